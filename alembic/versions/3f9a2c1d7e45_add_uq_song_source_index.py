@@ -0,0 +1,53 @@
+"""Add unique index for song_sources (song_id, source, source_id)
+
+Revision ID: 3f9a2c1d7e45
+Revises: 20b85a3c6d12
+Create Date: 2026-10-19 10:00:00.000000
+
+通过迁移建立的旧库没有 uq_song_source 唯一约束 (只有 create_all 新建的库才有)，
+批量写入使用的 INSERT ... ON CONFLICT DO NOTHING 依赖它作为冲突目标。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a2c1d7e45'
+down_revision: Union[str, Sequence[str], None] = '20b85a3c6d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UQ_COLUMNS = ['song_id', 'source', 'source_id']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'song_sources' not in inspector.get_table_names():
+        return
+
+    unique_sets = [uc['column_names'] for uc in inspector.get_unique_constraints('song_sources')]
+    unique_sets += [ix['column_names'] for ix in inspector.get_indexes('song_sources') if ix.get('unique')]
+    if UQ_COLUMNS in unique_sets:
+        return
+
+    # 清理历史重复记录 (保留最早的一条)，否则无法建立唯一索引
+    op.execute(
+        "DELETE FROM song_sources WHERE id NOT IN ("
+        "SELECT MIN(id) FROM song_sources GROUP BY song_id, source, source_id)"
+    )
+    op.create_index('uq_song_source', 'song_sources', UQ_COLUMNS, unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'song_sources' not in inspector.get_table_names():
+        return
+    indexes = [ix['name'] for ix in inspector.get_indexes('song_sources')]
+    if 'uq_song_source' in indexes:
+        op.drop_index('uq_song_source', table_name='song_sources')
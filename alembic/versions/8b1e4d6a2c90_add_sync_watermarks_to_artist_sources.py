@@ -0,0 +1,53 @@
+"""Add sync watermark columns to artist_sources
+
+Revision ID: 8b1e4d6a2c90
+Revises: 3f9a2c1d7e45
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e4d6a2c90'
+down_revision: Union[str, Sequence[str], None] = '3f9a2c1d7e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WATERMARK_COLUMNS = [
+    ('latest_publish_time', sa.DateTime()),
+    ('catalog_hash', sa.String()),
+    ('last_sync', sa.DateTime()),
+    ('last_full_sync', sa.DateTime()),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'artist_sources' not in inspector.get_table_names():
+        return
+
+    # create_all 新建的库已包含这些列，逐列检查避免重复添加
+    existing = {c['name'] for c in inspector.get_columns('artist_sources')}
+    for name, col_type in WATERMARK_COLUMNS:
+        if name not in existing:
+            op.add_column('artist_sources', sa.Column(name, col_type, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'artist_sources' not in inspector.get_table_names():
+        return
+
+    existing = {c['name'] for c in inspector.get_columns('artist_sources')}
+    with op.batch_alter_table('artist_sources') as batch_op:
+        for name, _ in reversed(WATERMARK_COLUMNS):
+            if name in existing:
+                batch_op.drop_column(name)
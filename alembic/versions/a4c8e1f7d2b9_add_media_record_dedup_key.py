@@ -0,0 +1,65 @@
+"""Add dedup_key to media_records
+
+Revision ID: a4c8e1f7d2b9
+Revises: f3b9d2e6a8c4
+Create Date: 2026-10-19 16:00:00.000000
+
+历史列表去重键 (标题_作者_专辑 小写)，用于 SQL 端 COUNT(DISTINCT) 与去重分页；
+新增列后回填已有记录。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e1f7d2b9'
+down_revision: Union[str, Sequence[str], None] = 'f3b9d2e6a8c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK_SIZE = 500
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'media_records' not in inspector.get_table_names():
+        return
+
+    existing = {c['name'] for c in inspector.get_columns('media_records')}
+    if 'dedup_key' not in existing:
+        op.add_column('media_records', sa.Column('dedup_key', sa.String(), nullable=True))
+    if 'ix_media_records_dedup_key' not in {ix['name'] for ix in inspector.get_indexes('media_records')}:
+        op.create_index('ix_media_records_dedup_key', 'media_records', ['dedup_key'])
+
+    # 回填 (与 MediaRecord.make_dedup_key 一致)
+    records = sa.table(
+        'media_records',
+        sa.column('id', sa.Integer), sa.column('title', sa.String), sa.column('author', sa.String),
+        sa.column('album', sa.String), sa.column('dedup_key', sa.String),
+    )
+    rows = conn.execute(
+        sa.select(records.c.id, records.c.title, records.c.author, records.c.album)
+        .where(records.c.dedup_key.is_(None))
+    ).all()
+    updates = [{"rid": r.id, "key": f"{r.title}_{r.author}_{r.album}".lower()} for r in rows]
+    stmt = records.update().where(records.c.id == sa.bindparam('rid')).values(dedup_key=sa.bindparam('key'))
+    for i in range(0, len(updates), BACKFILL_CHUNK_SIZE):
+        conn.execute(stmt, updates[i:i + BACKFILL_CHUNK_SIZE])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'media_records' not in inspector.get_table_names():
+        return
+
+    if 'ix_media_records_dedup_key' in {ix['name'] for ix in inspector.get_indexes('media_records')}:
+        op.drop_index('ix_media_records_dedup_key', table_name='media_records')
+    if 'dedup_key' in {c['name'] for c in inspector.get_columns('media_records')}:
+        with op.batch_alter_table('media_records') as batch_op:
+            batch_op.drop_column('dedup_key')
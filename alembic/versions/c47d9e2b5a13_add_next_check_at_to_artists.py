@@ -0,0 +1,43 @@
+"""Add next_check_at to artists
+
+Revision ID: c47d9e2b5a13
+Revises: 8b1e4d6a2c90
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d9e2b5a13'
+down_revision: Union[str, Sequence[str], None] = '8b1e4d6a2c90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'artists' not in inspector.get_table_names():
+        return
+
+    existing = {c['name'] for c in inspector.get_columns('artists')}
+    if 'next_check_at' not in existing:
+        op.add_column('artists', sa.Column('next_check_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'artists' not in inspector.get_table_names():
+        return
+
+    existing = {c['name'] for c in inspector.get_columns('artists')}
+    if 'next_check_at' in existing:
+        with op.batch_alter_table('artists') as batch_op:
+            batch_op.drop_column('next_check_at')
@@ -0,0 +1,43 @@
+"""Add adaptive check_interval_minutes to artists
+
+Revision ID: d5e8f1a3b7c2
+Revises: c47d9e2b5a13
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8f1a3b7c2'
+down_revision: Union[str, Sequence[str], None] = 'c47d9e2b5a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'artists' not in inspector.get_table_names():
+        return
+
+    existing = {c['name'] for c in inspector.get_columns('artists')}
+    if 'check_interval_minutes' not in existing:
+        op.add_column('artists', sa.Column('check_interval_minutes', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'artists' not in inspector.get_table_names():
+        return
+
+    existing = {c['name'] for c in inspector.get_columns('artists')}
+    if 'check_interval_minutes' in existing:
+        with op.batch_alter_table('artists') as batch_op:
+            batch_op.drop_column('check_interval_minutes')
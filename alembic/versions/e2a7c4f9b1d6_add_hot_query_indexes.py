@@ -0,0 +1,71 @@
+"""Add composite indexes for hot query shapes
+
+Revision ID: e2a7c4f9b1d6
+Revises: d5e8f1a3b7c2
+Create Date: 2026-10-19 14:00:00.000000
+
+与模型中声明的索引一致 (create_all 新建的库已有，这里补齐旧库)：
+- song_sources (source, source_id): 按平台 ID 反查歌曲
+- song_sources (song_id, source, url): 本地文件路径查重
+- songs (artist_id, title): 按歌手查重 / 去重分组
+- songs local_path / status / is_favorite 单列索引
+- songs created_at WHERE local_path IS NOT NULL: 本地歌曲列表
+- media_records found_at 及 (publish_time, found_at): 历史列表排序
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c4f9b1d6'
+down_revision: Union[str, Sequence[str], None] = 'd5e8f1a3b7c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (索引名, 表名, 列, 部分索引条件)
+INDEXES = [
+    ('ix_song_sources_source_source_id', 'song_sources', ['source', 'source_id'], None),
+    ('ix_song_sources_song_source_url', 'song_sources', ['song_id', 'source', 'url'], None),
+    ('ix_songs_artist_title', 'songs', ['artist_id', 'title'], None),
+    ('ix_songs_local_path', 'songs', ['local_path'], None),
+    ('ix_songs_status', 'songs', ['status'], None),
+    ('ix_songs_is_favorite', 'songs', ['is_favorite'], None),
+    ('ix_songs_local_created', 'songs', ['created_at'], 'local_path IS NOT NULL'),
+    ('ix_media_records_found_at', 'media_records', ['found_at'], None),
+    ('ix_media_records_publish_found', 'media_records', ['publish_time', 'found_at'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns, where in INDEXES:
+        if table not in tables:
+            continue
+        existing_columns = {c['name'] for c in inspector.get_columns(table)}
+        if not set(columns) <= existing_columns:
+            continue
+        if name in {ix['name'] for ix in inspector.get_indexes(table)}:
+            continue
+        kwargs = {'sqlite_where': sa.text(where)} if where else {}
+        op.create_index(name, table, columns, **kwargs)
+
+    # 更新统计信息，让查询规划器选用新索引
+    if conn.dialect.name == 'sqlite':
+        op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = set(inspector.get_table_names())
+
+    for name, table, _, _ in reversed(INDEXES):
+        if table in tables and name in {ix['name'] for ix in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
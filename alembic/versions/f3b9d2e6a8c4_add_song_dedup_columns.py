@@ -0,0 +1,63 @@
+"""Add materialized dedup columns to songs
+
+Revision ID: f3b9d2e6a8c4
+Revises: e2a7c4f9b1d6
+Create Date: 2026-10-19 15:00:00.000000
+
+- songs.dedup_key: 归一化 (标题, 歌手) 去重键，NULL 表示尚未计算 (启动时回填)
+- songs.is_canonical: 每个去重键下作为列表代表的那一行
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2e6a8c4'
+down_revision: Union[str, Sequence[str], None] = 'e2a7c4f9b1d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_songs_dedup_canonical', ['dedup_key', 'is_canonical']),
+    ('ix_songs_is_canonical', ['is_canonical']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'songs' not in inspector.get_table_names():
+        return
+
+    existing = {c['name'] for c in inspector.get_columns('songs')}
+    if 'dedup_key' not in existing:
+        op.add_column('songs', sa.Column('dedup_key', sa.String(), nullable=True))
+    if 'is_canonical' not in existing:
+        op.add_column('songs', sa.Column('is_canonical', sa.Boolean(), nullable=True, server_default=sa.true()))
+
+    indexes = {ix['name'] for ix in inspector.get_indexes('songs')}
+    for name, columns in INDEXES:
+        if name not in indexes:
+            op.create_index(name, 'songs', columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'songs' not in inspector.get_table_names():
+        return
+
+    indexes = {ix['name'] for ix in inspector.get_indexes('songs')}
+    for name, _ in reversed(INDEXES):
+        if name in indexes:
+            op.drop_index(name, table_name='songs')
+
+    existing = {c['name'] for c in inspector.get_columns('songs')}
+    with op.batch_alter_table('songs') as batch_op:
+        for column in ('is_canonical', 'dedup_key'):
+            if column in existing:
+                batch_op.drop_column(column)
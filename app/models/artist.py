@@ -26,6 +26,8 @@ class Artist(Base):
     status = Column(String, default="active")  # active/paused
     last_sync = Column(DateTime, default=datetime.now)
     is_monitored = Column(Boolean, default=False) 
+    next_check_at = Column(DateTime, nullable=True)  # 新歌监控的下次检查时间 (错峰排程，重启后保留)
+    check_interval_minutes = Column(Integer, nullable=True)  # 按发歌节奏自适应的检查间隔 (空则使用全局配置)
     
     # Relationships
     sources = relationship("ArtistSource", back_populates="artist", cascade="all, delete-orphan")
@@ -51,6 +53,12 @@ class ArtistSource(Base):
     # 完整原始数据 (可选)
     raw_data = Column(JSON, nullable=True) # Full API Response
     
+    # 增量同步水位 (Sync Watermarks)
+    latest_publish_time = Column(DateTime, nullable=True)  # 已同步歌曲中最新的发布时间
+    catalog_hash = Column(String, nullable=True)           # 上次全量拉取的歌曲 ID 集合哈希
+    last_sync = Column(DateTime, nullable=True)            # 最近一次同步 (增量或全量)
+    last_full_sync = Column(DateTime, nullable=True)       # 最近一次全量对账
+    
     artist = relationship("Artist", back_populates="sources")
 
     def __repr__(self):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, Index, event
 from datetime import datetime
 from app.models.base import Base
 
@@ -7,6 +7,9 @@ class MediaRecord(Base):
     Stores the history of found media to prevent duplicate notifications.
     """
     __tablename__ = 'media_records'
+    __table_args__ = (
+        Index('ix_media_records_publish_found', 'publish_time', 'found_at'),  # 历史列表默认排序
+    )
 
     id = Column(Integer, primary_key=True)
     unique_key = Column(String, unique=True, index=True, nullable=False) # e.g., "netease:album:123456"
@@ -32,11 +35,25 @@ class MediaRecord(Base):
     # Trial URL for audio previews
     trial_url = Column(String, nullable=True)  # URL for audio preview/trial
     
-    found_at = Column(DateTime, default=datetime.now)
+    found_at = Column(DateTime, default=datetime.now, index=True)
     is_pushed = Column(Boolean, default=False)
     push_time = Column(DateTime, nullable=True)
     is_favorite = Column(Boolean, default=False) # Added for user favorites
     extra_sources = Column(Text, nullable=True)  # JSON list of other sources e.g. ["qqmusic", "kugou"]
 
+    # 历史列表去重键 (标题_作者_专辑 小写)，写入时自动计算
+    dedup_key = Column(String, nullable=True, index=True)
+
+    @staticmethod
+    def make_dedup_key(title, author, album) -> str:
+        """生成去重键 (与历史列表的合并规则一致)"""
+        return f"{title}_{author}_{album}".lower()
+
     def __repr__(self):
         return f"<MediaRecord(key={self.unique_key}, title={self.title})>"
+
+
+@event.listens_for(MediaRecord, "before_insert")
+@event.listens_for(MediaRecord, "before_update")
+def _fill_dedup_key(mapper, connection, target):
+    target.dedup_key = MediaRecord.make_dedup_key(target.title, target.author, target.album)
@@ -8,8 +8,11 @@ Song模型 - 歌曲数据模型定义
 
 Author: music-monitor development team
 Updated: 2026-01-27
+
+更新日志:
+- 2026-10-19: 新增 dedup_key / is_canonical，物化去重结果 (由 canonical_songs 在写入时维护)
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.models.base import Base
@@ -20,6 +23,12 @@ class Song(Base):
     逻辑主键 (Artist + Title + Album)
     """
     __tablename__ = "songs"
+    __table_args__ = (
+        Index('ix_songs_artist_title', 'artist_id', 'title'),  # 按歌手查重 / 按 (标题, 歌手) 去重分组
+        # 本地歌曲列表 (local_path IS NOT NULL ORDER BY created_at) 的部分索引
+        Index('ix_songs_local_created', 'created_at', sqlite_where=text('local_path IS NOT NULL')),
+        Index('ix_songs_dedup_canonical', 'dedup_key', 'is_canonical'),  # 按去重键取同组版本 / 代表行
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     unique_key = Column(String, unique=True, index=True, nullable=False) # UUID-based unique key
@@ -36,10 +45,14 @@ class Song(Base):
     created_at = Column(DateTime, default=datetime.now)
     
     # Status
-    is_favorite = Column(Boolean, default=False)
-    status = Column(String, default="PENDING") # PENDING / DOWNLOADED / ERROR
-    local_path = Column(String, nullable=True) # If downloaded locally
+    is_favorite = Column(Boolean, default=False, index=True)
+    status = Column(String, default="PENDING", index=True) # PENDING / DOWNLOADED / ERROR
+    local_path = Column(String, nullable=True, index=True) # If downloaded locally
     last_enrich_at = Column(DateTime, nullable=True) # Last time enrichment was attempted
+
+    # 物化去重: 归一化 (标题, 歌手) 键，每组只有一行 is_canonical=True 作为列表展示的代表
+    dedup_key = Column(String, nullable=True)  # NULL 表示尚未计算
+    is_canonical = Column(Boolean, default=True, index=True)
     
     # Relationships
     artist = relationship("Artist", back_populates="songs")
@@ -84,6 +97,8 @@ class SongSource(Base):
     __tablename__ = "song_sources"
     __table_args__ = (
         UniqueConstraint('song_id', 'source', 'source_id', name='uq_song_source'),
+        Index('ix_song_sources_source_source_id', 'source', 'source_id'),  # 按平台 ID 反查歌曲
+        Index('ix_song_sources_song_source_url', 'song_id', 'source', 'url'),  # 本地文件路径查重
     )
 
     id = Column(Integer, primary_key=True, index=True)
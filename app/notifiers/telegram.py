@@ -1,88 +1,273 @@
+"""
+Telegram Notifier
+
+Sends messages / photos through the Bot API on the shared pooled HTTP client
+(app/utils/http_client.py) — never on the Starlette threadpool.
+
+- Per-chat rate limits are enforced locally: 1 message/second for private chats,
+  20 messages/minute for groups (negative chat ids), 30 messages/second per bot.
+- HTTP 429 responses are honoured via `parameters.retry_after`.
+- Photos are sent by URL when Telegram can fetch it; otherwise (local files,
+  intranet covers) the image is streamed as a multipart upload without buffering
+  it in memory. Site paths such as /uploads/covers/x.jpg are resolved against the
+  uploads directory; anything that is not a reachable URL or an existing file, or
+  any photo failure, falls back to a plain text message.
+
+更新日志:
+- 2026-10-19: 新增 send_message / send_photo (原 NotificationService 调用的方法不存在)，
+  改用共享连接池，本地执行 Telegram 限速，补充 check_connectivity
+- 2026-10-19: 封面为站内路径 (/uploads/...) 时解析为上传目录中的文件；图片不可用或发送失败时退回纯文本
+"""
+import asyncio
+import html
 import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
 import aiohttp
-from typing import Optional
+
 from app.domain.models import MediaInfo
 from app.notifiers.base import BaseNotifier
 
 logger = logging.getLogger(__name__)
 
+API_BASE = "https://api.telegram.org"
+CAPTION_LIMIT = 1024
+MESSAGE_LIMIT = 4096
+PRIVATE_CHAT_INTERVAL = 1.0  # 秒/条
+GROUP_CHAT_INTERVAL = 3.0  # 20 条/分钟
+GLOBAL_INTERVAL = 1 / 30  # 30 条/秒
+MAX_429_RETRIES = 3
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class TelegramAPIError(Exception):
+    """Bot API returned ok=false"""
+
+    def __init__(self, description: str, error_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(f"Telegram API Error: {description} (code: {error_code})")
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
+class _ChatRateLimiter:
+    """Spaces requests per chat and per bot (process-wide)"""
+
+    def __init__(self):
+        self._next_allowed: Dict[str, float] = {}
+        self._global_next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, chat_id: str):
+        async with self._lock:
+            now = time.monotonic()
+            interval = GROUP_CHAT_INTERVAL if str(chat_id).startswith("-") else PRIVATE_CHAT_INTERVAL
+            start = max(now, self._next_allowed.get(chat_id, 0.0), self._global_next)
+            self._next_allowed[chat_id] = start + interval
+            self._global_next = start + GLOBAL_INTERVAL
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def back_off(self, chat_id: str, seconds: float):
+        self._next_allowed[chat_id] = max(self._next_allowed.get(chat_id, 0.0), time.monotonic() + seconds)
+
+
+_rate_limiter = _ChatRateLimiter()
+
+
 class TelegramNotifier(BaseNotifier):
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(self, bot_token: str, chat_id: str, proxy: Optional[str] = None):
         self.bot_token = bot_token
-        self.chat_id = chat_id
-        # Initialize proxy to None by default, as it's used in check_connectivity
-        # but not provided in the __init__ signature in the original code.
-        # This ensures the code is syntactically correct and avoids AttributeError.
-        self.proxy = None 
+        self.chat_id = str(chat_id) if chat_id is not None else None
+        self.proxy = proxy
 
-    async def send(self, media: MediaInfo):
+    # ==================== Bot API ====================
+
+    async def _call(self, method: str, rate_limited: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        POST a Bot API method on the shared session.
+
+        kwargs are passed to session.post (json= / data=). `data` may be a callable
+        returning a fresh FormData, so streamed uploads can be rebuilt on retry.
+        """
+        from app.utils.http_client import get_http_session
+
+        url = f"{API_BASE}/bot{self.bot_token}/{method}"
+        data_factory = kwargs.pop("data", None)
+        for attempt in range(MAX_429_RETRIES + 1):
+            if rate_limited:
+                await _rate_limiter.acquire(self.chat_id)
+            session = await get_http_session()
+            data = data_factory() if callable(data_factory) else data_factory
+            async with session.post(url, data=data, proxy=self.proxy, **kwargs) as resp:
+                res = await resp.json(content_type=None)
+
+            if res.get("ok"):
+                return res.get("result") or {}
+
+            retry_after = (res.get("parameters") or {}).get("retry_after")
+            if res.get("error_code") == 429 and retry_after and attempt < MAX_429_RETRIES:
+                logger.warning(f"Telegram 限流，{retry_after}s 后重试 ({method})")
+                _rate_limiter.back_off(self.chat_id, float(retry_after))
+                continue
+            raise TelegramAPIError(res.get("description"), res.get("error_code"), retry_after)
+        raise TelegramAPIError("rate limited", 429)
+
+    async def send_message(self, text: str, image_url: Optional[str] = None, parse_mode: Optional[str] = None):
+        """
+        Send a notification; with an image it is sent as a photo with caption
+        (text longer than a caption goes as a separate message).
+        """
         if not self.bot_token or not self.chat_id:
             logger.warning("Telegram config missing, skipping.")
             return
 
-        # Prepare message
-        # Use MarkdownV2 or HTML. Let's use HTML for easier link handling.
-        
+        photo = resolve_photo(image_url) if image_url else None
+        if photo:
+            try:
+                if len(text) <= CAPTION_LIMIT:
+                    await self.send_photo(photo, caption=text, parse_mode=parse_mode)
+                    return
+                await self.send_photo(photo)
+            except Exception as e:
+                # 图片失败不能连累文字通知
+                logger.warning(f"Telegram 图片发送失败，改为纯文本: {e}")
+                photo = None
+
+        payload = {
+            "chat_id": self.chat_id,
+            "text": text[:MESSAGE_LIMIT],
+            "disable_web_page_preview": bool(photo),
+        }
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        await self._call("sendMessage", json=payload)
+        logger.info("Telegram 推送成功")
+
+    async def send_photo(self, photo: str, caption: Optional[str] = None, parse_mode: Optional[str] = None):
+        """
+        Send a photo by URL; fall back to a streamed multipart upload when the photo
+        is a local file or Telegram cannot fetch the URL itself.
+
+        Raises:
+            ValueError: photo is neither an http(s) URL nor an existing file
+        """
+        resolved = resolve_photo(photo)
+        if not resolved:
+            raise ValueError(f"Photo not found: {photo}")
+        photo = resolved
+
+        fields = {"chat_id": self.chat_id}
+        if caption:
+            fields["caption"] = caption[:CAPTION_LIMIT]
+        if parse_mode:
+            fields["parse_mode"] = parse_mode
+
+        if photo.startswith(("http://", "https://")):
+            try:
+                await self._call("sendPhoto", json={**fields, "photo": photo})
+                return
+            except TelegramAPIError as e:
+                if e.error_code != 400:
+                    raise
+                logger.info(f"Telegram 无法抓取图片，改为上传: {e}")
+
+        await self._call("sendPhoto", data=lambda: self._photo_form(fields, photo))
+
+    def _photo_form(self, fields: Dict[str, str], photo: str) -> aiohttp.FormData:
+        form = aiohttp.FormData()
+        for key, value in fields.items():
+            form.add_field(key, str(value))
+        if photo.startswith(("http://", "https://")):
+            form.add_field("photo", _stream_url(photo), filename="cover.jpg", content_type="image/jpeg")
+        else:
+            # aiohttp streams file objects in chunks and closes them after sending
+            form.add_field("photo", open(photo, "rb"), filename=os.path.basename(photo))
+        return form
+
+    # ==================== BaseNotifier ====================
+
+    async def send(self, media: MediaInfo):
         # Helper to get source name
         source_map = {'netease': '网易云音乐', 'qqmusic': 'QQ音乐'}
         source_name = source_map.get(media.source, media.source)
-        
-        links_part = ""
-            
-        # Standard Link
-        links_part += f"\n🔗 <a href='{media.url}'>前往 {source_name} 收听</a>"
+
+        date_str = media.publish_time
+        if hasattr(media.publish_time, 'strftime'):
+            date_str = media.publish_time.strftime('%Y-%m-%d')
 
         # Format:
         # 🎵 <b>Song Title</b>
         # 👤 Artist
         # 💿 Album
         # ...
-        
-        date_str = media.publish_time
-        if hasattr(media.publish_time, 'strftime'):
-            date_str = media.publish_time.strftime('%Y-%m-%d')
-
         text = (
-            f"🎵 <b>{media.title}</b>\n"
-            f"👤 {media.author}\n"
-            f"💿 {media.album or '单曲'}\n"
+            f"🎵 <b>{html.escape(media.title or '')}</b>\n"
+            f"👤 {html.escape(media.author or '')}\n"
+            f"💿 {html.escape(media.album or '单曲')}\n"
             f"📅 {date_str}\n"
-            f"{links_part}"
+            f"\n🔗 <a href='{html.escape(media.url or '', quote=True)}'>前往 {source_name} 收听</a>"
         )
 
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        payload = {
-            "chat_id": self.chat_id,
-            "text": text,
-            "parse_mode": "HTML",
-            "disable_web_page_preview": False
-        }
-
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as resp:
-                    res = await resp.json()
-                    if not res.get('ok'):
-                        logger.error(f"Telegram 发送失败: {res}")
-                    else:
-                        logger.info(f"Telegram 推送成功: {media.title}")
+            await self.send_message(text, image_url=getattr(media, 'cover', None), parse_mode="HTML")
+            logger.info(f"Telegram 推送成功: {media.title}")
         except Exception as e:
-             logger.error(f"Telegram 网络错误: {e}")
+            logger.error(f"Telegram 发送失败: {e}")
 
     async def send_test_message(self):
         """Send a test message to verify config."""
         if not self.bot_token or not self.chat_id:
              raise ValueError("Missing Token or Chat ID")
-             
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        payload = {
-            "chat_id": self.chat_id,
-            "text": "<b>Music Monitor Configuration Test</b>\nIf you see this, Telegram notification is working!",
-            "parse_mode": "HTML"
-        }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as resp:
-                res = await resp.json()
-                if not res.get('ok'):
-                    raise Exception(f"Telegram API Error: {res.get('description')}")
-                return True
+
+        await self.send_message(
+            "<b>Music Monitor Configuration Test</b>\nIf you see this, Telegram notification is working!",
+            parse_mode="HTML"
+        )
+        return True
+
+    async def check_connectivity(self) -> bool:
+        """Check that the bot token is valid (getMe)."""
+        if not self.bot_token:
+            return False
+        try:
+            await self._call("getMe", rate_limited=False)
+            return True
+        except Exception as e:
+            logger.warning(f"Telegram connectivity check failed: {e}")
+            return False
+
+
+def _upload_root() -> str:
+    """上传目录 (与 main.py 挂载的 /uploads 一致)"""
+    return "/config/uploads" if os.path.exists("/config") else os.path.join(os.getcwd(), "uploads")
+
+
+def resolve_photo(photo: Optional[str]) -> Optional[str]:
+    """
+    把封面地址解析为可发送的图片: http(s) URL 原样返回，/uploads/... 解析为上传目录中的文件，
+    其他存在的本地文件返回路径；无法解析 (例如 /api/discovery/cover?...) 时返回 None
+    """
+    if not photo:
+        return None
+    if photo.startswith(("http://", "https://")):
+        return photo
+    if photo.startswith("/uploads/"):
+        root = os.path.realpath(_upload_root())
+        path = os.path.realpath(os.path.join(root, photo[len("/uploads/"):].split("?", 1)[0]))
+        if path.startswith(root + os.sep) and os.path.isfile(path):
+            return path
+        return None
+    return photo if os.path.isfile(photo) else None
+
+
+async def _stream_url(url: str):
+    """Yield image bytes from url as they arrive (used as a multipart field)"""
+    from app.utils.http_client import get_http_session
+
+    session = await get_http_session()
+    async with session.get(url) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+            yield chunk
@@ -216,7 +216,7 @@ class WeComNotifier(BaseNotifier):
         token = await self._get_token()
         if not token:
             logger.error("无法获取企业微信 Token")
-            return
+            raise Exception("WeCom API Error: failed to get access token")
 
         api_url = f"https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token={token}"
         
@@ -248,5 +248,8 @@ class WeComNotifier(BaseNotifier):
                 res = await resp.json()
                 if res.get('errcode') != 0:
                     logger.error(f"企业微信发送图文失败: {res}")
-                else:
-                    logger.info(f"企业微信图文推送成功: {title}")
+                    if res.get('errcode') in (40014, 42001):
+                        self._token = None  # Token 失效，重试时重新获取
+                    # 抛出异常以便通知发送队列重试 (例如 45009 接口调用超过限制)
+                    raise Exception(f"WeCom API Error: {res.get('errmsg')} (code: {res.get('errcode')})")
+                logger.info(f"企业微信图文推送成功: {title}")
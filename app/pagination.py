@@ -6,10 +6,19 @@
 
 Author: google
 Created: 2026-01-30
+
+更新日志:
+- 2026-10-19: 新增游标 (keyset) 分页: 不透明游标编码排序键 + id，深分页不再使用 OFFSET
+- 2026-10-19: 抽出 encode_cursor / decode_cursor，供多列排序的游标复用
 """
-from typing import TypeVar, Generic, List
+import base64
+import json
+import operator
+from datetime import datetime
+from typing import Any, TypeVar, Generic, List, Optional
 from pydantic import BaseModel, Field
 from math import ceil
+from sqlalchemy import and_, asc, desc, or_
 
 
 # 泛型类型变量
@@ -55,6 +64,7 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = None  # 从本页之后继续的游标 (可切换到游标分页)
     
     @classmethod
     def create(
@@ -62,7 +72,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
         items: List[T],
         total: int,
         page: int,
-        page_size: int
+        page_size: int,
+        next_cursor: Optional[str] = None
     ) -> "PaginatedResponse[T]":
         """
         创建分页响应
@@ -72,6 +83,7 @@ class PaginatedResponse(BaseModel, Generic[T]):
             total: 总记录数
             page: 当前页码
             page_size: 每页数量
+            next_cursor: 下一页游标
             
         Returns:
             PaginatedResponse 实例
@@ -83,9 +95,100 @@ class PaginatedResponse(BaseModel, Generic[T]):
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
+        )
+
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    """
+    游标分页响应格式
+
+    Attributes:
+        items: 数据列表
+        total: 总记录数
+        page_size: 每页数量
+        next_cursor: 下一页游标，None 表示没有更多数据
+    """
+    items: List[T]
+    total: int
+    page_size: int
+    next_cursor: Optional[str] = None
+
+
+class InvalidCursorError(ValueError):
+    """游标无法解析或与当前排序不匹配"""
+
+
+def encode_cursor(payload: list) -> str:
+    """把排序键列表编码为对客户端不透明的游标 (datetime 转为 ISO 字符串)"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in payload]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """解码游标，格式错误时抛出 InvalidCursorError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except Exception as e:
+        raise InvalidCursorError(f"无效的游标: {cursor}") from e
+    if not isinstance(payload, list):
+        raise InvalidCursorError(f"无效的游标: {cursor}")
+    return payload
+
+
+class KeysetSort:
+    """
+    游标分页的排序定义: (排序列 IS NULL, 排序列, id)
+
+    空值统一排在最后，id 作为并列时的唯一决胜键，保证翻页不重不漏。
+    游标内容为 [排序名, 是否为空, 排序值, id]，经 base64 编码后对客户端不透明。
+    """
+
+    def __init__(self, name: str, column, id_column, descending: bool = True):
+        self.name = name
+        self.column = column
+        self.id_column = id_column
+        self.descending = descending
+
+    def order_by(self) -> list:
+        direction = desc if self.descending else asc
+        return [self.column.is_(None), direction(self.column), direction(self.id_column)]
+
+    def encode(self, value: Any, row_id: int) -> str:
+        """根据本页最后一行生成游标"""
+        return encode_cursor([f"{self.name}:{'desc' if self.descending else 'asc'}", value is None, value, row_id])
+
+    def after(self, cursor: str):
+        """返回 "位于游标之后" 的过滤条件"""
+        try:
+            sort_key, is_null, value, row_id = decode_cursor(cursor)
+            row_id = int(row_id)
+            if value is not None and self._python_type() is datetime:
+                value = datetime.fromisoformat(value)
+        except Exception as e:
+            raise InvalidCursorError(f"无效的游标: {cursor}") from e
+
+        if sort_key != f"{self.name}:{'desc' if self.descending else 'asc'}":
+            raise InvalidCursorError("游标与当前排序方式不一致")
+
+        beyond = operator.lt if self.descending else operator.gt
+        if is_null:
+            return and_(self.column.is_(None), beyond(self.id_column, row_id))
+        return or_(
+            self.column.is_(None),
+            beyond(self.column, value),
+            and_(self.column == value, beyond(self.id_column, row_id))
         )
 
+    def _python_type(self):
+        try:
+            return self.column.type.python_type
+        except NotImplementedError:
+            return None
+
 
 # 兼容旧格式的辅助函数
 def convert_skip_limit_to_page(skip: int, limit: int) -> tuple[int, int]:
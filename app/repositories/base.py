@@ -7,6 +7,8 @@ from sqlalchemy import delete, update
 T = TypeVar('T', bound=DeclarativeBase)
 
 class BaseRepository(Generic[T]):
+    """通用数据访问: 写方法只 flush 不提交，事务由调用方 (或写入队列) 负责"""
+
     def __init__(self, session: AsyncSession, model: type[T]):
         self._session = session
         self._model = model
@@ -34,19 +36,19 @@ class BaseRepository(Generic[T]):
 
     async def create(self, obj: T) -> T:
         self._session.add(obj)
-        await self._session.commit()
+        await self._session.flush()
         await self._session.refresh(obj)
         return obj
 
     async def update(self, id: int, obj_data: Dict[str, Any]) -> Optional[T]:
         stmt = update(self._model).where(self._model.id == id).values(**obj_data)
         await self._session.execute(stmt)
-        await self._session.commit()
+        await self._session.flush()
         
         return await self.get(id)
 
     async def delete(self, id: int) -> bool:
         stmt = delete(self._model).where(self._model.id == id)
         result = await self._session.execute(stmt)
-        await self._session.commit()
+        await self._session.flush()
         return result.rowcount > 0
\ No newline at end of file
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+物化去重 (canonical songs)
+
+用途:
+- 歌曲写入时计算 songs.dedup_key (DeduplicationService.dedup_key: 归一化标题 + 归一化歌手)
+- 每个去重键下选出一行 is_canonical=True 作为资料库列表的代表 (优选分数最高，同分取 id 最小)
+- 资料库分页直接读取代表行，总数精确，不再每次请求在 Python 中重新分组
+
+维护方式 (监听所有 Session，无需调用方配合):
+- ORM 写入: after_flush 收集新增 / 删除 / 关键字段变化的歌曲与来源
+- 语句级写入 (update / delete): 执行前按 WHERE 条件查出受影响的歌曲
+- 语句级批量插入: 新行 dedup_key 为 NULL，提交前统一补算
+- before_commit 时重算受影响的去重键；也可调用 mark_songs_dirty 显式标记
+
+Author: google
+Created: 2026-10-19
+"""
+import logging
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import event, select, update, inspect
+from sqlalchemy.orm import Session
+
+from app.models.artist import Artist
+from app.models.song import Song, SongSource
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+# 影响去重键或优选分数的字段
+_SONG_FIELDS = ("title", "artist_id", "local_path", "status")
+
+_PENDING = "canonical_pending"
+_BUSY = "canonical_busy"
+
+
+def _pending(session: Session) -> Dict:
+    return session.info.setdefault(_PENDING, {
+        "song_ids": set(), "artist_ids": set(), "keys": set(), "null_keys": False
+    })
+
+
+def _busy(session: Session) -> bool:
+    return bool(session.info.get(_BUSY))
+
+
+def _chunks(values: Iterable, size: int = CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def mark_songs_dirty(db, song_ids: Iterable[int] = (), artist_ids: Iterable[int] = (),
+                      keys: Iterable[str] = ()):
+    """
+    显式标记需要重算代表行的歌曲 (用于事件无法感知的写入，例如语句级批量插入来源)
+
+    重算在下一次 commit 前执行。
+    """
+    session = getattr(db, "sync_session", db)
+    pending = _pending(session)
+    pending["song_ids"].update(i for i in song_ids if i is not None)
+    pending["artist_ids"].update(i for i in artist_ids if i is not None)
+    pending["keys"].update(k for k in keys if k)
+
+
+# ==================== 重算 ====================
+
+def _refresh_keys(session: Session, song_ids: Set[int], artist_ids: Set[int], null_keys: bool) -> Set[str]:
+    """重算这些歌曲的 dedup_key，返回涉及的新旧键"""
+    from app.services.deduplication_service import DeduplicationService
+    conditions = []
+    if song_ids:
+        conditions += [Song.id.in_(chunk) for chunk in _chunks(song_ids)]
+    if artist_ids:
+        conditions += [Song.artist_id.in_(chunk) for chunk in _chunks(artist_ids)]
+    if null_keys:
+        conditions.append(Song.dedup_key.is_(None))
+
+    keys = set()
+    changes = []
+    for condition in conditions:
+        rows = session.execute(
+            select(Song.id, Song.title, Song.dedup_key, Artist.name)
+            .outerjoin(Artist, Song.artist_id == Artist.id)
+            .where(condition)
+        ).all()
+        for song_id, title, old_key, artist_name in rows:
+            new_key = DeduplicationService.dedup_key(title, artist_name)
+            keys.add(new_key)
+            if old_key != new_key:
+                if old_key:
+                    keys.add(old_key)
+                changes.append({"id": song_id, "dedup_key": new_key})
+
+    for chunk in _chunks(changes):
+        session.execute(update(Song), chunk)
+    keys.discard("")
+    return keys
+
+
+def _pick_canonical(session: Session, keys: Set[str]):
+    """为每个去重键选出代表行 (优选分数最高，同分取 id 最小)"""
+    from app.services.deduplication_service import DeduplicationService
+    for chunk in _chunks(keys):
+        rows = session.execute(
+            select(Song.id, Song.dedup_key, Song.local_path, Song.status, Song.is_canonical)
+            .where(Song.dedup_key.in_(chunk))
+        ).all()
+        if not rows:
+            continue
+
+        sources: Dict[int, List[str]] = {}
+        for ids in _chunks([r.id for r in rows]):
+            for song_id, source in session.execute(
+                select(SongSource.song_id, SongSource.source).where(SongSource.song_id.in_(ids))
+            ):
+                sources.setdefault(song_id, []).append(source)
+
+        best: Dict[str, tuple] = {}
+        for r in rows:
+            rank = (-DeduplicationService.score(r.local_path, r.status, sources.get(r.id, [])), r.id)
+            if r.dedup_key not in best or rank < best[r.dedup_key]:
+                best[r.dedup_key] = rank
+
+        winners = {rank[1] for rank in best.values()}
+        changes = [
+            {"id": r.id, "is_canonical": r.id in winners}
+            for r in rows if bool(r.is_canonical) != (r.id in winners)
+        ]
+        for part in _chunks(changes):
+            session.execute(update(Song), part)
+
+
+def recompute(session: Session, song_ids: Iterable[int] = (), artist_ids: Iterable[int] = (),
+              keys: Iterable[str] = (), null_keys: bool = False):
+    """
+    重算去重键与代表行 (同步，在 Session 所在的事务中执行)
+
+    Args:
+        song_ids / artist_ids: 需要重算 dedup_key 的歌曲 (或歌手的全部歌曲)
+        keys: 需要重新选代表行的去重键 (例如被删除歌曲的键)
+        null_keys: 同时补算 dedup_key 为 NULL 的歌曲 (语句级插入)
+    """
+    session.info[_BUSY] = True
+    try:
+        affected = set(keys)
+        affected |= _refresh_keys(session, set(song_ids), set(artist_ids), null_keys)
+        # 空标题的歌曲不参与展示
+        session.execute(
+            update(Song)
+            .where(Song.dedup_key == "", Song.is_canonical.isnot(False))
+            .values(is_canonical=False)
+            .execution_options(synchronize_session=False)
+        )
+        _pick_canonical(session, affected - {""})
+    finally:
+        session.info.pop(_BUSY, None)
+
+
+def backfill(session: Session) -> int:
+    """为尚未计算 dedup_key 的历史歌曲补算 (启动时执行)，返回处理的数量"""
+    from sqlalchemy import func
+    total = session.execute(
+        select(func.count()).select_from(Song).where(Song.dedup_key.is_(None))
+    ).scalar() or 0
+    if total:
+        recompute(session, null_keys=True)
+    return total
+
+
+# ==================== Session 事件 ====================
+
+def _changed(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    if _busy(session):
+        return
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Song):
+            if obj in session.deleted:
+                if obj.dedup_key:
+                    _pending(session)["keys"].add(obj.dedup_key)
+            elif obj in session.new or _changed(obj, _SONG_FIELDS):
+                _pending(session)["song_ids"].add(obj.id)
+        elif isinstance(obj, SongSource):
+            song_id = obj.song_id if obj.song_id is not None else getattr(obj.song, "id", None)
+            if song_id is not None:
+                _pending(session)["song_ids"].add(song_id)
+        elif isinstance(obj, Artist) and obj not in session.new and _changed(obj, ("name",)):
+            _pending(session)["artist_ids"].add(obj.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement(state):
+    """语句级写入: 执行前查出受影响的歌曲"""
+    if _busy(state.session) or not (state.is_update or state.is_delete or state.is_insert):
+        return
+    mapper = state.bind_mapper
+    if mapper is None or mapper.class_ not in (Song, SongSource):
+        return
+
+    pending = _pending(state.session)
+    if state.is_insert:
+        # 插入的歌曲 dedup_key 为 NULL，提交前补算；来源的批量插入需 mark_songs_dirty
+        if mapper.class_ is Song:
+            pending["null_keys"] = True
+        return
+
+    # 按主键批量更新 (参数列表): 直接取参数中的 id
+    if isinstance(state.parameters, list) and mapper.class_ is Song:
+        pending["song_ids"].update(p["id"] for p in state.parameters if p.get("id") is not None)
+        return
+
+    where = state.statement.whereclause
+    if mapper.class_ is Song:
+        stmt = select(Song.id, Song.dedup_key)
+        stmt = stmt.where(where) if where is not None else stmt
+        for song_id, key in state.session.execute(stmt):
+            if state.is_delete:
+                if key:
+                    pending["keys"].add(key)
+            else:
+                pending["song_ids"].add(song_id)
+    else:
+        stmt = select(SongSource.song_id).distinct()
+        stmt = stmt.where(where) if where is not None else stmt
+        pending["song_ids"].update(state.session.execute(stmt).scalars())
+
+
+@event.listens_for(Session, "before_commit")
+def _recompute_before_commit(session):
+    if _busy(session):
+        return
+    # 先把未刷新的 ORM 修改写入，after_flush 才能收集到
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if not pending or not any(pending.values()):
+        return
+    recompute(
+        session,
+        song_ids=pending["song_ids"],
+        artist_ids=pending["artist_ids"],
+        keys=pending["keys"],
+        null_keys=pending["null_keys"],
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_PENDING, None)
@@ -12,17 +12,23 @@ Author: GOOGLE music-monitor development team
 
 更新日志:
 - 2026-01-22: 初始创建，从 media.py Router 中提取数据访问逻辑
+- 2026-10-19: 历史列表改为 SQL 端去重: 持久化 dedup_key，COUNT(DISTINCT) 计数，
+              每页取各去重键的代表记录 (支持游标)，不再加载全表
+- 2026-10-19: 写方法改为只 flush 不提交，便于作为写入队列的修改批量提交
 """
 from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, desc, func, and_, or_, exists, false
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.orm import aliased, selectinload
 from datetime import datetime
 import json
 import logging
 
 from app.models.media_record import MediaRecord
 from app.repositories.base import BaseRepository
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.utils.counter_cache import counter_cache
 
 logger = logging.getLogger(__name__)
 
@@ -104,35 +110,133 @@ class MediaRecordRepository(BaseRepository[MediaRecord]):
         
         return records, total
     
-    async def get_all_for_dedup(
+    @staticmethod
+    def _filters(model, author: Optional[str], downloaded_only: bool) -> list:
+        conditions = []
+        if author:
+            conditions.append(model.author.ilike(f'%{author}%'))
+        if downloaded_only:
+            conditions.append(model.local_audio_path.isnot(None))
+        return conditions
+
+    @staticmethod
+    def _precedes(first: tuple, second: tuple):
+        """
+        first 是否排在 second 之前: 按 (publish_time, found_at, id) 倒序，空值在后
+
+        元素可以是列或 Python 值 (游标)。
+        """
+        def is_column(x):
+            return hasattr(x, '__clause_element__') or isinstance(x, ColumnElement)
+
+        def greater(a, b):
+            if not is_column(a):
+                return false() if a is None else or_(b.is_(None), b < a)
+            if not is_column(b):
+                return a.isnot(None) if b is None else a > b
+            return or_(and_(a.isnot(None), b.is_(None)), a > b)
+
+        def same(a, b):
+            if not is_column(a):
+                a, b = b, a
+            if not is_column(b):
+                return a.is_(None) if b is None else a == b
+            return a.is_not_distinct_from(b)
+
+        (pt1, f1, id1), (pt2, f2, id2) = first, second
+        return or_(
+            greater(pt1, pt2),
+            and_(same(pt1, pt2), greater(f1, f2)),
+            and_(same(pt1, pt2), same(f1, f2), id1 > id2),
+        )
+
+    async def count_unique(self, author: Optional[str] = None, downloaded_only: bool = False) -> int:
+        """去重后的记录数 (COUNT(DISTINCT dedup_key))，写入提交后失效"""
+        async def count():
+            stmt = select(func.count(func.distinct(MediaRecord.dedup_key))).where(
+                *self._filters(MediaRecord, author, downloaded_only)
+            )
+            return (await self._session.execute(stmt)).scalar() or 0
+
+        return await counter_cache.get_or_compute(
+            ("history_unique", author, downloaded_only), ("media_records",), count
+        )
+
+    async def get_unique_paginated(
         self,
+        offset: int = 0,
+        limit: int = 20,
         author: Optional[str] = None,
-        downloaded_only: bool = False
-    ) -> List[MediaRecord]:
+        downloaded_only: bool = False,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[MediaRecord], List[MediaRecord], Optional[str]]:
         """
-        获取所有记录用于去重计算
-        
+        去重分页: 每个去重键只取排序最靠前的一条作为代表，每页恰好 limit 个不同的歌曲
+
+        排序为 publish_time DESC, found_at DESC, id DESC (与 ix_media_records_publish_found 一致)；
+        代表记录通过 NOT EXISTS 相关子查询判定 (走 dedup_key 索引)。
+
         Args:
-            author: 作者过滤
-            downloaded_only: 仅已下载
-            
+            cursor: 上一页返回的游标，提供时忽略 offset
+
         Returns:
-            List[MediaRecord]: 记录列表
+            (代表记录, 同页各去重键的其他记录, 下一页游标)
         """
-        query = select(MediaRecord).order_by(
-            desc(MediaRecord.publish_time), 
-            desc(MediaRecord.found_at)
+        filters = self._filters(MediaRecord, author, downloaded_only)
+        earlier = aliased(MediaRecord)
+        has_earlier = exists().where(
+            earlier.dedup_key == MediaRecord.dedup_key,
+            *self._filters(earlier, author, downloaded_only),
+            self._precedes(
+                (earlier.publish_time, earlier.found_at, earlier.id),
+                (MediaRecord.publish_time, MediaRecord.found_at, MediaRecord.id),
+            ),
         )
-        
-        if author:
-            query = query.where(MediaRecord.author.ilike(f'%{author}%'))
-        
-        if downloaded_only:
-            query = query.where(MediaRecord.local_audio_path.isnot(None))
-        
-        result = await self._session.execute(query)
-        return result.scalars().all()
-    
+
+        stmt = select(MediaRecord).where(*filters, ~has_earlier)
+        if cursor:
+            stmt = stmt.where(self._precedes(self.parse_history_cursor(cursor), (
+                MediaRecord.publish_time, MediaRecord.found_at, MediaRecord.id
+            )))
+        else:
+            stmt = stmt.offset(offset)
+        stmt = stmt.order_by(
+            desc(MediaRecord.publish_time), desc(MediaRecord.found_at), desc(MediaRecord.id)
+        ).limit(limit)
+        records = (await self._session.execute(stmt)).scalars().all()
+
+        members = []
+        if records:
+            keys = {r.dedup_key for r in records}
+            member_stmt = select(MediaRecord).where(
+                MediaRecord.dedup_key.in_(keys),
+                MediaRecord.id.notin_([r.id for r in records]),
+                *filters,
+            )
+            members = (await self._session.execute(member_stmt)).scalars().all()
+
+        next_cursor = None
+        if len(records) == limit:
+            last = records[-1]
+            next_cursor = encode_cursor(["history", last.publish_time, last.found_at, last.id])
+        return records, members, next_cursor
+
+    @staticmethod
+    def parse_history_cursor(cursor: str) -> tuple:
+        """解析历史列表游标为 (publish_time, found_at, id)，无效时抛出 InvalidCursorError"""
+        payload = decode_cursor(cursor)
+        try:
+            name, publish_time, found_at, record_id = payload
+            if name != "history":
+                raise ValueError(name)
+            return (
+                datetime.fromisoformat(publish_time) if publish_time else None,
+                datetime.fromisoformat(found_at) if found_at else None,
+                int(record_id),
+            )
+        except Exception as e:
+            raise InvalidCursorError(f"无效的游标: {cursor}") from e
+
     async def update_audio_path(
         self, 
         unique_key: str, 
@@ -145,7 +249,7 @@ class MediaRecordRepository(BaseRepository[MediaRecord]):
             record.local_audio_path = local_path
             if quality:
                 record.audio_quality = quality
-            await self._session.commit()
+            await self._session.flush()
             await self._session.refresh(record)
         return record
     
@@ -156,7 +260,7 @@ class MediaRecordRepository(BaseRepository[MediaRecord]):
             return None
         
         record.is_favorite = not record.is_favorite
-        await self._session.commit()
+        await self._session.flush()
         await self._session.refresh(record)
         
         return {
@@ -169,7 +273,7 @@ class MediaRecordRepository(BaseRepository[MediaRecord]):
         record = await self.get_by_unique_key(unique_key)
         if record:
             record.is_favorite = state
-            await self._session.commit()
+            await self._session.flush()
             await self._session.refresh(record)
         return record
     
@@ -194,13 +298,13 @@ class MediaRecordRepository(BaseRepository[MediaRecord]):
             for key, value in data.items():
                 if key != 'unique_key' and hasattr(record, key):
                     setattr(record, key, value)
-            await self._session.commit()
+            await self._session.flush()
             await self._session.refresh(record)
         else:
             # 创建新记录
             record = MediaRecord(**data)
             self._session.add(record)
-            await self._session.commit()
+            await self._session.flush()
             await self._session.refresh(record)
         
         return record
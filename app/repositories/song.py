@@ -3,7 +3,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from sqlalchemy.orm import joinedload
 from app.models.song import Song
+from app.pagination import KeysetSort
 from app.repositories.base import BaseRepository
+from app.utils.counter_cache import counter_cache
+# 注册物化去重的 Session 事件 (写入歌曲时维护 dedup_key / is_canonical)
+import app.repositories.canonical_songs  # noqa: F401
+
+# 总数依赖的表 (歌曲增删 / 收藏 / 歌手关注状态变化都会影响计数)
+LIBRARY_COUNT_TABLES = ("songs", "artists")
 
 class SongRepository(BaseRepository[Song]):
     def __init__(self, session: AsyncSession):
@@ -77,7 +84,7 @@ class SongRepository(BaseRepository[Song]):
         song = await self.get(song_id)
         if song:
             song.is_favorite = not song.is_favorite
-            await self._session.commit()
+            await self._session.flush()
             await self._session.refresh(song)
         return song
 
@@ -106,67 +113,63 @@ class SongRepository(BaseRepository[Song]):
         is_favorite: Optional[bool] = None,
         only_monitored: bool = False,
         sort_by: str = "publish_time",
-        order: str = "desc"
-    ) -> Tuple[List[Song], int]:
+        order: str = "desc",
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Song], int, Optional[str]]:
         """
         分页获取歌曲，支持过滤、去重和排序
+
+        去重结果已在写入时物化 (songs.is_canonical，见 app.repositories.canonical_songs)，
+        这里只读取每个去重键的代表行，总数即代表行数。
+
+        Args:
+            cursor: 游标 (上一页返回的 next_cursor)，提供时忽略 skip
+
+        Returns:
+            (歌曲列表, 去重后总数, 下一页游标)
         """
-        from sqlalchemy import func, desc, asc, text
+        from sqlalchemy import func
         from app.models.artist import Artist
         
-        # 1. 构造过滤子查询 (用于去重和计数)
-        # 我们使用 (title, artist_id) 作为去重键
-        # 选取每个组中 id 最小的那个作为代表
-        filter_stmt = select(
-            Song.title,
-            Song.artist_id,
-            func.min(Song.id).label("min_id")
-        )
-
-        # Filters
-        if artist_name or only_monitored:
-             filter_stmt = filter_stmt.join(Song.artist)
-             
+        # 1. 过滤条件 (只取代表行)
+        conditions = [Song.is_canonical == True]
         if artist_name:
-            filter_stmt = filter_stmt.where(Artist.name.ilike(f"%{artist_name}%"))
-        
+            conditions.append(Artist.name.ilike(f"%{artist_name}%"))
         if is_favorite is not None:
-             filter_stmt = filter_stmt.where(Song.is_favorite == is_favorite)
-
+            conditions.append(Song.is_favorite == is_favorite)
         if only_monitored:
-            filter_stmt = filter_stmt.where(Artist.is_monitored == True)
-
-        filter_stmt = filter_stmt.group_by(Song.title, Song.artist_id)
+            conditions.append(Artist.is_monitored == True)
+        needs_artist = bool(artist_name or only_monitored)
         
-        # 2. 获取去重后的总数
-        count_stmt = select(func.count()).select_from(filter_stmt.subquery())
-        total = (await self._session.execute(count_stmt)).scalar() or 0
+        # 2. 获取去重后的总数 (按过滤条件缓存，写入提交后失效)
+        async def count():
+            count_stmt = select(func.count(Song.id))
+            if needs_artist:
+                count_stmt = count_stmt.join(Song.artist)
+            count_stmt = count_stmt.where(*conditions)
+            return (await self._session.execute(count_stmt)).scalar() or 0
+
+        total = await counter_cache.get_or_compute(
+            ("library_songs", artist_name, is_favorite, only_monitored), LIBRARY_COUNT_TABLES, count
+        )
 
-        # 3. 构造主查询获取完整对象
-        distinct_ids_stmt = select(filter_stmt.subquery().c.min_id)
+        # 3. 主查询
+        stmt = select(Song).options(joinedload(Song.artist))
+        if needs_artist or sort_by == "artist":
+            # 关联 Artist 表用于过滤或按名称排序
+            stmt = stmt.join(Song.artist)
+        stmt = stmt.where(*conditions)
         
-        # 主查询
-        stmt = select(Song).options(joinedload(Song.artist)).where(Song.id.in_(distinct_ids_stmt))
+        # 4. 处理排序 (排序列 + id，空值在后，与游标分页一致)
+        keyset = self.keyset_sort(sort_by, order)
+        stmt = stmt.order_by(*keyset.order_by())
         
-        # 4. 处理排序
-        order_func = desc if order.lower() == "desc" else asc
-        if sort_by == "publish_time":
-            stmt = stmt.order_by(order_func(Song.publish_time).nullslast(), order_func(Song.created_at))
-        elif sort_by == "created_at":
-            stmt = stmt.order_by(order_func(Song.created_at))
-        elif sort_by == "title":
-            stmt = stmt.order_by(order_func(Song.title))
-        elif sort_by == "artist":
-            # 关联 Artist 表并按名称排序
-            stmt = stmt.join(Artist).order_by(order_func(Artist.name))
-        elif sort_by == "album":
-            stmt = stmt.order_by(order_func(Song.album))
+        # 5. 分页: 有游标时按排序键定位，否则使用 OFFSET
+        if cursor:
+            stmt = stmt.where(keyset.after(cursor))
         else:
-            # 默认排序
-            stmt = stmt.order_by(Song.publish_time.desc().nullslast(), Song.created_at.desc())
-        
-        # 5. 分页
-        stmt = stmt.offset(skip).limit(limit)
+            stmt = stmt.offset(skip)
+        stmt = stmt.limit(limit)
         
         # 6. 加载来源并执行
         from sqlalchemy.orm import selectinload
@@ -174,4 +177,38 @@ class SongRepository(BaseRepository[Song]):
         result = await self._session.execute(stmt)
         songs = result.scalars().all()
         
-        return songs, total
+        next_cursor = None
+        if len(songs) == limit:
+            last = songs[-1]
+            value = last.artist.name if sort_by == "artist" and last.artist else getattr(last, keyset.column.key)
+            next_cursor = keyset.encode(value, last.id)
+        return songs, total, next_cursor
+
+    async def get_duplicates_of(self, songs: List[Song]) -> List[Song]:
+        """获取这些代表歌曲同一去重键下的其他版本 (含来源)，用于合并展示信息"""
+        from sqlalchemy.orm import selectinload
+        keys = {s.dedup_key for s in songs if s.dedup_key}
+        if not keys:
+            return []
+        stmt = (
+            select(Song)
+            .options(joinedload(Song.artist), selectinload(Song.sources))
+            .where(Song.dedup_key.in_(keys), Song.is_canonical == False)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    def keyset_sort(sort_by: str, order: str = "desc") -> KeysetSort:
+        """排序字段 -> 游标分页排序定义 (未知字段按发布时间倒序)"""
+        from app.models.artist import Artist
+        columns = {
+            "publish_time": Song.publish_time,
+            "created_at": Song.created_at,
+            "title": Song.title,
+            "album": Song.album,
+            "artist": Artist.name,
+        }
+        if sort_by not in columns:
+            return KeysetSort("publish_time", Song.publish_time, Song.id, descending=True)
+        return KeysetSort(sort_by, columns[sort_by], Song.id, descending=order.lower() == "desc")
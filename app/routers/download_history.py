@@ -11,7 +11,7 @@ from sqlalchemy import select, func
 from typing import Optional
 
 from app.services.download_history_service import DownloadHistoryService
-from core.database import get_async_session
+from core.database import get_read_session
 from app.models.download_history import DownloadHistory
 from app.pagination import PaginatedResponse, convert_skip_limit_to_page
 
@@ -30,7 +30,7 @@ async def get_download_history(
     source: Optional[str] = Query(None, description="筛选来源平台"),
     status: Optional[str] = Query(None, description="筛选下载状态"),
     artist: Optional[str] = Query(None, description="筛选艺术家"),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     """获取下载历史记录"""
     # 处理分页参数
@@ -94,7 +94,7 @@ async def get_download_history(
 
 @router.get("/stats")
 async def get_download_stats(
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     """获取下载统计信息"""
     history_service = DownloadHistoryService()
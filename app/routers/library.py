@@ -3,24 +3,26 @@
 Library API路由 - 本地资料库管理
 
 Author: google
-Updated: 2026-01-26
+Updated: 2026-10-19
 """
 import logging
 import traceback
 import asyncio
-from typing import List, Optional
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Query, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from sqlalchemy import select, delete, desc, asc
 
-from core.database import get_async_session
+from core.database import get_async_session, get_read_session
 from app.services.library import LibraryService
 from app.services.scan_service import ScanService
 from app.services.metadata_healer import MetadataHealer
 from app.repositories.song import SongRepository
 from app.models.song import SongSource
-from app.pagination import PaginatedResponse, convert_skip_limit_to_page
+from app.pagination import (
+    CursorPaginatedResponse, InvalidCursorError, PaginatedResponse, convert_skip_limit_to_page
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,18 +43,25 @@ async def get_library_songs(
     monitored_only: bool = Query(True, description="仅显示关注歌手(默认True)"),
     sort_by: str = Query("created_at", description="排序字段: created_at, publish_time, title"),
     order: str = Query("desc", description="排序方向: desc, asc"),
-    db: AsyncSession = Depends(get_async_session)
+    cursor: Optional[str] = Query(None, description="游标 (上一页返回的 next_cursor)，提供时忽略 page/skip"),
+    db: AsyncSession = Depends(get_read_session)
 ):
     """
     获取本地资料库歌曲
     
-    支持两种分页方式:
-    1. 新式: page + page_size (推荐)
-    2. 旧式: skip + limit (向后兼容,将来会移除)
+    支持三种分页方式:
+    1. 游标: cursor + page_size (无限滚动 / 深分页推荐)
+    2. 新式: page + page_size
+    3. 旧式: skip + limit (向后兼容,将来会移除)
     """
     try:
         # 处理分页参数 (优先使用新参数)
-        if page is not None and page_size is not None:
+        if cursor:
+            current_page = None
+            current_page_size = page_size or limit or 20
+            offset = 0
+            fetch_limit = current_page_size
+        elif page is not None and page_size is not None:
             # 使用新分页参数
             current_page = page
             current_page_size = page_size
@@ -71,33 +80,62 @@ async def get_library_songs(
             fetch_limit = 20
         
         song_repo = SongRepository(db)
-        songs, total = await song_repo.get_paginated(
+        songs, total, next_cursor = await song_repo.get_paginated(
             skip=offset,
             limit=fetch_limit,
             artist_name=artist_name,
             is_favorite=is_favorite,
             only_monitored=monitored_only,
             sort_by=sort_by,
-            order=order
+            order=order,
+            cursor=cursor
         )
         
-        # 去重
+        # 代表行已按请求排序分页，只需合并同组其他版本的来源等信息
         from app.services.deduplication_service import DeduplicationService
-        deduplicated_items = DeduplicationService.deduplicate_songs(songs)
+        duplicates = await song_repo.get_duplicates_of(songs)
+        deduplicated_items = DeduplicationService.merge_canonical(songs, duplicates)
         
         # 返回统一分页格式
+        if cursor:
+            return CursorPaginatedResponse(
+                items=deduplicated_items,
+                total=total,
+                page_size=current_page_size,
+                next_cursor=next_cursor
+            )
         return PaginatedResponse.create(
             items=deduplicated_items,
             total=total,
             page=current_page,
-            page_size=current_page_size
+            page_size=current_page_size,
+            next_cursor=next_cursor
         )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"获取资料库失败: {str(e)}")
 
 
+@router.get("/search")
+async def search_library(
+    q: str = Query(..., min_length=1, description="检索词 (标题 / 歌手 / 专辑 / 歌词，支持繁简与拼音)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_session)
+):
+    """本地资料库全文检索 (按相关度排序，不访问网络)"""
+    from app.services.library_search import LibrarySearchService
+    
+    try:
+        # 只读: 索引在写入提交后由 IndexSyncer 同步
+        return await LibrarySearchService().search(db, q, limit=limit)
+    except Exception as e:
+        logger.error(f"本地检索失败: {e}")
+        raise HTTPException(status_code=500, detail=f"本地检索失败: {str(e)}")
+
+
 @router.post("/match-metadata")
 async def match_metadata(
     match_data: dict, # {song_id, target_source, target_song_id}
@@ -130,7 +168,8 @@ async def get_local_songs(
     limit: Optional[int] = Query(None, ge=1, le=100, description="[已废弃] 使用 page_size 代替"),
     sort_by: str = Query("created_at", description="排序字段: created_at, publish_time, artist, title, album"),
     order: str = Query("desc", description="排序方向: desc, asc"),
-    db: AsyncSession = Depends(get_async_session)
+    cursor: Optional[str] = Query(None, description="游标 (上一页返回的 next_cursor)，提供时忽略 page/skip"),
+    db: AsyncSession = Depends(get_read_session)
 ):
     """
     专门获取所有本地歌曲 (有 local_path 的歌曲)
@@ -140,7 +179,12 @@ async def get_local_songs(
         from app.services.library import LibraryService
         
         # 处理分页参数
-        if page is not None and page_size is not None:
+        if cursor:
+            current_page = None
+            current_page_size = page_size or limit or 20
+            offset = 0
+            fetch_limit = current_page_size
+        elif page is not None and page_size is not None:
             current_page = page
             current_page_size = page_size
             offset = (page - 1) * page_size
@@ -156,16 +200,26 @@ async def get_local_songs(
             fetch_limit = 20
             
         service = LibraryService()
-        items, total = await service.get_local_songs_paginated(
-            db, offset, fetch_limit, sort_by, order
+        items, total, next_cursor = await service.get_local_songs_paginated(
+            db, offset, fetch_limit, sort_by, order, cursor
         )
 
+        if cursor:
+            return CursorPaginatedResponse(
+                items=items,
+                total=total,
+                page_size=current_page_size,
+                next_cursor=next_cursor
+            )
         return PaginatedResponse.create(
             items=items,
             total=total,
             page=current_page,
-            page_size=current_page_size
+            page_size=current_page_size,
+            next_cursor=next_cursor
         )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -348,6 +402,8 @@ async def download_from_search_endpoint(
 
 class RefreshRequest(BaseModel):
     artist_name: str
+    pre_scan: Literal["artist", "full", "none"] = "artist"  # 刷新前的本地预扫描范围
+    sync_mode: Literal["full", "incremental"] = "full"      # 手动刷新默认全量对账
 
 @router.post("/refresh_artist")
 async def refresh_artist(
@@ -357,7 +413,9 @@ async def refresh_artist(
     """刷新指定歌手的歌曲"""
     try:
         service = LibraryService()
-        count = await service.refresh_artist(db, request.artist_name)
+        count = await service.refresh_artist(
+            db, request.artist_name, pre_scan=request.pre_scan, sync_mode=request.sync_mode
+        )
         return {"success": True, "new_songs_count": count}
     except Exception as e:
         import traceback
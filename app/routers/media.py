@@ -9,7 +9,7 @@ Media路由 - 媒体资源API端点
 - 移动端元数据接口
 
 Author: google
-Updated: 2026-01-26
+Updated: 2026-10-19
 """
 import os
 import logging
@@ -18,14 +18,16 @@ from datetime import datetime
 from urllib.parse import quote
 from typing import Optional, Any
 
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import config
 from app.schemas import DownloadRequest, ArtistConfig
-from core.database import get_async_session
+from core.database import get_async_session, get_read_session
+from app.pagination import InvalidCursorError
+from app.utils.file_response import conditional_file_response
 from app.services.media_service import MediaService
 from app.services.subscription import SubscriptionService
 
@@ -70,33 +72,79 @@ async def download_audio_endpoint(
 @router.get("/api/audio/{filename:path}")
 async def serve_audio(
     filename: str, 
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="转码格式: opus / mp3 / aac"),
+    br: Optional[int] = Query(None, description="转码码率 (kbps)"),
     media_service: MediaService = Depends(MediaService),
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_read_session)
 ) -> Any:
-    """提供音频文件"""
+    """
+    提供音频文件 (支持 ETag / 304 与 Range 断点续传，路径解析结果缓存)
+
+    指定 ?format=opus&br=128 时实时转码 (移动端省流量)；已完整转码过的直接读取转码缓存。
+    """
     try:
-        file_path, song = await media_service.get_audio_path(filename, db)
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="音频文件未找到")
+        file_path, stat = await media_service.resolve_audio_file(filename, db)
+
+        if fmt:
+            return _serve_transcoded(request, filename, file_path, stat, fmt, br)
 
         media_type = "audio/mpeg"
         if filename.endswith(".flac"):
             media_type = "audio/flac"
         
         filename_encoded = quote(filename)
-        return FileResponse(
-            file_path, 
+        return conditional_file_response(
+            request,
+            file_path,
+            stat,
             media_type=media_type,
             headers={"Content-Disposition": f"attachment; filename*=utf-8''{filename_encoded}"}
         )
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="音频文件未找到")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"提供音频错误: {e}")
         raise HTTPException(status_code=500, detail=f"服务器错误: {str(e)}")
 
 
+def _serve_transcoded(request: Request, filename: str, file_path: str, stat: os.stat_result,
+                      fmt: str, br: Optional[int]):
+    """转码缓存命中时按文件返回 (支持 Range)，否则边转码边输出"""
+    from app.services.transcode_service import get_transcode_service
+
+    transcoder = get_transcode_service()
+    try:
+        profile = transcoder.get_profile(fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bitrate = transcoder.clamp_bitrate(br)
+
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    disposition = f"inline; filename*=utf-8''{quote(f'{stem}.{profile.extension}')}"
+
+    cache_path = transcoder.cache_path(file_path, stat, profile, bitrate)
+    cached_stat = transcoder.lookup(cache_path)
+    if cached_stat:
+        return conditional_file_response(
+            request, cache_path, cached_stat,
+            media_type=profile.media_type,
+            headers={"Content-Disposition": disposition}
+        )
+
+    if not transcoder.is_available():
+        raise HTTPException(status_code=503, detail="服务器未安装 ffmpeg，无法转码")
+
+    # 转码中的流长度未知，不支持 Range；完整转码后再次请求即可拖动
+    return StreamingResponse(
+        transcoder.stream(file_path, cache_path, profile, bitrate),
+        media_type=profile.media_type,
+        headers={"Content-Disposition": disposition, "Accept-Ranges": "none", "Cache-Control": "no-store"}
+    )
+
+
 # /api/artists routes moved to subscription.py for better task management
 
 
@@ -120,11 +168,17 @@ async def get_history(
     offset: int = 0, 
     author: Optional[str] = None, 
     downloaded_only: bool = False,
-    db: AsyncSession = Depends(get_async_session)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_session)
 ) -> Any:
-    """获取歌曲历史列表"""
+    """获取歌曲历史列表 (去重；传入上一页的 next_cursor 可按游标翻页)"""
     try:
         from app.services.history_service import HistoryService
+        from app.repositories.media_record import MediaRecordRepository
+        
+        if cursor:
+            # 先校验游标，避免被服务层的降级处理吞掉
+            MediaRecordRepository.parse_history_cursor(cursor)
         
         history_service = HistoryService()
         result = await history_service.get_history(
@@ -132,10 +186,13 @@ async def get_history(
             limit=limit,
             offset=offset,
             author=author,
-            downloaded_only=downloaded_only
+            downloaded_only=downloaded_only,
+            cursor=cursor
         )
         
         return result
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取历史错误: {e}")
         raise HTTPException(status_code=500, detail=f"获取历史失败: {str(e)}")
@@ -175,6 +232,7 @@ async def record_history(
         }
         
         record = await repo.create_or_update(data)
+        await db.commit()
         return {"success": True, "unique_key": record.unique_key}
     except Exception as e:
         logger.error(f"记录历史错误: {e}")
@@ -6,7 +6,7 @@ from sqlalchemy import select
 from pydantic import BaseModel
 from loguru import logger
 
-from core.database import get_async_session
+from core.database import get_async_session, get_read_session
 from app.services.subscription import SubscriptionService, active_refreshes
 from app.models.artist import ArtistSource
 from app.schemas import ArtistConfig, SubscriptionResponse
@@ -53,7 +53,7 @@ async def run_refresh_task(artist_name: str, source: str = None, artist_id: str
 
 @router.get("/api/artists")
 @router.get("/api/subscription/artists")
-async def get_monitored_artists(db: AsyncSession = Depends(get_async_session)):
+async def get_monitored_artists(db: AsyncSession = Depends(get_read_session)):
     """获取所有关注的歌手"""
     try:
         return await SubscriptionService.get_monitored_artists(db)
@@ -64,7 +64,7 @@ async def get_monitored_artists(db: AsyncSession = Depends(get_async_session)):
 @router.get("/api/subscription/artists/{artist_id}")
 async def get_artist_detail(
     artist_id: int,
-    db: AsyncSession = Depends(get_async_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     """获取艺人详情（歌曲列表 + 专辑分组）"""
     try:
@@ -7,24 +7,36 @@
 - 日志查看
 - 任务调度
 - 通知测试
-- WebSocket连接管理
+- WebSocket测试广播
 
 更新日志:
 - 2026-01-22: 添加了EventType.NEW_CONTENT支持通知功能
 - 2026-01-22: 修复了事件发布中的类型错误
+- 2026-10-19: /api/run_check 改为触发新歌监控引擎 (原 job_netease/job_qqmusic 从未注册)
+- 2026-10-19: /api/status 增加新歌监控排程 (每歌手自适应间隔) 与每日 API 调用预算
+- 2026-10-19: /api/status 增加数据库连接池与写锁等待统计
+- 2026-10-19: /api/status 增加后台写入队列统计
+- 2026-10-19: /api/status 增加音频路径缓存统计
+- 2026-10-19: /api/status 增加转码统计
+- 2026-10-19: /api/status 增加 WebSocket 发送队列统计
+- 2026-10-19: /api/status 增加任务进度合并统计
+- 2026-10-19: 移除重复的 /ws/progress 路由 (统一由 app/routers/websocket.py 提供)
+- 2026-10-19: /api/status 增加事件总线统计 (按事件类型)
+- 2026-10-19: /api/status 增加通知合并与发送队列统计；测试卡片直接发送，不进入合并窗口
+- 2026-10-19: 修正 Telegram 通知器的导入路径
 """
 
 import logging
 import yaml
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Core Imports
 from core.config import config
 from core.scheduler import scheduler
 from core.logger import api_log_handler
-from core.database import get_async_session, get_db, AsyncSessionLocal
+from core.database import get_async_session, get_db, get_db_stats, AsyncSessionLocal
 from core.event_bus import get_event_bus, EventType
 
 event_bus = get_event_bus()
@@ -34,21 +46,6 @@ from app.notifiers.wecom import WeComNotifier
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.websocket("/ws/progress")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
-    try:
-        while True:
-            # Keep connection alive, wait for client 'ping' or just block
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
-    except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-        try:
-            manager.disconnect(websocket)
-        except: pass
-
 @router.get("/api/test_ws")
 async def test_ws_broadcast(msg: str = "Test Message"):
     """Test broadcasting to all connected clients"""
@@ -125,33 +122,15 @@ async def trigger_library_scan(db: AsyncSession = Depends(get_async_session)):
 @router.post("/api/check/{source}")
 @router.post("/api/run_check/{source}")
 async def trigger_check(source: str):
-    """手动触发指定平台的同步检查"""
+    """手动触发指定平台的新歌检查 (关联了该平台的关注歌手立即检查)"""
     if source not in ['netease', 'qqmusic']:
         raise HTTPException(status_code=400, detail="Invalid source")
     
-    # 触发对应平台的立即检查
-    # Correct ID from main.py is "job_{source}"
-    job_id = f"job_{source}"
-    job = scheduler.get_job(job_id)
-    
-    if not job:
-        logger.warning(f"Job {job_id} not found in scheduler, available: {[j.id for j in scheduler.get_jobs()]}")
-        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
-    
     try:
-        # 立即执行任务
-        job.modify(next_run_time=datetime.now()) # Use datetime.now() for immediate run in some APScheduler versions or modify next_run_time
-        # In APScheduler, next_run_time=None usually means paused. 
-        # To trigger now, we can use scheduler.trigger_job(job_id) if it exists or just modify to now.
-        # scheduler.add_job(..., next_run_time=datetime.now())
-        # Let's use the most reliable way for APScheduler
-        try:
-            scheduler.modify_job(job_id, next_run_time=datetime.now())
-        except:
-             job.modify(next_run_time=datetime.now())
-             
-        logger.info(f"手动触发 {source} 同步检查")
-        return {"status": "success", "message": f"{source} 同步已触发"}
+        from app.services.release_monitor import get_release_monitor
+        count = await get_release_monitor().run_now(source=source)
+        logger.info(f"手动触发 {source} 同步检查 ({count} 名歌手)")
+        return {"status": "success", "message": f"{source} 同步已触发", "artists": count}
     except Exception as e:
         logger.error(f"触发 {source} 检查失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -160,7 +139,31 @@ async def trigger_check(source: str):
 async def get_status():
     jobs = scheduler.get_jobs()
     job_info = [{"id": j.id, "next_run": j.next_run_time} for j in jobs]
-    return {"status": "running", "jobs": job_info}
+    from app.utils.cache import api_cache
+    from app.services.music_providers.netease_provider import get_netease_executor
+    from app.services.release_monitor import get_release_monitor
+    from app.services.write_queue import get_write_queue
+    from app.services.media_service import audio_path_cache
+    from app.services.transcode_service import get_transcode_service
+    from app.services.task_monitor import task_monitor
+    from app.services.notification_queue import get_outbound_queue, get_notification_digest
+    monitor = get_release_monitor()
+    return {
+        "status": "running",
+        "jobs": job_info,
+        "cache": api_cache.stats(),
+        "netease_executor": get_netease_executor().stats(),
+        "database": get_db_stats(),
+        "write_queue": get_write_queue().stats(),
+        "audio_path_cache": audio_path_cache.stats(),
+        "transcode": get_transcode_service().stats(),
+        "websocket": manager.stats(),
+        "task_monitor": task_monitor.stats(),
+        "event_bus": event_bus.stats(),
+        "notifications": {**get_outbound_queue().stats(), **get_notification_digest().stats()},
+        "release_monitor": monitor.stats(),
+        "monitor_schedule": await monitor.schedule()
+    }
 
 @router.post("/api/test_notify/{channel}")
 async def test_notify(channel: str):
@@ -182,7 +185,7 @@ async def test_notify(channel: str):
             return {"status": "success", "message": "WeCom test message sent"}
             
         elif channel == 'telegram':
-            from notifiers.telegram import TelegramNotifier
+            from app.notifiers.telegram import TelegramNotifier
             cfg = notify_cfg.get('telegram', {})
             notifier = TelegramNotifier(
                 bot_token=cfg.get('bot_token'),
@@ -219,9 +222,10 @@ async def test_notify_card(channel: str):
              # "123456" might not exist in history, so frontend will just warn.
              # But the link is what matters.
         )
-        # We simulate the event
-        # Note: main.py subscribes to "new_content"
-        await event_bus.publish(EventType.NEW_CONTENT, mock_media)
+        # Dispatch directly: going through the NEW_CONTENT event would hold the card
+        # in the digest window (notify.digest_window) before sending
+        from app.services.notification import NotificationService
+        await NotificationService.dispatch_new_content(mock_media)
         
         return {"status": "success", "message": "Test card event published"}
     except Exception as e:
@@ -244,7 +248,7 @@ async def check_notify_status(channel: str):
             return {"status": "ok" if ok else "error", "connected": ok}
             
         elif channel == 'telegram':
-            from notifiers.telegram import TelegramNotifier
+            from app.notifiers.telegram import TelegramNotifier
             cfg = notify_cfg.get('telegram', {})
             notifier = TelegramNotifier(
                 bot_token=cfg.get('bot_token'),
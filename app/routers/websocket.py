@@ -1,18 +1,32 @@
+"""
+WebSocket 进度推送路由
+
+/ws/progress?topics=task:<id>,artist:<id>,type:<消息类型>&encoding=json|msgpack
+订阅协议见 core/websocket.py。
+
+更新日志:
+- 2026-10-19: 合并 system.py 中重复的 /ws/progress 路由；支持主题订阅与编码选择
+"""
+import logging
+from typing import Optional
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from core.websocket import manager
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
 
 @router.websocket("/ws/progress")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, topics: Optional[str] = None, encoding: Optional[str] = None):
+    await manager.connect(websocket, topics=(topics or "").split(","), encoding=encoding)
     try:
         while True:
-            # We just need to keep the connection open.
-            # Client might send "ping" or nothing.
-            await websocket.receive_text()
+            # Client might send "ping" (keep-alive) or subscription commands
+            manager.handle_client_message(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
         # Handle unexpected disconnects
+        logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket)
@@ -9,7 +9,7 @@
 - 后台下载收藏
 
 Author: google
-Updated: 2026-01-26
+Updated: 2026-10-19
 """
 import logging
 import asyncio
@@ -305,14 +305,16 @@ async def background_download(song: dict, user_id: str):
             await WeComNotifier().send_text(f"❌ 下载失败：{title}", [user_id])
             return
         
-        # 使用 WeChatDownloadService 保存记录
-        async with AsyncSessionLocal() as db:
-            record_result = await WeChatDownloadService.create_or_update_record(
+        # 使用 WeChatDownloadService 保存记录 (经由后台写入队列，与其他后台写入合并提交)
+        from app.services.write_queue import get_write_queue
+        record_result = await get_write_queue().submit(
+            lambda db: WeChatDownloadService.create_or_update_record(
                 db=db,
                 song=song,
                 download_result=result,
                 cover_url=song.get('cover', '')
             )
+        )
         
         if record_result:
             # 发送卡片通知
@@ -8,17 +8,30 @@ ArtistRefreshService - 歌手刷新服务
 - 元数据治愈（修复占位符日期、缺失封面）
 - 孤儿歌曲挽救（关联本地文件到在线源）
 
+更新日志:
+- 2026-10-19: 合并与治愈阶段改为按源批量获取歌曲详情，减少逐首请求
+- 2026-10-19: 各在线源并发拉取 (独立超时，单源失败不影响其他源)，先到的源先进入合并
+- 2026-10-19: 刷新前的本地预扫描默认只扫描该歌手 (pre_scan 参数可选 full/none)
+- 2026-10-19: 孤儿歌曲挽救改用 TitleMatchIndex 哈希索引匹配，在线搜索兜底并发执行
+- 2026-10-19: 合并阶段先在内存中计算新歌曲/新源，再以 INSERT ... ON CONFLICT DO NOTHING 批量写入
+- 2026-10-19: 增量同步: 按歌手/源记录同步水位，增量模式只拉首页最新歌曲，全量对账按需或每周一次
+- 2026-10-19: 批量写入来源后标记相关歌曲，提交时重算物化去重的代表行
+- 2026-10-19: 合并、孤儿挽救、同步水位与头像的写入改为经由后台写入队列提交，刷新会话只读
+- 2026-10-19: 不支持按发布时间分页的源 (QQ 音乐热歌接口) 增量模式改为全量拉取，避免漏掉新歌
+
 Author: google
 Created: 2026-02-02 (从 LibraryService 拆分)
 """
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from collections import defaultdict
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
 import logging
-import re
 import json
 import uuid
 
@@ -29,10 +42,51 @@ from app.repositories.song import SongRepository
 from app.services.music_providers.aggregator import MusicAggregator
 from app.services.scan_service import ScanService
 from app.services.metadata_healer import MetadataHealer
+from app.services.title_matcher import TitleKey, TitleMatchIndex
+from app.services.write_queue import get_write_queue, take_changes, update_mutation
 from app.utils.error_handler import handle_service_errors
 
 logger = logging.getLogger(__name__)
 
+# 合并优先级: 同名歌曲优先采用 QQ 音乐元数据，因此 QQ 先于网易云入库
+SOURCE_MERGE_PRIORITY = ("qqmusic", "netease")
+
+# 单个源拉取歌手歌曲列表的默认超时 (秒)
+DEFAULT_ARTIST_FETCH_TIMEOUT = 90
+
+# 批量插入单条语句的最大行数 (SQLite 单语句绑定参数数量有限)
+BULK_INSERT_CHUNK_SIZE = 500
+
+# 孤儿歌曲挽救时在线搜索兜底的默认并发数
+DEFAULT_RESCUE_SEARCH_CONCURRENCY = 4
+
+# 刷新前的本地预扫描模式
+PRE_SCAN_ARTIST = "artist"  # 只扫描未入库且匹配该歌手的文件
+PRE_SCAN_FULL = "full"      # 全库扫描 (含清理失效记录)
+PRE_SCAN_NONE = "none"      # 不扫描，完全依赖现有扫描索引
+
+# 同步模式
+SYNC_FULL = "full"                # 全量对账: 拉取完整曲库
+SYNC_INCREMENTAL = "incremental"  # 增量: 只拉首页 (按发布时间倒序)，遇到已知歌曲即停止
+
+# 增量同步首页大小 / 全量对账最长间隔 (天)
+DEFAULT_INCREMENTAL_PAGE_SIZE = 50
+DEFAULT_FULL_SYNC_INTERVAL_DAYS = 7
+
+# 刷新过程中可能修改的字段 (在刷新会话中计算，经由写入队列提交)
+MERGED_SONG_FIELDS = ("cover", "album", "publish_time")
+RESCUED_SONG_FIELDS = ("title", "cover", "album", "publish_time")
+WATERMARK_FIELDS = ("latest_publish_time", "last_sync", "catalog_hash", "last_full_sync")
+
+
+@dataclass
+class SourceSync:
+    """单个源本次同步的结果 (用于更新同步水位)"""
+    artist_source: ArtistSource
+    songs: List
+    full: bool
+    unchanged: bool = False  # 全量拉取的曲库与上次一致，无需重新合并
+
 
 class ArtistRefreshService:
     """歌手刷新服务 - 负责从在线源同步歌曲列表"""
@@ -45,9 +99,21 @@ class ArtistRefreshService:
         self._refresh_heal_count = 0
     
     @handle_service_errors(fallback_value=0)
-    async def refresh(self, db: AsyncSession, artist_name: str) -> int:
+    async def refresh(
+        self,
+        db: AsyncSession,
+        artist_name: str,
+        pre_scan: str = PRE_SCAN_ARTIST,
+        sync_mode: str = SYNC_FULL
+    ) -> int:
         """
-        全量刷新一名歌手的歌曲资料。
+        刷新一名歌手的歌曲资料。
+        
+        Args:
+            pre_scan: 刷新前的本地预扫描模式 ("artist" / "full" / "none")。
+                默认只扫描该歌手，连续添加多名歌手时不再反复全库扫描。
+            sync_mode: "full" 全量对账 (手动刷新) / "incremental" 增量 (定时监控)。
+                增量模式下距上次全量对账超过 full_sync_interval_days 的源仍会全量拉取。
         """
         logger.info(f"Refreshing artist: {artist_name}")
         
@@ -59,8 +125,14 @@ class ArtistRefreshService:
             return 0
         
         # 2. 预扫描本地文件
-        logger.info(f"📁 [Pre-refresh] Scanning local files for {artist_name}...")
-        await self.scan_service.scan_local_files(db)
+        if pre_scan == PRE_SCAN_FULL:
+            logger.info(f"📁 [Pre-refresh] Full library scan before refreshing {artist_name}...")
+            await self.scan_service.scan_local_files(db)
+        elif pre_scan == PRE_SCAN_ARTIST:
+            logger.info(f"📁 [Pre-refresh] Scanning local files for {artist_name}...")
+            await self.scan_service.scan_local_files(db, artist_name=artist_name)
+        else:
+            logger.info(f"📁 [Pre-refresh] Skipped, relying on existing scan index for {artist_name}")
         
         # 3. 广播开始状态
         from core.websocket import manager
@@ -74,26 +146,50 @@ class ArtistRefreshService:
             "songCount": await artist_repo.get_song_count(artist.id)
         })
         
-        # 4. 获取在线歌曲
-        raw_songs = await self._fetch_online_songs(db, artist, manager)
-        if not raw_songs:
-            return 0
-        
-        # 5. 反向查找缺失的原版歌曲
-        raw_songs = await self._reverse_lookup_originals(
-            raw_songs, artist, manager
-        )
+        # 4. 并发拉取在线歌曲，每个源到达后即进入合并
+        #    (按 SOURCE_MERGE_PRIORITY 顺序入库: 高优先级源未返回前，低优先级源暂存等待)
+        raw_songs = []
+        new_count = 0
+        waiting: Dict[str, List] = {}
+        sync_results: Dict[str, SourceSync] = {}
+        async for source, songs, remaining in self._stream_online_songs(
+            db, artist, manager, sync_mode, sync_results
+        ):
+            raw_songs.extend(songs)
+            sync = sync_results.get(source)
+            if songs and not (sync and sync.unchanged):
+                waiting[source] = songs
+            
+            for ready in self._ready_sources(waiting, remaining):
+                # 6. 合并在线和本地歌曲
+                new_count += await self._merge_with_local(
+                    db, artist, waiting.pop(ready), manager
+                )
         
-        # 6. 合并在线和本地歌曲
-        new_count = await self._merge_with_local(
-            db, artist, raw_songs, manager
-        )
+        # 更新同步水位 (只记录拉取成功的源)
+        await self._update_sync_watermarks(db, artist, sync_results)
         
-        # 7. 挽救孤儿歌曲
-        await self._rescue_orphan_songs(db, artist, raw_songs, manager)
+        if not raw_songs:
+            return 0
         
-        # 8. 全库元数据治愈 (使用 MetadataHealer)
-        await self._heal_all_metadata(db, artist)
+        # 反查原版 / 挽救孤儿 / 全库治愈都针对整个曲库，只在有源做了全量对账时执行
+        if any(sync.full for sync in sync_results.values()):
+            # 5. 反向查找缺失的原版歌曲 (需要全部源的结果)，仅合并新找回的部分
+            fetched_count = len(raw_songs)
+            await self._reverse_lookup_originals(raw_songs, artist, manager)
+            extra_songs = raw_songs[fetched_count:]
+            if extra_songs:
+                new_count += await self._merge_with_local(
+                    db, artist, extra_songs, manager
+                )
+            
+            # 7. 挽救孤儿歌曲
+            await self._rescue_orphan_songs(db, artist, raw_songs, manager)
+            
+            # 8. 全库元数据治愈 (使用 MetadataHealer)
+            await self._heal_all_metadata(db, artist)
+        else:
+            logger.info(f"⏩ 增量同步 {artist_name}: 跳过反查原版/孤儿挽救/全库治愈")
         
         # 9. 完成统计
         total_count = await artist_repo.get_song_count(artist.id)
@@ -122,79 +218,244 @@ class ArtistRefreshService:
         
         return new_count
     
-    @handle_service_errors(fallback_value=[])
-    async def _fetch_online_songs(
-        self, 
-        db: AsyncSession, 
+    @staticmethod
+    def _ready_sources(waiting: Dict[str, List], remaining: Set[str]) -> List[str]:
+        """返回可以立即合并的源 (所有更高优先级的源都已返回)，按优先级排序"""
+        def rank(source: str) -> int:
+            if source in SOURCE_MERGE_PRIORITY:
+                return SOURCE_MERGE_PRIORITY.index(source)
+            return len(SOURCE_MERGE_PRIORITY)
+        
+        ready = []
+        for source in sorted(waiting, key=rank):
+            if any(rank(pending) < rank(source) for pending in remaining):
+                break
+            ready.append(source)
+        return ready
+    
+    async def _stream_online_songs(
+        self,
+        db: AsyncSession,
         artist: Artist,
-        manager
-    ) -> List:
-        """获取在线歌曲列表"""
+        manager,
+        sync_mode: str = SYNC_FULL,
+        sync_results: Optional[Dict[str, SourceSync]] = None
+    ) -> AsyncIterator[Tuple[str, List, Set[str]]]:
+        """
+        并发拉取各在线源的歌曲列表，按完成顺序逐个产出
+
+        每个源独立超时，失败或超时的源产出空列表 (部分结果可用)。
+        总耗时取决于最慢的源，而非各源之和。
+
+        Args:
+            sync_mode: 同步模式 (SYNC_FULL / SYNC_INCREMENTAL)
+            sync_results: 若提供，拉取成功的源会写入 {source: SourceSync}
+
+        Yields:
+            (source, songs, 仍在拉取中的源集合)
+        """
         # 加载歌手源
         stmt = select(ArtistSource).where(ArtistSource.artist_id == artist.id)
         sources = (await db.execute(stmt)).scalars().all()
         artist_ids = {s.source: s.source_id for s in sources}
+        artist_sources = {s.source: s for s in sources}
+        if sync_results is None:
+            sync_results = {}
         
-        if not artist_ids:
+        providers = {
+            source: self.aggregator.get_provider(source)
+            for source in artist_ids
+        }
+        providers = {k: v for k, v in providers.items() if v}
+        if not providers:
             logger.info("No source IDs found for artist")
-            return []
-        
-        raw_songs = []
+            return
         
-        # QQ音乐
-        if 'qqmusic' in artist_ids:
-            await manager.broadcast({
-                "type": "artist_progress",
-                "artistId": str(artist.id),
-                "artistName": artist.name,
-                "state": "fetching_qq",
-                "progress": 20,
-                "message": "📥 正在拉取 QQ 音乐歌曲列表..."
-            })
-            qq_songs = await self.aggregator.providers[1].get_artist_songs(
-                artist_ids['qqmusic'], limit=1000
-            )
-            raw_songs.extend(qq_songs)
-            logger.info(f"Fetched {len(qq_songs)} songs from QQ Music")
+        from core.config_manager import get_config_manager
+        providers_cfg = get_config_manager().get("providers", {})
+        timeout = providers_cfg.get("artist_fetch_timeout", DEFAULT_ARTIST_FETCH_TIMEOUT)
+        page_size = providers_cfg.get("incremental_page_size", DEFAULT_INCREMENTAL_PAGE_SIZE)
+        full_interval = timedelta(
+            days=providers_cfg.get("full_sync_interval_days", DEFAULT_FULL_SYNC_INTERVAL_DAYS)
+        )
         
-        # 网易云
-        if 'netease' in artist_ids:
-            await manager.broadcast({
-                "type": "artist_progress",
-                "artistId": str(artist.id),
-                "artistName": artist.name,
-                "state": "fetching_netease",
-                "progress": 30,
-                "message": "📥 正在拉取网易云音乐歌曲列表..."
-            })
-            netease_songs = await self.aggregator.providers[0].get_artist_songs(
-                artist_ids['netease'], limit=1000
-            )
-            raw_songs.extend(netease_songs)
-            logger.info(f"Fetched {len(netease_songs)} songs from Netease")
-        
-        # 过滤脏数据
-        raw_songs = [s for s in raw_songs if self.aggregator._is_valid_song(s)]
-        
-        # 补全歌手头像
-        if not artist.avatar:
-            for rs in raw_songs:
-                if rs.cover:
-                    artist.avatar = rs.cover
-                    logger.info(f"🎨 已从采集列表自动补全艺人头像: {artist.name}")
-                    await db.commit()
-                    break
+        # 已入库的在线源歌曲 ID (增量停止判断 / 全量曲库未变化判断)
+        known_ids = await self._load_known_source_ids(db, artist)
         
+        source_labels = {"qqmusic": "QQ 音乐", "netease": "网易云音乐"}
         await manager.broadcast({
             "type": "artist_progress",
             "artistId": str(artist.id),
             "artistName": artist.name,
-            "state": "matching",
-            "progress": 40,
-            "message": f"获取到 {len(raw_songs)} 首歌曲，正在聚合..."
+            "state": "fetching",
+            "progress": 20,
+            "message": "📥 正在拉取 " + " / ".join(source_labels.get(s, s) for s in providers) + " 歌曲列表..."
         })
         
-        return raw_songs
+        async def fetch(source: str):
+            artist_source = artist_sources[source]
+            full = sync_mode == SYNC_FULL or self._needs_full_sync(artist_source, full_interval)
+            if not full and not providers[source].supports_newest_first:
+                # 首页不是按时间排序 (例如热歌)，新歌可能不在首页，只能全量拉取；曲库未变化时由 catalog_hash 跳过合并
+                logger.info(f"🔄 {source} 不支持按发布时间分页，增量同步改为全量拉取")
+                full = True
+            try:
+                if not full:
+                    page = await asyncio.wait_for(
+                        providers[source].get_artist_songs(
+                            artist_ids[source], limit=page_size, newest_first=True
+                        ),
+                        timeout=timeout
+                    )
+                    songs, reached_known = self._take_new_songs(
+                        page, known_ids[source], artist_source.latest_publish_time
+                    )
+                    if reached_known or len(page) < page_size:
+                        logger.info(f"🔄 {source} 增量同步: 首页 {len(page)} 首中新增 {len(songs)} 首")
+                        return source, songs, False
+                    # 整页都是新歌，可能有遗漏，退回全量拉取
+                    logger.info(f"🔄 {source} 增量同步首页未遇到已知歌曲，改为全量拉取")
+                
+                songs = await asyncio.wait_for(
+                    providers[source].get_artist_songs(artist_ids[source], limit=1000),
+                    timeout=timeout
+                )
+                return source, songs, True
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ 拉取 {source} 歌曲列表超时 ({timeout}s)，跳过该源")
+            except Exception as e:
+                logger.error(f"❌ 拉取 {source} 歌曲列表失败: {e}")
+            return source, [], None
+        
+        tasks = [asyncio.create_task(fetch(source)) for source in providers]
+        remaining = set(providers)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                source, songs, full = await next_done
+                remaining.discard(source)
+                
+                # 过滤脏数据
+                songs = [s for s in songs if self.aggregator._is_valid_song(s)]
+                logger.info(f"Fetched {len(songs)} songs from {source}")
+                
+                if full is not None:
+                    sync = SourceSync(artist_source=artist_sources[source], songs=songs, full=full)
+                    if full:
+                        ids = {str(s.id) for s in songs}
+                        sync.unchanged = (
+                            bool(ids) and ids <= known_ids[source] and
+                            artist_sources[source].catalog_hash == self._catalog_hash(ids)
+                        )
+                        if sync.unchanged:
+                            logger.info(f"⏩ {source} 曲库与上次全量对账一致，跳过合并")
+                    sync_results[source] = sync
+                
+                # 补全歌手头像
+                if not artist.avatar:
+                    for rs in songs:
+                        if rs.cover_url:
+                            artist.avatar = rs.cover_url
+                            logger.info(f"🎨 已从采集列表自动补全艺人头像: {artist.name}")
+                            await get_write_queue().submit(
+                                update_mutation(Artist, {artist.id: take_changes(artist, ("avatar",))})
+                            )
+                            break
+                
+                await manager.broadcast({
+                    "type": "artist_progress",
+                    "artistId": str(artist.id),
+                    "artistName": artist.name,
+                    "state": "matching",
+                    "progress": 40,
+                    "message": f"{source_labels.get(source, source)} 获取到 {len(songs)} 首歌曲，正在聚合..."
+                })
+                
+                yield source, songs, set(remaining)
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _load_known_source_ids(self, db: AsyncSession, artist: Artist) -> Dict[str, Set[str]]:
+        """加载该歌手已入库的在线源歌曲 ID: {source: {source_id, ...}}"""
+        stmt = (
+            select(SongSource.source, SongSource.source_id)
+            .join(Song, Song.id == SongSource.song_id)
+            .where(Song.artist_id == artist.id, SongSource.source != "local")
+        )
+        known_ids: Dict[str, Set[str]] = defaultdict(set)
+        for source, source_id in (await db.execute(stmt)).all():
+            known_ids[source].add(str(source_id))
+        return known_ids
+    
+    @staticmethod
+    def _needs_full_sync(artist_source: ArtistSource, interval: timedelta) -> bool:
+        """从未全量对账过，或距上次全量对账超过间隔"""
+        last_full = artist_source.last_full_sync
+        return last_full is None or datetime.now() - last_full >= interval
+    
+    def _take_new_songs(self, page: List, known: Set[str], watermark: Optional[datetime]):
+        """
+        从按发布时间倒序的首页中取出新歌，遇到已知歌曲 (或早于水位的歌曲) 即停止
+        
+        Returns:
+            (新歌列表, 是否到达已知区域)
+        """
+        new_songs = []
+        for s in page:
+            if str(s.id) in known:
+                return new_songs, True
+            published = self.metadata_healer._parse_date(str(s.publish_time)) if s.publish_time else None
+            if watermark and published and published < watermark:
+                return new_songs, True
+            new_songs.append(s)
+        return new_songs, False
+    
+    @staticmethod
+    def _catalog_hash(ids: Set[str]) -> str:
+        """歌曲 ID 集合哈希 (与顺序无关)"""
+        return hashlib.sha1("\n".join(sorted(ids)).encode("utf-8")).hexdigest()
+    
+    async def _update_sync_watermarks(
+        self,
+        db: AsyncSession,
+        artist: Artist,
+        sync_results: Dict[str, SourceSync]
+    ):
+        """记录各源的同步水位: 最新发布时间、曲库哈希、同步时间"""
+        if not sync_results:
+            return
+        
+        now = datetime.now()
+        for sync in sync_results.values():
+            src = sync.artist_source
+            dates = [
+                d for d in (
+                    self.metadata_healer._parse_date(str(s.publish_time))
+                    for s in sync.songs if s.publish_time
+                ) if d and d <= now
+            ]
+            if src.latest_publish_time:
+                dates.append(src.latest_publish_time)
+            if dates:
+                src.latest_publish_time = max(dates)
+            src.last_sync = now
+            if sync.full:
+                src.catalog_hash = self._catalog_hash({str(s.id) for s in sync.songs})
+                src.last_full_sync = now
+        
+        artist.last_sync = now
+        
+        source_changes = {
+            sync.artist_source.id: take_changes(sync.artist_source, WATERMARK_FIELDS)
+            for sync in sync_results.values()
+        }
+        artist_changes = {artist.id: take_changes(artist, ("last_sync",))}
+        
+        async def save(write_db: AsyncSession):
+            await update_mutation(ArtistSource, source_changes)(write_db)
+            await update_mutation(Artist, artist_changes)(write_db)
+        
+        await get_write_queue().submit(save)
     
     @handle_service_errors(fallback_value=[])
     async def _reverse_lookup_originals(
@@ -320,10 +581,17 @@ class ArtistRefreshService:
         }
         logger.info(f"  🔍 已缓存 {len(all_db_songs)} 首现有歌曲（带源信息）用于模糊匹配")
         
-        new_count = 0
+        # 对缺少封面/日期的分组，按源批量获取详情 (一次请求代替逐首补全)
+        prefetched = await self._prefetch_group_details(sorted_groups)
+        
         processed = 0
         total_groups = len(sorted_groups)
         
+        # 阶段 1: 在内存中计算新歌曲和新源 (不逐条 flush / 查询)
+        new_songs: List[Song] = []
+        touched_songs: List[Song] = []
+        pending_sources = []  # (song, row)
+        
         for title_key, group in sorted_groups:
             processed += 1
             
@@ -340,7 +608,7 @@ class ArtistRefreshService:
                 logger.info(f"🧹 过滤噪声动态: {best_meta.title}")
                 continue
             
-            # 查找或创建歌曲
+            # 查找或创建歌曲 (新歌曲先作为游离对象，稍后批量插入)
             norm_key = ScanService._normalize_cn_brackets(best_meta.title).lower().strip()
             existing_song = db_song_map.get(norm_key)
             
@@ -351,51 +619,42 @@ class ArtistRefreshService:
                     album=best_meta.album,
                     created_at=datetime.now(),
                     status="PENDING",
-                    unique_key=str(uuid.uuid4()),
-                    sources=[] # 显式初始化，防止 MissingGreenlet
+                    is_favorite=False,
+                    unique_key=str(uuid.uuid4())
                 )
-                db.add(existing_song)
-                await db.flush()
-                new_count += 1
+                new_songs.append(existing_song)
                 db_song_map[norm_key] = existing_song
             
             # 智能合并元数据
             await self._smart_merge_metadata(
-                db, existing_song, group, db_song_map, norm_key, artist.name
+                db, existing_song, group, db_song_map, norm_key, artist.name,
+                prefetched=prefetched
             )
             
-            # 获取此歌曲的所有源 - 此处由于已 prefetch 或显式初始化，不会报错
-            existing_sources = existing_song.sources
-            if not existing_sources:
-                pass
-            
-            src_map = {(src.source, str(src.source_id)) for src in existing_sources}
+            # 已有源来自 selectinload 预加载，新歌曲没有源
+            src_map = set()
+            if existing_song.id is not None:
+                src_map = {(src.source, str(src.source_id)) for src in existing_song.sources}
             
             # 更新源
+            added = False
             for s in group:
                 s_id_str = str(s.id)
-                if (s.source, s_id_str) not in src_map:
-                    # [Fix] Double check against DB to prevent IntegrityError
-                    chk = select(SongSource).where(
-                        SongSource.song_id == existing_song.id,
-                        SongSource.source == s.source,
-                        SongSource.source_id == s_id_str
-                    )
-                    if (await db.execute(chk)).scalars().first():
-                        src_map.add((s.source, s_id_str))
-                        continue
-
-                    src_ent = SongSource(
-                        song_id=existing_song.id,
-                        source=s.source,
-                        source_id=s_id_str,
-                        cover=s.cover_url or getattr(s, 'pic_url', None),
-                        duration=s.duration,
-                        url=getattr(s, 'url', None),
-                        data_json={'quality': getattr(s, 'quality', 'unknown')}
-                    )
-                    db.add(src_ent)
-                    src_map.add((s.source, s_id_str)) # 避免同一批次重复添加
+                if (s.source, s_id_str) in src_map:
+                    continue
+                pending_sources.append((existing_song, {
+                    "source": s.source,
+                    "source_id": s_id_str,
+                    "cover": s.cover_url or getattr(s, 'pic_url', None),
+                    "duration": s.duration,
+                    "url": getattr(s, 'url', None),
+                    "data_json": {'quality': getattr(s, 'quality', 'unknown')}
+                }))
+                src_map.add((s.source, s_id_str)) # 避免同一批次重复添加
+                added = True
+            
+            if added and existing_song.id is not None:
+                touched_songs.append(existing_song)
             
             # 进度广播
             if processed % 20 == 0 or processed == total_groups:
@@ -408,8 +667,114 @@ class ArtistRefreshService:
                     "message": f"⏳ 匹配进度 ({processed}/{total_groups})"
                 })
         
-        await db.commit()
-        return new_count
+        # 阶段 2: 批量写入 (每张表一条 INSERT ... RETURNING)，经由写入队列提交
+        #         已有歌曲的元数据修改从刷新会话中取出，一并提交
+        song_changes = {song.id: take_changes(song, MERGED_SONG_FIELDS) for song in all_db_songs}
+        
+        async def write(write_db: AsyncSession):
+            await update_mutation(Song, song_changes)(write_db)
+            song_ids = await self._bulk_insert_songs(write_db, new_songs)
+            for song in new_songs:
+                song.id = song_ids.get(song.unique_key)
+            
+            source_rows = [
+                {"song_id": song.id, **row}
+                for song, row in pending_sources if song.id is not None
+            ]
+            inserted_sources = await self._bulk_insert_sources(write_db, source_rows)
+            # 来源绕过 ORM 写入，显式标记以便提交时重选代表行 (新歌曲由插入语句自动补算)
+            from app.repositories.canonical_songs import mark_songs_dirty
+            mark_songs_dirty(write_db, song_ids=[row["song_id"] for row in source_rows])
+            return song_ids, inserted_sources
+        
+        song_ids, inserted_sources = await get_write_queue().submit(write)
+        logger.info(
+            f"  💾 批量写入: 新增歌曲 {len(song_ids)} 首, 新增源 {inserted_sources} 条"
+        )
+        
+        # 源是绕过 ORM 写入的，让已加载的 sources 集合在下次查询时重新加载
+        for song in touched_songs:
+            db.expire(song, ["sources"])
+        
+        return len(song_ids)
+    
+    @staticmethod
+    def _dialect_insert(db: AsyncSession, model):
+        """按数据库方言获取支持 ON CONFLICT 的 insert 构造器"""
+        if db.bind.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(model)
+    
+    async def _bulk_insert_songs(self, db: AsyncSession, songs: List[Song]) -> Dict[str, int]:
+        """
+        批量插入新歌曲
+        
+        Returns:
+            Dict[unique_key, song_id]
+        """
+        if not songs:
+            return {}
+        
+        columns = ("unique_key", "artist_id", "title", "album", "cover",
+                   "publish_time", "created_at", "status", "is_favorite")
+        rows = [{col: getattr(song, col) for col in columns} for song in songs]
+        
+        song_ids = {}
+        for i in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            stmt = (
+                self._dialect_insert(db, Song)
+                .values(rows[i:i + BULK_INSERT_CHUNK_SIZE])
+                .returning(Song.id, Song.unique_key)
+            )
+            for song_id, unique_key in (await db.execute(stmt)).all():
+                song_ids[unique_key] = song_id
+        return song_ids
+    
+    async def _bulk_insert_sources(self, db: AsyncSession, rows: List[Dict]) -> int:
+        """
+        批量插入歌曲源，已存在的 (song_id, source, source_id) 由 uq_song_source 约束忽略
+        
+        Returns:
+            实际插入的条数
+        """
+        inserted = 0
+        for i in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            stmt = (
+                self._dialect_insert(db, SongSource)
+                .values(rows[i:i + BULK_INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=["song_id", "source", "source_id"])
+                .returning(SongSource.id)
+            )
+            inserted += len((await db.execute(stmt)).all())
+        return inserted
+    
+    async def _prefetch_group_details(self, sorted_groups: List) -> Dict:
+        """
+        为缺少封面或发布日期的分组批量获取歌曲详情
+
+        Returns:
+            Dict[(source, song_id), metadata]
+        """
+        ids_by_source = defaultdict(list)
+        for _, group in sorted_groups:
+            has_cover = any(getattr(s, 'cover_url', None) or getattr(s, 'pic_url', None) for s in group)
+            has_date = any(getattr(s, 'publish_time', None) for s in group)
+            if has_cover and has_date:
+                continue
+            for s in group:
+                if s.source in ('netease', 'qqmusic') and s.id:
+                    ids_by_source[s.source].append(str(s.id))
+        
+        if not ids_by_source:
+            return {}
+        
+        try:
+            return await self.aggregator.get_songs_metadata(ids_by_source, with_lyrics=False)
+        except Exception as e:
+            logger.warning(f"批量获取歌曲详情失败，回退逐首补全: {e}")
+            return {}
     
     async def _smart_merge_metadata(
         self,
@@ -418,7 +783,8 @@ class ArtistRefreshService:
         group: List,
         db_song_map: Dict,
         norm_key: str,
-        artist_name: str
+        artist_name: str,
+        prefetched: Optional[Dict] = None
     ):
         """智能合并元数据"""
         candidate_covers = []
@@ -440,6 +806,20 @@ class ArtistRefreshService:
             if alb:
                 candidate_albums.append(alb)
         
+        # 批量预取的详情 (排在在线列表自带字段之后)
+        for s in group:
+            detail = (prefetched or {}).get((s.source, str(s.id)))
+            if not detail:
+                continue
+            if detail.get('cover_url'):
+                candidate_covers.append(detail['cover_url'])
+            if detail.get('publish_time'):
+                p_parsed = self.metadata_healer._parse_date(str(detail['publish_time']))
+                if p_parsed:
+                    candidate_dates.append(p_parsed.strftime("%Y-%m-%d"))
+            if detail.get('album'):
+                candidate_albums.append(detail['album'])
+        
         # 判断是否需要治愈
         needs_healing = False
         if not existing_song.cover or 'gtimg.cn' in str(existing_song.cover):
@@ -539,6 +919,12 @@ class ArtistRefreshService:
             })
             
             rescue_count = 0
+            new_sources: List[SongSource] = []
+            
+            # 在线候选索引: 每次刷新只归一化一次
+            index = TitleMatchIndex(raw_songs)
+            matches = {}
+            misses = []
             
             for song in local_songs:
                 # 检查是否已有在线源
@@ -569,30 +955,27 @@ class ArtistRefreshService:
                         pass
                 
                 # 查找匹配
-                best_match = self._find_match(raw_songs, song)
-                
-                if not best_match:
-                    search_key = f"{song.title} {artist.name}"
-                    search_results = await self.aggregator.search_song(search_key, limit=5)
-                    best_match = self._find_match(search_results, song)
-                
-                # 尝试去括号搜索
-                if not best_match:
-                    clean_title = re.sub(r"[\(\[【（].*?[\)\]】）]", "", song.title).strip()
-                    if clean_title and clean_title != song.title:
-                        logger.info(f"    ⚠️ 未命中，尝试去括号搜索: '{clean_title}'")
-                        clean_key = f"{clean_title} {artist.name}"
-                        relaxed_results = await self.aggregator.search_song(clean_key, limit=5)
-                        best_match = self._find_match(relaxed_results, song)
-                
+                key = TitleKey.of(song.title)
+                best_match = index.find(key)
                 if best_match:
-                    # 检查源是否已存在
-                    chk = select(SongSource).where(
-                        SongSource.song_id == song.id,
-                        SongSource.source == best_match.source,
-                        SongSource.source_id == str(best_match.id)
+                    matches[song.id] = best_match
+                else:
+                    misses.append((song, key))
+            
+            # 未命中的歌曲并发在线搜索 (有上限)
+            if misses:
+                logger.info(f"  🔎 {len(misses)} 首本地歌曲未在歌手列表中命中，转为在线搜索")
+                found = await self._search_rescue_matches(misses, artist.name)
+                matches.update(found)
+            
+            for song in local_songs:
+                best_match = matches.get(song.id)
+                if best_match:
+                    # 检查源是否已存在 (sources 已通过 selectinload 预加载)
+                    existing_src = any(
+                        src.source == best_match.source and str(src.source_id) == str(best_match.id)
+                        for src in song.sources
                     )
-                    existing_src = (await db.execute(chk)).scalars().first()
                     
                     if not existing_src:
                         new_source = SongSource(
@@ -604,7 +987,7 @@ class ArtistRefreshService:
                             url="",
                             data_json=json.dumps(best_match.__dict__, default=str)
                         )
-                        db.add(new_source)
+                        new_sources.append(new_source)
                         logger.info(f"    🔗 关联成功! 源: {best_match.source}")
                     
                     # 补全元数据
@@ -639,51 +1022,61 @@ class ArtistRefreshService:
                     
                     rescue_count += 1
             
+            # 修改从刷新会话中取出，经由写入队列提交
+            song_changes = {song.id: take_changes(song, RESCUED_SONG_FIELDS) for song in local_songs}
             if rescue_count > 0:
-                await db.commit()
+                async def save(write_db: AsyncSession):
+                    await update_mutation(Song, song_changes)(write_db)
+                    write_db.add_all(new_sources)
+                
+                await get_write_queue().submit(save)
+                # 新来源由写入队列插入，让已加载的 sources 集合在下次查询时重新加载
+                for song in local_songs:
+                    if any(src.song_id == song.id for src in new_sources):
+                        db.expire(song, ["sources"])
                 logger.info(f"✨ 挽救行动结束: 成功修复 {rescue_count} 首歌曲")
         
         except Exception as e:
             logger.error(f"❌ 挽救模式发生意外错误: {e}", exc_info=True)
     
+    async def _search_rescue_matches(self, misses: List, artist_name: str) -> Dict:
+        """
+        为未命中的本地歌曲并发执行在线搜索兜底
+
+        每首歌最多两次搜索: "标题 歌手"，未命中再用去括号标题搜索。
+        并发数由 providers.rescue_search_concurrency 控制。
+
+        Returns:
+            Dict[song.id, 匹配的在线歌曲]
+        """
+        from core.config_manager import get_config_manager
+        limit = get_config_manager().get("providers", {}).get(
+            "rescue_search_concurrency", DEFAULT_RESCUE_SEARCH_CONCURRENCY
+        )
+        semaphore = asyncio.Semaphore(max(1, int(limit)))
+        
+        async def search(song: Song, key: TitleKey):
+            async with semaphore:
+                try:
+                    results = await self.aggregator.search_song(f"{song.title} {artist_name}", limit=5)
+                    best_match = TitleMatchIndex(results).find(key)
+                    
+                    # 尝试去括号搜索
+                    if not best_match and key.stripped and key.stripped != song.title:
+                        logger.info(f"    ⚠️ 未命中，尝试去括号搜索: '{key.stripped}'")
+                        results = await self.aggregator.search_song(f"{key.stripped} {artist_name}", limit=5)
+                        best_match = TitleMatchIndex(results).find(key)
+                    return song.id, best_match
+                except Exception as e:
+                    logger.warning(f"    ❌ 在线搜索失败 [{song.title}]: {e}")
+                    return song.id, None
+        
+        results = await asyncio.gather(*(search(song, key) for song, key in misses))
+        return {song_id: match for song_id, match in results if match}
+    
     def _find_match(self, candidates: List, local_song: Song):
-        """查找匹配的歌曲"""
-        norm_local = ScanService._normalize_cn_brackets(local_song.title).lower().strip()
-        
-        variant_keywords = [
-            "(伴奏)", " 伴奏", "inst.", "instrumental", 
-            "demo", "(live)", " live", "（伴奏）"
-        ]
-        is_local_variant = any(k in local_song.title.lower() for k in variant_keywords)
-        
-        for res in candidates:
-            norm_res = ScanService._normalize_cn_brackets(res.title).lower().strip()
-            is_remote_variant = any(k in res.title.lower() for k in variant_keywords)
-            
-            # 精确匹配
-            if norm_local == norm_res:
-                logger.info(f"      -> ✅ 精确匹配成功: '{res.title}'")
-                return res
-            
-            # 模糊匹配（Remote在Local中）
-            if norm_res in norm_local:
-                if is_local_variant and not is_remote_variant:
-                    logger.info(
-                        f"      ⛔ 拒绝模糊匹配: 本地是变体但远程是原版"
-                    )
-                    continue
-                logger.info(f"      -> ⚠️ 模糊匹配成功(Remote在Local中)")
-                return res
-            
-            # 反向模糊匹配（Local在Remote中）
-            if len(norm_local) > 1 and norm_local in norm_res:
-                if not is_local_variant and is_remote_variant:
-                    logger.info(f"      ⚠️ 允许反向模糊匹配(可能是Live版)")
-                    return res
-                logger.info(f"      -> ⚠️ 模糊匹配成功(Local在Remote中)")
-                return res
-        
-        return None
+        """查找匹配的歌曲 (批量匹配请直接复用 TitleMatchIndex)"""
+        return TitleMatchIndex(candidates).find(local_song.title)
     
     @handle_service_errors(raise_on_critical=False)
     async def _heal_all_metadata(self, db: AsyncSession, artist: Artist):
@@ -695,17 +1088,24 @@ class ArtistRefreshService:
         
         # Get all songs
         res = await db.execute(
-            select(Song).where(Song.artist_id == artist.id)
+            select(Song)
+            .options(selectinload(Song.sources))
+            .where(Song.artist_id == artist.id)
         )
         all_db_songs = res.scalars().all()
         
+        # 按源批量预取已关联在线源的元数据
+        prefetched = await self.metadata_healer.prefetch_metadata(all_db_songs)
+        
         import asyncio
         semaphore = asyncio.Semaphore(5)
         
         async def heal_worker(song):
             async with semaphore:
                 # Force=False ensures we respect cooldown if it was just healed
-                return await self.metadata_healer.heal_song(song.id, force=False)
+                return await self.metadata_healer.heal_song(
+                    song.id, force=False, prefetched=prefetched.get(song.id)
+                )
 
         tasks = [heal_worker(s) for s in all_db_songs]
         results = await asyncio.gather(*tasks)
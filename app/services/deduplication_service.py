@@ -42,6 +42,83 @@ class DeduplicationService:
             
         return t_clean
 
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _normalize_artist(name: str) -> str:
+        """归一化歌手名用于去重：转小写，只保留第一位歌手 (去掉合作 / feat 等部分)"""
+        norm_artist = (name or "").lower().strip()
+        # 移除常见的合作标识之后的内容，为了更大概率合并
+        # 注意: 这可能会导致翻唱歌曲被合并，但通常 title 决定了一切
+        # 如果是翻唱，Title 通常会有 (Cover xxx) -> 被 _normalize_title 移除了 -> 冲突风险
+        # 但用户更想要的是 "合并"，所以我们激进一点
+
+        # Stage 1: Split by separators that require spaces (protects AC/DC, Earth, Wind & Fire)
+        space_split_chars = [' & ', ' / ']
+        for char in space_split_chars:
+             if char in norm_artist:
+                  norm_artist = norm_artist.split(char)[0].strip()
+
+        # Stage 2: Split by separators that act as clear delimiters (feat, ft., vs, comma)
+        # Comma usually implies list, so strict split is safer for "Artist A, Artist B"
+        strict_split_chars = [',', 'feat', 'ft.', 'vs']
+        for char in strict_split_chars:
+             if char in norm_artist:
+                  norm_artist = norm_artist.split(char)[0].strip()
+        return norm_artist
+
+    @staticmethod
+    def dedup_key(title: Optional[str], artist_name: Optional[str]) -> str:
+        """
+        去重键: 归一化标题 + 归一化歌手名
+
+        写入歌曲时持久化到 songs.dedup_key (见 canonical_songs)，
+        空标题返回空字符串 (不参与去重，也不会成为代表行)
+        """
+        if not title:
+            return ""
+        norm_title = DeduplicationService._normalize_title(title)
+        norm_artist = DeduplicationService._normalize_artist(artist_name or "")
+        return f"{norm_title}_{norm_artist}"
+
+    @staticmethod
+    def score(local_path: Optional[str], status: Optional[str], source_names: List[str]) -> int:
+        """同组歌曲的优选分数 (越高越适合作为代表)"""
+        score = 0
+        # 检查是否已本地化 (有 local_path 说明后端已确认存在物理文件)
+        if local_path:
+            score += 1000
+        if 'local' in source_names:
+            score += 800
+        if status == 'DOWNLOADED':
+            score += 500
+        # QQ 音乐数据作为主元数据通常更准确
+        if 'qqmusic' in source_names:
+            score += 100
+        return score
+
+    @staticmethod
+    def merge_canonical(canonical_songs: List[Any], members: List[Any]) -> List[Dict[str, Any]]:
+        """
+        合并已物化的去重结果: 每首代表歌曲与同 dedup_key 的其他版本合并来源等信息
+
+        与 deduplicate_songs 不同，不再重新分组和排序，保持数据库返回的顺序。
+
+        Args:
+            canonical_songs: 代表歌曲 (is_canonical=True，已按请求排序分页)
+            members: 同页各 dedup_key 下的非代表歌曲
+        """
+        by_key: Dict[str, List[Any]] = {}
+        for song in members:
+            by_key.setdefault(getattr(song, 'dedup_key', None), []).append(song)
+
+        result = []
+        for song in canonical_songs:
+            group = [song] + by_key.get(getattr(song, 'dedup_key', None), [])
+            best = DeduplicationService._pick_best_song(group)
+            if best:
+                result.append(best)
+        return result
+
     @staticmethod
     def deduplicate_songs(songs: List[Any]) -> List[Dict[str, Any]]:
         """
@@ -67,38 +144,7 @@ class DeduplicationService:
             if not title:
                 continue
                 
-            # 使用归一化后的标题作为粗略 Key
-            norm_title = DeduplicationService._normalize_title(title)
-            
-            # 改进: 尝试模糊匹配 Artist (解决 "Artist A" vs "Artist A feat. B" 无法合并的问题)
-            # 这里我们先只用 Title 分组，然后在组内再拆分? 
-            # 为了性能和简单，我们保持 Key 结构，但在生成 Key 之前做一次 Artist 归一化
-            
-            # Simple normalization for artist: Use the first part of the artist name (before & / feat)
-            import re
-            norm_artist = artist_name.lower().strip()
-            # 移除常见的合作标识之后的内容，为了更大概率合并
-            # 注意: 这可能会导致翻唱歌曲被合并，但通常 title 决定了一切
-            # 如果是翻唱，Title 通常会有 (Cover xxx) -> 被 _normalize_title 移除了 -> 冲突风险
-            # 但用户更想要的是 "合并"，所以我们激进一点
-            
-            # 仅仅保留第一位歌手的名称用于分组 Key
-            # 仅仅保留第一位歌手的名称用于分组 Key
-            
-            # Stage 1: Split by separators that require spaces (protects AC/DC, Earth, Wind & Fire)
-            space_split_chars = [' & ', ' / '] 
-            for char in space_split_chars:
-                 if char in norm_artist:
-                      norm_artist = norm_artist.split(char)[0].strip()
-
-            # Stage 2: Split by separators that act as clear delimiters (feat, ft., vs, comma)
-            # Comma usually implies list, so strict split is safer for "Artist A, Artist B"
-            strict_split_chars = [',', 'feat', 'ft.', 'vs']
-            for char in strict_split_chars:
-                 if char in norm_artist:
-                      norm_artist = norm_artist.split(char)[0].strip()
-            
-            key = f"{norm_title}_{norm_artist}"
+            key = DeduplicationService.dedup_key(title, artist_name)
             
             if key not in grouped_songs:
                 grouped_songs[key] = []
@@ -141,28 +187,11 @@ class DeduplicationService:
             
         # 评分函数
         def get_score(s):
-            score = 0
-            
-            # 检查是否已本地化 (有 local_path 说明后端已确认存在物理文件)
-            local_path = getattr(s, 'local_path', None)
-            status = getattr(s, 'status', '')
-            
-            # 检查来源集合
             sources_list = getattr(s, 'sources', [])
             source_names = [src.source for src in sources_list] if sources_list else []
-            
-            if local_path:
-                score += 1000
-            if 'local' in source_names:
-                score += 800
-            if status == 'DOWNLOADED':
-                score += 500
-            
-            # QQ 音乐数据作为主元数据通常更准确
-            if 'qqmusic' in source_names:
-                score += 100
-                
-            return score
+            return DeduplicationService.score(
+                getattr(s, 'local_path', None), getattr(s, 'status', ''), source_names
+            )
 
         # 按分数选出 Best
         sorted_group = sorted(group, key=get_score, reverse=True)
@@ -11,6 +11,9 @@
 
 Author: google
 Created: 2026-01-23
+
+更新日志:
+- 2026-10-19: 繁简转换抽出为模块级 to_simplified，供本地检索索引复用
 """
 import asyncio
 import aiohttp
@@ -37,6 +40,16 @@ except ImportError:
     logger.warning("opencc not installed, 繁简转换功能将不可用")
 
 
+def to_simplified(text: str) -> str:
+    """繁体转简体 (未安装 opencc 时原样返回)"""
+    if not _opencc_instance or not text:
+        return text
+    try:
+        return _opencc_instance.convert(text)
+    except Exception:
+        return text
+
+
 # ============== 数据类 ==============
 
 class DownloadStatus(Enum):
@@ -161,12 +174,7 @@ class DownloadService:
     
     def _convert_traditional_to_simplified(self, text: str) -> str:
         """繁体转简体"""
-        if not _opencc_instance or not text:
-            return text
-        try:
-            return _opencc_instance.convert(text)
-        except Exception:
-            return text
+        return to_simplified(text)
     
     def _calculate_weight_score(self, result: SearchResult, 
                                  expected_title: str, 
@@ -8,6 +8,9 @@ FavoriteService - 收藏管理服务
 
 Author: google
 Created: 2026-02-02 (从 LibraryService 拆分)
+
+更新日志:
+- 2026-10-19: 收藏状态与文件路径的写入改为经由后台写入队列提交
 """
 from typing import Optional, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -41,7 +44,7 @@ class FavoriteService:
         - 取消收藏: 移动到 'audio_cache/' 目录
         
         Args:
-            db (AsyncSession): 异步数据库会话。
+            db (AsyncSession): 异步数据库会话 (保留兼容，写入经由后台写入队列提交)。
             song_id (int): 歌曲在数据库中的唯一标识。
             
         Returns:
@@ -56,23 +59,29 @@ class FavoriteService:
         Raises:
             ServiceException: 当数据库操作或文件移动发生严重错误时抛出。
         """
-        song_repo = SongRepository(db)
-        song = await song_repo.toggle_favorite(song_id)
+        from app.services.write_queue import get_write_queue, update_mutation
+        queue = get_write_queue()
+        
+        async def flip(write_db: AsyncSession):
+            song = await SongRepository(write_db).toggle_favorite(song_id)
+            return (song.is_favorite, song.local_path) if song else None
         
-        if not song:
+        state = await queue.submit(flip)
+        if not state:
             return None
+        is_favorite, local_path = state
         
         # 如果没有本地文件，只更新状态
-        if not song.local_path:
+        if not local_path:
             return {
-                "song_id": song.id,
-                "is_favorite": song.is_favorite,
+                "song_id": song_id,
+                "is_favorite": is_favorite,
                 "new_path": None,
                 "message": "状态已更新 (无本地文件)"
             }
         
         try:
-            old_path = Path(song.local_path).resolve()
+            old_path = Path(local_path).resolve()
             
             # Load config directories
             from core.config_manager import get_config_manager
@@ -96,14 +105,14 @@ class FavoriteService:
                     logger.info(f"Song is in static library ({library_dir}), skipping move.")
                     # Do not move, just return success
                     return {
-                        "song_id": song.id,
-                        "is_favorite": song.is_favorite,
-                        "new_path": song.local_path
+                        "song_id": song_id,
+                        "is_favorite": is_favorite,
+                        "new_path": local_path
                     }
 
                 new_dir = None
                 
-                if song.is_favorite:
+                if is_favorite:
                     # 收藏操作:
                     # 仅当文件在 Cache 目录时，移动到 Favorites
                     if str(old_path).startswith(str(cache_dir)):
@@ -132,9 +141,8 @@ class FavoriteService:
                         )
                         
                         # 更新数据库路径
-                        song.local_path = str(new_path)
-                        await db.commit()
-                        await db.refresh(song)
+                        local_path = str(new_path)
+                        await queue.submit(update_mutation(Song, {song_id: {"local_path": local_path}}))
             else:
                 logger.warning(f"File not found: {old_path}")
         
@@ -143,9 +151,9 @@ class FavoriteService:
             # 即使移动失败，收藏状态已变更
         
         return {
-            "song_id": song.id,
-            "is_favorite": song.is_favorite,
-            "new_path": song.local_path
+            "song_id": song_id,
+            "is_favorite": is_favorite,
+            "new_path": local_path
         }
     
     @handle_service_errors(fallback_value=[])
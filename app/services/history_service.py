@@ -11,6 +11,7 @@ Author: GOOGLE music-monitor development team
 
 更新日志:
 - 2026-01-22: 初始创建，从 media.py Router 中提取业务逻辑
+- 2026-10-19: 去重移到 SQL (dedup_key): 每页恰好 limit 个不同歌曲，总数用 COUNT(DISTINCT)，支持游标
 """
 from typing import Optional, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,6 +21,7 @@ import json
 import logging
 import os
 
+from app.models.media_record import MediaRecord
 from app.repositories.media_record import MediaRecordRepository
 from app.utils.error_handler import handle_service_errors
 
@@ -36,26 +38,31 @@ class HistoryService:
     def __init__(self, db: AsyncSession = None):
         self.db = db
     
-    @handle_service_errors(fallback_value={'items': [], 'total': 0}, raise_on_critical=False)
+    @handle_service_errors(fallback_value={'items': [], 'total': 0, 'next_cursor': None}, raise_on_critical=False)
     async def get_history(
         self,
         db: AsyncSession,
         limit: int = 20,
         offset: int = 0,
         author: Optional[str] = None,
-        downloaded_only: bool = False
+        downloaded_only: bool = False,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         获取歌曲历史列表（带去重）
+
+        Args:
+            cursor: 上一页返回的 next_cursor，提供时忽略 offset
         """
         repo = MediaRecordRepository(db)
         
-        # 获取分页数据
-        records, _ = await repo.get_songs_paginated(
+        # 获取分页数据: 每个去重键的代表记录 + 同键的其他记录 (用于合并平台信息)
+        records, members, next_cursor = await repo.get_unique_paginated(
             offset=offset,
             limit=limit,
             author=author,
-            downloaded_only=downloaded_only
+            downloaded_only=downloaded_only,
+            cursor=cursor
         )
         
         # [Revised] 精准批量查询对应的本地 SongSource 记录
@@ -90,49 +97,37 @@ class HistoryService:
                     else:
                         logger.warning(f"[History] Matched {source_key} but no song attached")
 
-        # 实现去重逻辑
+        # 代表记录已按排序去重，其他记录只合并平台信息
         unique_items_map = {}
         for record in records:
-            unique_key_combo = self._get_dedup_key(record)
-            
             # 获取对应的本地来源对象
             mid = str(record.media_id)
             if record.source == 'local' and ('/' in mid or '\\' in mid):
                 mid = os.path.basename(mid)
                 
             matched_source = source_map.get(f"{record.source}_{mid}")
-            
-            if unique_key_combo in unique_items_map:
-                # 合并平台信息
-                self._merge_record(unique_items_map[unique_key_combo], record)
-            else:
-                # 新增项目
-                unique_items_map[unique_key_combo] = self._format_record(record, matched_source)
-        
-        # 转换为列表并排序
-        items = list(unique_items_map.values())        # 排序
-        items.sort(
-            key=lambda x: x['found_at'] or x['publish_time'] or x['created_at'] or '', 
-            reverse=True
-        )
+            unique_items_map[self._get_dedup_key(record)] = self._format_record(record, matched_source)
+
+        for record in members:
+            item = unique_items_map.get(self._get_dedup_key(record))
+            if item:
+                self._merge_record(item, record)
         
         # 计算去重后的总数
-        all_records = await repo.get_all_for_dedup(
+        total_unique = await repo.count_unique(
             author=author,
             downloaded_only=downloaded_only
         )
-        total_unique = len(set(
-            self._get_dedup_key(r) for r in all_records
-        ))
         
         return {
-            'items': items,
-            'total': total_unique
+            'items': list(unique_items_map.values()),
+            'total': total_unique,
+            'next_cursor': next_cursor
         }
     
     def _get_dedup_key(self, record) -> str:
         """生成去重键"""
-        return f"{record.title}_{record.author}_{record.album}".lower()
+        return record.dedup_key or MediaRecord.make_dedup_key(record.title, record.author, record.album)
     
     def _format_record(self, record, matched_source: Any = None) -> Dict[str, Any]:
         """格式化单条记录为前端期望的格式"""
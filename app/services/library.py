@@ -138,13 +138,25 @@ class LibraryService:
     
     # ==================== 歌手刷新 ====================
     
-    async def refresh_artist(self, db: AsyncSession, artist_name: str) -> int:
+    async def refresh_artist(
+        self,
+        db: AsyncSession,
+        artist_name: str,
+        pre_scan: str = "artist",
+        sync_mode: str = "full"
+    ) -> int:
         """
         刷新歌手歌曲列表
         
         委托给 ArtistRefreshService
+        
+        Args:
+            pre_scan: 刷新前的本地预扫描模式 ("artist" / "full" / "none")
+            sync_mode: 同步模式 ("full" 全量对账 / "incremental" 增量)
         """
-        count = await self.artist_refresh_service.refresh(db, artist_name)
+        count = await self.artist_refresh_service.refresh(
+            db, artist_name, pre_scan=pre_scan, sync_mode=sync_mode
+        )
         
         # [Fix] Trigger pending downloads immediately
         try:
@@ -184,11 +196,12 @@ class LibraryService:
         offset: int,
         fetch_limit: int,
         sort_by: str,
-        order: str
-    ) -> tuple[list, int]:
+        order: str,
+        cursor: Optional[str] = None
+    ) -> tuple[list, int, Optional[str]]:
         """专门获取所有本地歌曲，委托给 SongManagementService"""
         return await self.song_service.get_local_songs_paginated(
-            db, offset, fetch_limit, sort_by, order
+            db, offset, fetch_limit, sort_by, order, cursor
         )
         
     async def force_fix_quality(self, db: AsyncSession) -> tuple[int, list]:
@@ -0,0 +1,548 @@
+# -*- coding: utf-8 -*-
+"""
+LibrarySearchService - 本地资料库全文检索
+
+基于 SQLite FTS5 (trigram 分词，支持中文子串匹配) 检索歌曲标题、歌手、专辑和歌词：
+- 索引内容统一做繁转简 + 小写 (复用 download_service.to_simplified)，安装 pypinyin 时额外索引拼音与首字母
+- 每首歌一条文档 (rowid = song_id * 2)，每位歌手一条文档 (rowid = artist_id * 2 + 1)
+- 歌词取自 song_sources.data_json["lyrics"] (治愈 / 扫描 / 刷新写入歌词的位置)，同一歌曲多个来源去重后合并
+- 写入同步: songs / artists / song_sources 上的触发器把变更记入 library_search_dirty，
+  触发器不依赖 Python 函数，任何写入方都能被感知；涉及这些表的会话提交后，
+  IndexSyncer 防抖 (SYNC_DEBOUNCE_SECONDS) 经由串行写者增量重建脏文档，启动时也会同步一次。
+  检索本身只读，不做同步
+- 结果按 bm25 排序 (标题 > 歌手 > 专辑 > 拼音 > 歌词)
+- 两字检索词 (trigram 无法匹配) 走二元索引 library_fts_bigram: 汉字连续段预先拆为相邻两字的词，
+  unicode61 分词后同样按 bm25 排序；单字等其余短词用 LIKE 过滤，按命中列优先级排序
+- 非 SQLite 或不支持 FTS5 时退化为 ILIKE 查询
+
+更新日志:
+- 2026-10-19: 歌词改为索引 song_sources.data_json 中的歌词 (lyrics 表无写入方)
+- 2026-10-19: 新增二元索引支持两字检索词的排序检索，LIKE 短词按列优先级排序
+
+Author: google
+Created: 2026-10-19
+"""
+import asyncio
+import json
+import logging
+import re
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select, text, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.artist import Artist
+from app.models.song import Song, SongSource
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:  # 可选依赖: 未安装时不索引拼音
+    lazy_pinyin = None
+
+FTS_TABLE = "library_fts"
+BIGRAM_TABLE = "library_fts_bigram"
+DIRTY_TABLE = "library_search_dirty"
+
+DEFAULT_SEARCH_LIMIT = 20
+SYNC_CHUNK_SIZE = 500
+# 提交后等待多久再同步索引 (合并扫描等连续写入)
+SYNC_DEBOUNCE_SECONDS = 0.5
+# trigram 分词要求检索词至少 3 个字符，更短的词改用 LIKE 过滤
+MIN_MATCH_LENGTH = 3
+# bm25 列权重: title, artist, album, lyrics, pinyin
+BM25_WEIGHTS = (10.0, 5.0, 3.0, 1.0, 2.0)
+# LIKE 短词按命中的列排序 (越靠前越相关)
+LIKE_COLUMN_PRIORITY = ("title", "artist", "album", "pinyin", "lyrics")
+
+_LRC_TAG = re.compile(r"\[[^\]]*\]")
+# 汉字 / 假名 / 韩文连续段 (二元索引中拆为相邻两字)
+_CJK_RUN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+")
+
+SCHEMA_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, artist, album, lyrics, pinyin, tokenize='trigram'
+    )""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {BIGRAM_TABLE} USING fts5(
+        title, artist, album, lyrics, pinyin, tokenize='unicode61'
+    )""",
+    f"""CREATE TABLE IF NOT EXISTS {DIRTY_TABLE} (
+        kind TEXT NOT NULL, ref_id INTEGER NOT NULL, PRIMARY KEY (kind, ref_id)
+    ) WITHOUT ROWID""",
+    # 歌曲
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_song_ins AFTER INSERT ON songs BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('song', NEW.id); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_song_upd AFTER UPDATE OF title, album, artist_id ON songs BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('song', NEW.id); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_song_del AFTER DELETE ON songs BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('song', OLD.id); END""",
+    # 歌手 (改名时该歌手的歌曲也需重建)
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_artist_ins AFTER INSERT ON artists BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('artist', NEW.id); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_artist_upd AFTER UPDATE OF name ON artists BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('artist', NEW.id);
+        INSERT OR IGNORE INTO {DIRTY_TABLE} SELECT 'song', id FROM songs WHERE artist_id = NEW.id; END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_artist_del AFTER DELETE ON artists BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('artist', OLD.id); END""",
+    # 来源 (data_json 中的歌词)
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_source_ins AFTER INSERT ON song_sources BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('song', NEW.song_id); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_source_upd AFTER UPDATE OF data_json, song_id ON song_sources BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('song', NEW.song_id);
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('song', OLD.song_id); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_library_search_source_del AFTER DELETE ON song_sources BEGIN
+        INSERT OR IGNORE INTO {DIRTY_TABLE} VALUES ('song', OLD.song_id); END""",
+]
+
+
+def normalize(value: Optional[str]) -> str:
+    """检索归一化: 繁转简 + 小写"""
+    if not value:
+        return ""
+    from app.services.download_service import to_simplified
+    return to_simplified(value).lower().strip()
+
+
+def to_pinyin(value: str) -> str:
+    """全拼 + 首字母 (未安装 pypinyin 时为空)"""
+    if not value or lazy_pinyin is None:
+        return ""
+    full = "".join(lazy_pinyin(value))
+    initials = "".join(lazy_pinyin(value, style=Style.FIRST_LETTER))
+    return f"{full} {initials}".lower()
+
+
+def to_bigrams(value: str) -> str:
+    """二元索引文本: 汉字连续段拆为相邻两字 (单字保留)，其余字符交给 unicode61 分词"""
+    def split(match):
+        run = match.group()
+        return " " + " ".join([run[i:i + 2] for i in range(len(run) - 1)] or [run]) + " "
+    return _CJK_RUN.sub(split, value or "")
+
+
+def _phrase(term: str) -> str:
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def _source_lyrics(data_json) -> Optional[str]:
+    """来源 data_json 中的歌词 (兼容以 JSON 字符串存储的旧数据)"""
+    if isinstance(data_json, str):
+        try:
+            data_json = json.loads(data_json)
+        except ValueError:
+            return None
+    lyrics = data_json.get("lyrics") if isinstance(data_json, dict) else None
+    return lyrics if isinstance(lyrics, str) else None
+
+
+async def _table_exists(db: AsyncSession, name: str) -> bool:
+    row = (await db.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name})).first()
+    return row is not None
+
+
+def _song_rowid(song_id: int) -> int:
+    return song_id * 2
+
+
+def _artist_rowid(artist_id: int) -> int:
+    return artist_id * 2 + 1
+
+
+def ensure_schema(connection) -> bool:
+    """
+    创建 FTS 表、脏记录表与触发器 (同步，幂等)
+
+    首次创建时把已有歌曲和歌手全部标记为待索引；首次跟踪来源歌词时重建全部歌曲文档。
+
+    Returns:
+        当前数据库是否支持全文检索
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+
+    def exists(name):
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name}
+        ).first() is not None
+
+    existed = exists(FTS_TABLE) and exists(BIGRAM_TABLE)
+    lyrics_tracked = exists("trg_library_search_source_ins")
+    try:
+        for ddl in SCHEMA_DDL:
+            connection.execute(text(ddl))
+    except Exception as e:
+        logger.warning(f"⚠️ 无法创建全文检索索引 (FTS5 不可用?): {e}")
+        return False
+    if not existed:
+        connection.execute(text(f"INSERT OR IGNORE INTO {DIRTY_TABLE} SELECT 'song', id FROM songs"))
+        connection.execute(text(f"INSERT OR IGNORE INTO {DIRTY_TABLE} SELECT 'artist', id FROM artists"))
+    elif not lyrics_tracked:
+        # 旧索引未包含来源中的歌词，重建全部歌曲文档
+        connection.execute(text(f"INSERT OR IGNORE INTO {DIRTY_TABLE} SELECT 'song', id FROM songs"))
+    return True
+
+
+class LibrarySearchService:
+    """本地资料库检索"""
+
+    async def is_available(self, db: AsyncSession) -> bool:
+        return db.bind.dialect.name == "sqlite" and await _table_exists(db, FTS_TABLE)
+
+    async def has_pending(self, db: AsyncSession) -> bool:
+        """是否有尚未同步到索引的写入"""
+        return (await db.execute(text(f"SELECT 1 FROM {DIRTY_TABLE} LIMIT 1"))).first() is not None
+
+    # ==================== 索引同步 ====================
+
+    async def sync(self, db: AsyncSession) -> int:
+        """
+        增量重建脏记录对应的索引文档 (需要可写会话，不负责提交)
+
+        Returns:
+            处理的记录数
+        """
+        rows = (await db.execute(text(f"SELECT kind, ref_id FROM {DIRTY_TABLE}"))).all()
+        if not rows:
+            return 0
+
+        song_ids = [ref_id for kind, ref_id in rows if kind == "song"]
+        artist_ids = [ref_id for kind, ref_id in rows if kind == "artist"]
+        for i in range(0, len(song_ids), SYNC_CHUNK_SIZE):
+            await self._sync_songs(db, song_ids[i:i + SYNC_CHUNK_SIZE])
+        for i in range(0, len(artist_ids), SYNC_CHUNK_SIZE):
+            await self._sync_artists(db, artist_ids[i:i + SYNC_CHUNK_SIZE])
+
+        await db.execute(
+            text(f"DELETE FROM {DIRTY_TABLE} WHERE kind = :kind AND ref_id = :ref_id"),
+            [{"kind": kind, "ref_id": ref_id} for kind, ref_id in rows]
+        )
+        return len(rows)
+
+    async def _replace_docs(self, db: AsyncSession, rowids: List[int], docs: List[Dict[str, Any]]):
+        bigram_docs = [
+            {key: value if key == "rowid" else to_bigrams(value) for key, value in doc.items()}
+            for doc in docs
+        ]
+        for table, rows in ((FTS_TABLE, docs), (BIGRAM_TABLE, bigram_docs)):
+            await db.execute(text(f"DELETE FROM {table} WHERE rowid = :rowid"), [{"rowid": r} for r in rowids])
+            if rows:
+                await db.execute(
+                    text(f"INSERT INTO {table} (rowid, title, artist, album, lyrics, pinyin) "
+                         "VALUES (:rowid, :title, :artist, :album, :lyrics, :pinyin)"),
+                    rows
+                )
+
+    async def _sync_songs(self, db: AsyncSession, song_ids: List[int]):
+        songs = (await db.execute(
+            select(Song.id, Song.title, Song.album, Artist.name)
+            .outerjoin(Artist, Song.artist_id == Artist.id)
+            .where(Song.id.in_(song_ids))
+        )).all()
+
+        # 各来源的歌词 (多个来源常为同一份歌词，去重)
+        lyrics: Dict[int, List[str]] = {}
+        for song_id, data_json in (await db.execute(
+            select(SongSource.song_id, SongSource.data_json).where(SongSource.song_id.in_(song_ids))
+        )).all():
+            content = _source_lyrics(data_json)
+            if content and content not in lyrics.setdefault(song_id, []):
+                lyrics[song_id].append(content)
+
+        docs = [
+            {
+                "rowid": _song_rowid(song_id),
+                "title": normalize(title),
+                "artist": normalize(artist_name),
+                "album": normalize(album),
+                "lyrics": normalize(" ".join(_LRC_TAG.sub("", part) for part in lyrics.get(song_id, []))),
+                "pinyin": to_pinyin(f"{normalize(title)} {normalize(artist_name)}"),
+            }
+            for song_id, title, album, artist_name in songs
+        ]
+        await self._replace_docs(db, [_song_rowid(i) for i in song_ids], docs)
+
+    async def _sync_artists(self, db: AsyncSession, artist_ids: List[int]):
+        artists = (await db.execute(
+            select(Artist.id, Artist.name).where(Artist.id.in_(artist_ids))
+        )).all()
+        docs = [
+            {
+                "rowid": _artist_rowid(artist_id), "title": "", "artist": normalize(name),
+                "album": "", "lyrics": "", "pinyin": to_pinyin(normalize(name)),
+            }
+            for artist_id, name in artists
+        ]
+        await self._replace_docs(db, [_artist_rowid(i) for i in artist_ids], docs)
+
+    # ==================== 检索 ====================
+
+    @staticmethod
+    def _build_query(query: str) -> Tuple[Optional[str], Optional[str], List[str]]:
+        """
+        拆分检索词: (trigram MATCH 表达式, 二元索引 MATCH 表达式, 需要 LIKE 过滤的短词)
+
+        两字汉字词在二元索引中是完整的词；英文 / 数字短词按前缀匹配；
+        单字与中英混合的短词无法走索引，用 LIKE。
+        """
+        trigram, bigram, like_terms = [], [], []
+        for term in normalize(query).split():
+            if len(term) >= MIN_MATCH_LENGTH:
+                trigram.append(_phrase(term))
+            elif len(term) == 2 and _CJK_RUN.fullmatch(term):
+                bigram.append(_phrase(term))
+            elif term.isascii() and term.isalnum():
+                bigram.append(_phrase(term) + "*")
+            else:
+                like_terms.append(term)
+        return " AND ".join(trigram) or None, " AND ".join(bigram) or None, like_terms
+
+    async def search(self, db: AsyncSession, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> Dict[str, List]:
+        """
+        检索资料库
+
+        Returns:
+            {"songs": [...], "artists": [...], "albums": [...]}，各自按相关度排序
+        """
+        if not query or not query.strip():
+            return {"songs": [], "artists": [], "albums": []}
+        if not await self.is_available(db):
+            return await self._search_fallback(db, query, limit)
+
+        match, bigram, like_terms = self._build_query(query)
+        params = {"limit": limit * 4, "match": match, "bigram": bigram}
+        # 有 trigram 词时以 trigram 索引排序，否则以二元索引排序，二者都没有时只剩 LIKE
+        table = FTS_TABLE if match or not bigram else BIGRAM_TABLE
+        conditions, order = [], []
+        if match:
+            conditions.append(f"{FTS_TABLE} MATCH :match")
+        if bigram:
+            conditions.append(
+                f"{BIGRAM_TABLE} MATCH :bigram" if table == BIGRAM_TABLE
+                else f"rowid IN (SELECT rowid FROM {BIGRAM_TABLE} WHERE {BIGRAM_TABLE} MATCH :bigram)"
+            )
+        if match or bigram:
+            order.append(f"bm25({table}, {', '.join(map(str, BM25_WEIGHTS))})")
+
+        like_conditions, priority = [], []
+        for i, term in enumerate(like_terms):
+            like = f"LIKE :t{i} ESCAPE '\\'"
+            like_conditions.append("(" + " OR ".join(f"{column} {like}" for column in LIKE_COLUMN_PRIORITY) + ")")
+            priority.append("CASE " + " ".join(
+                f"WHEN {column} {like} THEN {rank}" for rank, column in enumerate(LIKE_COLUMN_PRIORITY)
+            ) + " END")
+            params[f"t{i}"] = "%{}%".format(term.replace("%", r"\%").replace("_", r"\_"))
+        if like_conditions:
+            # LIKE 针对原文 (二元索引中的文本已被拆分)
+            if table == FTS_TABLE:
+                conditions.extend(like_conditions)
+                order.append(" + ".join(priority))
+            else:
+                conditions.append(f"rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {' AND '.join(like_conditions)})")
+        order.append("rowid")
+
+        hits = (await db.execute(
+            text(f"SELECT rowid FROM {table} WHERE {' AND '.join(conditions)} "
+                 f"ORDER BY {', '.join(order)} LIMIT :limit"),
+            params
+        )).scalars().all()
+
+        song_rank = [rowid // 2 for rowid in hits if rowid % 2 == 0]
+        artist_rank = [rowid // 2 for rowid in hits if rowid % 2 == 1]
+        return await self._load_results(db, song_rank, artist_rank, query, limit)
+
+    async def _search_fallback(self, db: AsyncSession, query: str, limit: int) -> Dict[str, List]:
+        """不支持 FTS5 时的 ILIKE 检索"""
+        pattern = f"%{query.strip()}%"
+        song_ids = (await db.execute(
+            select(Song.id).outerjoin(Artist, Song.artist_id == Artist.id)
+            .where(or_(Song.title.ilike(pattern), Song.album.ilike(pattern), Artist.name.ilike(pattern)))
+            .limit(limit * 4)
+        )).scalars().all()
+        artist_ids = (await db.execute(
+            select(Artist.id).where(Artist.name.ilike(pattern)).limit(limit)
+        )).scalars().all()
+        return await self._load_results(db, list(song_ids), list(artist_ids), query, limit)
+
+    async def _load_results(self, db: AsyncSession, song_rank: List[int], artist_rank: List[int],
+                            query: str, limit: int) -> Dict[str, List]:
+        from sqlalchemy.orm import joinedload
+
+        songs_by_id = {}
+        if song_rank:
+            songs_by_id = {
+                s.id: s for s in (await db.execute(
+                    select(Song).options(joinedload(Song.artist)).where(Song.id.in_(song_rank))
+                )).scalars().all()
+            }
+        artists_by_id = {}
+        if artist_rank:
+            artists_by_id = {
+                a.id: a for a in (await db.execute(
+                    select(Artist).where(Artist.id.in_(artist_rank))
+                )).scalars().all()
+            }
+
+        # 同一去重键只保留相关度最高的一首
+        songs, seen_keys = [], set()
+        for song_id in song_rank:
+            song = songs_by_id.get(song_id)
+            if not song:
+                continue
+            key = song.dedup_key or f"id:{song.id}"
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            songs.append(song)
+
+        # 专辑: 从命中的歌曲中聚合专辑名包含检索词的专辑
+        terms = normalize(query).split()
+        albums, seen_albums = [], set()
+        for song in songs:
+            if not song.album or not all(t in normalize(song.album) for t in terms):
+                continue
+            artist_name = song.artist.name if song.artist else ""
+            if (song.album, artist_name) in seen_albums:
+                continue
+            seen_albums.add((song.album, artist_name))
+            albums.append({"album": song.album, "artist": artist_name, "cover": song.cover})
+
+        return {
+            "songs": [
+                {
+                    "id": s.id,
+                    "title": s.title,
+                    "artist": s.artist.name if s.artist else "",
+                    "album": s.album,
+                    "cover": s.cover,
+                    "local_path": s.local_path,
+                    "status": s.status,
+                    "publish_time": s.publish_time,
+                }
+                for s in songs[:limit]
+            ],
+            "artists": [
+                {"id": a.id, "name": a.name, "avatar": a.avatar, "is_monitored": a.is_monitored}
+                for a in (artists_by_id.get(i) for i in artist_rank) if a
+            ][:limit],
+            "albums": albums[:limit],
+        }
+
+
+# ==================== 写入后同步 ====================
+
+class IndexSyncer:
+    """
+    写入提交后的防抖索引同步
+
+    request() 只登记一次同步请求: 等待 delay 秒合并后续提交后，
+    在单个后台任务中经由串行写者执行 LibrarySearchService.sync；
+    同步期间又有新的提交时再跑一轮。
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None, delay: float = SYNC_DEBOUNCE_SECONDS):
+        """
+        Args:
+            session_factory: 异步会话工厂 (默认经由 db_writer 写入，测试时可替换)
+            delay: 防抖等待时间 (秒)
+        """
+        self.session_factory = session_factory
+        self.delay = delay
+        # 启动时确认支持 FTS5 后才开启 (core.database.async_init_db)
+        self.enabled = False
+        self.synced = 0
+        self._requested = False
+        self._task: Optional[asyncio.Task] = None
+
+    def request(self):
+        """登记一次同步 (可在同步上下文中调用；没有运行中的事件循环时忽略)"""
+        if not self.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._requested = True
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def flush(self):
+        """等待已登记的同步完成"""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        """完成剩余同步 (应用关闭时调用)"""
+        await self.flush()
+        self._task = None
+
+    @asynccontextmanager
+    async def _session(self):
+        if self.session_factory is None:
+            from core.database import db_writer
+            async with db_writer.session() as db:
+                yield db
+            return
+
+        async with self.session_factory() as db:
+            try:
+                yield db
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def _run(self):
+        while self._requested:
+            self._requested = False
+            await asyncio.sleep(self.delay)
+            try:
+                async with self._session() as db:
+                    self.synced += await LibrarySearchService().sync(db)
+            except Exception as e:
+                logger.error(f"❌ 检索索引同步失败: {e}")
+
+
+_TOUCHED = "library_search_touched"
+_INDEXED_MODELS = (Song, Artist, SongSource)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    if not _index_syncer.enabled or session.info.get(_TOUCHED):
+        return
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _INDEXED_MODELS):
+            session.info[_TOUCHED] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement(state):
+    if not _index_syncer.enabled or not (state.is_update or state.is_delete or state.is_insert):
+        return
+    mapper = state.bind_mapper
+    if mapper is not None and mapper.class_ in _INDEXED_MODELS:
+        state.session.info[_TOUCHED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _sync_after_commit(session):
+    if session.info.pop(_TOUCHED, False):
+        _index_syncer.request()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_TOUCHED, None)
+
+
+# 全局实例
+_index_syncer = IndexSyncer()
+
+
+def get_index_syncer() -> IndexSyncer:
+    """获取检索索引同步器单例"""
+    return _index_syncer
@@ -9,8 +9,12 @@ MediaService - 媒体服务业务逻辑处理
 
 Author: google
 Created: 2026-01-23
+
+更新日志:
+- 2026-10-19: 音频路径解析结果进入进程内 LRU (filename -> 路径 + stat)，扫描发现变化时失效
 """
-from typing import List, Optional, Dict, Any
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from loguru import logger
@@ -28,6 +32,61 @@ from core.config_manager import get_config_manager
 # Setup logger
 logger = logging.getLogger(__name__)
 
+DEFAULT_AUDIO_PATH_CACHE_SIZE = 2048
+
+
+class AudioPathCache:
+    """
+    音频路径解析缓存 (LRU)
+
+    filename -> (绝对路径, stat)。命中时只做一次 os.stat 校验文件仍在且未变化，
+    不再查询数据库和遍历配置目录；文件消失时自动剔除并重新解析。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_AUDIO_PATH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[str, os.stat_result]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filename: str) -> Optional[Tuple[str, os.stat_result]]:
+        entry = self._data.get(filename)
+        if entry is None:
+            self.misses += 1
+            return None
+        path = entry[0]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            del self._data[filename]
+            self.misses += 1
+            return None
+        self._data[filename] = (path, stat)
+        self._data.move_to_end(filename)
+        self.hits += 1
+        return path, stat
+
+    def set(self, filename: str, path: str, stat: os.stat_result):
+        self._data[filename] = (path, stat)
+        self._data.move_to_end(filename)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, path: Optional[str] = None):
+        """剔除指向 path 的条目；不传 path 时清空 (扫描发现文件增删时调用)"""
+        if path is None:
+            self._data.clear()
+            return
+        path = os.path.abspath(path)
+        for key in [k for k, (p, _) in self._data.items() if p == path]:
+            del self._data[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+audio_path_cache = AudioPathCache()
+
 
 class MediaService:
     """媒体服务"""
@@ -101,6 +160,22 @@ class MediaService:
         
         return result
 
+    async def resolve_audio_file(self, filename: str, db: AsyncSession = None) -> Tuple[str, os.stat_result]:
+        """
+        解析音频文件的绝对路径和 stat (优先走 audio_path_cache)
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        cached = audio_path_cache.get(filename)
+        if cached:
+            return cached
+        file_path, _ = await self.get_audio_path(filename, db)
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        audio_path_cache.set(filename, file_path, stat)
+        return file_path, stat
+
     async def get_audio_path(self, filename: str, db: AsyncSession = None) -> tuple[str, Optional[Song]]:
         """
         获取音频文件路径 (增强版: 支持跨平台路径修复)
@@ -382,32 +457,36 @@ async def find_artist_ids(artist_name: str) -> List[Dict[str, any]]:
 
 async def check_file_integrity():
     """检查媒体文件完整性"""
-    from core.database import AsyncSessionLocal
+    from core.database import AsyncReadSessionLocal
     from app.models.song import Song
-    from sqlalchemy import select
+    from app.services.write_queue import get_write_queue
+    from sqlalchemy import select, update
     
     logger.info("开始文件完整性检查...")
     
-    async with AsyncSessionLocal() as db:
-        try:
-            stmt = select(Song).where(Song.local_path.isnot(None))
-            result = await db.execute(stmt)
-            records = result.scalars().all()
-            
-            missing_count = 0
-            for record in records:
-                if record.local_path and not os.path.exists(record.local_path):
-                    logger.warning(f"文件丢失: {record.title} at {record.local_path}")
-                    record.status = "FILE_MISSING"
-                    missing_count += 1
-            
-            if missing_count > 0:
-                await db.commit()
-            
-            logger.info(f"文件完整性检查完成，丢失: {missing_count}")
-            
-        except Exception as e:
-            logger.error(f"文件完整性检查错误: {e}")
+    try:
+        # 只读扫描，检查文件期间不持有写锁
+        async with AsyncReadSessionLocal() as db:
+            stmt = select(Song.id, Song.title, Song.local_path).where(Song.local_path.isnot(None))
+            records = (await db.execute(stmt)).all()
+        
+        missing_ids = []
+        for song_id, title, local_path in records:
+            if local_path and not os.path.exists(local_path):
+                logger.warning(f"文件丢失: {title} at {local_path}")
+                missing_ids.append(song_id)
+        
+        if missing_ids:
+            await get_write_queue().submit(
+                lambda db: db.execute(
+                    update(Song).where(Song.id.in_(missing_ids)).values(status="FILE_MISSING")
+                )
+            )
+        
+        logger.info(f"文件完整性检查完成，丢失: {len(missing_ids)}")
+        
+    except Exception as e:
+        logger.error(f"文件完整性检查错误: {e}")
 
 
 async def auto_cache_recent_songs():
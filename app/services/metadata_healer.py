@@ -10,6 +10,10 @@ MetadataHealer - 元数据治愈者
 
 更新日志:
 - 2026-02-10: 移除元数据补全冷却期限制，网易云和QQ音乐接口无需冷却
+- 2026-10-19: 已关联在线源的歌曲按源批量预取元数据 (prefetch_metadata)
+- 2026-10-19: 预取改为在循环中按块进行 (先检查暂停/取消)，任务可随时暂停取消、进度即时更新
+- 2026-10-19: 读取后即关闭会话，治愈结果、歌词同步与头像的写入经由后台写入队列提交
+- 2026-10-19: 预取有结果即直接使用 (缺失字段不再触发完整搜索)，预取无结果时才在线搜索
 
 Author: ali
 Created: 2026-02-05
@@ -17,18 +21,29 @@ Created: 2026-02-05
 import logging
 import os
 import re
+from collections import defaultdict
+from functools import partial
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Tuple
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import flag_modified
 from core.database import AsyncSessionLocal
-from app.models.song import Song
+from app.models.song import Song, SongSource
 from app.services.smart_merger import SmartMerger, SongMetadata
-from app.services.metadata_service import MetadataService
+from app.services.metadata_service import MetadataService, MetadataResult
 from app.services.tag_service import TagService
+from app.services.write_queue import get_write_queue, take_changes, update_mutation
 
 logger = logging.getLogger(__name__)
 
+# 支持按 ID 批量获取元数据的在线源
+ONLINE_SOURCES = ("netease", "qqmusic")
+# 每次批量预取的待治愈歌曲数
+PREFETCH_CHUNK_SIZE = 20
+# 治愈时可能修改的歌曲字段 (经由写入队列提交)
+HEALED_SONG_FIELDS = ("title", "album", "publish_time", "cover")
+
 class MetadataHealer:
     """
     元数据治愈者
@@ -68,346 +83,421 @@ class MetadataHealer:
             ).where(Song.local_path.isnot(None)).limit(limit * 2) # 取多一点供筛选
             
             songs = (await db.execute(stmt)).scalars().all()
+        
+        # TaskMonitor Start
+        from app.services.task_monitor import task_monitor, TaskCancelledException
+        task_id = await task_monitor.start_task("heal", "正在初始化元数据治愈...")
+        
+        total_candidates = len(songs)
+        logger.info(f"🚑 找到 {total_candidates} 首待检查歌曲")
+        
+        healed_count = 0
+        processed_so_far = 0
+        
+        try:
+            # 🔧 关键修复: 先检查完整性，已完整的直接跳过
+            incomplete_ids = {song.id for song in songs if not self._is_complete(song)}
             
-            # TaskMonitor Start
-            from app.services.task_monitor import task_monitor, TaskCancelledException
-            task_id = await task_monitor.start_task("heal", "正在初始化元数据治愈...")
-            
-            total_candidates = len(songs)
-            logger.info(f"🚑 找到 {total_candidates} 首待检查歌曲")
-            
-            healed_count = 0
-            processed_so_far = 0
+            # 批量预取的元数据 (在循环中按块填充)
+            prefetched: Dict[int, MetadataResult] = {}
+            prefetch_done = set()
             
-            try:
-                for song in songs:
-                    if healed_count >= limit:
-                        break
-                    
-                    # Check for Pause/Cancel
-                    await task_monitor.check_status(task_id)
+            for index, song in enumerate(songs):
+                if healed_count >= limit:
+                    break
+                
+                # Check for Pause/Cancel
+                await task_monitor.check_status(task_id)
 
-                    processed_so_far += 1
-                    
-                    # Update Progress
-                    pct = int((processed_so_far / total_candidates) * 100)
-                    await task_monitor.update_progress(
-                        task_id,
-                        pct,
-                        f"正在检查: {song.title}",
-                        details={"healed": healed_count, "total": total_candidates}
-                    )
-                    
-                    # 🔧 关键修复: 先检查完整性，如果已完整则直接跳过
-                    if self._is_complete(song):
-                        continue
-
-                    # 🔧 关键修复: 在补全之前，先尝试从文件标签同步歌词
-                    if song.local_path and os.path.exists(song.local_path):
-                        try:
-                            file_tags = await TagService.read_tags(song.local_path)
-                            file_lyrics = file_tags.get("lyrics") if file_tags else None
-                            
-                            if file_lyrics:
-                                has_lyrics_in_db = any(self._parse_data_json(src.data_json).get("lyrics") for src in song.sources)
-                                if not has_lyrics_in_db:
-                                    logger.info(f"📥 发现文件标签歌词，同步到数据库: {song.title}")
-                                    if not song.sources:
-                                        from app.models.song import SongSource
-                                        new_src = SongSource(song_id=song.id, source="local", data_json={"lyrics": file_lyrics})
-                                        db.add(new_src)
-                                    else:
-                                        for src in song.sources:
-                                            data = self._parse_data_json(src.data_json)
-                                            data["lyrics"] = file_lyrics
-                                            src.data_json = data
-                                            from sqlalchemy.orm.attributes import flag_modified
-                                            flag_modified(src, "data_json")
-                                    
-                                    await db.commit()
-                                    # 同步完成后重新检查，如果变完整了就跳过后续 API 调用
-                                    if self._is_complete(song):
-                                        healed_count += 1
-                                        continue
-                        except Exception as e:
-                            logger.warning(f"⚠️ 同步文件标签失败 [{song.title}]: {e}")
+                processed_so_far += 1
+                
+                # Update Progress
+                pct = int((processed_so_far / total_candidates) * 100)
+                await task_monitor.update_progress(
+                    task_id,
+                    pct,
+                    f"正在检查: {song.title}",
+                    details={"healed": healed_count, "total": total_candidates}
+                )
+                
+                if song.id not in incomplete_ids:
+                    continue
+
+                # 🔧 关键修复: 在补全之前，先尝试从文件标签同步歌词
+                if song.local_path and os.path.exists(song.local_path):
+                    try:
+                        file_tags = await TagService.read_tags(song.local_path)
+                        file_lyrics = file_tags.get("lyrics") if file_tags else None
                         
-                    # 2. 执行网络补全
+                        if file_lyrics:
+                            has_lyrics_in_db = any(self._parse_data_json(src.data_json).get("lyrics") for src in song.sources)
+                            if not has_lyrics_in_db:
+                                logger.info(f"📥 发现文件标签歌词，同步到数据库: {song.title}")
+                                await get_write_queue().submit(
+                                    partial(self._save_file_lyrics, song_id=song.id, lyrics=file_lyrics)
+                                )
+                                # 已加载的来源同步更新 (会话已关闭，仅用于下面的完整性检查)
+                                for src in song.sources:
+                                    data = self._parse_data_json(src.data_json)
+                                    data["lyrics"] = file_lyrics
+                                    src.data_json = data
+                                
+                                # 同步完成后重新检查，如果变完整了就跳过后续 API 调用
+                                if self._is_complete(song):
+                                    healed_count += 1
+                                    continue
+                    except Exception as e:
+                        logger.warning(f"⚠️ 同步文件标签失败 [{song.title}]: {e}")
+                    
+                # 2. 执行网络补全
+                # 已关联在线源的歌曲按块批量预取 (按源一次请求，代替逐首搜索)
+                if song.id not in prefetch_done:
+                    chunk = [s for s in songs[index:] if s.id in incomplete_ids][:PREFETCH_CHUNK_SIZE]
+                    prefetch_done.update(s.id for s in chunk)
                     try:
-                        success = await self.heal_song(song.id, force=force)
-                        if success:
-                            healed_count += 1
-                            # Update details on success
-                            await task_monitor.update_progress(
-                                task_id, pct, f"已修复: {song.title}", details={"healed": healed_count}
-                            )
+                        prefetched.update(await self.prefetch_metadata(chunk))
                     except Exception as e:
-                        logger.error(f"❌ 治愈失败 [{song.title}]: {e}")
-                
-                msg = f"治愈完成, 成功修复 {healed_count} 首"
-                logger.info(f"✅ {msg}")
-                
-                await task_monitor.finish_task(task_id, msg, details={"healed": healed_count, "processed": processed_so_far})
-                return healed_count
+                        logger.warning(f"⚠️ 批量预取元数据失败: {e}")
+
+                try:
+                    success = await self.heal_song(song.id, force=force, prefetched=prefetched.get(song.id))
+                    if success:
+                        healed_count += 1
+                        # Update details on success
+                        await task_monitor.update_progress(
+                            task_id, pct, f"已修复: {song.title}", details={"healed": healed_count}
+                        )
+                except Exception as e:
+                    logger.error(f"❌ 治愈失败 [{song.title}]: {e}")
             
-            except TaskCancelledException as e:
-                logger.warning(f"Heal task cancelled: {e}")
-                await task_monitor.finish_task(task_id, f"治愈已取消 (已修复: {healed_count})", details={"healed": healed_count})
-                return healed_count
+            msg = f"治愈完成, 成功修复 {healed_count} 首"
+            logger.info(f"✅ {msg}")
+            
+            await task_monitor.finish_task(task_id, msg, details={"healed": healed_count, "processed": processed_so_far})
+            return healed_count
+        
+        except TaskCancelledException as e:
+            logger.warning(f"Heal task cancelled: {e}")
+            await task_monitor.finish_task(task_id, f"治愈已取消 (已修复: {healed_count})", details={"healed": healed_count})
+            return healed_count
 
-            except Exception as e:
-                logger.error(f"Heal task failed: {e}")
-                await task_monitor.error_task(task_id, str(e))
-                return healed_count
+        except Exception as e:
+            logger.error(f"Heal task failed: {e}")
+            await task_monitor.error_task(task_id, str(e))
+            return healed_count
 
-    async def heal_song(self, song_id: str, force: bool = False) -> bool:
+    async def prefetch_metadata(self, songs: List[Song]) -> Dict[int, MetadataResult]:
+        """
+        批量预取已关联在线源 (网易云/QQ) 的歌曲元数据
+
+        按源聚合 source_id 后一次性调用 get_songs_metadata，
+        代替对每首歌单独 "搜索 + 获取详情"。songs 需已加载 sources。
+
+        Returns:
+            Dict[song.id, MetadataResult]
+        """
+        ids_by_source: Dict[str, List[str]] = defaultdict(list)
+        owners: Dict[Tuple[str, str], int] = {}
+        for song in songs:
+            for src in song.sources:
+                if src.source not in ONLINE_SOURCES or not src.source_id:
+                    continue
+                key = (src.source, str(src.source_id))
+                if key not in owners:
+                    owners[key] = song.id
+                    ids_by_source[src.source].append(key[1])
+
+        if not owners:
+            return {}
+
+        batch = await self.metadata_service.fetch_metadata_batch(ids_by_source)
+
+        prefetched: Dict[int, MetadataResult] = {}
+        for key, result in batch.items():
+            song_id = owners.get(key)
+            if song_id is None or not result.success:
+                continue
+            current = prefetched.get(song_id)
+            if current is None:
+                prefetched[song_id] = result
+                continue
+            # 同一首歌有多个源: 补全缺失字段
+            current.lyrics = current.lyrics or result.lyrics
+            current.cover_url = current.cover_url or result.cover_url
+            current.album = current.album or result.album
+            current.publish_time = current.publish_time or result.publish_time
+
+        logger.info(f"📦 批量预取元数据: {len(songs)} 首候选, {len(prefetched)} 首命中")
+        return prefetched
+
+    async def heal_song(self, song_id: str, force: bool = False,
+                        prefetched: Optional[MetadataResult] = None) -> bool:
         """
         治愈单首歌曲 (核心逻辑)
+
+        读取后即关闭会话: 网络请求与标签回写期间不持有会话，数据库写入经由后台写入队列提交。
+
+        Args:
+            prefetched: 批量预取的元数据 (prefetch_metadata)，有结果时直接使用，不再在线搜索
         """
         async with AsyncSessionLocal() as db:
             song = await db.get(Song, song_id, options=[selectinload(Song.artist), selectinload(Song.sources)])
-            if not song: 
-                logger.error(f"❌ 无法找到歌曲 ID: {song_id}")
-                return False
+        if not song:
+            logger.error(f"❌ 无法找到歌曲 ID: {song_id}")
+            return False
 
-            logger.info(f"🩹 正在治愈: {song.title} (ID: {song.id})")
-            
-            # 记录详细的处理信息
-            processing_info = {
-                'song_id': song_id,
-                'title': song.title,
-                'artist': song.artist.name if song.artist else "未知",
-                'local_path': song.local_path,
-                'current_state': {
-                    'has_lyrics': any(self._parse_data_json(src.data_json).get("lyrics") for src in song.sources),
-                    'has_cover': bool(song.cover and song.cover.startswith("/uploads/")),
-                    'has_album': bool(song.album),
-                    'has_publish_time': bool(song.publish_time)
-                }
+        logger.info(f"🩹 正在治愈: {song.title} (ID: {song.id})")
+        
+        # 记录详细的处理信息
+        processing_info = {
+            'song_id': song_id,
+            'title': song.title,
+            'artist': song.artist.name if song.artist else "未知",
+            'local_path': song.local_path,
+            'current_state': {
+                'has_lyrics': any(self._parse_data_json(src.data_json).get("lyrics") for src in song.sources),
+                'has_cover': bool(song.cover and song.cover.startswith("/uploads/")),
+                'has_album': bool(song.album),
+                'has_publish_time': bool(song.publish_time)
             }
-            
-            logger.info(f"📋 处理前状态: {processing_info}")
+        }
+        
+        logger.info(f"📋 处理前状态: {processing_info}")
 
-            # --- 阶段 1: 搜索元数据 ---
-            # 策略 A: 标准搜索 (Title Artist)
-            # 用户要求不要调用 gdstudio 返回的元数据，我们的 metadata_service 已经默认使用网易云/QQ
-            try:
+        # --- 阶段 1: 搜索元数据 ---
+        # 策略 A: 标准搜索 (Title Artist)
+        # 用户要求不要调用 gdstudio 返回的元数据，我们的 metadata_service 已经默认使用网易云/QQ
+        try:
+            # 预取已合并该歌曲关联的所有在线源，缺失的字段上游也没有，再搜索只会多出请求
+            if prefetched and prefetched.success:
+                logger.info(f"📦 使用批量预取的元数据 ({prefetched.source}): {song.title}")
+                best_meta = prefetched
+            else:
                 best_meta = await self.metadata_service.get_best_match_metadata(song.title, song.artist.name if song.artist else "")
+            
+            if not best_meta.success:
+                # 记录失败详情
+                logger.warning(f"⚠️ 元数据搜索失败: {song.title}")
+                logger.debug(f"🔍 搜索详情 - 标题: '{song.title}', 艺人: '{song.artist.name if song.artist else ''}'")
+                logger.debug(f"📊 搜索结果 - 歌词: {bool(best_meta.lyrics)}, 封面: {bool(best_meta.cover_url)}, 专辑: {best_meta.album}")
                 
-                if not best_meta.success:
-                    # 记录失败详情
-                    logger.warning(f"⚠️ 元数据搜索失败: {song.title}")
-                    logger.debug(f"🔍 搜索详情 - 标题: '{song.title}', 艺人: '{song.artist.name if song.artist else ''}'")
-                    logger.debug(f"📊 搜索结果 - 歌词: {bool(best_meta.lyrics)}, 封面: {bool(best_meta.cover_url)}, 专辑: {best_meta.album}")
-                    
-                    # 策略 B: 文件名降级搜索 (如果是自动导入的乱码歌曲)
-                    if song.local_path:
-                        filename_clean = self._clean_filename(song.local_path)
-                        if filename_clean and filename_clean != song.title:
-                            logger.info(f"🔄 标准搜索失败, 尝试文件名降级搜索: '{filename_clean}'")
-                            best_meta = await self.metadata_service.get_best_match_metadata(filename_clean, "")
-                            
-                            if not best_meta.success:
-                                logger.warning(f"❌ 文件名搜索也失败: {filename_clean}")
-                                logger.debug(f"📊 文件名搜索结果 - 歌词: {bool(best_meta.lyrics)}, 封面: {bool(best_meta.cover_url)}, 专辑: {best_meta.album}")
-                
-                if not best_meta.success:
-                    logger.error(f"❌ 无法找到元数据: {song.title}")
-                    # 更新重试时间
-                    song.last_enrich_at = datetime.now()
-                    await db.commit()
-                    return False
-                    
-            except Exception as search_error:
-                logger.error(f"💥 元数据搜索过程中发生异常: {song.title} - {str(search_error)}")
-                logger.exception(search_error)  # 记录完整堆栈
-                song.last_enrich_at = datetime.now()
-                await db.commit()
+                # 策略 B: 文件名降级搜索 (如果是自动导入的乱码歌曲)
+                if song.local_path:
+                    filename_clean = self._clean_filename(song.local_path)
+                    if filename_clean and filename_clean != song.title:
+                        logger.info(f"🔄 标准搜索失败, 尝试文件名降级搜索: '{filename_clean}'")
+                        best_meta = await self.metadata_service.get_best_match_metadata(filename_clean, "")
+                        
+                        if not best_meta.success:
+                            logger.warning(f"❌ 文件名搜索也失败: {filename_clean}")
+                            logger.debug(f"📊 文件名搜索结果 - 歌词: {bool(best_meta.lyrics)}, 封面: {bool(best_meta.cover_url)}, 专辑: {best_meta.album}")
+            
+            if not best_meta.success:
+                logger.error(f"❌ 无法找到元数据: {song.title}")
+                # 更新重试时间
+                await self._mark_enrich_attempt(song.id)
                 return False
+                
+        except Exception as search_error:
+            logger.error(f"💥 元数据搜索过程中发生异常: {song.title} - {str(search_error)}")
+            logger.exception(search_error)  # 记录完整堆栈
+            await self._mark_enrich_attempt(song.id)
+            return False
 
-            # --- 阶段 2: 智能合并 ---
-            current_lyrics = None
-            for src in song.sources:
-                data = self._parse_data_json(src.data_json)
-                if data.get("lyrics"):
-                    current_lyrics = data["lyrics"]
-                    break
+        # --- 阶段 2: 智能合并 ---
+        current_lyrics = None
+        for src in song.sources:
+            data = self._parse_data_json(src.data_json)
+            if data.get("lyrics"):
+                current_lyrics = data["lyrics"]
+                break
 
-            current = SongMetadata(
-                title=song.title,
-                artist=song.artist.name if song.artist else "",
-                album=song.album,
-                cover_url=song.cover,
-                lyrics=current_lyrics, 
-                publish_time=song.publish_time
-            )
-            
-            new_meta = SongMetadata(
-                title=best_meta.search_result.title if best_meta.search_result else song.title,
-                artist=best_meta.search_result.artist if best_meta.search_result else "",
-                album=best_meta.album,
-                cover_url=best_meta.cover_url,
-                lyrics=best_meta.lyrics,
-                publish_time=self._parse_date(best_meta.publish_time)
-            )
+        current = SongMetadata(
+            title=song.title,
+            artist=song.artist.name if song.artist else "",
+            album=song.album,
+            cover_url=song.cover,
+            lyrics=current_lyrics, 
+            publish_time=song.publish_time
+        )
+        
+        new_meta = SongMetadata(
+            title=best_meta.search_result.title if best_meta.search_result else song.title,
+            artist=best_meta.search_result.artist if best_meta.search_result else "",
+            album=best_meta.album,
+            cover_url=best_meta.cover_url,
+            lyrics=best_meta.lyrics,
+            publish_time=self._parse_date(best_meta.publish_time)
+        )
 
-            # 相似度分级校验 (防止误关联)
-            similarity = SmartMerger.check_similarity(song.title, new_meta.title)
-            if similarity < 0.6:
-                logger.warning(f"⚠️ 相似度过低 ({similarity:.2f}), 跳过自动治愈: '{song.title}' vs '{new_meta.title}'")
-                song.last_enrich_at = datetime.now()
-                await db.commit()
-                return False
+        # 相似度分级校验 (防止误关联)
+        similarity = SmartMerger.check_similarity(song.title, new_meta.title)
+        if similarity < 0.6:
+            logger.warning(f"⚠️ 相似度过低 ({similarity:.2f}), 跳过自动治愈: '{song.title}' vs '{new_meta.title}'")
+            await self._mark_enrich_attempt(song.id)
+            return False
 
-            updates = SmartMerger.merge(current, new_meta)
-            
-            if not updates and not force:
-                logger.info("⏩ 元数据未发生显著变化，跳过")
-                song.last_enrich_at = datetime.now()
-                await db.commit()
-                return True # 虽然没更，但也算处理完
+        updates = SmartMerger.merge(current, new_meta)
+        
+        if not updates and not force:
+            logger.info("⏩ 元数据未发生显著变化，跳过")
+            await self._mark_enrich_attempt(song.id)
+            return True # 虽然没更，但也算处理完
 
-            # --- 阶段 3: 执行更新 ---
-            
-            # 3.1 下载封面
-            cover_data = None
-            
-            # 确定是否需要下载/处理封面
-            # 逻辑：
-            # 1. updates 里有新封面 (SmartMerger 决定更新)
-            # 2. 当前封面是在线链接 (http开头) -> 始终本地化，以满足“全部物理嵌入”要求
-            need_download_cover = "cover" in updates
-            if not need_download_cover and song.cover and (song.cover.startswith("http") or song.cover.startswith("/api/discovery/cover")):
-                need_download_cover = True
-                # 这里不需要强制加入 updates["cover"]，下面逻辑会直接拿 song.cover
-            
-            if need_download_cover:
-                cover_url = updates.get("cover") or song.cover
-                # 处理代理 URL: /api/discovery/cover?source=xxx&id=yyy
-                if cover_url.startswith("/api/discovery/cover"):
-                    import urllib.parse as urlparse
-                    parsed = urlparse.urlparse(cover_url)
-                    qs = urlparse.parse_qs(parsed.query)
-                    source = qs.get("source", [""])[0]
-                    target_id = qs.get("id", [""])[0]
-                    if source and target_id:
-                        # 还原为 GDStudio 的真实 pic 链接 (实际上 pic 会返回 json，所以我们直接用那个 pic 接口)
-                        cover_url = f"{self.api_base_url}?types=pic&source={source}&id={target_id}"
-
-                web_url, local_path = await self._download_cover(cover_url)
-                if web_url:
-                     song.cover = web_url # 这一步很关键，将在线链接改为本地 /uploads 链接
-                     # 读取 bytes 用于写 tag
-                     if local_path and os.path.exists(local_path):
-                         with open(local_path, "rb") as f:
-                             cover_data = f.read()
-            elif song.cover and song.cover.startswith("/uploads/"):
-                 # 已经是本地封面，读取出来
-                 # 修复 Windows 下的路径拼接逻辑
-                 rel_path = song.cover.replace("/", os.sep).lstrip(os.sep)
-                 # 如果 cover 是 /uploads/covers/xxx.jpg，rel_path 变成 uploads\covers\xxx.jpg
-                 # 而 self.upload_root 可能是 D:\code\music-monitor\uploads
-                 # 所以要小心拼接。 song.cover 包含 'uploads' 吗？
-                 # 查看 _download_cover: web_url = f"/uploads/covers/{filename}"
-                 # 所以 rel_path 包含 uploads/covers/...
-                 # 我们需要的是相对于 cwd 的路径。
-                 local_path = os.path.join(os.getcwd(), rel_path)
-                 if os.path.exists(local_path):
+        # --- 阶段 3: 执行更新 ---
+        
+        # 3.1 下载封面
+        cover_data = None
+        
+        # 确定是否需要下载/处理封面
+        # 逻辑：
+        # 1. updates 里有新封面 (SmartMerger 决定更新)
+        # 2. 当前封面是在线链接 (http开头) -> 始终本地化，以满足“全部物理嵌入”要求
+        need_download_cover = "cover" in updates
+        if not need_download_cover and song.cover and (song.cover.startswith("http") or song.cover.startswith("/api/discovery/cover")):
+            need_download_cover = True
+            # 这里不需要强制加入 updates["cover"]，下面逻辑会直接拿 song.cover
+        
+        if need_download_cover:
+            cover_url = updates.get("cover") or song.cover
+            # 处理代理 URL: /api/discovery/cover?source=xxx&id=yyy
+            if cover_url.startswith("/api/discovery/cover"):
+                import urllib.parse as urlparse
+                parsed = urlparse.urlparse(cover_url)
+                qs = urlparse.parse_qs(parsed.query)
+                source = qs.get("source", [""])[0]
+                target_id = qs.get("id", [""])[0]
+                if source and target_id:
+                    # 还原为 GDStudio 的真实 pic 链接 (实际上 pic 会返回 json，所以我们直接用那个 pic 接口)
+                    cover_url = f"{self.api_base_url}?types=pic&source={source}&id={target_id}"
+
+            web_url, local_path = await self._download_cover(cover_url)
+            if web_url:
+                 song.cover = web_url # 这一步很关键，将在线链接改为本地 /uploads 链接
+                 # 读取 bytes 用于写 tag
+                 if local_path and os.path.exists(local_path):
                      with open(local_path, "rb") as f:
                          cover_data = f.read()
+        elif song.cover and song.cover.startswith("/uploads/"):
+             # 已经是本地封面，读取出来
+             # 修复 Windows 下的路径拼接逻辑
+             rel_path = song.cover.replace("/", os.sep).lstrip(os.sep)
+             # 如果 cover 是 /uploads/covers/xxx.jpg，rel_path 变成 uploads\covers\xxx.jpg
+             # 而 self.upload_root 可能是 D:\code\music-monitor\uploads
+             # 所以要小心拼接。 song.cover 包含 'uploads' 吗？
+             # 查看 _download_cover: web_url = f"/uploads/covers/{filename}"
+             # 所以 rel_path 包含 uploads/covers/...
+             # 我们需要的是相对于 cwd 的路径。
+             local_path = os.path.join(os.getcwd(), rel_path)
+             if os.path.exists(local_path):
+                 with open(local_path, "rb") as f:
+                     cover_data = f.read()
 
-            # 3.2 更新 DB 字段
-            if "title" in updates: song.title = updates["title"]
-            if "album" in updates: song.album = updates["album"]
-            if "publish_time" in updates: song.publish_time = updates["publish_time"]
-            
-            # 3.3 写入文件 (TagService)
-            # 准备写入的数据
-            # 确保即使这次没获取到歌词，也要尝试从数据库现有记录里拿，防止被空值覆盖
-            final_lyrics = updates.get("lyrics") or new_meta.lyrics or current_lyrics
-            
-            tag_meta = {
-                "title": song.title,
-                "artist": song.artist.name if song.artist else "",
-                "album": song.album,
-                "date": song.publish_time,
-                "lyrics": final_lyrics,
-                "cover_data": cover_data
-            }
-            
-            # 清理 None 值
-            tag_meta = {k: v for k, v in tag_meta.items() if v is not None}
+        # 3.2 更新 DB 字段
+        if "title" in updates: song.title = updates["title"]
+        if "album" in updates: song.album = updates["album"]
+        if "publish_time" in updates: song.publish_time = updates["publish_time"]
+        
+        # 3.3 写入文件 (TagService)
+        # 准备写入的数据
+        # 确保即使这次没获取到歌词，也要尝试从数据库现有记录里拿，防止被空值覆盖
+        final_lyrics = updates.get("lyrics") or new_meta.lyrics or current_lyrics
+        
+        tag_meta = {
+            "title": song.title,
+            "artist": song.artist.name if song.artist else "",
+            "album": song.album,
+            "date": song.publish_time,
+            "lyrics": final_lyrics,
+            "cover_data": cover_data
+        }
+        
+        # 清理 None 值
+        tag_meta = {k: v for k, v in tag_meta.items() if v is not None}
+
+        if song.local_path and os.path.exists(song.local_path):
+            success = await TagService.write_tags(song.local_path, tag_meta)
+            if success:
+                logger.info(f"💾 文件标签回写成功: {song.local_path}")
+        
+        # 3.4 写入数据库: 歌曲字段 + 来源中的歌词 / 专辑 / 封面
+        song_changes = take_changes(song, HEALED_SONG_FIELDS)
+        return await get_write_queue().submit(partial(
+            self._save_healed_song, song_id=song.id, song_changes=song_changes,
+            final_lyrics=final_lyrics, updates=updates
+        ))
 
-            if song.local_path and os.path.exists(song.local_path):
-                success = await TagService.write_tags(song.local_path, tag_meta)
-                if success:
-                    logger.info(f"💾 文件标签回写成功: {song.local_path}")
+    async def _save_healed_song(self, db, song_id: int, song_changes: Dict, final_lyrics: Optional[str],
+                                updates: Dict) -> bool:
+        """写入治愈结果 (写入队列的修改函数，不提交)"""
+        song = await db.get(Song, song_id, options=[selectinload(Song.sources)])
+        if not song:
+            return False
+        for field, value in song_changes.items():
+            setattr(song, field, value)
+
+        # 更新 Source 数据 (lyrics 和 cover 存这里)
+        # 🔧 修复: 如果没有 source 记录，创建一个 local source
+        if not song.sources:
+            logger.info(f"⚠️ 歌曲没有 source 记录，创建 local source: {song.title}")
+            new_source = SongSource(
+                song_id=song.id,
+                source="local",
+                source_id=song.local_path or str(song.id),
+                data_json={"lyrics": final_lyrics} if final_lyrics else {}
+            )
+            db.add(new_source)
+            # 立即刷新以获取新创建的 source
+            await db.flush()
+            song.sources.append(new_source)
+        
+        for src in song.sources:
+            data = self._parse_data_json(src.data_json)
+            changed = False
             
-            # 3.4 更新 Source 数据 (lyrics 和 cover 存这里)
-            # 🔧 修复: 如果没有 source 记录，创建一个 local source
-            if not song.sources:
-                from app.models.song import SongSource
-                logger.info(f"⚠️ 歌曲没有 source 记录，创建 local source: {song.title}")
-                new_source = SongSource(
-                    song_id=song.id,
-                    source="local",
-                    source_id=song.local_path or str(song.id),
-                    data_json={"lyrics": final_lyrics} if final_lyrics else {}
-                )
-                db.add(new_source)
-                # 立即刷新以获取新创建的 source
-                await db.flush()
-                song.sources.append(new_source)
+            # 同步歌词 - 确保歌词一定写入 data_json (修复持久化问题)
+            # 不论 SmartMerger 是否决定"更新"，只要有歌词就写入
+            if final_lyrics and not data.get("lyrics"):
+                data["lyrics"] = final_lyrics
+                changed = True
+            elif updates.get("lyrics"):  # SmartMerger 决定升级歌词 (如 纯文本->LRC)
+                data["lyrics"] = updates["lyrics"]
+                changed = True
             
-            for src in song.sources:
-                data = self._parse_data_json(src.data_json)
-                changed = False
-                
-                # 同步歌词 - 确保歌词一定写入 data_json (修复持久化问题)
-                # 不论 SmartMerger 是否决定"更新"，只要有歌词就写入
-                if final_lyrics and not data.get("lyrics"):
-                    data["lyrics"] = final_lyrics
-                    changed = True
-                elif updates.get("lyrics"):  # SmartMerger 决定升级歌词 (如 纯文本->LRC)
-                    data["lyrics"] = updates["lyrics"]
-                    changed = True
-                
-                # 同步专辑
-                if "album" in updates:
-                    data["album"] = updates["album"]
+            # 同步专辑
+            if "album" in updates:
+                data["album"] = updates["album"]
+                changed = True
+            
+            # 同步封面 (如果已本地化，强制所有来源同步)
+            if song.cover and song.cover.startswith("/uploads/"):
+                if src.cover != song.cover:
+                    src.cover = song.cover
                     changed = True
                 
-                # 同步封面 (如果已本地化，强制所有来源同步)
-                if song.cover and song.cover.startswith("/uploads/"):
-                    if src.cover != song.cover:
-                        src.cover = song.cover
+                # 确保 data_json 里的封面也更新
+                if isinstance(data, dict):
+                    if data.get("cover") != song.cover:
+                        data["cover"] = song.cover
                         changed = True
-                    
-                    # 确保 data_json 里的封面也更新
-                    if isinstance(data, dict):
-                        if data.get("cover") != song.cover:
-                            data["cover"] = song.cover
-                            changed = True
-                
-                if changed:
-                    src.data_json = data
-                    # 🔧 关键修复: SQLAlchemy 不会自动追踪 JSON 字段的内部修改
-                    # 必须显式标记字段已变更，否则 commit 时不会持久化
-                    from sqlalchemy.orm.attributes import flag_modified
-                    flag_modified(src, "data_json")
-                    logger.info(f"📝 已更新 source[{src.source}].data_json: lyrics={bool(data.get('lyrics'))}")
-            
-            # 调试: 确认最终状态
-            final_check = False
-            for src in song.sources:
-                d = self._parse_data_json(src.data_json)
-                if d.get("lyrics"):
-                    final_check = True
-                    break
-            logger.info(f"🔍 持久化检查: {song.title} 歌词已保存={final_check}, sources数量={len(song.sources)}")
             
-            await db.commit()
-            return True
+            if changed:
+                src.data_json = data
+                # 🔧 关键修复: SQLAlchemy 不会自动追踪 JSON 字段的内部修改
+                # 必须显式标记字段已变更，否则 commit 时不会持久化
+                flag_modified(src, "data_json")
+                logger.info(f"📝 已更新 source[{src.source}].data_json: lyrics={bool(data.get('lyrics'))}")
+        
+        # 调试: 确认最终状态
+        final_check = False
+        for src in song.sources:
+            d = self._parse_data_json(src.data_json)
+            if d.get("lyrics"):
+                final_check = True
+                break
+        logger.info(f"🔍 持久化检查: {song.title} 歌词已保存={final_check}, sources数量={len(song.sources)}")
+        
+        return True
 
     async def heal_artist(self, db, artist) -> bool:
         """治愈歌手头像 (本地化)"""
@@ -418,16 +508,42 @@ class MetadataHealer:
         web_url, local_path = await self._download_image(artist.avatar, "avatars")
         
         if web_url:
+            from app.models.artist import Artist, ArtistSource
             artist.avatar = web_url
             # 同步到所有 source
             for src in artist.sources:
                 src.avatar = web_url
             
-            await db.commit()
+            artist_changes = {artist.id: take_changes(artist, ("avatar",))}
+            source_changes = {src.id: take_changes(src, ("avatar",)) for src in artist.sources}
+            
+            async def save(write_db):
+                await update_mutation(Artist, artist_changes)(write_db)
+                await update_mutation(ArtistSource, source_changes)(write_db)
+            
+            await get_write_queue().submit(save)
             logger.info(f"✅ 歌手头像本地化成功: {artist.name} -> {web_url}")
             return True
         return False
 
+    async def _mark_enrich_attempt(self, song_id: int):
+        """记录治愈尝试时间 (经由后台写入队列)"""
+        await get_write_queue().submit(
+            update_mutation(Song, {song_id: {"last_enrich_at": datetime.now()}})
+        )
+
+    async def _save_file_lyrics(self, db, song_id: int, lyrics: str):
+        """把文件标签中的歌词写入歌曲来源 (写入队列的修改函数，不提交)"""
+        sources = (await db.execute(select(SongSource).where(SongSource.song_id == song_id))).scalars().all()
+        if not sources:
+            db.add(SongSource(song_id=song_id, source="local", data_json={"lyrics": lyrics}))
+            return
+        for src in sources:
+            data = self._parse_data_json(src.data_json)
+            data["lyrics"] = lyrics
+            src.data_json = data
+            flag_modified(src, "data_json")
+
     def _is_complete(self, song: Song) -> bool:
         """
         检查歌曲元数据是否完整 (严格模式: 6 字段全覆盖)
@@ -11,6 +11,7 @@
 
 更新日志:
 - 2026-02-10: 增加元数据获取重试次数至5次
+- 2026-10-19: 歌词 / 封面只在各源都正常返回但没有结果时返回 NotFound (负缓存)，请求失败不缓存
 
 Author: ali
 Created: 2026-01-23
@@ -20,11 +21,11 @@ import os
 import aiohttp
 import logging
 import re
-from typing import Optional
+from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 import anyio
-from app.utils.cache import persistent_cache
+from app.utils.cache import NotFound, persistent_cache
 
 try:
     import mutagen
@@ -187,11 +188,17 @@ class MetadataService:
 
     async def _fetch_online_lyrics(self, title: str, artist: str, 
                            source: str = None, source_id: str = None) -> Optional[str]:
+        """在线获取歌词；各源都正常返回但没有歌词时返回 NotFound，有请求失败时返回 None"""
+        failed = False
         # 如果有 source_id，直接获取
         if source and source_id:
-            lyrics = await self._fetch_lyrics_by_id(source, source_id)
-            if lyrics:
-                return lyrics
+            try:
+                lyrics = await self._fetch_lyrics_by_id(source, source_id)
+                if lyrics:
+                    return lyrics
+            except Exception as e:
+                logger.warning(f"通过ID获取歌词失败: {e}")
+                failed = True
         
         # 否则搜索后获取
         providers = [
@@ -215,10 +222,11 @@ class MetadataService:
                         return lyrics
             except Exception as e:
                 logger.warning(f"从 {source_name} 获取歌词失败: {e}")
+                failed = True
                 continue
         
         logger.warning(f"未能获取歌词: {title} - {artist}")
-        return None
+        return None if failed else NotFound()
 
     async def _read_embedded_lyrics(self, file_path: str) -> Optional[str]:
         """读取内嵌歌词"""
@@ -299,11 +307,7 @@ class MetadataService:
         if not provider:
             return None
         
-        try:
-            return await provider.get_lyrics(source_id)
-        except Exception as e:
-            logger.warning(f"通过ID获取歌词失败: {e}")
-            return None
+        return await provider.get_lyrics(source_id)
     
     # ========== 封面获取 ==========
     
@@ -314,6 +318,7 @@ class MetadataService:
         
         通过 music_providers 搜索获取封面URL。
         """
+        failed = False
         providers = [
             ("netease", self._get_netease_provider()),
             ("qqmusic", self._get_qqmusic_provider())
@@ -331,9 +336,10 @@ class MetadataService:
                     return results[0].cover_url
             except Exception as e:
                 logger.warning(f"从 {source_name} 获取封面失败: {e}")
+                failed = True
                 continue
         
-        return None
+        return None if failed else NotFound()
     
     async def fetch_cover_data(self, cover_url: str) -> Optional[bytes]:
         """下载封面图片数据"""
@@ -431,6 +437,58 @@ class MetadataService:
         result.success = bool(result.lyrics or result.cover_url or result.publish_time)
         return result
     
+    # ========== 批量元数据获取 ==========
+
+    async def fetch_metadata_batch(
+        self,
+        ids_by_source: Dict[str, List[str]],
+        with_lyrics: bool = True
+    ) -> Dict[Tuple[str, str], MetadataResult]:
+        """
+        按源批量获取已知ID歌曲的元数据 (无需搜索)
+
+        Args:
+            ids_by_source: {"netease": [id, ...], "qqmusic": [mid, ...]}
+            with_lyrics: 是否获取歌词
+
+        Returns:
+            {(source, source_id): MetadataResult}
+        """
+        provider_getters = {
+            "netease": self._get_netease_provider,
+            "qqmusic": self._get_qqmusic_provider
+        }
+
+        async def fetch_source(source_name: str, ids: List[str]):
+            provider = provider_getters[source_name]()
+            if not provider or not ids:
+                return source_name, {}
+            try:
+                return source_name, await provider.get_songs_metadata(ids, with_lyrics=with_lyrics)
+            except Exception as e:
+                logger.warning(f"从 {source_name} 批量获取元数据失败: {e}")
+                return source_name, {}
+
+        tasks = [
+            fetch_source(name, ids) for name, ids in ids_by_source.items()
+            if name in provider_getters
+        ]
+        batch_results = await asyncio.gather(*tasks)
+
+        results: Dict[Tuple[str, str], MetadataResult] = {}
+        for source_name, metas in batch_results:
+            for source_id, meta in metas.items():
+                result = MetadataResult(
+                    lyrics=meta.get("lyrics") or None,
+                    cover_url=meta.get("cover_url") or None,
+                    album=meta.get("album") or None,
+                    publish_time=meta.get("publish_time") or None,
+                    source=source_name
+                )
+                result.success = bool(result.lyrics or result.cover_url or result.album)
+                results[(source_name, str(source_id))] = result
+        return results
+
     async def close(self):
         """关闭服务"""
         pass
@@ -6,6 +6,9 @@
 2. 结果去重合并
 3. 智能打分排序
 
+更新日志:
+- 2026-10-19: 最佳源元数据只在各源搜索都成功但没有匹配时返回 NotFound (负缓存)
+
 Author: google
 Created: 2026-01-23
 """
@@ -19,7 +22,7 @@ import logging
 import math
 from collections import defaultdict
 
-from app.utils.cache import persistent_cache
+from app.utils.cache import NotFound, persistent_cache
 
 logger = logging.getLogger(__name__)
 
@@ -237,6 +240,39 @@ class MusicAggregator:
         
         return cleaned_songs
 
+    async def get_songs_metadata(
+        self,
+        ids_by_source: Dict[str, List[str]],
+        with_lyrics: bool = True
+    ) -> Dict[Tuple[str, str], Dict]:
+        """
+        按源并发批量获取已知ID歌曲的元数据
+
+        Args:
+            ids_by_source: 各源的歌曲ID列表 {'netease': [...], 'qqmusic': [...]}
+            with_lyrics: 是否获取歌词
+
+        Returns:
+            Dict[(source, song_id), 元数据字典]
+        """
+        sources = [s for s, ids in ids_by_source.items() if ids and self.get_provider(s)]
+        tasks = [
+            self.get_provider(s).get_songs_metadata(ids_by_source[s], with_lyrics=with_lyrics)
+            for s in sources
+        ]
+        results_list = await asyncio.gather(*tasks, return_exceptions=True)
+
+        merged: Dict[Tuple[str, str], Dict] = {}
+        for source, results in zip(sources, results_list):
+            if isinstance(results, Exception):
+                logger.error(f"❌ 音乐源 {source} 批量元数据失败: {results}")
+                continue
+            for song_id, metadata in results.items():
+                merged[(source, str(song_id))] = metadata
+
+        logger.info(f"📦 批量元数据: {', '.join(f'{s}={len(ids_by_source[s])}' for s in sources)} -> {len(merged)} 条")
+        return merged
+
     def _is_valid_song(self, song: SongInfo) -> bool:
         """
         Check if song is valid (not cover, not generic noise).
@@ -385,7 +421,10 @@ class MusicAggregator:
             return final_meta
             
         logger.warning(f"No metadata found for {keyword}")
-        return None
+        # 有源搜索失败时不能断定 "未找到"，不做负缓存
+        if any(isinstance(results, Exception) for results in results_list):
+            return None
+        return NotFound()
 
     def _normalize_title_for_healing(self, title: str) -> str:
         """为治愈流程准备的归一化标题 (移除括号和常见版本标识)"""
@@ -3,6 +3,9 @@
 
 定义统一的抽象接口,所有音乐源提供者必须实现这些接口。
 
+更新日志:
+- 2026-10-19: 新增 supports_newest_first 能力标记
+
 Author: google
 Created: 2026-01-23
 """
@@ -104,6 +107,9 @@ class MusicProvider(ABC):
     对于底层同步API,实现类需要使用 asyncio.run_in_executor 包装。
     """
     
+    # 歌手歌曲列表接口能否按发布时间倒序分页 (增量同步依赖此能力，否则只能全量拉取)
+    supports_newest_first: bool = False
+    
     @property
     @abstractmethod
     def source_name(self) -> str:
@@ -143,7 +149,8 @@ class MusicProvider(ABC):
         self, 
         artist_id: str, 
         offset: int = 0, 
-        limit: int = 50
+        limit: int = 50,
+        newest_first: bool = False
     ) -> List[SongInfo]:
         """
         获取歌手歌曲列表
@@ -152,6 +159,7 @@ class MusicProvider(ABC):
             artist_id: 歌手ID
             offset: 偏移量
             limit: 返回结果数量限制
+            newest_first: 按发布时间倒序 (增量同步只取首页时使用)
             
         Returns:
             歌曲信息列表
@@ -171,6 +179,48 @@ class MusicProvider(ABC):
         """
         pass
 
+    # 批量元数据: 单批最大 ID 数 / 默认实现的并发上限
+    METADATA_BATCH_SIZE = 50
+    METADATA_CONCURRENCY = 5
+
+    async def get_songs_metadata(
+        self,
+        song_ids: List[str],
+        with_lyrics: bool = True
+    ) -> Dict[str, Dict]:
+        """
+        批量获取歌曲元数据
+
+        默认实现: 按 METADATA_BATCH_SIZE 分块, 以有限并发逐首调用 get_song_metadata。
+        支持批量接口的源应覆盖此方法。
+
+        Args:
+            song_ids: 歌曲ID列表
+            with_lyrics: 是否获取歌词 (歌词通常无批量接口, 不需要时应关闭以减少请求)
+
+        Returns:
+            Dict[song_id, 元数据字典] (获取失败的ID不在结果中)
+        """
+        ids = list(dict.fromkeys(str(i) for i in song_ids if i))
+        semaphore = asyncio.Semaphore(self.METADATA_CONCURRENCY)
+        results: Dict[str, Dict] = {}
+
+        async def fetch_one(song_id: str):
+            async with semaphore:
+                try:
+                    metadata = await self.get_song_metadata(song_id)
+                except Exception as e:
+                    logger.warning(f"{self.source_name} get_song_metadata failed for {song_id}: {e}")
+                    return
+                if metadata:
+                    results[song_id] = metadata
+
+        for start in range(0, len(ids), self.METADATA_BATCH_SIZE):
+            chunk = ids[start:start + self.METADATA_BATCH_SIZE]
+            await asyncio.gather(*(fetch_one(i) for i in chunk))
+
+        return results
+
     async def get_lyrics(self, song_id: str) -> Optional[str]:
         """
         获取歌词 (MetadataService 插件接口要求)
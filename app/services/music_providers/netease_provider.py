@@ -2,32 +2,176 @@
 网易云音乐提供者
 
 使用 pyncm 库(同步API)
-通过 asyncio.run_in_executor 包装成异步接口
+通过专用的有界线程池 (NeteaseExecutor) 包装成异步接口，
+避免与 anyio.to_thread 文件 IO / Starlette 线程池争抢默认 executor。
 
 更新日志:
 - 2026-02-10: 增加重试次数至5次
+- 2026-10-19: 使用专用有界线程池 + GetTrackDetail 批量合并
+- 2026-10-19: 声明 supports_newest_first (歌手歌曲接口可按发布时间倒序分页)
 
 Author: ali
 Created: 2026-01-23
 """
 
 from .base import MusicProvider, ArtistInfo, SongInfo, async_retry
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
-from functools import partial
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 默认线程数 (可通过配置 providers.netease_max_workers 覆盖)
+DEFAULT_MAX_WORKERS = 4
+# GetTrackDetail 单次请求的最大 ID 数
+DEFAULT_DETAIL_BATCH_SIZE = 500
+# 合并窗口 (秒): 窗口内的单曲详情请求会合并为一次 GetTrackDetail 调用
+DETAIL_BATCH_WINDOW = 0.02
+
+
+class NeteaseExecutor:
+    """
+    网易云同步 API 专用线程池
+
+    - 线程数有上限，healing 突发时只会在本队列排队，不会占满默认线程池
+    - 记录排队深度 / 执行中数量等指标
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="netease")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_queue_depth = 0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """在专用线程池中执行同步调用"""
+        loop = asyncio.get_running_loop()
+        # 是否已出队 (由工作线程或取消路径二者之一负责，避免重复计数)
+        dequeued = False
+
+        with self._lock:
+            self.queued += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queued)
+
+        def call():
+            nonlocal dequeued
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self.queued -= 1
+                self.active += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+        try:
+            result = await loop.run_in_executor(self._executor, call)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            # 排队期间被取消: 手动出队
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self.queued -= 1
+
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "queued": self.queued,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "peak_queue_depth": self.peak_queue_depth,
+        }
+
+
+_executor: Optional[NeteaseExecutor] = None
+
+
+def _providers_config() -> Dict[str, Any]:
+    try:
+        from core.config_manager import get_config_manager
+        return get_config_manager().get("providers", {}) or {}
+    except Exception:
+        return {}
+
+
+def get_netease_executor() -> NeteaseExecutor:
+    """获取全局网易云线程池 (懒加载)"""
+    global _executor
+    if _executor is None:
+        max_workers = _providers_config().get("netease_max_workers", DEFAULT_MAX_WORKERS)
+        _executor = NeteaseExecutor(max_workers=max_workers)
+    return _executor
+
+
+class TrackDetailBatcher:
+    """
+    GetTrackDetail 请求合并器
+
+    GetTrackDetail 接受 ID 列表，短时间窗口内的单曲详情请求
+    会被合并为一次调用 (超过 batch_size 时分块)。
+    """
+
+    def __init__(self, fetch_many: Callable, window: float = DETAIL_BATCH_WINDOW):
+        self._fetch_many = fetch_many
+        self._window = window
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def get(self, song_id: str) -> Optional[Dict]:
+        """获取单曲详情 (与同窗口内的其他请求合并)"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(str(song_id), []).append(future)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._window)
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+
+        try:
+            details = await self._fetch_many(list(pending.keys()))
+        except Exception as e:
+            for futures in pending.values():
+                for f in futures:
+                    if not f.done():
+                        f.set_exception(e)
+            return
+
+        for song_id, futures in pending.items():
+            for f in futures:
+                if not f.done():
+                    f.set_result(details.get(song_id))
+
 
 class NeteaseProvider(MusicProvider):
     """
     网易云音乐提供者
     
     使用 pyncm 库(同步API)
-    通过 asyncio.run_in_executor 包装成异步接口
+    通过专用线程池 NeteaseExecutor 包装成异步接口
     """
     
+    supports_newest_first = True
+    
     @property
     def source_name(self) -> str:
         return "netease"
@@ -42,11 +186,9 @@ class NeteaseProvider(MusicProvider):
         try:
             from pyncm import apis
             
-            # 在线程池中运行同步API
-            loop = asyncio.get_event_loop()
-            search_result = await loop.run_in_executor(
-                None, 
-                partial(apis.cloudsearch.GetSearchResult, keyword, stype=100, limit=limit)
+            # 在专用线程池中运行同步API
+            search_result = await get_netease_executor().run(
+                apis.cloudsearch.GetSearchResult, keyword, stype=100, limit=limit
             )
             
             results = []
@@ -80,10 +222,8 @@ class NeteaseProvider(MusicProvider):
         try:
             from pyncm import apis
             
-            loop = asyncio.get_event_loop()
-            search_result = await loop.run_in_executor(
-                None, 
-                partial(apis.cloudsearch.GetSearchResult, keyword, stype=1, limit=limit)
+            search_result = await get_netease_executor().run(
+                apis.cloudsearch.GetSearchResult, keyword, stype=1, limit=limit
             )
             
             results = []
@@ -112,21 +252,28 @@ class NeteaseProvider(MusicProvider):
         self, 
         artist_id: str, 
         offset: int = 0, 
-        limit: int = 1000
+        limit: int = 1000,
+        newest_first: bool = False
     ) -> List[SongInfo]:
-        """获取歌手歌曲列表"""
+        """获取歌手歌曲列表 (newest_first 时由接口按发布时间倒序分页)"""
         try:
             from pyncm import apis
             
-            loop = asyncio.get_event_loop()
-            tracks = await loop.run_in_executor(
-                None,
-                partial(apis.artist.GetArtistTracks, artist_id)
-            )
+            if newest_first:
+                tracks = await get_netease_executor().run(
+                    apis.artist.GetArtistTracks, artist_id,
+                    offset=offset, limit=limit, order="time"
+                )
+                page = (tracks or {}).get('songs') or []
+            else:
+                tracks = await get_netease_executor().run(
+                    apis.artist.GetArtistTracks, artist_id
+                )
+                page = ((tracks or {}).get('songs') or [])[offset:offset+limit]
             
             results = []
-            if tracks and 'songs' in tracks:
-                for song in tracks['songs'][offset:offset+limit]:
+            if page:
+                for song in page:
                     # 兼容不同的歌手字段名 (ar 或 artists)
                     artist_name = ''
                     if song.get('ar'):
@@ -154,37 +301,47 @@ class NeteaseProvider(MusicProvider):
             logger.error(f"❌ 网易云获取歌手热歌失败: {e}")
             return []
     
+    async def get_track_details(self, song_ids: List[str]) -> Dict[str, Dict]:
+        """
+        批量获取歌曲详情 (GetTrackDetail 支持一次传入多个 ID)
+
+        Returns:
+            Dict[song_id, 原始 song 字典]
+        """
+        from pyncm import apis
+
+        ids = list(dict.fromkeys(str(i) for i in song_ids if i))
+        batch_size = _providers_config().get("netease_detail_batch_size", DEFAULT_DETAIL_BATCH_SIZE)
+        details: Dict[str, Dict] = {}
+
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            result = await get_netease_executor().run(apis.track.GetTrackDetail, chunk)
+            for song in (result or {}).get('songs', []) or []:
+                details[str(song.get('id', ''))] = song
+
+        logger.info(f"☁️ 网易云批量详情: 请求 {len(ids)} 首, 取回 {len(details)} 首")
+        return details
+
+    def _get_detail_batcher(self) -> TrackDetailBatcher:
+        batcher = getattr(self, '_detail_batcher', None)
+        if batcher is None:
+            batcher = TrackDetailBatcher(self.get_track_details)
+            self._detail_batcher = batcher
+        return batcher
+
     async def get_song_metadata(self, song_id: str) -> Optional[Dict]:
         """获取歌曲元数据"""
         try:
             from pyncm import apis
             
-            loop = asyncio.get_event_loop()
-            
-            # 获取歌词
-            lyrics_info = await loop.run_in_executor(
-                None,
-                partial(apis.track.GetTrackLyrics, song_id)
+            # 获取歌词 + 详情 (详情请求与其他并发请求合并为一次 GetTrackDetail)
+            lyrics_info, song = await asyncio.gather(
+                get_netease_executor().run(apis.track.GetTrackLyrics, song_id),
+                self._get_detail_batcher().get(str(song_id))
             )
             
-            # 获取详情
-            detail = await loop.run_in_executor(
-                None,
-                partial(apis.track.GetTrackDetail, [song_id])
-            )
-            
-            metadata = {
-                'lyrics': lyrics_info.get('lrc', {}).get('lyric', '') if lyrics_info else '',
-                'cover_url': '',
-                'album': ''
-            }
-            
-            if detail and detail.get('songs'):
-                song = detail['songs'][0]
-                if song.get('al'):
-                    metadata['cover_url'] = song['al'].get('picUrl', '')
-                    metadata['album'] = song['al'].get('name', '')
-                metadata['publish_time'] = str(song.get('publishTime', ''))
+            metadata = self._build_metadata(song, lyrics_info)
             
             logger.info(f"☁️ 网易云详情获取成功: {song_id}")
             return metadata
@@ -192,3 +349,58 @@ class NeteaseProvider(MusicProvider):
         except Exception as e:
             logger.error(f"Netease get_song_metadata failed: {e}")
             return None
+
+    async def get_songs_metadata(
+        self,
+        song_ids: List[str],
+        with_lyrics: bool = True
+    ) -> Dict[str, Dict]:
+        """
+        批量获取歌曲元数据
+
+        详情通过 GetTrackDetail 批量获取 (每批最多 netease_detail_batch_size 个ID);
+        歌词无批量接口, 仅在 with_lyrics=True 时经专用线程池并发获取。
+        """
+        try:
+            from pyncm import apis
+
+            details = await self.get_track_details(song_ids)
+
+            lyrics_map: Dict[str, Any] = {}
+            if with_lyrics and details:
+                ids = list(details.keys())
+                lyric_results = await asyncio.gather(
+                    *(get_netease_executor().run(apis.track.GetTrackLyrics, i) for i in ids),
+                    return_exceptions=True
+                )
+                for song_id, lyrics_info in zip(ids, lyric_results):
+                    if isinstance(lyrics_info, Exception):
+                        logger.warning(f"Netease lyrics failed for {song_id}: {lyrics_info}")
+                        continue
+                    lyrics_map[song_id] = lyrics_info
+
+            return {
+                song_id: self._build_metadata(song, lyrics_map.get(song_id))
+                for song_id, song in details.items()
+            }
+
+        except Exception as e:
+            logger.error(f"Netease get_songs_metadata failed: {e}")
+            return {}
+
+    @staticmethod
+    def _build_metadata(song: Optional[Dict], lyrics_info: Optional[Dict]) -> Dict:
+        """由 GetTrackDetail 的 song 字典和歌词响应构造元数据字典"""
+        metadata = {
+            'lyrics': lyrics_info.get('lrc', {}).get('lyric', '') if lyrics_info else '',
+            'cover_url': '',
+            'album': ''
+        }
+        
+        if song:
+            if song.get('al'):
+                metadata['cover_url'] = song['al'].get('picUrl', '')
+                metadata['album'] = song['al'].get('name', '')
+            metadata['publish_time'] = str(song.get('publishTime', ''))
+        
+        return metadata
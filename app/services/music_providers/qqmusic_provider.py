@@ -5,6 +5,7 @@ QQ音乐提供者
 
 更新日志:
 - 2026-02-10: 增加重试次数至5次
+- 2026-10-19: singer.get_songs 返回热门歌曲，不支持按发布时间排序 (supports_newest_first=False)
 
 Author: ali  
 Created: 2026-01-23
@@ -12,6 +13,7 @@ Created: 2026-01-23
 
 from .base import MusicProvider, ArtistInfo, SongInfo, async_retry
 from typing import List, Optional, Dict
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,6 +30,9 @@ class QQMusicProvider(MusicProvider):
     - lyric.get_lyric: Coroutine,直接 await
     """
     
+    # singer.get_songs 返回热歌列表，新歌不一定在首页
+    supports_newest_first = False
+    
     @property
     def source_name(self) -> str:
         return "qqmusic"
@@ -169,12 +174,14 @@ class QQMusicProvider(MusicProvider):
         self, 
         artist_id: str, 
         offset: int = 0, 
-        limit: int = 1000
+        limit: int = 1000,
+        newest_first: bool = False
     ) -> List[SongInfo]:
         """
         获取歌手歌曲列表
         
         qqmusic-api 的 singer.get_songs 是异步的,直接 await
+        (返回按热度排序的歌曲，不支持按发布时间排序，newest_first 被忽略)
         """
         try:
             from qqmusic_api import singer
@@ -252,8 +259,7 @@ class QQMusicProvider(MusicProvider):
         2. 使用搜索API获取专辑和封面信息 (因为 song.query_song 需要 cookie)
         """
         try:
-            from qqmusic_api import song, lyric, search
-            from qqmusic_api.search import SearchType
+            from qqmusic_api import song
             
             metadata = {
                 'lyrics': '',
@@ -263,29 +269,16 @@ class QQMusicProvider(MusicProvider):
             
             # 1. 尝试获取歌词 
             # 优先尝试 qqmusic-api (需Cookie), 失败则尝试 Legacy API (无需Cookie)
-            try:
-                lyric_data = await lyric.get_lyric(song_id)
-                if isinstance(lyric_data, dict):
-                    metadata['lyrics'] = lyric_data.get('lyric', '')
-                elif isinstance(lyric_data, str):
-                    metadata['lyrics'] = lyric_data
-            except Exception:
-                # 尝试旧版接口
-                try:
-                    metadata['lyrics'] = await self._get_lyric_legacy(song_id)
-                except Exception as e:
-                    logger.debug(f"Legacy lyric fetch failed: {e}")
-                    pass
+            metadata['lyrics'] = await self._fetch_lyric(song_id)
             
             # 2. 使用搜索作为元数据来源 (无需cookie)
             try:
                 # 尝试 query_song, 即使它报错, 万一用户配了 cookie 呢?
-                detail = await song.query_song(song_id)
-                if detail:
-                    metadata['cover_url'] = detail.get('cover', '')
-                    if detail.get('album'):
-                        metadata['album'] = detail['album'].get('name', '')
-                    metadata['publish_time'] = detail.get('time_public', '')
+                details = await song.query_song([song_id])
+                if details:
+                    detail_meta = self._build_metadata(details[0])
+                    detail_meta['lyrics'] = metadata['lyrics']
+                    metadata = detail_meta
             except Exception:
                 pass
                 
@@ -295,6 +288,86 @@ class QQMusicProvider(MusicProvider):
             logger.error(f"❌ QQMusic 获取元数据失败: {e}")
             return None
 
+    async def get_songs_metadata(
+        self,
+        song_ids: List[str],
+        with_lyrics: bool = True
+    ) -> Dict[str, Dict]:
+        """
+        批量获取歌曲元数据
+
+        - 详情: song.query_song 支持传入 mid 列表, 按 METADATA_BATCH_SIZE 分块
+        - 歌词: 无批量接口, 仅在 with_lyrics=True 时以有限并发逐首获取
+        """
+        try:
+            from qqmusic_api import song
+        except ImportError as e:
+            logger.error(f"❌ QQMusic 批量获取元数据失败: {e}")
+            return {}
+
+        ids = list(dict.fromkeys(str(i) for i in song_ids if i))
+        results: Dict[str, Dict] = {}
+
+        for start in range(0, len(ids), self.METADATA_BATCH_SIZE):
+            chunk = ids[start:start + self.METADATA_BATCH_SIZE]
+            try:
+                details = await song.query_song(chunk)
+            except Exception as e:
+                logger.warning(f"⚠️ QQMusic query_song 批量请求失败 ({len(chunk)} 首): {e}")
+                continue
+            for detail in details or []:
+                mid = detail.get('mid') if isinstance(detail, dict) else None
+                if mid:
+                    results[mid] = self._build_metadata(detail)
+
+        if with_lyrics:
+            semaphore = asyncio.Semaphore(self.METADATA_CONCURRENCY)
+
+            async def fill_lyrics(mid: str):
+                async with semaphore:
+                    lyrics = await self._fetch_lyric(mid)
+                if lyrics:
+                    results.setdefault(mid, {'lyrics': '', 'cover_url': '', 'album': ''})['lyrics'] = lyrics
+
+            await asyncio.gather(*(fill_lyrics(mid) for mid in ids))
+
+        logger.info(f"🐧 QQMusic 批量详情: 请求 {len(ids)} 首, 取回 {len(results)} 首")
+        return results
+
+    @staticmethod
+    def _build_metadata(detail: Dict) -> Dict:
+        """由 query_song 的歌曲字典构造元数据字典"""
+        album = detail.get('album') if isinstance(detail.get('album'), dict) else {}
+        album_mid = album.get('mid', '')
+        cover_url = detail.get('cover', '')
+        if not cover_url and album_mid and album_mid != '00000000000000':
+            cover_url = f"https://y.gtimg.cn/music/photo_new/T002R300x300M000{album_mid}.jpg"
+
+        return {
+            'lyrics': '',
+            'cover_url': cover_url,
+            'album': album.get('name', ''),
+            'publish_time': detail.get('time_public', '')
+        }
+
+    async def _fetch_lyric(self, song_id: str) -> str:
+        """获取歌词: 优先 qqmusic-api, 失败时回退旧版接口"""
+        from qqmusic_api import lyric
+
+        try:
+            lyric_data = await lyric.get_lyric(song_id)
+            if isinstance(lyric_data, dict):
+                return lyric_data.get('lyric', '')
+            if isinstance(lyric_data, str):
+                return lyric_data
+        except Exception:
+            # 尝试旧版接口
+            try:
+                return await self._get_lyric_legacy(song_id)
+            except Exception as e:
+                logger.debug(f"Legacy lyric fetch failed: {e}")
+        return ''
+
     async def _get_lyric_legacy(self, song_mid: str) -> str:
         """
         使用旧版接口获取歌词 (无需 Cookie)
@@ -5,11 +5,14 @@ Notification Service
 Handles media content notification dispatch to different channels (WeCom, etc.).
 
 Author: GOOGLE music-monitor development team
+
+更新日志:
+- 2026-10-19: 新歌通知先按歌手/专辑合并，再经限速发送队列发送 (见 notification_queue.py)
+- 2026-10-19: Telegram 改为原生异步发送 (不再占用线程池)，修正初始化参数 bot_token
 """
 import logging
 from urllib.parse import quote
 from typing import Optional, Any
-from starlette.concurrency import run_in_threadpool
 
 from core.config import config
 from app.notifiers.wecom import WeComNotifier
@@ -50,7 +53,7 @@ class NotificationService:
         if tg_cfg.get('enabled') and tg_cfg.get('bot_token'):
             try:
                 cls._telegram = TelegramNotifier(
-                    token=tg_cfg.get('bot_token'),
+                    bot_token=tg_cfg.get('bot_token'),
                     chat_id=tg_cfg.get('chat_id')
                 )
                 logger.info("NotificationService: Telegram initialized")
@@ -64,7 +67,22 @@ class NotificationService:
         """
         Event handler for 'new_content'.
         media: MediaInfo or Song object (duck typing usually)
+
+        Buffers the item in the digest aggregator; bursts from the same artist/album
+        are sent as a single summary after `notify.digest_window` seconds.
+        """
+        from app.services.notification_queue import get_notification_digest
+        await get_notification_digest().add(media)
+
+    @classmethod
+    async def dispatch_new_content(cls, media: Any):
+        """
+        Queue the notification for a single item or a digest (with custom_description)
+        on the rate-limited outbound queue.
         """
+        from app.services.notification_queue import get_outbound_queue
+        outbound = get_outbound_queue()
+
         # 1. Format Message
         message_text = (
             f"🎵 新歌发布: {media.title}\n"
@@ -103,32 +121,32 @@ class NotificationService:
 
         # 3. Send WeCom
         if cls._wecom:
-            try:
-                # 增强消息描述，说明交互指令
-                enhanced_description = message_text
-                if not (hasattr(media, 'custom_description') and media.custom_description):
-                    enhanced_description += f"\n\n💡 想要离线听？发送“下载 {media.title}”即可开始下载。"
-                
-                # Use News Message for rich display
-                await cls._wecom.send_news_message(
+            # 增强消息描述，说明交互指令
+            enhanced_description = message_text
+            if not (hasattr(media, 'custom_description') and media.custom_description):
+                enhanced_description += f"\n\n💡 想要离线听？发送“下载 {media.title}”即可开始下载。"
+
+            wecom = cls._wecom
+            # Use News Message for rich display
+            outbound.submit(
+                "wecom",
+                lambda: wecom.send_news_message(
                     title=f"🎵 新歌发布: {media.title}",
                     description=enhanced_description,
                     url=target_url,
                     pic_url=pic_url
-                )
-            except Exception as e:
-                logger.error(f"WeCom send failed: {e}")
+                ),
+                description=media.title
+            )
 
         # 4. Send Telegram
         if cls._telegram:
-            try:
-                await run_in_threadpool(
-                    cls._telegram.send_message,
-                    message_text,
-                    image_url=pic_url
-                )
-            except Exception as e:
-                logger.error(f"Telegram send failed: {e}")
+            telegram = cls._telegram
+            outbound.submit(
+                "telegram",
+                lambda: telegram.send_message(message_text, image_url=pic_url or None),
+                description=media.title
+            )
 
     @classmethod
     async def send_artist_card(cls, artist_name: str, artist_id: str, avatar: str = ""):
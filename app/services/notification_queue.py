@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+通知合并与限速发送
+
+核心功能：
+- NotificationDigest: 按 (歌手, 专辑) 缓冲 NEW_CONTENT 事件，窗口结束后发送一条汇总
+  (20 首的新专辑只发一条消息，单曲仍按原格式发送)
+- OutboundQueue: 每个通知渠道一个发送队列与发送协程，按每分钟条数限速，
+  失败按指数退避重试 (例如企业微信 45009 接口调用超过限制)
+
+配置 (notify 配置段):
+- digest_window: 汇总窗口 (秒)，默认 60；0 表示不合并
+- rate_limit_per_minute: 每个渠道每分钟最多发送条数，默认 20
+- max_retries: 发送失败重试次数，默认 3
+- retry_delay: 首次重试等待秒数 (之后翻倍)，默认 2
+
+Author: google
+Created: 2026-10-19
+"""
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIGEST_WINDOW = 60
+DEFAULT_RATE_LIMIT_PER_MINUTE = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 2.0
+DIGEST_MAX_LINES = 10
+
+Send = Callable[[], Awaitable[Any]]
+
+
+def _notify_config(key: str, default: Any) -> Any:
+    from core.config_manager import get_config_manager
+    value = get_config_manager().get(f"notify.{key}", default)
+    return default if value is None else value
+
+
+class OutboundQueue:
+    """限速 + 重试的通知发送队列 (每个渠道独立排队，互不影响)"""
+
+    def __init__(self, rate_limit_per_minute: Optional[float] = None,
+                 max_retries: Optional[int] = None, retry_delay: Optional[float] = None):
+        rate = float(rate_limit_per_minute if rate_limit_per_minute is not None
+                     else _notify_config("rate_limit_per_minute", DEFAULT_RATE_LIMIT_PER_MINUTE))
+        self.interval = 60.0 / rate if rate > 0 else 0.0
+        self.max_retries = int(max_retries if max_retries is not None
+                               else _notify_config("max_retries", DEFAULT_MAX_RETRIES))
+        self.retry_delay = float(retry_delay if retry_delay is not None
+                                 else _notify_config("retry_delay", DEFAULT_RETRY_DELAY))
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def submit(self, channel: str, send: Send, description: str = ""):
+        """把一次发送 (无参协程函数) 放入渠道队列，立即返回"""
+        queue = self._queues.get(channel)
+        if queue is None:
+            queue = self._queues[channel] = asyncio.Queue()
+        worker = self._workers.get(channel)
+        if worker is None or worker.done():
+            self._workers[channel] = asyncio.get_running_loop().create_task(self._run(channel, queue))
+        queue.put_nowait((send, description))
+
+    async def _run(self, channel: str, queue: asyncio.Queue):
+        next_allowed = 0.0
+        while True:
+            send, description = await queue.get()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    wait = next_allowed - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    next_allowed = time.monotonic() + self.interval
+                    try:
+                        await send()
+                        self.sent += 1
+                        break
+                    except Exception as e:
+                        if attempt < self.max_retries:
+                            delay = self.retry_delay * 2 ** attempt
+                            self.retried += 1
+                            logger.warning(f"⚠️ {channel} 发送失败，{delay:.0f}s 后重试 [{description}]: {e}")
+                            await asyncio.sleep(delay)
+                        else:
+                            self.failed += 1
+                            logger.error(f"❌ {channel} 发送失败 [{description}]: {e}")
+            finally:
+                queue.task_done()
+
+    async def join(self):
+        """等待所有渠道的排队消息发送完毕"""
+        for queue in list(self._queues.values()):
+            await queue.join()
+
+    async def stop(self, timeout: float = 10.0):
+        """尽量发完剩余消息后停止发送协程 (应用关闭时调用)"""
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ 通知队列未能在关闭前发送完毕")
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": {channel: q.qsize() for channel, q in self._queues.items()},
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+class NotificationDigest:
+    """按 (歌手, 专辑) 在时间窗口内合并新歌通知"""
+
+    def __init__(self, dispatch: Callable[[Any], Awaitable[Any]], window: Optional[float] = None):
+        """
+        Args:
+            dispatch: 实际发送函数，接收单条 media 或汇总对象 (带 custom_description)
+            window: 汇总窗口 (秒)
+        """
+        self.dispatch = dispatch
+        self.window = float(window if window is not None else _notify_config("digest_window", DEFAULT_DIGEST_WINDOW))
+        self._buffers: Dict[Tuple[str, str], List[Any]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.received = 0
+        self.digests = 0
+
+    @staticmethod
+    def _key(media: Any) -> Tuple[str, str]:
+        return (getattr(media, "author", "") or "", getattr(media, "album", "") or "")
+
+    async def add(self, media: Any):
+        """缓冲一条新歌；窗口为 0 时直接发送"""
+        self.received += 1
+        if self.window <= 0:
+            await self.dispatch(media)
+            return
+
+        key = self._key(media)
+        self._buffers.setdefault(key, []).append(media)
+        if key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: Tuple[str, str]):
+        await asyncio.sleep(self.window)
+        self._timers.pop(key, None)
+        await self._flush(key)
+
+    async def _flush(self, key: Tuple[str, str]):
+        items = self._buffers.pop(key, [])
+        if not items:
+            return
+        try:
+            await self.dispatch(items[0] if len(items) == 1 else self.build_digest(items))
+        except Exception as e:
+            logger.error(f"❌ 新歌通知发送失败 ({key[0]} - {key[1] or '单曲'}): {e}")
+
+    async def flush_all(self):
+        """立即发送所有缓冲中的通知 (应用关闭时调用)"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for key in list(self._buffers):
+            await self._flush(key)
+
+    def build_digest(self, items: List[Any]) -> SimpleNamespace:
+        """把同一歌手/专辑的多首新歌合并为一条通知 (沿用 custom_description 字段)"""
+        first = items[0]
+        author, album = self._key(first)
+        self.digests += 1
+
+        lines = [f"{i}. {m.title}" for i, m in enumerate(items[:DIGEST_MAX_LINES], 1)]
+        if len(items) > DIGEST_MAX_LINES:
+            lines.append(f"... 等共 {len(items)} 首")
+        header = f"💿 专辑: {album}" if album else "💿 多首单曲"
+        description = (
+            f"👤 歌手: {author}\n"
+            f"{header} ({len(items)} 首)\n"
+            f"📅 时间: {first.publish_time}\n\n"
+            + "\n".join(lines)
+            + f"\n\n🔗 链接: {first.url}"
+        )
+
+        return SimpleNamespace(
+            title=f"{album or author} ({len(items)} 首)",
+            author=author,
+            album=album,
+            url=first.url,
+            publish_time=first.publish_time,
+            cover=getattr(first, "cover", None),
+            source=getattr(first, "source", None),
+            media_id=getattr(first, "media_id", None),
+            id=getattr(first, "id", None),
+            unique_key=getattr(first, "unique_key", None),
+            custom_description=description,
+            items=items,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": sum(len(v) for v in self._buffers.values()),
+            "received": self.received,
+            "digests": self.digests,
+        }
+
+
+# 全局实例
+_outbound_queue: Optional[OutboundQueue] = None
+_digest: Optional[NotificationDigest] = None
+
+
+def get_outbound_queue() -> OutboundQueue:
+    """获取通知发送队列单例"""
+    global _outbound_queue
+    if _outbound_queue is None:
+        _outbound_queue = OutboundQueue()
+    return _outbound_queue
+
+
+def get_notification_digest() -> NotificationDigest:
+    """获取新歌通知合并器单例 (合并后交给 NotificationService 发送)"""
+    global _digest
+    if _digest is None:
+        from app.services.notification import NotificationService
+        _digest = NotificationDigest(NotificationService.dispatch_new_content)
+    return _digest
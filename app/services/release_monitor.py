@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+ReleaseMonitor - 新歌发布监控引擎
+
+功能：
+- 定时检查所有关注 (is_monitored) 的歌手是否有新歌
+- 检查时间在 check_interval_minutes 内均匀错开，并加入随机抖动
+- 有上限的并发检查 (每次检查同时请求 QQ 音乐和网易云，增量同步)
+- 新歌通过事件总线发布 EventType.NEW_CONTENT
+- 每个歌手的下次检查时间持久化在 artists.next_check_at，重启后不会集中触发
+- 根据歌手历史发歌节奏 (Song.publish_time) 自适应检查间隔，限制在配置的上下限内
+- 排程写入经由后台写入队列合并提交，并发检查的歌手不会互相争抢写锁
+
+Author: google
+Created: 2026-10-19
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from statistics import median
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from app.models.artist import Artist, ArtistSource
+from app.models.song import Song
+from core.event_bus import EventType, get_event_bus
+
+logger = logging.getLogger(__name__)
+
+# 调度器任务 ID / 轮询间隔 (秒)
+MONITOR_JOB_ID = "job_release_monitor"
+TICK_SECONDS = 60
+
+# 默认配置 (scheduler 配置段)
+DEFAULT_CHECK_INTERVAL_MINUTES = 60
+DEFAULT_MONITOR_CONCURRENCY = 2
+DEFAULT_JITTER_RATIO = 0.1       # 抖动幅度占单个时间片的比例
+DEFAULT_NOTIFY_WINDOW_DAYS = 30  # 只通知近期发布的歌曲 (避免全量对账补回的旧歌刷屏)
+DEFAULT_MIN_INTERVAL_MINUTES = 30     # 自适应间隔下限 (高产歌手)
+DEFAULT_MAX_INTERVAL_MINUTES = 1440   # 自适应间隔上限 (长期不发歌的歌手)
+
+# 发歌节奏学习: 取最近 N 次发布 (按天去重)，在两次发布的典型间隔内检查约 M 次
+CADENCE_SAMPLE_RELEASES = 10
+CHECKS_PER_RELEASE_GAP = 48
+
+# 在线歌曲链接模板
+SONG_URL_TEMPLATES = {
+    "netease": "https://music.163.com/#/song?id={id}",
+    "qqmusic": "https://y.qq.com/n/ryqq/songDetail/{id}",
+}
+
+
+class ReleaseMonitor:
+    """新歌发布监控引擎"""
+
+    def __init__(self, session_factory: Optional[Callable] = None):
+        """
+        Args:
+            session_factory: 异步会话工厂 (默认 AsyncSessionLocal，测试时可替换)
+        """
+        from app.services.write_queue import WriteQueue, get_write_queue
+        if session_factory is None:
+            from core.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+            self.write_queue = get_write_queue()
+        else:
+            self.write_queue = WriteQueue(session_factory)
+        self.session_factory = session_factory
+        self._tick_lock = asyncio.Lock()
+        self.last_tick_at: Optional[datetime] = None
+        self.checked_count = 0
+        self.failed_count = 0
+        self.published_count = 0
+
+    # ==================== 配置 ====================
+
+    @staticmethod
+    def _settings() -> Dict[str, Any]:
+        from core.config_manager import get_config_manager
+        cfg = get_config_manager()
+        sched = cfg.get("scheduler", {}) or {}
+        monitor = cfg.get("monitor", {}) or {}
+        min_minutes = max(1, int(sched.get("monitor_min_interval_minutes", DEFAULT_MIN_INTERVAL_MINUTES)))
+        max_minutes = max(min_minutes, int(sched.get("monitor_max_interval_minutes", DEFAULT_MAX_INTERVAL_MINUTES)))
+        return {
+            "enabled": monitor.get("enabled", True),
+            "interval": timedelta(minutes=max(1, int(
+                sched.get("check_interval_minutes", DEFAULT_CHECK_INTERVAL_MINUTES)
+            ))),
+            "min_interval": timedelta(minutes=min_minutes),
+            "max_interval": timedelta(minutes=max_minutes),
+            "concurrency": max(1, int(sched.get("monitor_concurrency", DEFAULT_MONITOR_CONCURRENCY))),
+            "jitter": float(sched.get("monitor_jitter_ratio", DEFAULT_JITTER_RATIO)),
+            "notify_window": timedelta(days=sched.get("notify_window_days", DEFAULT_NOTIFY_WINDOW_DAYS)),
+        }
+
+    # ==================== 排程 ====================
+
+    @staticmethod
+    def _slot(now: datetime, interval: timedelta, index: int, total: int, jitter: float) -> datetime:
+        """把第 index 个歌手放到 interval 内第 index 个时间片，并在时间片内抖动"""
+        width = interval / max(total, 1)
+        return now + width * index + width * random.uniform(0, jitter)
+
+    @staticmethod
+    def _next_run(now: datetime, interval: timedelta, jitter: float) -> datetime:
+        """本次检查完成后的下次检查时间 (间隔 ± 抖动)"""
+        return now + interval + interval * random.uniform(-jitter, jitter)
+
+    @staticmethod
+    def adaptive_interval(release_times: Iterable[datetime], now: datetime, base: timedelta,
+                          min_interval: timedelta, max_interval: timedelta) -> timedelta:
+        """
+        根据历史发布时间估算检查间隔
+
+        典型发布间隔取最近几次发布 (按天去重) 间隔的中位数；距上次发布已超过该间隔的
+        歌手按 "距今时长" 估算，长期沉寂的歌手会逐渐降到间隔上限。
+        发布记录不足两次时使用全局 check_interval_minutes。
+
+        Returns:
+            限制在 [min_interval, max_interval] 内的检查间隔
+        """
+        days = sorted({t.date() for t in release_times if t}, reverse=True)[:CADENCE_SAMPLE_RELEASES + 1]
+        if len(days) < 2:
+            interval = base
+        else:
+            gap = timedelta(days=median((a - b).days for a, b in zip(days, days[1:])))
+            since_last = now - datetime.combine(days[0], datetime.min.time())
+            interval = max(gap, since_last) / CHECKS_PER_RELEASE_GAP
+        return min(max(interval, min_interval), max_interval)
+
+    @staticmethod
+    def _interval_for(artist: Artist, settings: Dict[str, Any]) -> timedelta:
+        """歌手当前的检查间隔 (未学习过的使用全局间隔；配置上下限变更后重新限制)"""
+        if not artist.check_interval_minutes:
+            return settings["interval"]
+        interval = timedelta(minutes=artist.check_interval_minutes)
+        return min(max(interval, settings["min_interval"]), settings["max_interval"])
+
+    async def _learn_interval(self, db, artist_id: int, settings: Dict[str, Any]) -> timedelta:
+        """从数据库中歌手的发布历史学习检查间隔"""
+        release_times = (await db.execute(
+            select(Song.publish_time)
+            .where(Song.artist_id == artist_id, Song.publish_time.isnot(None))
+            .order_by(Song.publish_time.desc())
+            .limit(CADENCE_SAMPLE_RELEASES * 20)  # 同一天的多首歌 (专辑) 只算一次发布
+        )).scalars().all()
+        return self.adaptive_interval(
+            release_times, datetime.now(), settings["interval"],
+            settings["min_interval"], settings["max_interval"]
+        )
+
+    async def spread_schedule(self, reschedule_overdue: bool = False) -> int:
+        """
+        为尚未排程的歌手均匀分配检查时间
+
+        Args:
+            reschedule_overdue: 同时重新分配已过期的歌手 (启动时使用，避免停机期间
+                积压的歌手在重启后同时触发)
+
+        Returns:
+            重新排程的歌手数量
+        """
+        from app.services.write_queue import update_mutation
+
+        settings = self._settings()
+        now = datetime.now()
+        async with self.session_factory() as db:
+            artists = (await db.execute(
+                select(Artist).where(Artist.is_monitored == True).order_by(Artist.id)
+            )).scalars().all()
+
+        pending = [
+            a for a in artists
+            if a.next_check_at is None or (reschedule_overdue and a.next_check_at <= now)
+        ]
+        if pending:
+            await self.write_queue.submit(update_mutation(Artist, {
+                artist.id: {"next_check_at": self._slot(
+                    now, self._interval_for(artist, settings), index, len(pending), settings["jitter"]
+                )}
+                for index, artist in enumerate(pending)
+            }))
+            logger.info(f"🗓️ 已为 {len(pending)} 名歌手错峰分配检查时间")
+        return len(pending)
+
+    def register(self, scheduler):
+        """注册到调度器，并在启动时把积压的检查重新错峰"""
+        scheduler.add_job(
+            self.tick, 'interval', seconds=TICK_SECONDS,
+            id=MONITOR_JOB_ID, replace_existing=True,
+            max_instances=1, coalesce=True,
+            next_run_time=datetime.now() + timedelta(seconds=5)
+        )
+        asyncio.get_running_loop().create_task(self.spread_schedule(reschedule_overdue=True))
+        logger.info(f"已调度新歌监控任务，每 {TICK_SECONDS} 秒检查到期歌手")
+
+    # ==================== 执行 ====================
+
+    async def tick(self):
+        """检查所有到期的歌手 (有上限的并发)"""
+        settings = self._settings()
+        if not settings["enabled"] or self._tick_lock.locked():
+            return
+
+        async with self._tick_lock:
+            self.last_tick_at = datetime.now()
+            # 新关注的歌手在这里获得错峰时间，而不是立即检查
+            await self.spread_schedule()
+
+            async with self.session_factory() as db:
+                due = (await db.execute(
+                    select(Artist.id, Artist.name)
+                    .where(Artist.is_monitored == True, Artist.next_check_at <= self.last_tick_at)
+                    .order_by(Artist.next_check_at)
+                )).all()
+
+            if not due:
+                return
+
+            logger.info(f"🔔 新歌监控: {len(due)} 名歌手到期 (并发 {settings['concurrency']})")
+            semaphore = asyncio.Semaphore(settings["concurrency"])
+
+            async def worker(artist_id: int, name: str):
+                async with semaphore:
+                    await self.check_artist(artist_id, name, settings)
+
+            await asyncio.gather(*(worker(artist_id, name) for artist_id, name in due))
+
+    async def check_artist(self, artist_id: int, name: str, settings: Optional[Dict] = None) -> List[Song]:
+        """
+        增量检查一名歌手并发布新歌事件
+
+        Returns:
+            本次新增的歌曲
+        """
+        settings = settings or self._settings()
+        started_at = datetime.now()
+        new_songs: List[Song] = []
+        interval: Optional[timedelta] = None
+
+        async with self.session_factory() as db:
+            try:
+                # 之前同步过才通知 (首次同步拉回的是整个曲库，不是新歌)
+                had_baseline = (await db.execute(
+                    select(ArtistSource.id).where(
+                        ArtistSource.artist_id == artist_id,
+                        ArtistSource.last_sync.isnot(None)
+                    ).limit(1)
+                )).first() is not None
+
+                from app.services.library import LibraryService
+                await LibraryService().refresh_artist(
+                    db, name, pre_scan="none", sync_mode="incremental"
+                )
+
+                new_songs = (await db.execute(
+                    select(Song).options(selectinload(Song.sources))
+                    .where(Song.artist_id == artist_id, Song.created_at >= started_at)
+                )).scalars().all()
+                self.checked_count += 1
+                interval = await self._learn_interval(db, artist_id, settings)
+
+                if had_baseline:
+                    await self._publish_new_songs(name, new_songs, settings["notify_window"])
+            except Exception as e:
+                self.failed_count += 1
+                logger.error(f"❌ 新歌监控检查失败 [{name}]: {e}")
+                await db.rollback()
+
+            artist = await db.get(Artist, artist_id)
+            if artist is None:
+                return new_songs
+            if interval is not None:
+                artist.check_interval_minutes = max(1, round(interval.total_seconds() / 60))
+            values = {
+                "check_interval_minutes": artist.check_interval_minutes,
+                "next_check_at": self._next_run(
+                    datetime.now(), self._interval_for(artist, settings), settings["jitter"]
+                ),
+            }
+
+        # 无论成功与否都排到下一个周期，失败的歌手不会在每次轮询时重试
+        await self.write_queue.submit(
+            lambda db: db.execute(update(Artist).where(Artist.id == artist_id).values(**values))
+        )
+        return new_songs
+
+    async def _publish_new_songs(self, artist_name: str, songs: List[Song], window: timedelta):
+        """把新歌作为 NEW_CONTENT 事件发布"""
+        from app.models.media_record import MediaRecord
+
+        cutoff = datetime.now() - window
+        event_bus = get_event_bus()
+        for song in songs:
+            if song.publish_time and song.publish_time < cutoff:
+                continue
+
+            online = sorted(
+                (s for s in song.sources if s.source in SONG_URL_TEMPLATES),
+                key=lambda s: s.source != "qqmusic"  # QQ 优先
+            )
+            if not online:
+                continue
+            src = online[0]
+
+            media = MediaRecord(
+                unique_key=f"{src.source}:song:{src.source_id}",
+                source=src.source,
+                media_type="song",
+                media_id=str(src.source_id),
+                title=song.title,
+                author=artist_name,
+                album=song.album,
+                cover=song.cover or src.cover,
+                url=SONG_URL_TEMPLATES[src.source].format(id=src.source_id),
+                publish_time=song.publish_time,
+                found_at=datetime.now()
+            )
+            logger.info(f"🆕 发现新歌: {artist_name} - {song.title} ({src.source})")
+            await event_bus.publish(EventType.NEW_CONTENT, media)
+            self.published_count += 1
+
+    async def run_now(self, source: Optional[str] = None) -> int:
+        """
+        立即检查关注的歌手 (手动触发)
+
+        Args:
+            source: 只检查关联了该平台的歌手 (netease / qqmusic)，None 表示全部
+
+        Returns:
+            被标记为立即检查的歌手数量
+        """
+        now = datetime.now()
+        async with self.session_factory() as db:
+            stmt = select(Artist.id).where(Artist.is_monitored == True)
+            if source:
+                stmt = stmt.where(Artist.sources.any(ArtistSource.source == source))
+            artist_ids = (await db.execute(stmt)).scalars().all()
+
+        if artist_ids:
+            await self.write_queue.submit(
+                lambda db: db.execute(update(Artist).where(Artist.id.in_(artist_ids)).values(next_check_at=now))
+            )
+        asyncio.get_running_loop().create_task(self.tick())
+        return len(artist_ids)
+
+    async def schedule(self) -> Dict[str, Any]:
+        """
+        当前排程与每日 API 调用预算估算
+
+        每次增量检查对歌手关联的每个平台各请求一次歌曲列表，
+        因此每日调用量 ≈ Σ (每日检查次数 × 关联平台数)，不含周期性全量对账。
+        """
+        settings = self._settings()
+        day = timedelta(days=1)
+        async with self.session_factory() as db:
+            artists = (await db.execute(
+                select(Artist).options(selectinload(Artist.sources))
+                .where(Artist.is_monitored == True)
+                .order_by(Artist.next_check_at)
+            )).scalars().all()
+
+            rows = []
+            checks_per_day = 0.0
+            api_calls_per_day = 0.0
+            for artist in artists:
+                interval = self._interval_for(artist, settings)
+                checks = day / interval
+                checks_per_day += checks
+                api_calls_per_day += checks * len(artist.sources)
+                rows.append({
+                    "artist": artist.name,
+                    "interval_minutes": round(interval.total_seconds() / 60),
+                    "adaptive": bool(artist.check_interval_minutes),
+                    "next_check_at": artist.next_check_at,
+                    "sources": sorted(s.source for s in artist.sources),
+                })
+
+        return {
+            "min_interval_minutes": round(settings["min_interval"].total_seconds() / 60),
+            "max_interval_minutes": round(settings["max_interval"].total_seconds() / 60),
+            "checks_per_day": round(checks_per_day, 1),
+            "api_calls_per_day": round(api_calls_per_day, 1),
+            "artists": rows,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "last_tick_at": self.last_tick_at,
+            "running": self._tick_lock.locked(),
+            "checked": self.checked_count,
+            "failed": self.failed_count,
+            "published": self.published_count,
+        }
+
+
+# 全局实例
+_release_monitor: Optional[ReleaseMonitor] = None
+
+
+def get_release_monitor() -> ReleaseMonitor:
+    """获取新歌监控引擎单例"""
+    global _release_monitor
+    if _release_monitor is None:
+        _release_monitor = ReleaseMonitor()
+    return _release_monitor
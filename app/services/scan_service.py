@@ -8,12 +8,20 @@ ScanService - 本地媒体库文件扫描服务
 - 清理数据库中物理文件已不存在的"死键"
 - 支持增量扫描模式
 - 提供扫描进度回调
+- 支持按歌手限定范围扫描 (刷新单个歌手时使用)
+
+更新日志:
+- 2026-10-19: scan_local_files 新增 artist_name 参数，只处理未入库且文件名/标签匹配该歌手的文件
+- 2026-10-19: 扫描发现文件增删时清空音频路径缓存
+- 2026-10-19: 入库与清理的写入改为经由后台写入队列按批提交，扫描会话只读
 
 Author: google
 Created: 2026-01-30
 """
-from typing import Optional, Callable, Dict
+from typing import Optional, Callable, Dict, List
 from sqlalchemy.ext.asyncio import AsyncSession
+from functools import partial
+import asyncio
 import os
 from datetime import datetime
 from pathlib import Path
@@ -24,7 +32,7 @@ import uuid
 from app.repositories.song import SongRepository
 from app.repositories.artist import ArtistRepository
 from app.models.song import Song, SongSource
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
 import hashlib
 import binascii  # For manual APIC parsing if needed, though mutagen usually handles it
 
@@ -86,7 +94,8 @@ class ScanService:
         self,
         db: AsyncSession,
         progress_callback: Optional[Callable[[Dict], None]] = None,
-        incremental: bool = False
+        incremental: bool = False,
+        artist_name: Optional[str] = None
     ) -> Dict[str, int]:
         """
         全量/增量扫描本地音频文件目录。
@@ -96,13 +105,14 @@ class ScanService:
         
         优化点:
         - 预加载所有现有的本地源 ID，避免 N+1 查询。
-        - 缓存所有歌手信息，减少重复的歌手查询/创建。
-        - 延迟提交 (Bulk Commit)，显著提升数千个文件时的扫描性能。
+        - 入库写入提交到后台写入队列，按批合并提交，扫描期间不长时间占用写锁。
         
         Args:
             db (AsyncSession): 异步数据库会话。
             progress_callback (Callable): 用于实时推送扫描进度的回调函数。
             incremental (bool): 若为 True，则跳过清理阶段（Pruning），仅扫描新文件。
+            artist_name (str): 限定歌手范围。设置后跳过清理阶段，已入库的文件直接跳过
+                (依赖现有扫描索引)，未入库的文件仅在文件名或标签歌手匹配时入库。
             
         Returns:
             Dict[str, int]: 包含结果统计的字典:
@@ -111,30 +121,30 @@ class ScanService:
                     "removed_files_count": int # 清理失效记录数量
                 }
         """
-        from mutagen import File as MutagenFile
-        from app.models.artist import Artist
+        from app.services.write_queue import get_write_queue
         
         new_count = 0
         removed_count = 0
+        queue = get_write_queue()
+        pending: List[asyncio.Future] = []
         
-        song_repo = SongRepository(db)
+        # 歌手范围扫描: 归一化后做包含匹配 (兼容 "A/B" 等多歌手写法)
+        scope_key = self._normalize_cn_brackets(artist_name).lower() if artist_name else None
         
         from app.services.task_monitor import task_monitor, TaskCancelledException
-        task_id = await task_monitor.start_task("scan", "正在初始化扫描...")
+        task_id = await task_monitor.start_task(
+            "scan", f"正在初始化扫描 ({artist_name})..." if artist_name else "正在初始化扫描..."
+        )
         
         try:
             # --- 阶段 1: 清理阶段 (Pruning) ---
-            if not incremental:
+            if not incremental and not scope_key:
                 removed_count = await self._prune_missing_files(db, progress_callback, task_id)
             
             # 获取所有现有的本地源 ID
             stmt = select(SongSource.source_id).where(SongSource.source == "local")
             existing_source_ids = set((await db.execute(stmt)).scalars().all())
             logger.info(f"📊 数据库中已存在 {len(existing_source_ids)} 个本地文件记录")
-
-            # 缓存所有歌手信息以减少查询
-            all_artists = (await db.execute(select(Artist))).scalars().all()
-            artist_map = {a.name: a for a in all_artists}
             
             # --- 阶段 2: 扫描阶段 (Scanning) ---
             logger.info(f"🔍 准备扫描目录列表: {self.scan_directories}")
@@ -189,6 +199,10 @@ class ScanService:
                     
                     file_path = os.path.join(dir_name, filename).replace("\\", "/")
                     
+                    # 歌手范围扫描: 已入库的文件依赖现有索引，不再重复读取标签
+                    if scope_key and filename in existing_source_ids:
+                        continue
+                    
                     # [Fix]: 不要简单根据 filename 跳过，需要结合路径判断
                     # 我们将在 _create_song_source 中处理具体的去重逻辑
                     # 但为了性能，如果我们确定该文件的路径已经完全入库，可以跳过
@@ -231,41 +245,33 @@ class ScanService:
                     if 'publish_time' not in metadata:
                         metadata['publish_time'] = None
 
-                    # 获取歌手 (使用缓存)
-                    artist_name = metadata['artist_name']
-                    if artist_name in artist_map:
-                        artist_obj = artist_map[artist_name]
-                    else:
-                        artist_repo = ArtistRepository(db)
-                        artist_obj = await artist_repo.get_or_create_by_name(artist_name)
-                        artist_map[artist_name] = artist_obj
-                    
-                    # 查找或创建歌曲
-                    song_obj = await self._find_or_create_song(
-                        db, song_repo, metadata, artist_obj
-                    )
-                    
-                    # 创建本地源记录 (使用封装方法处理去重和 path 更新)
+                    # 歌手范围扫描: 文件名和标签歌手都不匹配时跳过
+                    file_artist = metadata['artist_name']
+                    if scope_key and (
+                        scope_key not in self._normalize_cn_brackets(file_artist).lower() and
+                        scope_key not in self._normalize_cn_brackets(filename_no_ext).lower()
+                    ):
+                        continue
+
+                    # 本地源记录 (由 _create_song_source 处理去重和 path 更新)
                     data_json = {
                         "quality": metadata.get('quality_info', 'PQ'),
                         "format": os.path.splitext(filename)[1].replace('.', '').upper(),
                         "cover": metadata.get('cover')
                     }
                     
-                    await self._create_song_source(
-                        db, song_obj, filename, file_path, data_json
-                    )
+                    # 歌手 / 歌曲 / 本地源的写入交给后台写入队列，与其他后台写入按批合并提交
+                    pending.append(queue.submit_nowait(partial(
+                        self._ingest_file, metadata=metadata, filename=filename,
+                        file_path=file_path, data_json=data_json
+                    )))
                     
                     existing_source_ids.add(filename)
                     new_count += 1
-                    
-                    # 每 50 个文件 flush 一次，防止事务过大
-                    if new_count % 50 == 0:
-                        await db.flush()
 
-            # 统一提交
+            # 等待入库写入提交
+            new_count = await self._wait_ingested(pending)
             if new_count > 0:
-                await db.commit()
                 logger.info(f"💾 扫描完成,已入库 {new_count} 个新文件")
             
             # 最终进度回调
@@ -276,6 +282,11 @@ class ScanService:
                     "removed_files_count": removed_count
                 })
             
+            if new_count or removed_count:
+                # 文件有增删，已缓存的音频路径可能失效
+                from app.services.media_service import audio_path_cache
+                audio_path_cache.invalidate()
+            
             msg = f"扫描完成, 新增 {new_count}, 移除 {removed_count}"
             await task_monitor.finish_task(task_id, msg, details={"new": new_count, "removed": removed_count})
             
@@ -286,6 +297,8 @@ class ScanService:
 
         except TaskCancelledException as e:
             logger.warning(f"Scan task cancelled: {e}")
+            # 已提交到队列的文件仍会入库
+            new_count = await self._wait_ingested(pending)
             await task_monitor.finish_task(task_id, f"扫描已取消 (新增: {new_count})", details={"new": new_count})
             return {"new_files_found": new_count, "removed_files_count": removed_count, "status": "cancelled"}
         
@@ -323,7 +336,6 @@ class ScanService:
         total_songs = len(all_local_songs)
         
         # 并发检查本地文件存在性
-        import asyncio
         async def check_exists(song):
             return await anyio.to_thread.run_sync(os.path.exists, song.local_path)
         
@@ -359,56 +371,81 @@ class ScanService:
                 missing_songs.append(song)
                 
         if missing_songs:
-            missing_ids = [s.id for s in missing_songs]
-            
-            # 1. 批量移除所有相关的本地源信息
-            source_del_stmt = delete(SongSource).where(
-                SongSource.song_id.in_(missing_ids),
-                SongSource.source == "local"
+            from app.services.write_queue import get_write_queue
+            removed_count = await get_write_queue().submit(
+                partial(self._remove_missing_songs, missing_ids=[s.id for s in missing_songs])
             )
-            await db.execute(source_del_stmt)
-            await db.flush()
-            
-            # 2. 批量检查每个缺失歌曲剩余的在线源数量
-            from sqlalchemy import func
-            source_count_stmt = select(SongSource.song_id, func.count(SongSource.id)).where(
-                SongSource.song_id.in_(missing_ids)
-            ).group_by(SongSource.song_id)
-            
-            res = await db.execute(source_count_stmt)
-            remaining_sources = dict(res.all())
-            
-            songs_to_delete = []
-            songs_to_update = []
-            
-            for song in missing_songs:
-                count = remaining_sources.get(song.id, 0)
-                if count == 0:
-                    songs_to_delete.append(song)
-                else:
-                    songs_to_update.append(song)
-                    
-            # 3. 彻底删除无在线源的孤立歌曲 
-            if songs_to_delete:
-                delete_ids = [s.id for s in songs_to_delete]
-                await db.execute(delete(Song).where(Song.id.in_(delete_ids)))
-                
-            # 4. 更新仍然有在线源的歌曲状态
-            for song in songs_to_update:
-                song.local_path = None
-                song.status = "PENDING"
-                
-            removed_count = len(missing_songs)
-            
-        if removed_count > 0:
-            await db.commit()
             logger.info(f"✅ 成功批量清理了 {removed_count} 条失效本地记录")
             
         return removed_count
 
-    async def scan_single_file(self, file_path: str, db: AsyncSession) -> Optional[Song]:
+    @staticmethod
+    async def _remove_missing_songs(db: AsyncSession, missing_ids: List[int]) -> int:
+        """
+        清理文件已丢失的歌曲 (写入队列的修改函数，不提交)
+        
+        Returns:
+            int: 处理的歌曲数
+        """
+        # 1. 批量移除所有相关的本地源信息
+        source_del_stmt = delete(SongSource).where(
+            SongSource.song_id.in_(missing_ids),
+            SongSource.source == "local"
+        )
+        await db.execute(source_del_stmt)
+        
+        # 2. 批量检查每个缺失歌曲剩余的在线源数量
+        from sqlalchemy import func
+        source_count_stmt = select(SongSource.song_id, func.count(SongSource.id)).where(
+            SongSource.song_id.in_(missing_ids)
+        ).group_by(SongSource.song_id)
+        
+        res = await db.execute(source_count_stmt)
+        remaining_sources = dict(res.all())
+        
+        delete_ids = [i for i in missing_ids if remaining_sources.get(i, 0) == 0]
+        update_ids = [i for i in missing_ids if remaining_sources.get(i, 0) > 0]
+        
+        # 3. 彻底删除无在线源的孤立歌曲
+        if delete_ids:
+            await db.execute(delete(Song).where(Song.id.in_(delete_ids)))
+        
+        # 4. 更新仍然有在线源的歌曲状态
+        if update_ids:
+            await db.execute(
+                update(Song).where(Song.id.in_(update_ids)).values(local_path=None, status="PENDING")
+            )
+        
+        return len(missing_ids)
+
+    async def _ingest_file(
+        self,
+        db: AsyncSession,
+        metadata: Dict,
+        filename: str,
+        file_path: str,
+        data_json: Dict
+    ) -> Song:
+        """入库单个文件: 歌手 / 歌曲 / 本地源 (写入队列的修改函数，不提交)"""
+        artist_obj = await ArtistRepository(db).get_or_create_by_name(metadata['artist_name'])
+        song_obj = await self._find_or_create_song(db, SongRepository(db), metadata, artist_obj)
+        await self._create_song_source(db, song_obj, filename, file_path, data_json)
+        return song_obj
+
+    @staticmethod
+    async def _wait_ingested(pending: List[asyncio.Future]) -> int:
+        """等待已提交的入库写入完成，返回成功数 (单个文件失败只记录日志)"""
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            logger.error(f"❌ {len(failed)} 个文件入库失败，首个错误: {failed[0]!r}")
+        return len(results) - len(failed)
+
+    async def scan_single_file(self, file_path: str, db: AsyncSession = None) -> Optional[Song]:
         """
         扫描单个文件并入库 (用于下载后即时更新)
+        
+        写入经由后台写入队列提交 (db 参数保留兼容，不再使用)。
         """
         if not os.path.exists(file_path):
             logger.warning(f"File not found for single scan: {file_path}")
@@ -438,26 +475,19 @@ class ScanService:
             if key not in metadata: metadata[key] = None
         if 'publish_time' not in metadata: metadata['publish_time'] = None
 
-        # 获取/创建歌手
-        artist_name = metadata['artist_name']
-        from app.repositories.artist import ArtistRepository
-        artist_repo = ArtistRepository(db)
-        artist_obj = await artist_repo.get_or_create_by_name(artist_name)
-        
-        # 查找或创建歌曲
-        from app.repositories.song import SongRepository
-        song_repo = SongRepository(db)
-        song_obj = await self._find_or_create_song(db, song_repo, metadata, artist_obj)
-        
-        # 创建本地源
+        # 本地源数据
         data_json = {
             "quality": metadata.get('quality', 'PQ'), # Uses new logic from _extract_metadata -> _analyze_quality
             "format": os.path.split(file_path)[1].split('.')[-1].upper(),
             "cover": metadata.get('cover')
         }
         
-        await self._create_song_source(db, song_obj, filename, file_path, data_json)
-        await db.commit()
+        # 获取/创建歌手、查找或创建歌曲、创建本地源
+        from app.services.write_queue import get_write_queue
+        song_obj = await get_write_queue().submit(partial(
+            self._ingest_file, metadata=metadata, filename=filename,
+            file_path=file_path, data_json=data_json
+        ))
         
         logger.info(f"🚀 Single file scanned and committed: {filename} ({data_json['quality']})")
         return song_obj
@@ -10,6 +10,10 @@ SongManagementService - 歌曲管理服务
 
 Author: google
 Created: 2026-02-02 (从 LibraryService 拆分)
+
+更新日志:
+- 2026-10-19: 本地歌曲列表支持游标分页，总数由计数缓存提供
+- 2026-10-19: 删除歌曲时剔除音频路径缓存
 """
 from typing import Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -78,9 +82,12 @@ class SongManagementService:
             exists = await anyio.to_thread.run_sync(os.path.exists, song.local_path)
             if exists:
                 await anyio.to_thread.run_sync(os.remove, song.local_path)
+            from app.services.media_service import audio_path_cache
+            audio_path_cache.invalidate(song.local_path)
         
         # 从数据库删除
         success = await song_repo.delete(song_id)
+        await db.commit()
         return success
     
     @handle_service_errors(fallback_value=False)
@@ -114,6 +121,7 @@ class SongManagementService:
         else:
             success = False
         
+        await db.commit()
         return success
     
     @handle_service_errors(fallback_value=False)
@@ -493,14 +501,21 @@ class SongManagementService:
         offset: int,
         fetch_limit: int,
         sort_by: str,
-        order: str
-    ) -> tuple[list, int]:
+        order: str,
+        cursor: Optional[str] = None
+    ) -> tuple[list, int, Optional[str]]:
         """
         专门获取所有本地歌曲 (有 local_path 的歌曲)
         无视是否关注歌手,按入库时间倒序排列
+
+        Args:
+            cursor: 游标 (上一页返回的 next_cursor)，提供时忽略 offset
+
+        Returns:
+            (歌曲列表, 总数, 下一页游标)
         """
-        from sqlalchemy import func, desc, asc
-        from app.models.artist import Artist
+        from sqlalchemy import func
+        from app.utils.counter_cache import counter_cache
 
         stmt = select(Song).options(
             selectinload(Song.artist),
@@ -508,29 +523,36 @@ class SongManagementService:
         )
         stmt = stmt.where(Song.local_path.isnot(None))
         
-        # 排序处理
-        order_func = desc if order.lower() == "desc" else asc
-        if sort_by == "created_at":
-            stmt = stmt.order_by(order_func(Song.created_at))
-        elif sort_by == "publish_time":
-            stmt = stmt.order_by(order_func(Song.publish_time).nullslast())
-        elif sort_by == "artist":
-            stmt = stmt.join(Artist).order_by(order_func(Artist.name))
-        elif sort_by == "title":
-            stmt = stmt.order_by(order_func(Song.title))
-        elif sort_by == "album":
-            stmt = stmt.order_by(order_func(Song.album))
-        else:
-             stmt = stmt.order_by(Song.created_at.desc())
-        
-        # 分页
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total = (await db.execute(count_stmt)).scalar() or 0
+        # 排序处理 (未知字段按入库时间倒序)
+        if sort_by not in ("created_at", "publish_time", "artist", "title", "album"):
+            sort_by, order = "created_at", "desc"
+        keyset = SongRepository.keyset_sort(sort_by, order)
+        if sort_by == "artist":
+            stmt = stmt.join(Artist)
+        stmt = stmt.order_by(*keyset.order_by())
+        
+        # 总数 (写入提交后失效)
+        async def count():
+            count_stmt = select(func.count(Song.id)).where(Song.local_path.isnot(None))
+            return (await db.execute(count_stmt)).scalar() or 0
+
+        total = await counter_cache.get_or_compute(("local_songs",), ("songs",), count)
         
-        stmt = stmt.offset(offset).limit(fetch_limit)
+        # 分页: 有游标时按排序键定位，否则使用 OFFSET
+        if cursor:
+            stmt = stmt.where(keyset.after(cursor))
+        else:
+            stmt = stmt.offset(offset)
+        stmt = stmt.limit(fetch_limit)
         
         result = await db.execute(stmt)
         songs = result.scalars().all()
+
+        next_cursor = None
+        if songs and len(songs) == fetch_limit:
+            last = songs[-1]
+            value = last.artist.name if sort_by == "artist" else getattr(last, keyset.column.key)
+            next_cursor = keyset.encode(value, last.id)
         
         # 序列化
         items = []
@@ -619,7 +641,7 @@ class SongManagementService:
                 "source_id": s.local_path,
             })
 
-        return items, total
+        return items, total, next_cursor
 
     async def force_fix_quality(self, db: AsyncSession) -> tuple[int, list]:
         """
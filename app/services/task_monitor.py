@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import uuid
 import time
@@ -6,12 +7,20 @@ from core.websocket import manager
 
 logger = logging.getLogger(__name__)
 
+# Max progress broadcasts per task per second (state changes are always sent immediately)
+DEFAULT_MAX_UPDATES_PER_SECOND = 4
+
 class TaskMonitor:
     """
     Global Task Monitor Service
     
     Manages the lifecycle of background tasks and broadcasts updates via WebSocket.
     Singleton pattern usage recommended.
+
+    Progress updates are coalesced per task: workers may call update_progress for
+    every item, but at most `task_monitor.max_updates_per_second` messages per task
+    are broadcast. The latest state is flushed by a trailing timer, and state
+    transitions (paused/cancelling/completed/error) are broadcast immediately.
     """
     _instance = None
     
@@ -27,6 +36,10 @@ class TaskMonitor:
         self.tasks = {}
         self._pause_events = {}  # task_id -> asyncio.Event
         self._cancel_flags = set() # task_id set
+        self._last_emit: Dict[str, float] = {}  # task_id -> monotonic time of last broadcast
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._min_interval: Optional[float] = None
+        self.suppressed = 0
         
         self._initialized = True
 
@@ -40,7 +53,6 @@ class TaskMonitor:
         Start a new task and broadcast pending state.
         Returns: task_id (str)
         """
-        import asyncio
         task_id = str(uuid.uuid4())
         timestamp = int(time.time() * 1000)
         
@@ -60,7 +72,7 @@ class TaskMonitor:
         self._pause_events[task_id] = asyncio.Event()
         self._pause_events[task_id].set() # Initially running (not paused)
         
-        await self._broadcast(task_data)
+        self._emit(task_id)
         logger.info(f"Task Started [{task_type}]: {message} (ID: {task_id})")
         return task_id
 
@@ -73,7 +85,7 @@ class TaskMonitor:
         state: str = "running"
     ):
         """
-        Update task progress and broadcast.
+        Update task progress and broadcast (rate limited per task).
         """
         if task_id not in self.tasks:
             return
@@ -95,8 +107,23 @@ class TaskMonitor:
              task["state"] = state
              
         task["timestamp"] = int(time.time() * 1000)
-        
-        await self._broadcast(task)
+
+        if task["state"] != current_state or task["state"] in ("completed", "error"):
+            self._emit(task_id)
+            return
+
+        elapsed = time.monotonic() - self._last_emit.get(task_id, 0.0)
+        interval = self._get_min_interval()
+        if elapsed >= interval:
+            self._emit(task_id)
+            return
+
+        self.suppressed += 1
+        if task_id not in self._flush_handles:
+            # Trailing flush so the latest coalesced progress is not lost
+            self._flush_handles[task_id] = asyncio.get_running_loop().call_later(
+                interval - elapsed, self._emit, task_id
+            )
 
     async def finish_task(self, task_id: str, message: str = "Completed", details: Optional[Dict] = None):
         """
@@ -151,11 +178,14 @@ class TaskMonitor:
         if task_id in self._cancel_flags:
             raise TaskCancelledException(f"Task {task_id} cancelled by user")
             
-        # Check pause (Wait if cleared)
-        if task_id in self._pause_events:
-            await self._pause_events[task_id].wait()
+        # Check pause (Wait if cleared); the running case costs two lookups and no await
+        pause_event = self._pause_events.get(task_id)
+        if pause_event is not None and not pause_event.is_set():
+            await pause_event.wait()
 
     def _cleanup_task(self, task_id: str):
+        self._cancel_flush(task_id)
+        self._last_emit.pop(task_id, None)
         if task_id in self._pause_events:
             del self._pause_events[task_id]
         if task_id in self._cancel_flags:
@@ -164,15 +194,40 @@ class TaskMonitor:
     def _get_progress(self, task_id: str) -> int:
         return self.tasks.get(task_id, {}).get("progress", 0)
 
-    async def _broadcast(self, task_data: Dict):
+    def _get_min_interval(self) -> float:
+        if self._min_interval is None:
+            from core.config_manager import get_config_manager
+            rate = get_config_manager().get("task_monitor.max_updates_per_second", DEFAULT_MAX_UPDATES_PER_SECOND)
+            self._min_interval = 1.0 / rate if rate and rate > 0 else 0.0
+        return self._min_interval
+
+    def _cancel_flush(self, task_id: str):
+        handle = self._flush_handles.pop(task_id, None)
+        if handle:
+            handle.cancel()
+
+    def _emit(self, task_id: str):
         """
-        Construct WS message and send.
+        Construct WS message from the current task state and enqueue it (non-blocking).
         """
+        self._cancel_flush(task_id)
+        task_data = self.tasks.get(task_id)
+        if task_data is None:
+            return
+        self._last_emit[task_id] = time.monotonic()
+        # Snapshot: messages sit in per-client send queues while the task dict keeps mutating
         msg = {
             "type": "task_progress",
-            "data": task_data
+            "data": {**task_data, "details": dict(task_data.get("details") or {})}
+        }
+        manager.broadcast_nowait(msg)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tasks": len(self.tasks),
+            "pending_flushes": len(self._flush_handles),
+            "suppressed": self.suppressed,
         }
-        await manager.broadcast(msg)
 
 class TaskCancelledException(Exception):
     pass
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+TitleMatchIndex - 歌曲标题匹配索引
+
+核心功能：
+对一批在线候选歌曲只做一次标题归一化，建立哈希索引，
+之后每首本地歌曲的匹配只需查表，而不是逐个重新归一化候选标题。
+
+匹配规则 (与原 ArtistRefreshService._find_match 一致)：
+1. 精确匹配: 归一化标题相同 (优先)
+2. 模糊匹配: 远程标题包含于本地标题 (本地是变体而远程是原版时拒绝)
+3. 反向模糊: 本地标题包含于远程标题 (本地标题长度需大于 1)
+模糊匹配有多个命中时取候选列表中最靠前的一个。
+
+Author: google
+Created: 2026-10-19
+"""
+import re
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from app.services.scan_service import ScanService
+
+logger = logging.getLogger(__name__)
+
+# 变体关键词 (伴奏 / Live / Demo 等)
+VARIANT_KEYWORDS = (
+    "(伴奏)", " 伴奏", "inst.", "instrumental",
+    "demo", "(live)", " live", "（伴奏）"
+)
+
+_BRACKET_PATTERN = re.compile(r"[\(\[【（].*?[\)\]】）]")
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """归一化标题: 统一中英文括号、移除空格、转小写"""
+    return ScanService._normalize_cn_brackets(title).lower().strip()
+
+
+def strip_brackets(title: Optional[str]) -> str:
+    """去除括号及其内容 (如 "(Live)"、"【伴奏】")，用于放宽搜索"""
+    if not title:
+        return ""
+    return _BRACKET_PATTERN.sub("", title).strip()
+
+
+def is_variant(title: Optional[str]) -> bool:
+    """是否为伴奏 / Live / Demo 等变体版本"""
+    lowered = (title or "").lower()
+    return any(k in lowered for k in VARIANT_KEYWORDS)
+
+
+@dataclass(frozen=True)
+class TitleKey:
+    """本地歌曲的预计算匹配键"""
+    norm: str
+    stripped: str
+    variant: bool
+
+    @classmethod
+    def of(cls, title: Optional[str]) -> "TitleKey":
+        return cls(
+            norm=normalize_title(title),
+            stripped=strip_brackets(title),
+            variant=is_variant(title)
+        )
+
+
+class TitleMatchIndex:
+    """
+    在线候选歌曲的标题匹配索引 (每次刷新构建一次)
+
+    - exact: 归一化标题 -> 候选下标列表
+    - bigrams: 二元字串 -> 候选下标集合 (用于 "本地包含于远程" 的反向匹配)
+    """
+
+    def __init__(self, candidates: List):
+        self.candidates = list(candidates)
+        self._norms: List[str] = []
+        self._variants: List[bool] = []
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._bigrams: Dict[str, Set[int]] = defaultdict(set)
+        self._lengths: Set[int] = set()
+
+        for pos, cand in enumerate(self.candidates):
+            title = getattr(cand, "title", None) or ""
+            norm = normalize_title(title)
+            self._norms.append(norm)
+            self._variants.append(is_variant(title))
+            if not norm:
+                continue
+            self._exact[norm].append(pos)
+            self._lengths.add(len(norm))
+            for i in range(len(norm) - 1):
+                self._bigrams[norm[i:i + 2]].add(pos)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def find(self, title_or_key) -> Optional[object]:
+        """
+        查找与本地标题匹配的候选
+
+        Args:
+            title_or_key: 本地标题字符串或预计算的 TitleKey
+
+        Returns:
+            匹配的候选对象，未命中返回 None
+        """
+        key = title_or_key if isinstance(title_or_key, TitleKey) else TitleKey.of(title_or_key)
+        norm_local = key.norm
+        if not norm_local:
+            return None
+
+        # 1. 精确匹配
+        exact = self._exact.get(norm_local)
+        if exact:
+            return self.candidates[exact[0]]
+
+        best = None
+
+        # 2. 远程标题包含于本地标题: 枚举本地标题的子串查表
+        for length in self._lengths:
+            if length >= len(norm_local):
+                continue
+            for start in range(len(norm_local) - length + 1):
+                for pos in self._exact.get(norm_local[start:start + length], ()):
+                    if best is not None and pos >= best:
+                        break
+                    if key.variant and not self._variants[pos]:
+                        # 本地是变体但远程是原版，拒绝
+                        continue
+                    best = pos
+                    break
+
+        # 3. 本地标题包含于远程标题: 二元字串倒排求交后校验
+        if len(norm_local) > 1:
+            postings = sorted(
+                (self._bigrams.get(norm_local[i:i + 2], set()) for i in range(len(norm_local) - 1)),
+                key=len
+            )
+            if postings and postings[0]:
+                hits = set.intersection(*postings)
+                for pos in sorted(hits):
+                    if best is not None and pos >= best:
+                        break
+                    if norm_local in self._norms[pos]:
+                        best = pos
+                        break
+
+        return self.candidates[best] if best is not None else None
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+TranscodeService - 移动端播放的实时转码
+
+核心功能：
+- 通过本地 ffmpeg 子进程把原始音频 (例如 hi-res FLAC) 转为 opus / mp3 / aac，边转边发送
+- 完整转码的结果写入转码缓存目录，按 (文件指纹, 格式, 码率) 命名，再次请求直接按文件返回 (支持 Range)
+- 缓存目录按总大小做 LRU 淘汰 (命中时刷新 mtime)
+- 同时进行的转码数由信号量限制
+
+配置 (storage 配置段):
+- transcode_cache_dir: 缓存目录，默认 cache_dir 下的 transcode 子目录 (随音频缓存卷持久化)
+- transcode_cache_size: 缓存上限 (字节)，默认 2GB
+- transcode_max_concurrent: 最大并发转码数，默认 2
+
+更新日志:
+- 2026-10-19: ffmpeg 的 stderr 由并发任务持续读取 (只保留末尾)，避免管道写满后转码卡死；
+  缓存文件写入与 LRU 淘汰移到工作线程，不阻塞事件循环
+
+Author: google
+Created: 2026-10-19
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from functools import partial
+from typing import AsyncIterator, Dict, Optional
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/audio_cache"
+TRANSCODE_SUBDIR = "transcode"
+DEFAULT_TRANSCODE_CACHE_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+DEFAULT_TRANSCODE_MAX_CONCURRENT = 2
+DEFAULT_BITRATE = 128
+MIN_BITRATE = 32
+MAX_BITRATE = 320
+CHUNK_SIZE = 64 * 1024
+STDERR_TAIL_BYTES = 4096  # 转码失败时记录的 stderr 末尾长度
+
+
+@dataclass(frozen=True)
+class TranscodeProfile:
+    """转码目标格式"""
+    format: str
+    codec: str
+    muxer: str
+    extension: str
+    media_type: str
+
+
+PROFILES: Dict[str, TranscodeProfile] = {
+    "opus": TranscodeProfile("opus", "libopus", "ogg", "ogg", "audio/ogg"),
+    "mp3": TranscodeProfile("mp3", "libmp3lame", "mp3", "mp3", "audio/mpeg"),
+    "aac": TranscodeProfile("aac", "aac", "adts", "aac", "audio/aac"),
+}
+
+
+class TranscodeUnavailableError(RuntimeError):
+    """未安装 ffmpeg"""
+
+
+class TranscodeService:
+    """实时转码 + 转码缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_cache_size: Optional[int] = None,
+                 max_concurrent: Optional[int] = None):
+        from core.config_manager import get_config_manager
+        storage_cfg = get_config_manager().get("storage", {}) or {}
+
+        self.cache_dir = cache_dir or storage_cfg.get("transcode_cache_dir") or os.path.join(
+            storage_cfg.get("cache_dir") or DEFAULT_CACHE_DIR, TRANSCODE_SUBDIR
+        )
+        self.max_cache_size = int(max_cache_size or storage_cfg.get(
+            "transcode_cache_size", DEFAULT_TRANSCODE_CACHE_SIZE
+        ))
+        self.max_concurrent = max(1, int(max_concurrent or storage_cfg.get(
+            "transcode_max_concurrent", DEFAULT_TRANSCODE_MAX_CONCURRENT
+        )))
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.completed = 0
+        self.cache_hits = 0
+
+    # ==================== 参数与缓存 ====================
+
+    @staticmethod
+    def get_profile(fmt: str) -> TranscodeProfile:
+        profile = PROFILES.get((fmt or "").lower())
+        if not profile:
+            raise ValueError(f"不支持的转码格式: {fmt} (可选: {', '.join(PROFILES)})")
+        return profile
+
+    @staticmethod
+    def clamp_bitrate(bitrate: Optional[int]) -> int:
+        return min(max(int(bitrate or DEFAULT_BITRATE), MIN_BITRATE), MAX_BITRATE)
+
+    @staticmethod
+    def is_available() -> bool:
+        return shutil.which("ffmpeg") is not None
+
+    def cache_path(self, source_path: str, stat: os.stat_result, profile: TranscodeProfile, bitrate: int) -> str:
+        """
+        缓存文件路径: 文件指纹 (绝对路径 + 大小 + mtime) + 格式 + 码率
+
+        源文件被替换 (大小或 mtime 变化) 时指纹随之变化，旧缓存由 LRU 淘汰。
+        """
+        identity = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}_{profile.format}_{bitrate}.{profile.extension}")
+
+    def lookup(self, cache_path: str) -> Optional[os.stat_result]:
+        """命中缓存时刷新 mtime (LRU) 并返回 stat"""
+        try:
+            os.utime(cache_path)
+            stat = os.stat(cache_path)
+        except OSError:
+            return None
+        self.cache_hits += 1
+        return stat
+
+    def enforce_cache_limit(self):
+        """缓存总大小超过上限时按 mtime 从旧到新删除 (跳过写入中的 .part 文件)"""
+        try:
+            entries = []
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith(".part"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_cache_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                logger.warning(f"⚠️ 删除转码缓存失败 {path}: {e}")
+
+    # ==================== 转码 ====================
+
+    def _command(self, source_path: str, profile: TranscodeProfile, bitrate: int) -> list:
+        return [
+            "ffmpeg", "-nostdin", "-v", "error",
+            "-i", source_path,
+            "-map", "0:a:0", "-vn",
+            "-c:a", profile.codec, "-b:a", f"{bitrate}k",
+            "-f", profile.muxer, "pipe:1",
+        ]
+
+    @staticmethod
+    async def _drain_stderr(stream: asyncio.StreamReader) -> bytes:
+        """持续读取 stderr (只保留末尾)，否则管道写满后 ffmpeg 会阻塞在写 stderr 上"""
+        tail = b""
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            if not chunk:
+                return tail
+            tail = (tail + chunk)[-STDERR_TAIL_BYTES:]
+
+    async def stream(self, source_path: str, cache_path: str, profile: TranscodeProfile,
+                     bitrate: int) -> AsyncIterator[bytes]:
+        """
+        转码并逐块产出数据，同时写入缓存临时文件；完整结束后才放入缓存
+
+        客户端中途断开时终止 ffmpeg 并丢弃临时文件。文件写入与缓存淘汰在工作线程中执行。
+        """
+        if not self.is_available():
+            raise TranscodeUnavailableError("ffmpeg 不可用")
+
+        async with self._semaphore:
+            self.active += 1
+            await anyio.to_thread.run_sync(partial(os.makedirs, self.cache_dir, exist_ok=True))
+            part_path = f"{cache_path}.{uuid.uuid4().hex[:8]}.part"
+            process = await asyncio.create_subprocess_exec(
+                *self._command(source_path, profile, bitrate),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stderr_task = asyncio.create_task(self._drain_stderr(process.stderr))
+            finished = False
+            try:
+                async with await anyio.open_file(part_path, "wb") as part:
+                    while True:
+                        chunk = await process.stdout.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        await part.write(chunk)
+                        yield chunk
+
+                returncode = await process.wait()
+                stderr = await stderr_task
+                if returncode == 0:
+                    await anyio.to_thread.run_sync(os.replace, part_path, cache_path)
+                    finished = True
+                    self.completed += 1
+                    await anyio.to_thread.run_sync(self.enforce_cache_limit)
+                else:
+                    logger.error(f"❌ 转码失败 {source_path}: {stderr.decode(errors='ignore')[-500:]}")
+            finally:
+                self.active -= 1
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                stderr_task.cancel()
+                if not finished and os.path.exists(part_path):
+                    os.remove(part_path)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "completed": self.completed,
+            "cache_hits": self.cache_hits,
+        }
+
+
+# 全局实例 (信号量需要在所有请求间共享)
+_transcode_service: Optional[TranscodeService] = None
+
+
+def get_transcode_service() -> TranscodeService:
+    """获取转码服务单例"""
+    global _transcode_service
+    if _transcode_service is None:
+        _transcode_service = TranscodeService()
+    return _transcode_service
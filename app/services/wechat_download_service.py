@@ -8,7 +8,7 @@
 - Magic Link 生成
 
 Author: google
-Updated: 2026-01-26
+Updated: 2026-10-19
 """
 from typing import Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -64,12 +64,14 @@ class WeChatDownloadService:
             
             if result:
                 # 下载成功，创建记录
-                return await WeChatDownloadService.create_or_update_record(
+                record = await WeChatDownloadService.create_or_update_record(
                     db=db,
                     song=song,
                     download_result=result,
                     cover_url=song.get('cover', '')
                 )
+                await db.commit()
+                return record
             else:
                 logger.error(f"微信下载失败: {title}")
                 return None
@@ -85,7 +87,7 @@ class WeChatDownloadService:
         download_result: Dict[str, Any],
         cover_url: str = ""
     ) -> Optional[Dict[str, Any]]:
-        """下载完成后创建或更新媒体记录"""
+        """下载完成后创建或更新媒体记录 (不提交，可作为写入队列的修改)"""
         repo = MediaRecordRepository(db)
         
         unique_key = f"{song['source']}_{song['id']}"
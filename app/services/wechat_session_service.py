@@ -4,7 +4,7 @@ from typing import Optional
 from datetime import datetime, timedelta
 from sqlalchemy import select, delete
 
-from core.database import AsyncSessionLocal
+from core.database import AsyncSessionLocal, db_writer
 from app.models.wechat_session import WeChatSession
 
 logger = logging.getLogger(__name__)
@@ -14,7 +14,7 @@ class WeChatSessionService:
 
     @staticmethod
     async def get_db_session(user_id: str) -> Optional[dict]:
-        """从数据库获取搜索会话"""
+        """从数据库获取搜索会话 (过期会话经由 db_writer 删除)"""
         async with AsyncSessionLocal() as db:
             stmt = select(WeChatSession).where(WeChatSession.user_id == user_id)
             result = await db.execute(stmt)
@@ -22,16 +22,15 @@ class WeChatSessionService:
             
             if session and session.expires_at > datetime.now():
                 return session.session_data
-            
-            if session:
-                await db.delete(session)
-                await db.commit()
+        
+        if session:
+            await WeChatSessionService.clear_db_session(user_id)
         return None
 
     @staticmethod
     async def set_db_session(user_id: str, data: dict, expire_seconds: int = 300):
         """保存搜索会话到数据库"""
-        async with AsyncSessionLocal() as db:
+        async with db_writer.session() as db:
             stmt = select(WeChatSession).where(WeChatSession.user_id == user_id)
             result = await db.execute(stmt)
             session = result.scalar_one_or_none()
@@ -48,12 +47,10 @@ class WeChatSessionService:
                     expires_at=expires_at
                 )
                 db.add(session)
-            await db.commit()
 
     @staticmethod
     async def clear_db_session(user_id: str):
         """清除搜索会话"""
-        async with AsyncSessionLocal() as db:
+        async with db_writer.session() as db:
             stmt = delete(WeChatSession).where(WeChatSession.user_id == user_id)
             await db.execute(stmt)
-            await db.commit()
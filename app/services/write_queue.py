@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+WriteQueue - 后台写入合并队列
+
+核心功能：
+后台任务 (扫描、治愈、新歌监控、文件检查等) 不再各自打开会话并独立提交，
+而是把修改 (mutation) 提交到队列，由单个写入任务按批合并到同一个事务中执行：
+- 第一个修改到达后最多等待 latency 毫秒，或攒满 batch_size 个后立即写入
+- 每个修改在独立的 SAVEPOINT 中执行，单个失败只回滚它自己，不影响同批其他修改
+- 默认经由 core.database.db_writer 写入，与其他串行写者共用同一把写锁
+
+修改函数约定: 接收 AsyncSession，只做修改，不要自行 commit / rollback。
+
+在读会话中算出的修改可用 take_changes 取出 (对象在读会话中保持干净，不会被自动刷新写入)，
+再用 update_mutation 按主键提交。
+
+Author: google
+Created: 2026-10-19
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import inspect, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+logger = logging.getLogger(__name__)
+
+Mutation = Callable[[AsyncSession], Awaitable[Any]]
+
+# 默认配置 (database 配置段)
+DEFAULT_WRITE_BATCH_SIZE = 100
+DEFAULT_WRITE_LATENCY_MS = 50
+
+
+@dataclass
+class _PendingWrite:
+    mutation: Mutation
+    future: asyncio.Future
+    submitted_at: float
+
+
+class WriteQueue:
+    """后台写入合并队列 (单写入任务)"""
+
+    def __init__(self, session_factory: Optional[Callable] = None,
+                 batch_size: Optional[int] = None, latency_ms: Optional[int] = None):
+        """
+        Args:
+            session_factory: 异步会话工厂 (默认经由 db_writer 写入，测试时可替换)
+            batch_size: 单个事务最多合并的修改数
+            latency_ms: 攒批的最长等待时间
+        """
+        if batch_size is None or latency_ms is None:
+            from core.config_manager import get_config_manager
+            db_cfg = get_config_manager().get("database", {}) or {}
+            batch_size = batch_size or db_cfg.get("write_batch_size", DEFAULT_WRITE_BATCH_SIZE)
+            latency_ms = latency_ms if latency_ms is not None else db_cfg.get(
+                "write_latency_ms", DEFAULT_WRITE_LATENCY_MS
+            )
+
+        self.session_factory = session_factory
+        self.batch_size = max(1, int(batch_size))
+        self.latency = max(0, int(latency_ms)) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.applied = 0
+        self.failed = 0
+        self.max_batch = 0
+        self.total_delay = 0.0
+
+    # ==================== 提交 ====================
+
+    def submit_nowait(self, mutation: Mutation) -> asyncio.Future:
+        """
+        提交修改，不等待写入完成
+
+        Returns:
+            修改提交后完成的 Future (结果为 mutation 的返回值)
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingWrite(mutation, future, time.monotonic()))
+        return future
+
+    async def submit(self, mutation: Mutation) -> Any:
+        """提交修改并等待所在批次提交，返回 mutation 的返回值 (失败时抛出其异常)"""
+        return await self.submit_nowait(mutation)
+
+    async def flush(self):
+        """等待当前排队的修改全部写入"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        """写完剩余修改后停止写入任务 (应用关闭时调用)"""
+        if self._worker is None:
+            return
+        await self.flush()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    # ==================== 写入任务 ====================
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.latency
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                logger.error(f"❌ 批量写入失败 ({len(batch)} 项): {e}")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                self.failed += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @asynccontextmanager
+    async def _session(self):
+        if self.session_factory is None:
+            from core.database import db_writer
+            async with db_writer.session() as db:
+                yield db
+            return
+
+        async with self.session_factory() as db:
+            try:
+                yield db
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def _apply(self, batch: List[_PendingWrite]):
+        """在一个事务中依次执行整批修改，提交后再通知提交者"""
+        outcomes = []
+        async with self._session() as db:
+            for item in batch:
+                if item.future.cancelled():
+                    continue
+                try:
+                    async with db.begin_nested():
+                        outcomes.append((item, await item.mutation(db), None))
+                except Exception as e:
+                    outcomes.append((item, None, e))
+
+        now = time.monotonic()
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+        for item, result, error in outcomes:
+            self.total_delay += now - item.submitted_at
+            if error is not None:
+                self.failed += 1
+                logger.warning(f"⚠️ 写入队列中的修改失败: {error!r}")
+                if not item.future.done():
+                    item.future.set_exception(error)
+            else:
+                self.applied += 1
+                if not item.future.done():
+                    item.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.applied + self.failed
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "applied": self.applied,
+            "failed": self.failed,
+            "max_batch": self.max_batch,
+            "avg_batch": round(total / self.batches, 2) if self.batches else 0.0,
+            "avg_delay_ms": round(self.total_delay / total * 1000, 2) if total else 0.0,
+        }
+
+
+def take_changes(obj, fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    取出对象上尚未提交的字段修改，交给写入队列执行
+
+    取出的字段在对象所属会话中视为已提交 (不会被自动刷新写入)，对象上仍保留新值。
+    """
+    state = inspect(obj)
+    changes = {}
+    for field in fields:
+        if state.attrs[field].history.has_changes():
+            value = getattr(obj, field)
+            set_committed_value(obj, field, value)
+            changes[field] = value
+    return changes
+
+
+def update_mutation(model, changes: Dict[Any, Dict[str, Any]]) -> Mutation:
+    """按主键更新的修改函数: changes = {id: {字段: 值}}，空修改跳过"""
+    async def mutation(db: AsyncSession):
+        for pk, values in changes.items():
+            if values:
+                await db.execute(update(model).where(model.id == pk).values(**values))
+    return mutation
+
+
+# 全局实例
+_write_queue: Optional[WriteQueue] = None
+
+
+def get_write_queue() -> WriteQueue:
+    """获取后台写入队列单例"""
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue()
+    return _write_queue
@@ -7,23 +7,131 @@
 - 减少重复网络请求，提升性能
 - 支持磁盘持久化
 
+结构 (两级缓存):
+- L1: 进程内 LRU (按条目数 + 字节数双预算淘汰)，命中时无 MD5 / 文件 IO / JSON 解析
+- L2: 磁盘 JSON 文件，进程重启后仍然有效
+
+更新日志:
+- 2026-10-19: 增加内存 LRU 层、按命名空间 TTL、"未找到"结果的负缓存、并发回源合并 (防击穿)
+- 2026-10-19: 回源者被取消 (例如客户端断开) 时等待者改为重试，不再一起抛出 CancelledError
+- 2026-10-19: 只对显式返回 NotFound 的结果做负缓存，其他空结果 (例如网络异常后返回 None) 不缓存
+
 Author: google
 Created: 2026-02-02
 """
 import os
 import json
 import time
+import asyncio
 import logging
 import hashlib
 import functools
-from typing import Any, Optional, Dict
+from collections import OrderedDict
+from typing import Any, Optional, Dict, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 缓存未命中标记 (区分 "没有缓存" 与 "缓存了一个空结果")
+_MISS = object()
+# 回源者被取消时交给等待者的标记: 等待者重新查缓存或自行回源
+_RETRY = object()
+
+# 负缓存默认有效期 (秒)：未找到的结果短暂缓存，避免播放器反复打到网络
+DEFAULT_NEGATIVE_TTL = 600
+
+
+class NotFound:
+    """
+    被缓存函数返回的 "确认未找到" 结果
+
+    只有这种结果按负缓存写入 (negative_ttl)，调用方拿到的是 value；其他空结果
+    (例如捕获网络异常后返回的 None) 不缓存，下次调用重新回源。
+    自身为假值，未经装饰器解包时也可以直接用 if 判断。
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any = None):
+        self.value = value
+
+    def __bool__(self):
+        return False
+
+
+class MemoryCache:
+    """进程内 LRU 缓存 (条目数 + 字节数双预算)"""
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_entries: 最大条目数
+            max_bytes: 最大占用字节数 (按值的 JSON 序列化长度估算)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, value)
+        self._data: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """获取缓存内容，未命中或已过期返回 _MISS"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISS
+
+        expires_at, _, value = entry
+        if time.time() >= expires_at:
+            self.delete(key)
+            self.misses += 1
+            return _MISS
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float, size: int):
+        """设置缓存内容 (超出预算时淘汰最久未使用的条目)"""
+        if size > self.max_bytes:
+            # 单条超过总预算，不进入内存层
+            return
+
+        self.delete(key)
+        self._data[key] = (expires_at, size, value)
+        self._bytes += size
+
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, old_size, _) = self._data.popitem(last=False)
+            self._bytes -= old_size
+            self.evictions += 1
+
+    def delete(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
 class DiskCache:
     """简单的基于文件的磁盘缓存"""
-    
+
     def __init__(self, cache_dir: str = "cache/api_cache", ttl: int = 86400 * 7):
         """
         Args:
@@ -33,34 +141,40 @@ class DiskCache:
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.ttl = ttl
-    
+
     def _get_cache_path(self, key: str) -> Path:
         """根据 key 生成 md5 文件名"""
         hashed_key = hashlib.md5(key.encode('utf-8')).hexdigest()
         return self.cache_dir / f"{hashed_key}.json"
-    
-    def get(self, key: str) -> Optional[Any]:
-        """获取缓存内容"""
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取原始缓存条目 (包含 timestamp / negative 标记)，不做过期判断"""
         path = self._get_cache_path(key)
         if not path.exists():
             return None
-        
+
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # 检查是否过期
-            if time.time() - data.get('timestamp', 0) > self.ttl:
-                # logger.debug(f"Cache expired for key: {key}")
-                return None
-            
-            return data.get('value')
+                return json.load(f)
         except Exception as e:
             logger.warning(f"Failed to read cache for {key}: {e}")
             return None
-    
-    def set(self, key: str, value: Any):
-        """设置缓存内容"""
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存内容"""
+        data = self.get_entry(key)
+        if data is None:
+            return None
+
+        # 检查是否过期
+        if time.time() - data.get('timestamp', 0) > self.ttl:
+            # logger.debug(f"Cache expired for key: {key}")
+            return None
+
+        return data.get('value')
+
+    def set(self, key: str, value: Any, negative: bool = False) -> int:
+        """设置缓存内容，返回写入的字节数 (失败返回 0)"""
         path = self._get_cache_path(key)
         try:
             data = {
@@ -68,23 +182,128 @@ class DiskCache:
                 'timestamp': time.time(),
                 'value': value
             }
+            if negative:
+                data['negative'] = True
+            payload = json.dumps(data, ensure_ascii=False, indent=2)
             with open(path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.write(payload)
+            return len(payload)
         except Exception as e:
             logger.warning(f"Failed to write cache for {key}: {e}")
+            return 0
+
+
+class TieredCache:
+    """
+    两级缓存: 内存 LRU (L1) + 磁盘 (L2)
+
+    - 读: L1 命中直接返回; 否则读 L2 并回填 L1 (保留原过期时间)
+    - 写: 同时写入 L1 和 L2
+    - 负缓存: 确认未找到的结果以 negative 标记写入，使用更短的 TTL
+    """
+
+    def __init__(self, memory: MemoryCache, disk: DiskCache):
+        self.memory = memory
+        self.disk = disk
+
+    def lookup(self, key: str, ttl: int, negative_ttl: int) -> Any:
+        """查找缓存，未命中返回 _MISS"""
+        value = self.memory.get(key)
+        if value is not _MISS:
+            return value
+
+        data = self.disk.get_entry(key)
+        if data is None:
+            return _MISS
+
+        negative = bool(data.get('negative'))
+        expires_at = data.get('timestamp', 0) + (negative_ttl if negative else ttl)
+        if time.time() >= expires_at:
+            return _MISS
+
+        value = data.get('value')
+        self.memory.set(key, value, expires_at, self._estimate_size(value))
+        return value
+
+    def store(self, key: str, value: Any, ttl: int, negative_ttl: int, negative: bool = False):
+        """写入缓存 (negative=True 时按负缓存处理)"""
+        expires_in = negative_ttl if negative else ttl
+        if expires_in <= 0:
+            return
+
+        size = self.disk.set(key, value, negative=negative)
+        self.memory.set(key, value, time.time() + expires_in, size or self._estimate_size(value))
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        try:
+            return len(json.dumps(value, ensure_ascii=False))
+        except (TypeError, ValueError):
+            return len(str(value))
+
+    def stats(self) -> Dict[str, int]:
+        return self.memory.stats()
+
+
+def _load_cache_config() -> Dict[str, Any]:
+    """读取 cache 配置段 (配置不可用时使用默认值)"""
+    try:
+        from core.config_manager import get_config_manager
+        return get_config_manager().get("cache", {}) or {}
+    except Exception as e:
+        logger.debug(f"Cache config unavailable, using defaults: {e}")
+        return {}
+
+
+def _resolve_ttls(namespace: str, ttl: int, negative_ttl: Optional[int]) -> Tuple[int, int]:
+    """按命名空间解析 TTL: 配置 cache.namespace_ttls 优先于装饰器参数"""
+    cache_cfg = _load_cache_config()
+    ns_cfg = (cache_cfg.get("namespace_ttls") or {}).get(namespace)
+
+    if isinstance(ns_cfg, dict):
+        ttl = ns_cfg.get("ttl", ttl)
+        negative_ttl = ns_cfg.get("negative_ttl", negative_ttl)
+    elif isinstance(ns_cfg, (int, float)):
+        ttl = ns_cfg
+
+    if negative_ttl is None:
+        negative_ttl = cache_cfg.get("negative_ttl", DEFAULT_NEGATIVE_TTL)
+    return int(ttl), int(negative_ttl)
+
+
+def _create_api_cache() -> TieredCache:
+    cache_cfg = _load_cache_config()
+    memory = MemoryCache(
+        max_entries=cache_cfg.get("memory_max_entries", 2048),
+        max_bytes=cache_cfg.get("memory_max_bytes", 32 * 1024 * 1024)
+    )
+    return TieredCache(memory, DiskCache())
+
 
 # 全局缓存实例
-api_cache = DiskCache()
+api_cache = _create_api_cache()
 
-def persistent_cache(namespace: str, ttl: int = 86400 * 7):
+def persistent_cache(namespace: str, ttl: int = 86400 * 7, negative_ttl: Optional[int] = None):
     """
     持久化缓存装饰器
-    
+
+    Args:
+        namespace: 命名空间 (可在配置 cache.namespace_ttls 中单独设置 TTL)
+        ttl: 正常结果的过期时间(秒)
+        negative_ttl: 返回 NotFound ("确认未找到") 时的过期时间(秒)，默认取 cache.negative_ttl
+
+    其他空结果不缓存: 被装饰函数捕获网络异常后返回 None 时，下次调用会重新回源。
+    同一 key 的并发未命中只会回源一次，其余调用等待并共享结果 (防止缓存击穿)。
+    注意: 内存层返回的是共享对象，调用方不应原地修改返回值。
+
     Usage:
         @persistent_cache(namespace="lyrics")
         async def fetch_lyrics(title, artist): ...
     """
     def decorator(func):
+        # key -> 正在回源的 Future
+        inflight: Dict[str, asyncio.Future] = {}
+
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             # 生成 cache key
@@ -95,21 +314,49 @@ def persistent_cache(namespace: str, ttl: int = 86400 * 7):
             key_parts.extend([str(a) for a in func_args])
             key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
             key = ":".join(key_parts)
-            
-            # 尝试获取缓存
-            cached_val = api_cache.get(key)
-            if cached_val is not None:
-                # logger.debug(f"Cache hit for {func.__name__} ({key})")
-                return cached_val
-            
-            # 执行原函数
-            result = await func(*args, **kwargs)
-            
-            # 设置缓存 (仅当结果不为空时)
-            if result:
-                api_cache.set(key, result)
-            
-            return result
-        
+
+            ns_ttl, ns_negative_ttl = _resolve_ttls(namespace, ttl, negative_ttl)
+
+            while True:
+                # 尝试获取缓存
+                cached_val = api_cache.lookup(key, ns_ttl, ns_negative_ttl)
+                if cached_val is not _MISS:
+                    # logger.debug(f"Cache hit for {func.__name__} ({key})")
+                    return cached_val
+
+                # 已有相同 key 在回源，等待其结果
+                pending = inflight.get(key)
+                if pending is None:
+                    break
+                result = await asyncio.shield(pending)
+                if result is not _RETRY:
+                    return result
+                # 回源者被取消: 重新查缓存，必要时由自己回源
+
+            future = asyncio.get_running_loop().create_future()
+            inflight[key] = future
+            try:
+                # 执行原函数
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                # 只有回源者自己被取消，等待者没有: 让它们重试而不是一起失败
+                future.set_result(_RETRY)
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # 标记异常已被获取，避免无等待者时的 "never retrieved" 警告
+                future.exception()
+                raise
+            else:
+                if isinstance(result, NotFound):
+                    result = result.value
+                    api_cache.store(key, result, ns_ttl, ns_negative_ttl, negative=True)
+                elif result:
+                    api_cache.store(key, result, ns_ttl, ns_negative_ttl)
+                future.set_result(result)
+                return result
+            finally:
+                inflight.pop(key, None)
+
         return async_wrapper
     return decorator
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+列表总数缓存
+
+用途:
+- 分页接口的总数 (COUNT / GROUP BY 计数) 按查询条件缓存，翻页时不再重复统计
+- 监听所有引擎的写语句，事务提交后按表递增版本号，相关计数自动失效
+- TTL 兜底 (其他进程或脚本直接修改数据库时)
+- 条目数有上限 (LRU)：查询条件包含自由输入的搜索词，不能无限增长
+
+更新日志:
+- 2026-10-19: 改为有上限的 LRU，访问到过期 / 失效的条目时立即删除
+
+Author: google
+Created: 2026-10-19
+"""
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNTER_TTL = 300  # 秒
+DEFAULT_COUNTER_MAX_ENTRIES = 1024
+
+_WRITE_PATTERN = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+["`]?(\w+)',
+    re.IGNORECASE
+)
+
+
+class CounterCache:
+    """按表版本号失效的计数缓存"""
+
+    def __init__(self, ttl: int = DEFAULT_COUNTER_TTL, max_entries: int = DEFAULT_COUNTER_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (表版本号, 过期时间, 计数)，按最近使用排序
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], float, int]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _versions(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(t, 0) for t in tables)
+
+    def invalidate(self, *tables: str):
+        """使涉及这些表的计数失效"""
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+
+    async def get_or_compute(self, key: Hashable, tables: Tuple[str, ...],
+                             compute: Callable[[], Awaitable[int]]) -> int:
+        """
+        获取计数，缓存失效时调用 compute 重新统计
+
+        Args:
+            key: 查询条件 (需可哈希)
+            tables: 计数依赖的表，任一表有写入提交即失效
+            compute: 统计函数
+        """
+        versions = self._versions(tables)
+        entry = self._entries.get(key)
+        if entry:
+            if entry[0] == versions and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            # 已过期或已失效，不会再命中
+            del self._entries[key]
+
+        self.misses += 1
+        value = await compute()
+        # 统计期间如有写入提交，版本号已变化，不缓存这次结果
+        if self._versions(tables) == versions:
+            self._entries[key] = (versions, time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+counter_cache = CounterCache()
+
+
+# 所有引擎共用的写入监听: 记录连接上本事务写过的表，提交后递增版本号
+@event.listens_for(Engine, "after_cursor_execute")
+def _track_writes(conn, cursor, statement, parameters, context, executemany):
+    match = _WRITE_PATTERN.match(statement)
+    if match:
+        conn.info.setdefault("counter_cache_tables", set()).add(match.group(1).lower())
+
+
+@event.listens_for(Engine, "commit")
+def _invalidate_on_commit(conn):
+    tables = conn.info.pop("counter_cache_tables", None)
+    if tables:
+        counter_cache.invalidate(*tables)
+
+
+@event.listens_for(Engine, "rollback")
+def _discard_on_rollback(conn):
+    conn.info.pop("counter_cache_tables", None)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+支持条件请求与断点续传的文件响应
+
+用途:
+- ETag / Last-Modified (由文件 mtime + size 生成，不读文件内容)
+- If-None-Match / If-Modified-Since 命中时返回 304
+- Range (单段 bytes=start-end / start- / -suffix) 返回 206，无法满足返回 416
+- If-Range 与当前 ETag / Last-Modified 不一致时忽略 Range，返回完整文件
+
+播放器拖动进度条时只读取所需片段，重复播放时直接 304。
+不依赖 Starlette 版本自带的 Range 支持 (requirements 允许的旧版本没有)。
+
+Author: google
+Created: 2026-10-19
+"""
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _validators(stat: os.stat_result) -> Dict[str, str]:
+    return {
+        "etag": file_etag(stat),
+        "last-modified": formatdate(stat.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+    }
+
+
+def _not_modified(request: Request, stat: os.stat_result) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = file_etag(stat)
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _range_applies(request: Request, stat: os.stat_result) -> bool:
+    """If-Range 校验: 资源未变化时才按 Range 返回片段"""
+    if_range = request.headers.get("if-range")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == file_etag(stat)  # 弱 ETag 不能用于 If-Range
+    try:
+        return int(stat.st_mtime) == int(parsedate_to_datetime(if_range).timestamp())
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单段 Range 头
+
+    Returns:
+        (start, end) 闭区间；格式不支持 (例如多段) 时返回 None (按完整文件返回)
+
+    Raises:
+        ValueError: 范围无法满足 (416)
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if size == 0:
+        raise ValueError(header)
+    if not start:
+        # 后缀范围: 最后 N 字节
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+async def _iter_file(path: str, start: int, length: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def conditional_file_response(
+    request: Request,
+    path: str,
+    stat: os.stat_result,
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """按请求头返回 304 / 206 / 416 / 200 文件响应"""
+    headers = {**(headers or {}), **_validators(stat)}
+
+    if _not_modified(request, stat):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header and _range_applies(request, stat):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{stat.st_size}"})
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            headers.update({
+                "content-range": f"bytes {start}-{end}/{stat.st_size}",
+                "content-length": str(length),
+            })
+            return StreamingResponse(
+                _iter_file(path, start, length), status_code=206, media_type=media_type, headers=headers
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+共享 HTTP 客户端
+
+整个进程复用一个 aiohttp.ClientSession (连接池 + keep-alive)，
+避免每次请求新建会话、重新握手 TLS。
+
+用法:
+    session = await get_http_session()
+    async with session.post(url, json=payload) as resp:
+        ...
+
+应用关闭时调用 close_http_session()。
+
+Author: google
+Created: 2026-10-19
+"""
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+DEFAULT_POOL_SIZE = 100
+DEFAULT_POOL_SIZE_PER_HOST = 10
+DEFAULT_TIMEOUT = 30  # 秒
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """获取共享会话 (首次调用、已关闭或事件循环变化时重新创建)"""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session_loop = loop
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=DEFAULT_POOL_SIZE, limit_per_host=DEFAULT_POOL_SIZE_PER_HOST),
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+        )
+    return _session
+
+
+async def close_http_session():
+    """关闭共享会话 (应用关闭时调用)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
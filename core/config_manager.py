@@ -56,14 +56,21 @@ class ConfigManager:
                 "cache_dir": "/audio_cache",
                 "favorites_dir": "/favorites",
                 "max_cache_size": 10 * 1024 * 1024 * 1024,  # 10GB
-                "cleanup_threshold": 0.8  # 80%
+                "cleanup_threshold": 0.8,  # 80%
+                # 移动端实时转码缓存 (留空表示 cache_dir 下的 transcode 子目录)
+                "transcode_cache_dir": "",
+                "transcode_cache_size": 2 * 1024 * 1024 * 1024,  # 2GB
+                "transcode_max_concurrent": 2
             },
             "database": {
                 # 默认使用容器内路径，通过 Docker Volume 映射
                 "url": "sqlite+aiosqlite:///music_monitor.db",
                 "echo": False,
                 "pool_size": 5,
-                "max_overflow": 10
+                "max_overflow": 10,
+                # 后台写入队列: 单个事务最多合并的修改数 / 攒批最长等待 (毫秒)
+                "write_batch_size": 100,
+                "write_latency_ms": 50
             },
             "logging": {
                 "level": "INFO",
@@ -89,6 +96,26 @@ class ConfigManager:
                 "rate_limit": {"requests_per_minute": 60, "burst_size": 10},
                 "timeout": 30
             },
+            "cache": {
+                # API 结果缓存: 内存 LRU 层预算 + 负缓存时长 (秒)
+                "memory_max_entries": 2048,
+                "memory_max_bytes": 32 * 1024 * 1024,  # 32MB
+                "negative_ttl": 600,
+                # 按命名空间覆盖 TTL, e.g. {"lyrics": {"ttl": 2592000, "negative_ttl": 300}}
+                "namespace_ttls": {}
+            },
+            "providers": {
+                # 网易云 (pyncm 同步 API) 专用线程池大小 / GetTrackDetail 单批 ID 数
+                "netease_max_workers": 4,
+                "netease_detail_batch_size": 500,
+                # 刷新歌手时单个源拉取歌曲列表的超时 (秒)
+                "artist_fetch_timeout": 90,
+                # 孤儿歌曲挽救时在线搜索兜底的并发数
+                "rescue_search_concurrency": 4,
+                # 增量同步只拉取的首页大小 / 全量对账最长间隔 (天)
+                "incremental_page_size": 50,
+                "full_sync_interval_days": 7
+            },
             # --- 以下为业务配置 (默认值，后续被 DB 覆盖) ---
             "download": {
                 "max_concurrent_downloads": 3,
@@ -112,7 +139,14 @@ class ConfigManager:
             "scheduler": {
                 "check_interval_minutes": 60,
                 "sync_interval_hours": 24,
-                "cleanup_interval_hours": 24
+                "cleanup_interval_hours": 24,
+                # 新歌监控: 并发检查歌手数 / 错峰抖动比例 / 只通知最近 N 天发布的歌曲
+                "monitor_concurrency": 2,
+                "monitor_jitter_ratio": 0.1,
+                # 按发歌节奏自适应的检查间隔上下限 (分钟)
+                "monitor_min_interval_minutes": 30,
+                "monitor_max_interval_minutes": 1440,
+                "notify_window_days": 30
             },
             "notify": { # Simplified structure
                 "enabled": False,
@@ -133,7 +167,7 @@ class ConfigManager:
         yaml_config = self._read_yaml()
         if yaml_config:
             # 只合并允许的基础设施字段和 Notify
-            allowed_sections = ["database", "logging", "storage", "auth", "api", "notify", "monitor"] # monitor left for backward compat for now
+            allowed_sections = ["database", "logging", "storage", "auth", "api", "cache", "providers", "notify", "monitor"] # monitor left for backward compat for now
             # 注意：Monitor users 列表如果还在 YAML，我们暂不处理，依赖 Artist 表
             
             self._deep_merge_allowed(new_config, yaml_config, allowed_sections)
@@ -273,6 +307,9 @@ class ConfigManager:
         fav_dir = storage.get('favorites_dir', '/favorites')
         max_cache = storage.get('max_cache_size', 10737418240)
         retention = storage.get('retention_days', 180)
+        transcode_dir = storage.get('transcode_cache_dir', '')
+        transcode_size = storage.get('transcode_cache_size', 2147483648)
+        transcode_concurrent = storage.get('transcode_max_concurrent', 2)
 
         # 认证
         auth = current_yaml.get('auth', {})
@@ -352,6 +389,11 @@ storage:
   cleanup_threshold: 0.8
   retention_days: {retention}
 
+  # 移动端实时转码 (?format=opus&br=128) 的结果缓存
+  transcode_cache_dir: "{transcode_dir}"      # 留空: cache_dir/transcode
+  transcode_cache_size: {transcode_size}
+  transcode_max_concurrent: {transcode_concurrent}     # 同时运行的 ffmpeg 进程数
+
 # --- 6. 系统/外部链接 (System) ---
 system:
     external_url: "{ext_url}" # 用于生成分享链接
@@ -363,6 +405,11 @@ system:
 # 启动一次成功导入数据库后，推荐在 UI 中管理。
 # ==============================================================================
 """
+        # 保留模板之外的基础设施配置段 (原样写回)
+        for section in ("cache", "providers"):
+            if current_yaml.get(section):
+                yaml_content += "\n" + yaml.dump({section: current_yaml[section]}, default_flow_style=False, allow_unicode=True)
+
         # Always preserve/update 'notify' section in config.yaml as requested
         current_notify = self._config.get("notify")
         if current_notify:
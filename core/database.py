@@ -15,12 +15,22 @@ Author: music-monitor development team
            重构了数据库初始化逻辑，实现了async_init_db和async_migrate_db函数
            添加了线程池执行异步数据库初始化，避免循环冲突
 2026-01-21 - 修改了Base导入，使用统一模型定义，确保所有模型都能正确创建
+2026-10-19 - 新增 SQLite 引擎工厂: 连接时设置 WAL / synchronous / cache_size / mmap_size /
+           temp_store / busy_timeout；API 查询使用只读连接池 (get_read_session)，
+           后台写入通过 db_writer 串行化，并统计写锁等待
+2026-10-19 - 初始化后为尚未计算去重键的歌曲回填 dedup_key / is_canonical
+2026-10-19 - 初始化时创建本地检索的 FTS5 索引并同步待索引记录，之后写入提交时自动同步 (IndexSyncer)
+2026-10-19 - 明确 db_writer 的范围: 后台写入 (写入队列、检索索引同步、企业微信会话) 经由 db_writer；
+           get_async_session 仍为请求级会话，提交不经过写锁，由 busy_timeout 处理冲突
 """
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Index, Text
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Index, Text, event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
+import asyncio
 from datetime import datetime
 import os
+import time
 
 # Use a local SQLite database by default
 # Use async SQLite driver
@@ -31,13 +41,152 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///config/music_monit
 # (do NOT import from app.models as it imports all models)
 from app.models.base import Base
 
+# SQLite 连接参数 (每个新连接建立时设置)
+# - WAL: 读不阻塞写、写不阻塞读 (长时间的扫描提交不再卡住 API 查询)
+# - synchronous=NORMAL: WAL 模式下仍保证一致性，只在断电时可能丢失最后的事务
+# - busy_timeout: 写锁冲突时等待而不是立即报 "database is locked"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,        # 负数单位为 KiB，约 64MB 页缓存
+    "mmap_size": 268435456,      # 256MB 内存映射读
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,        # 毫秒
+}
+READ_POOL_SIZE = 4
+
+# "database is locked" 错误计数 (busy_timeout 耗尽后仍未拿到锁)
+_lock_errors = 0
+
+
+def _is_file_sqlite(url: str) -> bool:
+    """是否为文件型 SQLite (内存库每个连接都是独立数据库，不能拆分读写连接池)"""
+    return url.startswith("sqlite") and ":memory:" not in url and not url.rstrip("/").endswith(":")
+
+
+def create_db_engine(url: str, read_only: bool = False, **kwargs):
+    """
+    创建异步引擎，SQLite 连接建立时自动应用 SQLITE_PRAGMAS
+
+    Args:
+        url: 数据库连接串
+        read_only: 只读连接池 (PRAGMA query_only，误写入会直接报错)
+    """
+    engine = create_async_engine(url, echo=False, **kwargs)
+    if not url.startswith("sqlite"):
+        return engine
+
+    pragmas = dict(SQLITE_PRAGMAS)
+    if not _is_file_sqlite(url):
+        pragmas.pop("journal_mode")  # 内存库不支持 WAL
+        pragmas.pop("mmap_size")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _count_lock_errors(context):
+        global _lock_errors
+        if "database is locked" in str(context.original_exception):
+            _lock_errors += 1
+
+    return engine
+
+
 # Create async engine
-async_engine = create_async_engine(DATABASE_URL, echo=False)  # [Fix] Enable echo for debugging flicker issue
+async_engine = create_db_engine(DATABASE_URL)
 AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
+# 只读连接池: API 查询使用，WAL 模式下不会被后台写入阻塞
+if _is_file_sqlite(DATABASE_URL):
+    async_read_engine = create_db_engine(DATABASE_URL, read_only=True, pool_size=READ_POOL_SIZE)
+else:
+    async_read_engine = async_engine
+AsyncReadSessionLocal = sessionmaker(async_read_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+class SerializedWriter:
+    """
+    单写者: 后台写入通过同一把锁串行执行
+
+    使用方: 写入队列 (扫描 / 治愈 / 刷新 / 收藏 / 企业微信下载)、检索索引同步、
+    企业微信搜索会话。请求级会话 (get_async_session) 不经过此锁。
+
+    SQLite 同一时间只允许一个写事务，多个后台任务同时写入时，与其在连接层
+    互相重试直到 "database is locked"，不如在应用层排队，并记录排队耗时。
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_hold = 0.0
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        获取写会话 (退出时提交，异常时回滚)
+
+        用法:
+            async with db_writer.session() as db:
+                db.add(obj)
+        """
+        started = time.monotonic()
+        if self._lock.locked():
+            self.contended += 1
+        async with self._lock:
+            acquired_at = time.monotonic()
+            waited = acquired_at - started
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            try:
+                async with self.session_factory() as db:
+                    try:
+                        yield db
+                        await db.commit()
+                    except Exception:
+                        await db.rollback()
+                        raise
+            finally:
+                self.total_hold += time.monotonic() - acquired_at
+
+    def stats(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "waiting": self._lock.locked(),
+            "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 2) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "total_hold_ms": round(self.total_hold * 1000, 2),
+            "lock_errors": _lock_errors,
+        }
+
+
+db_writer = SerializedWriter(AsyncSessionLocal)
+
+
+def get_db_stats() -> dict:
+    """数据库连接池与写锁统计 (用于 /api/status)"""
+    return {
+        "read_pool": async_read_engine.pool.status(),
+        "write_pool": async_engine.pool.status(),
+        "writer": db_writer.stats(),
+    }
+
 
 # Database initialization for async
-import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy import text
 from alembic.config import Config
@@ -78,6 +227,33 @@ async def async_init_db():
     except Exception as e:
         logger.error(f"Database migration failed: {e}")
 
+    # 物化去重: 旧数据 (或外部写入) 的歌曲补算去重键与代表行
+    try:
+        from app.repositories.canonical_songs import backfill
+        async with AsyncSessionLocal() as db:
+            count = await db.run_sync(backfill)
+            await db.commit()
+        if count:
+            logger.info(f"Backfilled dedup keys for {count} songs.")
+    except Exception as e:
+        logger.error(f"Dedup key backfill failed: {e}")
+
+    # 本地检索: FTS5 索引与触发器，首次创建时全量索引
+    try:
+        from app.services.library_search import LibrarySearchService, ensure_schema, get_index_syncer
+        async with async_engine.begin() as conn:
+            available = await conn.run_sync(ensure_schema)
+        # 之后的写入提交后自动同步索引
+        get_index_syncer().enabled = available
+        if available:
+            async with AsyncSessionLocal() as db:
+                count = await LibrarySearchService().sync(db)
+                await db.commit()
+            if count:
+                logger.info(f"Library search index synced {count} records.")
+    except Exception as e:
+        logger.error(f"Library search index init failed: {e}")
+
 # Create sync engine for backward compatibility where needed
 sync_database_url = DATABASE_URL.replace("sqlite+aiosqlite://", "sqlite://")
 if "://" in sync_database_url and sync_database_url != DATABASE_URL:
@@ -126,5 +302,17 @@ def get_db():
 
 
 async def get_async_session():
+    """
+    请求级读写会话 (由处理函数自行提交)
+
+    不经过 db_writer: 写锁若覆盖整个请求，会把所有写接口串行化，且处理函数内再向
+    写入队列提交修改时会与队列争同一把锁。写冲突由 busy_timeout 等待处理。
+    """
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_session():
+    """只读会话依赖 (列表 / 统计等纯查询接口使用)"""
+    async with AsyncReadSessionLocal() as session:
+        yield session
@@ -1,17 +1,43 @@
 # -*- coding: utf-8 -*-
 """
-事件总线 - 简单的事件发布/订阅系统
+事件总线 - 异步事件发布/订阅系统
+
+每个订阅者一个有界队列 + 若干工作协程:
+- publish 只把事件放入各订阅者的队列，不在发布者的协程里执行处理函数
+  (慢的通知渠道不会拖住新歌监控循环)
+- 队列满时发布者最多等待 publish_timeout 秒 (背压)，超时则丢弃并计入死信
+- 处理失败按指数退避重试 max_retries 次，仍失败则进入死信列表
+- 按 EventType 统计发布/投递/失败/重试/死信数、队列深度与处理耗时
+
+配置 (event_bus 配置段，订阅时读取，也可在 subscribe 时单独指定):
+- queue_size: 每个订阅者的队列容量，默认 100
+- concurrency: 每个订阅者的工作协程数，默认 1 (保持事件顺序)
+- max_retries: 失败重试次数，默认 2
+- retry_delay: 首次重试等待秒数 (之后翻倍)，默认 1.0
+- publish_timeout: 队列满时发布者的最长等待秒数，默认 5.0
 
 Author: google
 Created: 2026-01-26
+
+更新日志:
+- 2026-10-19: 改为每订阅者有界队列 + 工作协程异步分发，增加重试、死信与统计
 """
 import asyncio
 import logging
+import time
+from collections import deque
 from enum import Enum
-from typing import Dict, List, Callable, Any
+from typing import Dict, List, Callable, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_CONCURRENCY = 1
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_DELAY = 1.0
+DEFAULT_PUBLISH_TIMEOUT = 5.0
+DEAD_LETTER_LIMIT = 100
+
 
 class EventType(Enum):
     """事件类型枚举"""
@@ -21,46 +47,236 @@ class EventType(Enum):
     SCAN_COMPLETE = "scan_complete"
 
 
+class _EventMetrics:
+    """单个 EventType 的统计"""
+
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float):
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def to_dict(self, queue_depth: int) -> Dict[str, Any]:
+        handled = self.delivered + self.failed
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "queue_depth": queue_depth,
+            "avg_latency_ms": round(self.total_latency / handled * 1000, 2) if handled else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+        }
+
+
+class _Subscriber:
+    """一个订阅: 处理函数 + 有界队列 + 工作协程"""
+
+    def __init__(self, bus: "EventBus", event_type: EventType, callback: Callable,
+                 queue_size: int, concurrency: int, max_retries: int, retry_delay: float):
+        self.bus = bus
+        self.event_type = event_type
+        self.callback = callback
+        self.name = getattr(callback, "__qualname__", repr(callback))
+        self.queue_size = max(1, queue_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = max(0.0, retry_delay)
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def ensure_workers(self):
+        """在事件循环中首次发布时启动工作协程 (订阅可能发生在事件循环之外)"""
+        loop = asyncio.get_running_loop()
+        if self.queue is None or loop is not self._loop:
+            # 首次使用，或原事件循环已结束 (例如测试中每个用例一个循环)
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
+            self.workers = []
+            self._loop = loop
+        self.workers = [w for w in self.workers if not w.done()]
+        while len(self.workers) < self.concurrency:
+            self.workers.append(loop.create_task(self._work()))
+
+    async def _invoke(self, data: Any):
+        if asyncio.iscoroutinefunction(self.callback):
+            await self.callback(data)
+        else:
+            self.callback(data)
+
+    async def _work(self):
+        metrics = self.bus._metrics_for(self.event_type)
+        while True:
+            data = await self.queue.get()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    started = time.monotonic()
+                    try:
+                        await self._invoke(data)
+                        metrics.record(time.monotonic() - started)
+                        metrics.delivered += 1
+                        break
+                    except Exception as e:
+                        metrics.record(time.monotonic() - started)
+                        if attempt < self.max_retries:
+                            metrics.retried += 1
+                            logger.warning(
+                                f"⚠️ 事件处理失败，{self.retry_delay * 2 ** attempt:.1f}s 后重试 "
+                                f"{self.event_type.value} -> {self.name}: {e}"
+                            )
+                            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+                        else:
+                            metrics.failed += 1
+                            logger.error(f"事件处理错误 {self.event_type.value} -> {self.name}: {e}")
+                            self.bus._dead_letter(self, data, repr(e), attempt + 1)
+            finally:
+                self.queue.task_done()
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        for worker in self.workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self.workers = []
+
+
 class EventBus:
-    """简单的事件总线"""
-    
+    """异步事件总线"""
+
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance._subscribers: Dict[EventType, List[Callable]] = {}
+            cls._instance._subscribers: Dict[EventType, List[_Subscriber]] = {}
+            cls._instance._metrics: Dict[EventType, _EventMetrics] = {}
+            cls._instance.dead_letters = deque(maxlen=DEAD_LETTER_LIMIT)
         return cls._instance
-    
-    def subscribe(self, event_type: EventType, callback: Callable):
-        """订阅事件"""
-        if event_type not in self._subscribers:
-            self._subscribers[event_type] = []
-        self._subscribers[event_type].append(callback)
-        logger.debug(f"订阅事件: {event_type.value}")
-    
+
+    def subscribe(
+        self,
+        event_type: EventType,
+        callback: Callable,
+        queue_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_delay: Optional[float] = None
+    ):
+        """订阅事件 (未指定的参数取 event_bus 配置段)"""
+        from core.config_manager import get_config_manager
+        cfg = get_config_manager().get("event_bus", {}) or {}
+
+        subscriber = _Subscriber(
+            self,
+            event_type,
+            callback,
+            queue_size=int(queue_size or cfg.get("queue_size", DEFAULT_QUEUE_SIZE)),
+            concurrency=int(concurrency or cfg.get("concurrency", DEFAULT_CONCURRENCY)),
+            max_retries=int(max_retries if max_retries is not None else cfg.get("max_retries", DEFAULT_MAX_RETRIES)),
+            retry_delay=float(retry_delay if retry_delay is not None else cfg.get("retry_delay", DEFAULT_RETRY_DELAY)),
+        )
+        self._subscribers.setdefault(event_type, []).append(subscriber)
+        logger.debug(f"订阅事件: {event_type.value} -> {subscriber.name}")
+
     def unsubscribe(self, event_type: EventType, callback: Callable):
-        """取消订阅"""
-        if event_type in self._subscribers:
-            self._subscribers[event_type] = [
-                cb for cb in self._subscribers[event_type] if cb != callback
-            ]
-    
-    async def publish(self, event_type: EventType, data: Any = None):
-        """发布事件"""
+        """取消订阅 (队列中尚未处理的事件随之丢弃)"""
         if event_type not in self._subscribers:
             return
-        
+        remaining = []
+        for subscriber in self._subscribers[event_type]:
+            if subscriber.callback == callback:
+                for worker in subscriber.workers:
+                    worker.cancel()
+            else:
+                remaining.append(subscriber)
+        self._subscribers[event_type] = remaining
+
+    async def publish(self, event_type: EventType, data: Any = None):
+        """
+        发布事件: 放入每个订阅者的队列后返回，不等待处理完成
+
+        订阅者队列已满时最多等待 publish_timeout 秒，超时则该订阅者的这条事件进入死信。
+        """
+        subscribers = self._subscribers.get(event_type)
+        if not subscribers:
+            return
+
         logger.debug(f"发布事件: {event_type.value}")
-        
-        for callback in self._subscribers[event_type]:
+        self._metrics_for(event_type).published += 1
+        timeout = None
+        for subscriber in list(subscribers):
+            subscriber.ensure_workers()
             try:
-                if asyncio.iscoroutinefunction(callback):
-                    await callback(data)
-                else:
-                    callback(data)
-            except Exception as e:
-                logger.error(f"事件处理错误 {event_type.value}: {e}")
+                subscriber.queue.put_nowait(data)
+                continue
+            except asyncio.QueueFull:
+                pass
+
+            if timeout is None:
+                from core.config_manager import get_config_manager
+                timeout = float(get_config_manager().get("event_bus.publish_timeout", DEFAULT_PUBLISH_TIMEOUT))
+            try:
+                await asyncio.wait_for(subscriber.queue.put(data), timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"事件队列已满，丢弃 {event_type.value} -> {subscriber.name}")
+                self._dead_letter(subscriber, data, "queue full", 0)
+
+    async def drain(self, event_type: Optional[EventType] = None):
+        """等待 (某类) 已发布事件全部处理完毕"""
+        for etype, subscribers in list(self._subscribers.items()):
+            if event_type is not None and etype != event_type:
+                continue
+            for subscriber in subscribers:
+                if subscriber.queue is not None and subscriber.workers:
+                    await subscriber.queue.join()
+
+    async def stop(self):
+        """处理完已排队的事件后停止全部工作协程 (应用关闭时调用)"""
+        await self.drain()
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                await subscriber.stop()
+
+    def _metrics_for(self, event_type: EventType) -> _EventMetrics:
+        metrics = self._metrics.get(event_type)
+        if metrics is None:
+            metrics = self._metrics[event_type] = _EventMetrics()
+        return metrics
+
+    def _dead_letter(self, subscriber: _Subscriber, data: Any, error: str, attempts: int):
+        self._metrics_for(subscriber.event_type).dead_lettered += 1
+        self.dead_letters.append({
+            "event": subscriber.event_type.value,
+            "subscriber": subscriber.name,
+            "error": error,
+            "attempts": attempts,
+            "data": repr(data)[:200],
+            "time": time.time(),
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        events = {}
+        for event_type in set(self._metrics) | set(self._subscribers):
+            subscribers = self._subscribers.get(event_type, [])
+            events[event_type.value] = {
+                **self._metrics_for(event_type).to_dict(sum(s.depth() for s in subscribers)),
+                "subscribers": len(subscribers),
+            }
+        return {"events": events, "dead_letters": len(self.dead_letters)}
 
 
 # 全局事件总线实例
@@ -1,42 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+WebSocket 连接管理
+
+每个连接一个有界发送队列 + 独立写协程:
+- broadcast 只入队不等待发送，慢客户端不会拖慢其他连接和调用方 (例如扫描热循环)
+- 进度类消息按 key 合并 (同一任务/歌手/歌曲只保留最新一条未发送的进度)
+- 队列满时丢弃最旧的消息
+- 发送失败或超时的连接自动移除
+- 主题订阅: 客户端只接收订阅的任务/歌手/消息类型 (未订阅时接收全部)
+- 每条消息每种编码只序列化一次，所有连接共享
+
+订阅协议 (/ws/progress):
+- 连接参数: ?topics=task:<id>,artist:<id>,type:<消息类型>&encoding=json|msgpack
+- 连接后发送文本 {"op": "subscribe" | "unsubscribe", "topics": [...]}，
+  或 {"op": "encoding", "encoding": "msgpack"}；服务端回复 {"type": "subscribed", ...}
+- notification 类型的消息始终发送给所有连接
+- msgpack 编码需要安装 msgpack (可选依赖)，未安装时退回 json
+
+更新日志:
+- 2026-10-19: 改为每连接有界发送队列，broadcast 不再阻塞，自动清理失效连接
+- 2026-10-19: 增加主题订阅、共享序列化与 msgpack 二进制编码
+"""
+import asyncio
+import json
 import logging
-from typing import List
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
 from fastapi import WebSocket
 
+try:
+    import msgpack
+except ImportError:  # 可选依赖
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_SEND_QUEUE_SIZE = 100
+DEFAULT_SEND_TIMEOUT = 10.0  # 秒
+MAX_SUBSCRIPTIONS = 200
+
+# 不受订阅过滤、始终发送的消息类型
+BROADCAST_TYPES = {"notification", "subscribed"}
+
+
+def coalesce_key(message: dict) -> Optional[str]:
+    """进度类消息的合并 key；返回 None 表示不合并 (每条都要送达)"""
+    msg_type = message.get("type")
+    if msg_type == "task_progress":
+        task_id = (message.get("data") or {}).get("taskId")
+        return f"task:{task_id}" if task_id else None
+    if msg_type == "artist_progress" and message.get("artistId"):
+        return f"artist:{message['artistId']}"
+    if msg_type == "download_progress" and message.get("song_id"):
+        return f"download:{message.get('source')}:{message['song_id']}"
+    return None
+
+
+def message_topics(message: dict) -> Set[str]:
+    """消息所属的主题: type:<类型>，以及 task:/artist:/download: 实体主题"""
+    topics = {f"type:{message.get('type')}"}
+    key = coalesce_key(message)
+    if key:
+        topics.add(key)
+    if message.get("artistId"):
+        topics.add(f"artist:{message['artistId']}")
+    return topics
+
+
+def available_encodings() -> List[str]:
+    return ["json", "msgpack"] if msgpack is not None else ["json"]
+
+
+class OutgoingMessage:
+    """一次广播的消息: 合并 key、主题，以及按编码缓存的序列化结果"""
+
+    __slots__ = ("message", "key", "topics", "_encoded")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self.key = coalesce_key(message)
+        self.topics = message_topics(message)
+        self._encoded: Dict[str, Union[str, bytes]] = {}
+
+    def encode(self, encoding: str) -> Union[str, bytes]:
+        data = self._encoded.get(encoding)
+        if data is None:
+            if encoding == "msgpack":
+                data = msgpack.packb(self.message, use_bin_type=True, default=str)
+            else:
+                data = json.dumps(self.message, separators=(",", ":"), ensure_ascii=False, default=str)
+            self._encoded[encoding] = data
+        return data
+
+
+class ClientConnection:
+    """单个 WebSocket 连接的发送队列与写协程"""
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager",
+                 max_queue: int = DEFAULT_SEND_QUEUE_SIZE, send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        self.websocket = websocket
+        self.manager = manager
+        self.max_queue = max(1, max_queue)
+        self.send_timeout = send_timeout
+        # 队列元素为 [key, message]，合并时原地替换 message，保持原有位置
+        self._queue: deque = deque()
+        self._pending: Dict[str, list] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.topics: Set[str] = set()  # 为空表示接收全部
+        self.encoding = "json"
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.filtered = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._writer())
+
+    def wants(self, outgoing: OutgoingMessage) -> bool:
+        if not self.topics or outgoing.message.get("type") in BROADCAST_TYPES:
+            return True
+        return not self.topics.isdisjoint(outgoing.topics)
+
+    def subscribe(self, topics: Iterable[str]):
+        for topic in topics:
+            if len(self.topics) >= MAX_SUBSCRIPTIONS:
+                break
+            topic = str(topic).strip()
+            if topic:
+                self.topics.add(topic)
+
+    def unsubscribe(self, topics: Iterable[str]):
+        self.topics.difference_update(str(t).strip() for t in topics)
+
+    def set_encoding(self, encoding: Optional[str]):
+        encoding = (encoding or "json").lower()
+        self.encoding = encoding if encoding in available_encodings() else "json"
+
+    def enqueue(self, outgoing: OutgoingMessage):
+        if not self.wants(outgoing):
+            self.filtered += 1
+            return
+
+        key = outgoing.key
+        if key is not None and key in self._pending:
+            self._pending[key][1] = outgoing
+            self.coalesced += 1
+            return
+
+        if len(self._queue) >= self.max_queue:
+            old_key, _ = self._queue.popleft()
+            if old_key is not None:
+                self._pending.pop(old_key, None)
+            self.dropped += 1
+
+        entry = [key, outgoing]
+        self._queue.append(entry)
+        if key is not None:
+            self._pending[key] = entry
+        self._wakeup.set()
+
+    async def _writer(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                key, outgoing = self._queue.popleft()
+                if key is not None:
+                    self._pending.pop(key, None)
+                data = outgoing.encode(self.encoding)
+                if isinstance(data, bytes):
+                    send = self.websocket.send_bytes(data)
+                else:
+                    send = self.websocket.send_text(data)
+                await asyncio.wait_for(send, timeout=self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WS send failed, evicting client: {type(e).__name__}: {e}")
+            self.manager.evict(self.websocket)
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+
+    def stop(self):
+        if self._task and not self._task.done() and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self._clients: Dict[WebSocket, ClientConnection] = {}
+        self.evicted = 0
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self._clients)
+
+    async def connect(self, websocket: WebSocket, topics: Optional[Iterable[str]] = None,
+                      encoding: Optional[str] = None) -> ClientConnection:
+        from core.config_manager import get_config_manager
+        config_manager = get_config_manager()
 
-    async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WS Connected. Total: {len(self.active_connections)}")
+        client = ClientConnection(
+            websocket,
+            self,
+            max_queue=int(config_manager.get("websocket.send_queue_size", DEFAULT_SEND_QUEUE_SIZE)),
+            send_timeout=float(config_manager.get("websocket.send_timeout", DEFAULT_SEND_TIMEOUT)),
+        )
+        client.subscribe(topics or [])
+        client.set_encoding(encoding)
+        self._clients[websocket] = client
+        client.start()
+        logger.info(f"WS Connected. Total: {len(self._clients)}")
+        return client
+
+    def handle_client_message(self, websocket: WebSocket, text: str):
+        """
+        处理客户端发来的文本: 订阅控制指令；其他内容 (例如 "ping") 仅用于保活，忽略
+        """
+        client = self._clients.get(websocket)
+        if client is None or not text.startswith("{"):
+            return
+        try:
+            command = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(command, dict):
+            return
+
+        op = command.get("op")
+        topics = command.get("topics") or []
+        if isinstance(topics, str):
+            topics = [topics]
+        if op == "subscribe":
+            client.subscribe(topics)
+        elif op == "unsubscribe":
+            client.unsubscribe(topics)
+        elif op == "encoding":
+            client.set_encoding(command.get("encoding"))
+        else:
+            return
+        self.send_to(websocket, {
+            "type": "subscribed",
+            "topics": sorted(client.topics),
+            "encoding": client.encoding,
+            "encodings": available_encodings(),
+        })
+
+    def send_to(self, websocket: WebSocket, message: dict):
+        client = self._clients.get(websocket)
+        if client:
+            client.enqueue(OutgoingMessage(message))
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"WS Disconnected. Total: {len(self.active_connections)}")
+        client = self._clients.pop(websocket, None)
+        if client:
+            client.stop()
+            logger.info(f"WS Disconnected. Total: {len(self._clients)}")
 
-    async def broadcast(self, message: dict):
-        if not self.active_connections:
-            logger.info(f"No active WS connections (skip broadcast): {message.get('message', 'Unknown')}")
+    def evict(self, websocket: WebSocket):
+        """移除发送失败/超时的连接"""
+        if websocket in self._clients:
+            self.evicted += 1
+            self.disconnect(websocket)
+
+    def broadcast_nowait(self, message: dict):
+        """把消息放入每个连接的发送队列后立即返回"""
+        if not self._clients:
+            logger.debug(f"No active WS connections (skip broadcast): {message.get('message', 'Unknown')}")
             return
-            
-        logger.debug(f"Broadcasting to {len(self.active_connections)} clients: {message.get('message', '')}")
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
-    
+        outgoing = OutgoingMessage(message)
+        for client in list(self._clients.values()):
+            client.enqueue(outgoing)
+
+    async def broadcast(self, message: dict):
+        """保持 async 接口以兼容现有调用方，实际不等待发送"""
+        self.broadcast_nowait(message)
+
     async def disconnect_all(self):
         """关闭所有活动连接"""
-        for connection in self.active_connections[:]:  # 创建副本以避免在迭代时修改列表
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            client.stop()
             try:
-                await connection.close()
-            except:
+                await client.websocket.close()
+            except Exception:
                 pass  # 连接可能已经关闭
-        self.active_connections.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        clients = list(self._clients.values())
+        return {
+            "connections": len(clients),
+            "queued": sum(c.queued for c in clients),
+            "sent": sum(c.sent for c in clients),
+            "dropped": sum(c.dropped for c in clients),
+            "coalesced": sum(c.coalesced for c in clients),
+            "filtered": sum(c.filtered for c in clients),
+            "evicted": self.evicted,
+        }
+
 
 manager = ConnectionManager()
@@ -37,10 +37,8 @@ from urllib.parse import quote
 from core.database import init_db, SessionLocal
 from app.models.media_record import MediaRecord
 from app.services.notification import NotificationService
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-
-# 创建调度器实例
-scheduler = AsyncIOScheduler()
+# 与 app.routers.system 共用同一个调度器实例 (手动触发 / 状态查询才能看到这里注册的任务)
+from core.scheduler import scheduler
 
 from fastapi import Request, Response, Query
 from wechatpy.crypto import WeChatCrypto, PrpCrypto
@@ -221,8 +219,15 @@ async def lifespan(app: FastAPI):
         )
         logger.info(f"已调度自动缓存任务，每 30 分钟执行一次")
         
+        # 新歌发布监控 (关注歌手错峰增量检查，新歌以 NEW_CONTENT 事件发布)
+        from app.services.release_monitor import get_release_monitor
+        get_release_monitor().register(scheduler)
+        
         NotificationService.initialize()
         
+        from core.event_bus import get_event_bus, EventType
+        get_event_bus().subscribe(EventType.NEW_CONTENT, NotificationService.handle_new_content)
+        
         # --- Startup Notification ---
         try:
             from version import get_version_info
@@ -252,6 +257,20 @@ async def lifespan(app: FastAPI):
         from core.websocket import manager
         await manager.disconnect_all()
         scheduler.shutdown(wait=False)
+        # 处理完已发布的事件 (例如排队中的新歌通知)
+        from core.event_bus import get_event_bus
+        await get_event_bus().stop()
+        # 发出合并窗口中的新歌通知
+        from app.services.notification_queue import get_notification_digest, get_outbound_queue
+        await get_notification_digest().flush_all()
+        await get_outbound_queue().stop()
+        from app.utils.http_client import close_http_session
+        await close_http_session()
+        # 写完排队中的后台修改
+        from app.services.write_queue import get_write_queue
+        await get_write_queue().stop()
+        from app.services.library_search import get_index_syncer
+        await get_index_syncer().stop()
     except Exception as e:
         import traceback
         import sys
@@ -32,3 +32,15 @@ async def db_session(test_engine):
         yield session
         # Rollback to keep tests isolated
         await session.rollback()
+
+@pytest.fixture
+async def write_queue(test_engine, monkeypatch):
+    """Write queue bound to the test engine (replaces the process-wide singleton)"""
+    import app.services.write_queue as write_queue_module
+    queue = write_queue_module.WriteQueue(
+        sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False),
+        batch_size=100, latency_ms=0,
+    )
+    monkeypatch.setattr(write_queue_module, "_write_queue", queue)
+    yield queue
+    await queue.stop()
@@ -0,0 +1,218 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.models.artist import Artist, ArtistSource
+from app.services.artist_refresh_service import ArtistRefreshService
+from app.services.music_providers.base import SongInfo
+
+
+def test_ready_sources_respects_merge_priority():
+    waiting = {"netease": [1]}
+    # QQ 仍在拉取中: 网易云需等待
+    assert ArtistRefreshService._ready_sources(waiting, {"qqmusic"}) == []
+    assert ArtistRefreshService._ready_sources(waiting, set()) == ["netease"]
+
+    waiting = {"netease": [1], "qqmusic": [2]}
+    assert ArtistRefreshService._ready_sources(waiting, set()) == ["qqmusic", "netease"]
+    # 低优先级源未返回不影响高优先级源
+    assert ArtistRefreshService._ready_sources({"qqmusic": [2]}, {"netease"}) == ["qqmusic"]
+
+
+def _make_provider(source, songs=None, delay=0.0, exc=None):
+    provider = MagicMock()
+    provider.source_name = source
+
+    async def get_artist_songs(artist_id, limit=1000):
+        await asyncio.sleep(delay)
+        if exc:
+            raise exc
+        return songs or []
+
+    provider.get_artist_songs = get_artist_songs
+    return provider
+
+
+@pytest.mark.asyncio
+async def test_stream_online_songs_tolerates_slow_and_failing_sources(db_session, write_queue):
+    artist = Artist(name="测试歌手", avatar="x.jpg")
+    db_session.add(artist)
+    await db_session.flush()
+    db_session.add_all([
+        ArtistSource(artist_id=artist.id, source="qqmusic", source_id="qq1"),
+        ArtistSource(artist_id=artist.id, source="netease", source_id="ne1"),
+    ])
+    await db_session.flush()
+
+    qq_song = SongInfo(title="晴天", artist="测试歌手", album="叶惠美", source="qqmusic", id="m1")
+    providers = {
+        "qqmusic": _make_provider("qqmusic", [qq_song]),
+        "netease": _make_provider("netease", delay=5),
+    }
+
+    service = ArtistRefreshService()
+    service.aggregator.get_provider = lambda name: providers.get(name)
+    manager = MagicMock()
+    manager.broadcast = AsyncMock()
+
+    config = MagicMock()
+    config.get.return_value = {"artist_fetch_timeout": 0.05}
+    with patch("core.config_manager.get_config_manager", return_value=config):
+        results = [item async for item in service._stream_online_songs(db_session, artist, manager)]
+
+    assert results[0] == ("qqmusic", [qq_song], {"netease"})
+    # 超时的源产出空列表，不影响已获取的结果
+    assert results[1] == ("netease", [], set())
+
+
+@pytest.mark.asyncio
+async def test_merge_with_local_bulk_inserts_songs_and_sources(db_session, write_queue):
+    from sqlalchemy import select
+    from app.models.song import Song, SongSource
+
+    artist = Artist(name="合并歌手")
+    db_session.add(artist)
+    await db_session.flush()
+    existing = Song(artist_id=artist.id, title="旧歌", unique_key="merge-old", status="PENDING")
+    existing.sources = [SongSource(source="qqmusic", source_id="q-old")]
+    db_session.add(existing)
+    await db_session.commit()
+
+    def info(title, source, song_id):
+        return SongInfo(title=title, artist="合并歌手", album="专辑", source=source, id=song_id,
+                        cover_url="http://c/x.jpg", publish_time="2020-01-01")
+
+    raw_songs = [
+        info("旧歌", "qqmusic", "q-old"),   # 已存在的源
+        info("旧 歌", "netease", "n-old"),  # 已有歌曲的新源
+        info("新歌", "qqmusic", "q-new"),
+        info("新歌", "qqmusic", "q-new"),   # 同批次重复
+    ]
+
+    service = ArtistRefreshService()
+    service._refresh_enrich_count = 15
+    manager = MagicMock()
+    manager.broadcast = AsyncMock()
+
+    new_count = await service._merge_with_local(db_session, artist, raw_songs, manager)
+    assert new_count == 1
+
+    songs = (await db_session.execute(
+        select(Song).where(Song.artist_id == artist.id)
+    )).scalars().all()
+    assert sorted(s.title for s in songs) == ["新歌", "旧歌"]
+
+    sources = (await db_session.execute(
+        select(SongSource.source, SongSource.source_id)
+        .join(Song).where(Song.artist_id == artist.id)
+    )).all()
+    assert sorted(sources) == [("netease", "n-old"), ("qqmusic", "q-new"), ("qqmusic", "q-old")]
+
+    # 再次合并同样的数据不会产生新记录
+    assert await service._merge_with_local(db_session, artist, raw_songs, manager) == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_stops_at_known_songs(db_session, write_queue):
+    from datetime import datetime
+    from app.models.song import Song, SongSource
+    from app.services.artist_refresh_service import SYNC_INCREMENTAL
+
+    artist = Artist(name="增量歌手", avatar="x.jpg")
+    db_session.add(artist)
+    await db_session.flush()
+    artist_source = ArtistSource(
+        artist_id=artist.id, source="netease", source_id="ne-inc",
+        last_full_sync=datetime.now()
+    )
+    known = Song(artist_id=artist.id, title="老歌", unique_key="inc-old")
+    known.sources = [SongSource(source="netease", source_id="old")]
+    db_session.add_all([artist_source, known])
+    await db_session.flush()
+
+    def info(song_id, date):
+        return SongInfo(title=song_id, artist="增量歌手", album="专辑", source="netease",
+                        id=song_id, publish_time=date)
+
+    calls = []
+    provider = MagicMock()
+
+    async def get_artist_songs(artist_id, limit=1000, newest_first=False):
+        calls.append((limit, newest_first))
+        return [info("new", "2026-10-01"), info("old", "2025-01-01"), info("older", "2024-01-01")]
+
+    provider.get_artist_songs = get_artist_songs
+    provider.supports_newest_first = True
+
+    service = ArtistRefreshService()
+    service.aggregator.get_provider = lambda name: provider if name == "netease" else None
+    manager = MagicMock()
+    manager.broadcast = AsyncMock()
+
+    config = MagicMock()
+    config.get.return_value = {"incremental_page_size": 3}
+    sync_results = {}
+    with patch("core.config_manager.get_config_manager", return_value=config):
+        results = [item async for item in service._stream_online_songs(
+            db_session, artist, manager, SYNC_INCREMENTAL, sync_results
+        )]
+
+    assert calls == [(3, True)]
+    assert [s.id for s in results[0][1]] == ["new"]
+    assert sync_results["netease"].full is False
+
+    await service._update_sync_watermarks(db_session, artist, sync_results)
+    assert artist_source.latest_publish_time == datetime(2026, 10, 1)
+    assert artist_source.last_sync is not None
+    assert artist_source.catalog_hash is None
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_full_pulls_when_source_is_not_time_ordered(db_session, write_queue):
+    from datetime import datetime
+    from app.models.song import Song, SongSource
+    from app.services.artist_refresh_service import SYNC_INCREMENTAL
+
+    artist = Artist(name="热歌歌手", avatar="x.jpg")
+    db_session.add(artist)
+    await db_session.flush()
+    artist_source = ArtistSource(
+        artist_id=artist.id, source="qqmusic", source_id="qq-hot",
+        last_full_sync=datetime.now()
+    )
+    known = Song(artist_id=artist.id, title="热歌", unique_key="hot-old")
+    known.sources = [SongSource(source="qqmusic", source_id="hot")]
+    db_session.add_all([artist_source, known])
+    await db_session.flush()
+
+    def info(song_id, date):
+        return SongInfo(title=song_id, artist="热歌歌手", album="专辑", source="qqmusic",
+                        id=song_id, publish_time=date)
+
+    calls = []
+    provider = MagicMock()
+    provider.supports_newest_first = False
+
+    async def get_artist_songs(artist_id, limit=1000, newest_first=False):
+        calls.append((limit, newest_first))
+        # 热歌首页只有已知歌曲，新歌在完整曲库中
+        hot = [info("hot", "2020-01-01")]
+        return hot if limit < 1000 else hot + [info("new", "2026-10-01")]
+
+    provider.get_artist_songs = get_artist_songs
+
+    service = ArtistRefreshService()
+    service.aggregator.get_provider = lambda name: provider if name == "qqmusic" else None
+    manager = MagicMock()
+    manager.broadcast = AsyncMock()
+
+    config = MagicMock()
+    config.get.return_value = {"incremental_page_size": 1}
+    sync_results = {}
+    with patch("core.config_manager.get_config_manager", return_value=config):
+        results = [item async for item in service._stream_online_songs(
+            db_session, artist, manager, SYNC_INCREMENTAL, sync_results
+        )]
+
+    assert calls == [(1000, False)]
+    assert "new" in [s.id for s in results[0][1]]
+    assert sync_results["qqmusic"].full is True
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.models.artist import Artist
+from app.models.song import Song, SongSource
+from app.repositories.song import SongRepository
+from app.repositories.canonical_songs import mark_songs_dirty
+from app.services.deduplication_service import DeduplicationService
+
+
+async def _canonical(db, artist_id):
+    rows = await db.execute(
+        select(Song.id, Song.dedup_key, Song.is_canonical)
+        .where(Song.artist_id == artist_id).order_by(Song.id)
+    )
+    return {song_id: (key, bool(flag)) for song_id, key, flag in rows}
+
+
+def test_dedup_key_matches_grouping():
+    assert DeduplicationService.dedup_key("Hello (Live)", "Adele feat. X") == \
+        DeduplicationService.dedup_key("hello", "ADELE")
+    assert DeduplicationService.dedup_key("Hello (Instrumental)", "Adele") != \
+        DeduplicationService.dedup_key("Hello", "Adele")
+    assert DeduplicationService.dedup_key("", "Adele") == ""
+
+
+@pytest.mark.asyncio
+async def test_canonical_maintained_on_write(test_engine):
+    session_factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        artist = Artist(name="去重歌手 & 合作者")
+        db.add(artist)
+        await db.flush()
+        songs = [
+            Song(artist_id=artist.id, title="物化 (Live)", unique_key="canon-1"),
+            Song(artist_id=artist.id, title="物化", unique_key="canon-2"),
+            Song(artist_id=artist.id, title="另一首", unique_key="canon-3"),
+        ]
+        db.add_all(songs)
+        await db.commit()
+        live, studio, other = (s.id for s in songs)
+
+        # ORM 写入: 同分取 id 最小
+        rows = await _canonical(db, artist.id)
+        assert rows[live] == ("物化_去重歌手", True)
+        assert rows[studio] == ("物化_去重歌手", False)
+        assert rows[other][1] is True
+
+        # 语句级更新: 本地文件优先
+        await db.execute(update(Song).where(Song.id == studio).values(local_path="/music/物化.flac"))
+        await db.commit()
+        rows = await _canonical(db, artist.id)
+        assert (rows[live][1], rows[studio][1]) == (False, True)
+
+        # 语句级删除: 剩余版本接替代表
+        await db.execute(delete(Song).where(Song.id == studio))
+        await db.commit()
+        rows = await _canonical(db, artist.id)
+        assert studio not in rows and rows[live][1] is True
+
+        # 显式标记: 绕过 ORM 写入的来源
+        db.add(Song(artist_id=artist.id, title="另一首 - Remix", unique_key="canon-4"))
+        await db.flush()
+        remix = (await db.execute(select(Song.id).where(Song.unique_key == "canon-4"))).scalar()
+        await db.commit()
+        await db.execute(
+            SongSource.__table__.insert().values(song_id=remix, source="local", source_id="r", url="/r.flac")
+        )
+        mark_songs_dirty(db, song_ids=[remix])
+        await db.commit()
+        rows = await _canonical(db, artist.id)
+        assert (rows[other][1], rows[remix][1]) == (False, True)
+
+        # 分页只读代表行，总数精确，合并同组信息
+        repo = SongRepository(db)
+        page, total, _ = await repo.get_paginated(limit=10, artist_name="去重歌手")
+        assert total == 2
+        assert {s.id for s in page} == {live, remix}
+        merged = DeduplicationService.merge_canonical(page, await repo.get_duplicates_of(page))
+        assert [m["id"] for m in merged] == [s.id for s in page]
+        assert "local" in next(m for m in merged if m["id"] == remix)["available_sources"]
@@ -0,0 +1,47 @@
+import pytest
+from datetime import datetime
+from app.models.media_record import MediaRecord
+from app.pagination import InvalidCursorError
+from app.repositories.media_record import MediaRecordRepository
+from app.services.history_service import HistoryService
+
+
+def _record(i, title, source="netease", publish_time=None, found_at=None):
+    return MediaRecord(
+        unique_key=f"history-{i}", source=source, media_type="song", media_id=str(i),
+        title=title, author="历史歌手", album="专辑", publish_time=publish_time, found_at=found_at,
+    )
+
+
+@pytest.mark.asyncio
+async def test_history_pages_are_unique_and_exact(db_session):
+    db_session.add_all([
+        _record(1, "甲", publish_time=datetime(2024, 3, 1), found_at=datetime(2024, 3, 2)),
+        _record(2, "甲", source="qqmusic", publish_time=datetime(2024, 3, 1), found_at=datetime(2024, 3, 1)),
+        _record(3, "乙", publish_time=datetime(2024, 2, 1), found_at=datetime(2024, 2, 1)),
+        _record(4, "丙", publish_time=None, found_at=datetime(2024, 4, 1)),
+        _record(5, "乙", source="qqmusic", publish_time=None, found_at=datetime(2024, 5, 1)),
+        _record(6, "丁", publish_time=datetime(2023, 1, 1), found_at=datetime(2023, 1, 1)),
+    ])
+    await db_session.flush()
+
+    service = HistoryService()
+    first = await service.get_history(db_session, limit=2, author="历史歌手")
+    assert first["total"] == 4
+    assert [i["title"] for i in first["items"]] == ["甲", "乙"]
+    assert first["items"][0]["extra_sources"] == ["qqmusic"]
+
+    titles, cursor = [], None
+    while True:
+        page = await service.get_history(db_session, limit=3, author="历史歌手", cursor=cursor)
+        titles += [i["title"] for i in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert titles == ["甲", "乙", "丁", "丙"]
+
+    offset_page = await service.get_history(db_session, limit=2, offset=2, author="历史歌手")
+    assert [i["title"] for i in offset_page["items"]] == ["丁", "丙"]
+
+    with pytest.raises(InvalidCursorError):
+        MediaRecordRepository.parse_history_cursor("not-a-cursor")
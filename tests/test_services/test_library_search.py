@@ -0,0 +1,140 @@
+import pytest
+from sqlalchemy import update
+from app.models.artist import Artist
+from app.models.song import Song, SongSource
+from app.services.library_search import LibrarySearchService, ensure_schema, to_bigrams
+
+
+@pytest.fixture
+async def search_db(test_engine, db_session):
+    async with test_engine.begin() as conn:
+        assert await conn.run_sync(ensure_schema)
+    return db_session
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_and_normalizes(search_db):
+    db = search_db
+    artist = Artist(name="檢索測試歌手")
+    db.add(artist)
+    await db.flush()
+    songs = [
+        Song(artist_id=artist.id, title="說好的幸福呢", album="魔杰座", unique_key="fts-1"),
+        Song(artist_id=artist.id, title="晴天", album="葉惠美", unique_key="fts-2"),
+        Song(artist_id=artist.id, title="告白气球", album="周杰倫的床邊故事", unique_key="fts-3"),
+    ]
+    db.add_all(songs)
+    await db.flush()
+    lyric = "[00:01.00]塞纳河畔 左岸的咖啡"
+    db.add_all([
+        SongSource(song_id=songs[2].id, source="netease", source_id="fts-ne", data_json={"lyrics": lyric}),
+        SongSource(song_id=songs[2].id, source="local", source_id="fts-local", data_json={"lyrics": lyric}),
+    ])
+    await db.flush()
+
+    service = LibrarySearchService()
+    assert await service.has_pending(db)
+    assert await service.sync(db) >= 4
+    assert not await service.has_pending(db)
+
+    # 繁简互通
+    result = await service.search(db, "说好的幸福")
+    assert [s["title"] for s in result["songs"]] == ["說好的幸福呢"]
+
+    # 歌手命中: 歌手本身 + 其歌曲
+    result = await service.search(db, "检索测试歌手")
+    assert [a["id"] for a in result["artists"]] == [artist.id]
+    assert len(result["songs"]) == 3
+
+    # 短词走 LIKE，专辑聚合
+    result = await service.search(db, "叶惠")
+    assert [s["title"] for s in result["songs"]] == ["晴天"]
+    assert result["albums"] == [{"album": "葉惠美", "artist": "檢索測試歌手", "cover": None}]
+
+    # 歌词 (去掉 LRC 时间标签)
+    result = await service.search(db, "左岸的咖啡")
+    assert [s["title"] for s in result["songs"]] == ["告白气球"]
+
+    # 来源歌词更新后由触发器标记
+    await db.execute(
+        update(SongSource).where(SongSource.source_id == "fts-ne").values(data_json={"lyrics": "风吹过的街道"})
+    )
+    await service.sync(db)
+    result = await service.search(db, "风吹过的街道")
+    assert [s["title"] for s in result["songs"]] == ["告白气球"]
+
+    # 写入后由触发器标记，增量同步
+    await db.execute(update(Song).where(Song.id == songs[1].id).values(title="晴天娃娃"))
+    assert await service.has_pending(db)
+    await service.sync(db)
+    result = await service.search(db, "晴天娃娃")
+    assert [s["id"] for s in result["songs"]] == [songs[1].id]
+    assert (await service.search(db, "   "))["songs"] == []
+
+
+@pytest.mark.asyncio
+async def test_index_synced_after_commit_not_on_search(search_db, test_engine):
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    import app.services.library_search as library_search
+
+    factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    syncer = library_search.IndexSyncer(session_factory=factory, delay=0.01)
+    syncer.enabled = True
+    original = library_search._index_syncer
+    library_search._index_syncer = syncer
+    service = LibrarySearchService()
+    try:
+        async with factory() as db:
+            await service.sync(db)
+            await db.commit()
+
+            db.add(Song(title="提交后自动索引", unique_key="fts-sync-1"))
+            await db.commit()
+            # 检索只读: 同步前查不到
+            assert (await service.search(db, "提交后自动索引"))["songs"] == []
+
+            await syncer.flush()
+            await db.rollback()
+            assert not await service.has_pending(db)
+            assert [s["title"] for s in (await service.search(db, "提交后自动索引"))["songs"]] == ["提交后自动索引"]
+            assert syncer.synced >= 1
+
+            # 与索引无关的提交不触发同步
+            synced = syncer.synced
+            await db.commit()
+            await syncer.flush()
+            assert syncer.synced == synced
+    finally:
+        library_search._index_syncer = original
+
+
+@pytest.mark.asyncio
+async def test_short_terms_rank_title_above_lyrics(search_db):
+    db = search_db
+    artist = Artist(name="短词歌手")
+    db.add(artist)
+    await db.flush()
+    # 歌词命中的歌曲先入库 (rowid 更小)，标题命中仍应排在前面
+    by_lyrics = Song(artist_id=artist.id, title="七里香", unique_key="short-1")
+    by_title = Song(artist_id=artist.id, title="稻香", unique_key="short-2")
+    rain = Song(artist_id=artist.id, title="雨下一整晚", unique_key="short-3")
+    db.add_all([by_lyrics, by_title, rain])
+    await db.flush()
+    db.add(SongSource(song_id=by_lyrics.id, source="netease", source_id="short-ne",
+                      data_json={"lyrics": "稻香 雨 窗外的麻雀"}))
+    await db.flush()
+
+    service = LibrarySearchService()
+    await service.sync(db)
+    assert to_bigrams("稻香 abc") == " 稻香  abc"
+
+    # 两字词走二元索引，按 bm25 排序
+    result = await service.search(db, "稻香")
+    assert [s["title"] for s in result["songs"]] == ["稻香", "七里香"]
+    # 单字走 LIKE，按命中列排序
+    result = await service.search(db, "雨")
+    assert [s["title"] for s in result["songs"]] == ["雨下一整晚", "七里香"]
+    # 长词与两字词组合
+    result = await service.search(db, "雨下一整晚 短词")
+    assert [s["title"] for s in result["songs"]] == ["雨下一整晚"]
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+from app.services.metadata_healer import MetadataHealer
+from app.services.metadata_service import MetadataService
+
+
+def _provider(metas):
+    provider = MagicMock()
+    provider.get_songs_metadata = AsyncMock(return_value=metas)
+    return provider
+
+
+def _song(song_id, *sources):
+    return SimpleNamespace(id=song_id, sources=[SimpleNamespace(source=s, source_id=i) for s, i in sources])
+
+
+@pytest.mark.asyncio
+async def test_fetch_metadata_batch_maps_results_by_source_id():
+    netease = _provider({"101": {"lyrics": "[00:00]歌词", "cover_url": "", "album": "七里香"}})
+    qqmusic = _provider({"mid1": {"lyrics": "", "cover_url": "http://y/1.jpg", "album": "叶惠美"}, "mid2": {}})
+    service = MetadataService()
+    service._get_netease_provider = lambda: netease
+    service._get_qqmusic_provider = lambda: qqmusic
+
+    results = await service.fetch_metadata_batch({"netease": ["101"], "qqmusic": ["mid1", "mid2"], "kugou": ["x"]})
+
+    netease.get_songs_metadata.assert_awaited_once_with(["101"], with_lyrics=True)
+    assert set(results) == {("netease", "101"), ("qqmusic", "mid1"), ("qqmusic", "mid2")}
+    assert results[("netease", "101")].lyrics == "[00:00]歌词"
+    assert results[("netease", "101")].cover_url is None
+    assert results[("qqmusic", "mid1")].source == "qqmusic"
+    # 空结果不算成功
+    assert not results[("qqmusic", "mid2")].success
+
+
+@pytest.mark.asyncio
+async def test_prefetch_metadata_merges_sources_per_song(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    healer = MetadataHealer()
+    healer.metadata_service._get_netease_provider = lambda: _provider(
+        {"101": {"lyrics": "网易歌词", "cover_url": "", "album": ""}}
+    )
+    healer.metadata_service._get_qqmusic_provider = lambda: _provider(
+        {"mid1": {"lyrics": "QQ歌词", "cover_url": "http://y/1.jpg", "album": "七里香"},
+         "mid9": {"lyrics": "", "cover_url": "http://y/9.jpg", "album": ""}}
+    )
+
+    songs = [
+        _song(1, ("netease", 101), ("qqmusic", "mid1"), ("local", None)),
+        _song(2, ("qqmusic", "mid9")),
+        _song(3, ("local", None)),
+    ]
+    prefetched = await healer.prefetch_metadata(songs)
+
+    assert set(prefetched) == {1, 2}
+    # 先到的源保留已有字段，缺失字段由其他源补全
+    assert prefetched[1].lyrics == "网易歌词"
+    assert prefetched[1].cover_url == "http://y/1.jpg"
+    assert prefetched[1].album == "七里香"
+    assert prefetched[2].cover_url == "http://y/9.jpg" and prefetched[2].lyrics is None
+
+    assert await healer.prefetch_metadata([songs[2]]) == {}
+
+
+@pytest.mark.asyncio
+async def test_heal_song_uses_partial_prefetch_without_search(db_session, test_engine, write_queue, tmp_path, monkeypatch):
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    import app.services.metadata_healer as metadata_healer
+    from app.models.artist import Artist
+    from app.models.song import Song
+    from app.services.metadata_service import MetadataResult
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(metadata_healer, "AsyncSessionLocal",
+                        sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    artist = Artist(name="预取歌手")
+    db_session.add(artist)
+    await db_session.flush()
+    song = Song(artist_id=artist.id, title="晴天", unique_key="heal-prefetch")
+    db_session.add(song)
+    await db_session.commit()
+
+    healer = MetadataHealer()
+    healer.metadata_service.get_best_match_metadata = AsyncMock(side_effect=AssertionError("不应搜索"))
+    # 上游没有歌词和封面，只有专辑
+    prefetched = MetadataResult(album="叶惠美", success=True, source="netease")
+
+    assert await healer.heal_song(song.id, prefetched=prefetched)
+    album = (await db_session.execute(select(Song.album).where(Song.id == song.id))).scalar()
+    assert album == "叶惠美"
@@ -0,0 +1,35 @@
+import asyncio
+import pytest
+from app.services.music_providers.netease_provider import NeteaseExecutor, TrackDetailBatcher
+
+
+@pytest.mark.asyncio
+async def test_executor_tracks_completed_and_failed():
+    executor = NeteaseExecutor(max_workers=2)
+
+    assert await executor.run(lambda x: x * 2, 21) == 42
+    with pytest.raises(ValueError):
+        await executor.run(lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["failed"] == 1
+    assert stats["queued"] == 0
+    assert stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_track_detail_batcher_merges_concurrent_requests():
+    calls = []
+
+    async def fetch_many(ids):
+        calls.append(sorted(ids))
+        return {i: {"id": i} for i in ids if i != "404"}
+
+    batcher = TrackDetailBatcher(fetch_many, window=0.01)
+    results = await asyncio.gather(
+        batcher.get("1"), batcher.get("2"), batcher.get("1"), batcher.get("404")
+    )
+
+    assert calls == [["1", "2", "404"]]
+    assert results == [{"id": "1"}, {"id": "2"}, {"id": "1"}, None]
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from app.services.notification_queue import NotificationDigest, OutboundQueue
+
+
+def song(title, album="七里香", author="周杰伦"):
+    return SimpleNamespace(title=title, author=author, album=album, url=f"https://x/{title}",
+                           publish_time=datetime(2026, 10, 19), cover=None, source="netease")
+
+
+@pytest.mark.asyncio
+async def test_digest_groups_by_artist_and_album():
+    sent = []
+
+    async def dispatch(media):
+        sent.append(media)
+
+    digest = NotificationDigest(dispatch, window=0.05)
+    for i in range(12):
+        await digest.add(song(f"第{i}首"))
+    await digest.add(song("单曲", album=None))
+    assert sent == []
+
+    await asyncio.sleep(0.1)
+    by_title = {m.title: m for m in sent}
+    assert set(by_title) == {"七里香 (12 首)", "单曲"}
+    album = by_title["七里香 (12 首)"]
+    assert "1. 第0首" in album.custom_description
+    assert "等共 12 首" in album.custom_description
+    assert len(album.items) == 12
+    assert not hasattr(by_title["单曲"], "custom_description")
+
+    await digest.add(song("晴天", album="叶惠美"))
+    await digest.flush_all()
+    assert sent[-1].title == "晴天"
+
+
+@pytest.mark.asyncio
+async def test_outbound_queue_rate_limit_and_retry():
+    queue = OutboundQueue(rate_limit_per_minute=60 * 50, max_retries=2, retry_delay=0)  # 20ms 间隔
+    calls = []
+
+    def sender(name, failures=0):
+        async def send():
+            calls.append((name, asyncio.get_running_loop().time()))
+            if sum(1 for n, _ in calls if n == name) <= failures:
+                raise RuntimeError("45009")
+        return send
+
+    queue.submit("wecom", sender("a"))
+    queue.submit("wecom", sender("b", failures=1))
+    queue.submit("wecom", sender("c", failures=5))
+    queue.submit("telegram", sender("t"))
+    await queue.join()
+
+    wecom = [t for n, t in calls if n != "t"]
+    assert [n for n, _ in calls if n != "t"] == ["a", "b", "b", "c", "c", "c"]
+    assert all(b - a >= 0.015 for a, b in zip(wecom, wecom[1:]))
+    assert queue.stats()["sent"] == 3
+    assert queue.stats()["retried"] == 3
+    assert queue.stats()["failed"] == 1
+    await queue.stop()
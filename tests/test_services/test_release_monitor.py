@@ -0,0 +1,131 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.models.artist import Artist, ArtistSource
+from app.models.song import Song, SongSource
+from app.services.release_monitor import ReleaseMonitor
+from core.event_bus import EventType, get_event_bus
+
+SETTINGS = {
+    "enabled": True,
+    "interval": timedelta(minutes=60),
+    "min_interval": timedelta(minutes=30),
+    "max_interval": timedelta(minutes=1440),
+    "concurrency": 2,
+    "jitter": 0.1,
+    "notify_window": timedelta(days=30),
+}
+
+
+def test_slots_spread_evenly_across_interval():
+    now = datetime(2026, 1, 1)
+    interval = timedelta(minutes=60)
+    slots = [ReleaseMonitor._slot(now, interval, i, 4, 0.1) for i in range(4)]
+
+    for i, slot in enumerate(slots):
+        # 每个歌手落在自己的 15 分钟时间片内
+        assert now + timedelta(minutes=15 * i) <= slot < now + timedelta(minutes=15 * (i + 1))
+
+
+def test_adaptive_interval_follows_release_cadence():
+    now = datetime(2026, 10, 19, 12)
+    base, low, high = timedelta(minutes=60), timedelta(minutes=30), timedelta(minutes=1440)
+
+    # 每周发歌且近期活跃: 7 天 / 48
+    weekly = [now - timedelta(days=1 + 7 * i) for i in range(6)]
+    assert ReleaseMonitor.adaptive_interval(weekly, now, base, low, high) == timedelta(days=7) / 48
+
+    # 同一天的多首歌只算一次发布；每天发歌受下限约束
+    daily = [now - timedelta(days=i, hours=h) for i in range(5) for h in (0, 1)]
+    assert ReleaseMonitor.adaptive_interval(daily, now, base, low, high) == low
+
+    # 一年前发过歌后沉寂: 受上限约束
+    dormant = [now - timedelta(days=400), now - timedelta(days=430)]
+    assert ReleaseMonitor.adaptive_interval(dormant, now, base, low, high) == high
+
+    # 历史不足两次发布: 使用全局间隔
+    assert ReleaseMonitor.adaptive_interval([now], now, base, low, high) == base
+
+
+@pytest.mark.asyncio
+async def test_check_artist_publishes_new_songs_and_reschedules(test_engine):
+    session_factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        artist = Artist(name="监控歌手", is_monitored=True)
+        db.add(artist)
+        await db.flush()
+        db.add(ArtistSource(artist_id=artist.id, source="netease", source_id="1", last_sync=datetime.now()))
+        await db.commit()
+        artist_id = artist.id
+
+    async def fake_refresh(self, db, name, pre_scan="artist", sync_mode="full"):
+        assert (pre_scan, sync_mode) == ("none", "incremental")
+        song = Song(artist_id=artist_id, title="新歌", unique_key="monitor-new",
+                    publish_time=datetime.now(), created_at=datetime.now())
+        song.sources = [SongSource(source="netease", source_id="42")]
+        old = Song(artist_id=artist_id, title="旧歌", unique_key="monitor-old",
+                   publish_time=datetime.now() - timedelta(days=7),
+                   created_at=datetime.now() - timedelta(days=7))
+        db.add_all([song, old])
+        await db.commit()
+        return 1
+
+    received = []
+
+    async def collect(media):
+        received.append(media)
+
+    bus = get_event_bus()
+    bus.subscribe(EventType.NEW_CONTENT, collect)
+    try:
+        monitor = ReleaseMonitor(session_factory=session_factory)
+        with patch("app.services.library.LibraryService.refresh_artist", fake_refresh):
+            new_songs = await monitor.check_artist(artist_id, "监控歌手", SETTINGS)
+        await bus.drain(EventType.NEW_CONTENT)
+    finally:
+        bus.unsubscribe(EventType.NEW_CONTENT, collect)
+
+    assert [s.title for s in new_songs] == ["新歌"]
+    assert len(received) == 1
+    assert received[0].url == "https://music.163.com/#/song?id=42"
+    assert received[0].author == "监控歌手"
+
+    async with session_factory() as db:
+        artist = await db.get(Artist, artist_id)
+        # 每周一首: 学习到 7 天 / 48 = 210 分钟的检查间隔
+        assert artist.check_interval_minutes == 210
+        assert artist.next_check_at > datetime.now() + timedelta(minutes=180)
+
+    with patch.object(ReleaseMonitor, "_settings", return_value=SETTINGS):
+        schedule = await monitor.schedule()
+    row = next(r for r in schedule["artists"] if r["artist"] == "监控歌手")
+    assert row["interval_minutes"] == 210 and row["sources"] == ["netease"]
+    assert schedule["api_calls_per_day"] >= round(1440 / 210, 1)
+
+
+@pytest.mark.asyncio
+async def test_schedule_writes_go_through_write_queue(test_engine):
+    session_factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        artists = [Artist(name=f"排程歌手{i}", is_monitored=True) for i in range(3)]
+        db.add_all(artists)
+        await db.commit()
+        artist_ids = [a.id for a in artists]
+
+    monitor = ReleaseMonitor(session_factory=session_factory)
+    with patch.object(ReleaseMonitor, "_settings", return_value=SETTINGS), \
+            patch.object(ReleaseMonitor, "tick", AsyncMock()):
+        assert await monitor.spread_schedule() >= 3
+        assert monitor.write_queue.stats()["applied"] == 1
+
+        before = datetime.now()
+        assert await monitor.run_now() >= 3
+        assert monitor.write_queue.stats()["applied"] == 2
+    await monitor.write_queue.stop()
+
+    async with session_factory() as db:
+        rows = (await db.execute(select(Artist.next_check_at).where(Artist.id.in_(artist_ids)))).scalars().all()
+    assert all(before <= t <= datetime.now() for t in rows)
@@ -14,7 +14,7 @@ async def test_normalize_cn_brackets():
     assert service._normalize_cn_brackets(None) == ""
 
 @pytest.mark.asyncio
-async def test_scan_local_files_empty(db_session):
+async def test_scan_local_files_empty(db_session, write_queue):
     # Test scanning with no directories
     service = ScanService()
     service.scan_directories = []
@@ -66,3 +66,21 @@ async def test_find_or_create_song_new(db_session):
     db_result = (await db_session.execute(stmt)).scalars().first()
     assert db_result is not None
     assert db_result.id == song.id
+
+@pytest.mark.asyncio
+async def test_scan_local_files_scoped_to_artist(db_session, tmp_path, write_queue):
+    for name in ("范围歌手 - 晴天.mp3", "其他歌手 - 江南.mp3"):
+        (tmp_path / name).write_bytes(b"")
+
+    service = ScanService()
+    service.scan_directories = [str(tmp_path)]
+
+    with patch("app.services.scan_service.ScanService._extract_metadata", side_effect=lambda *args: {}) as mock_extract:
+        results = await service.scan_local_files(db_session, artist_name="范围歌手")
+        assert results["new_files_found"] == 1
+
+        # 已入库的文件依赖扫描索引，再次范围扫描时不再读取标签
+        mock_extract.reset_mock()
+        results = await service.scan_local_files(db_session, artist_name="范围歌手")
+        assert results["new_files_found"] == 0
+        assert all("范围歌手" not in call.args[1] for call in mock_extract.call_args_list)
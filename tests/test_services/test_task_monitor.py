@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from core.websocket import manager
+from app.services.task_monitor import TaskMonitor, TaskCancelledException
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+    monitor = TaskMonitor()
+    monkeypatch.setattr(manager, "broadcast_nowait", messages.append)
+    monkeypatch.setattr(monitor, "_min_interval", 0.05)
+    return messages
+
+
+def progress_of(messages):
+    return [(m["data"]["state"], m["data"]["progress"]) for m in messages]
+
+
+@pytest.mark.asyncio
+async def test_progress_is_coalesced_and_flushed(sent):
+    monitor = TaskMonitor()
+    task_id = await monitor.start_task("scan", "start")
+    for i in range(1, 1001):
+        await monitor.update_progress(task_id, i // 10, details={"current": i})
+    assert progress_of(sent) == [("running", 0)]
+
+    # 尾随刷新发送最新状态
+    await asyncio.sleep(0.08)
+    assert progress_of(sent) == [("running", 0), ("running", 100)]
+    assert sent[-1]["data"]["details"]["current"] == 1000
+
+    # 状态变化立即发送
+    await monitor.pause_task(task_id)
+    await monitor.finish_task(task_id, "done")
+    assert progress_of(sent)[-2:] == [("paused", 100), ("completed", 100)]
+    assert not monitor._flush_handles
+    await asyncio.sleep(0.08)
+    assert len(sent) == 4
+
+
+@pytest.mark.asyncio
+async def test_check_status_cancel(sent):
+    monitor = TaskMonitor()
+    task_id = await monitor.start_task("heal")
+    await monitor.check_status(task_id)
+    await monitor.cancel_task(task_id)
+    with pytest.raises(TaskCancelledException):
+        await monitor.check_status(task_id)
+    assert sent[-1]["data"]["state"] == "cancelling"
+    await monitor.error_task(task_id, "cancelled")
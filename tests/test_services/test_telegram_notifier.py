@@ -0,0 +1,113 @@
+import time
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import app.notifiers.telegram as telegram
+from app.utils.http_client import close_http_session
+from app.notifiers.telegram import TelegramNotifier
+
+IMAGE = b"\xff\xd8" + b"x" * 200_000
+
+
+@pytest.fixture
+async def bot_api(monkeypatch):
+    calls = []
+    state = {"throttle": 1}
+
+    async def api(request):
+        method = request.match_info["method"]
+        if request.content_type == "multipart/form-data":
+            form = await request.post()
+            body = {k: (v.file.read() if hasattr(v, "file") else v) for k, v in form.items()}
+        else:
+            body = await request.json() if request.can_read_body else {}
+        calls.append((method, body))
+
+        if method == "sendMessage" and state["throttle"]:
+            state["throttle"] -= 1
+            return web.json_response({"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                      "parameters": {"retry_after": 0.01}})
+        if method == "sendPhoto" and isinstance(body.get("photo"), str):
+            return web.json_response({"ok": False, "error_code": 400,
+                                      "description": "Bad Request: wrong file identifier/HTTP URL specified"})
+        if method == "getMe" and "bad" in request.match_info["token"]:
+            return web.json_response({"ok": False, "error_code": 401, "description": "Unauthorized"})
+        return web.json_response({"ok": True, "result": {}})
+
+    async def cover(request):
+        return web.Response(body=IMAGE, content_type="image/jpeg")
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api)
+    app.router.add_get("/cover.jpg", cover)
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(telegram, "API_BASE", str(server.make_url("")).rstrip("/"))
+    monkeypatch.setattr(telegram, "PRIVATE_CHAT_INTERVAL", 0.0)
+    yield calls, str(server.make_url("/cover.jpg"))
+    await close_http_session()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_send_message_retries_429_and_streams_photo(bot_api, tmp_path):
+    calls, cover_url = bot_api
+    notifier = TelegramNotifier(bot_token="t", chat_id="42")
+
+    await notifier.send_message("hello")
+    assert [c[0] for c in calls] == ["sendMessage", "sendMessage"]
+
+    # Telegram 抓不到封面 URL 时改为流式上传
+    await notifier.send_message("新歌", image_url=cover_url)
+    method, body = calls[-1]
+    assert method == "sendPhoto" and body["photo"] == IMAGE and body["caption"] == "新歌"
+
+    local = tmp_path / "cover.jpg"
+    local.write_bytes(IMAGE)
+    await notifier.send_photo(str(local))
+    assert calls[-1][1]["photo"] == IMAGE
+
+    assert await notifier.check_connectivity()
+    assert not await TelegramNotifier(bot_token="bad", chat_id="42").check_connectivity()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_group_chat():
+    limiter = telegram._ChatRateLimiter()
+    await limiter.acquire("-100")
+    start = time.monotonic()
+    limiter._next_allowed["-100"] = start + 0.05
+    await limiter.acquire("-100")
+    assert time.monotonic() - start >= 0.04
+    # 不同会话互不影响 (只受全局 30 条/秒限制)
+    start = time.monotonic()
+    await limiter.acquire("7")
+    assert time.monotonic() - start < 0.04
+
+
+@pytest.mark.asyncio
+async def test_site_relative_cover_paths(bot_api, tmp_path, monkeypatch):
+    calls, _ = bot_api
+    monkeypatch.setattr(telegram, "_upload_root", lambda: str(tmp_path))
+    (tmp_path / "covers").mkdir()
+    (tmp_path / "covers" / "x.jpg").write_bytes(IMAGE)
+    notifier = TelegramNotifier(bot_token="t", chat_id="42")
+    calls.clear()
+
+    # /uploads/... 解析为上传目录中的文件并上传
+    await notifier.send_message("有封面", image_url="/uploads/covers/x.jpg")
+    assert [c[0] for c in calls] == ["sendPhoto"]
+    assert calls[-1][1]["photo"] == IMAGE and calls[-1][1]["caption"] == "有封面"
+
+    # 无法解析的站内路径 / 越界路径: 只发文字
+    for cover in ("/uploads/covers/missing.jpg", "/api/discovery/cover?id=1", "/uploads/../secret.jpg"):
+        calls.clear()
+        await notifier.send_message("无封面", image_url=cover)
+        assert [(m, b["text"]) for m, b in calls if m == "sendMessage"][-1] == ("sendMessage", "无封面")
+        assert all(m == "sendMessage" for m, _ in calls)
+
+    # 图片发送失败时退回文字
+    calls.clear()
+    monkeypatch.setattr(TelegramNotifier, "_photo_form", lambda self, fields, photo: 1 / 0)
+    await notifier.send_message("上传失败", image_url="/uploads/covers/x.jpg")
+    assert calls[-1] == ("sendMessage", {"chat_id": "42", "text": "上传失败", "disable_web_page_preview": False})
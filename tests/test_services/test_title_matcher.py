@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+from app.services.title_matcher import TitleKey, TitleMatchIndex
+
+
+def _songs(*titles):
+    return [SimpleNamespace(title=t) for t in titles]
+
+
+def test_exact_match_preferred_over_earlier_fuzzy():
+    index = TitleMatchIndex(_songs("晴天 (Live)", "晴天"))
+    assert index.find("晴天").title == "晴天"
+    assert index.find("晴 天").title == "晴天"
+
+
+def test_remote_contained_in_local_rejects_original_for_variant():
+    index = TitleMatchIndex(_songs("七里香"))
+    assert index.find("七里香（Remaster）").title == "七里香"
+    # 本地是伴奏，远程是原版: 拒绝
+    assert index.find("七里香（伴奏）") is None
+
+    index = TitleMatchIndex(_songs("七里香", "七里香 (伴奏)"))
+    assert index.find("七里香 (伴奏) 版").title == "七里香 (伴奏)"
+
+
+def test_local_contained_in_remote_uses_first_candidate():
+    index = TitleMatchIndex(_songs("稻香", "夜曲 (Live)", "夜曲 - Remix"))
+    assert index.find("夜曲").title == "夜曲 (Live)"
+    assert index.find("夜") is None
+    assert index.find(TitleKey.of("不存在的歌")) is None
+
+
+def test_title_key_stripped():
+    assert TitleKey.of("告白气球 (Live)").stripped == "告白气球"
+    assert TitleKey.of("告白气球 (Live)").variant
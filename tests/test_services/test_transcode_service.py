@@ -0,0 +1,97 @@
+import os
+import shutil
+import subprocess
+import pytest
+from app.services.transcode_service import TranscodeService
+
+
+@pytest.fixture
+def transcoder(tmp_path):
+    return TranscodeService(cache_dir=str(tmp_path / "transcode"), max_cache_size=100, max_concurrent=1)
+
+
+def test_profiles_and_cache_key(transcoder, tmp_path):
+    profile = transcoder.get_profile("OPUS")
+    assert profile.media_type == "audio/ogg"
+    with pytest.raises(ValueError):
+        transcoder.get_profile("wav")
+    assert transcoder.clamp_bitrate(None) == 128
+    assert transcoder.clamp_bitrate(9999) == 320
+
+    source = tmp_path / "a.flac"
+    source.write_bytes(b"x")
+    key = transcoder.cache_path(str(source), os.stat(source), profile, 128)
+    assert key.endswith("_opus_128.ogg")
+    assert key != transcoder.cache_path(str(source), os.stat(source), profile, 96)
+
+    # 源文件变化后指纹变化
+    source.write_bytes(b"changed")
+    assert key != transcoder.cache_path(str(source), os.stat(source), profile, 128)
+
+
+def test_cache_lru_eviction(transcoder):
+    os.makedirs(transcoder.cache_dir)
+    paths = []
+    for i in range(3):
+        path = os.path.join(transcoder.cache_dir, f"{i}.ogg")
+        with open(path, "wb") as f:
+            f.write(b"x" * 40)
+        os.utime(path, (1000 + i, 1000 + i))
+        paths.append(path)
+    with open(os.path.join(transcoder.cache_dir, "3.ogg.tmp.part"), "wb") as f:
+        f.write(b"x" * 40)
+
+    # 命中刷新 mtime，最旧的 1.ogg 被淘汰
+    assert transcoder.lookup(paths[0]).st_size == 40
+    assert transcoder.lookup(paths[0] + ".missing") is None
+    transcoder.enforce_cache_limit()
+    assert [os.path.exists(p) for p in paths] == [True, False, True]
+    assert transcoder.stats()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="需要 ffmpeg")
+async def test_stream_writes_cache(transcoder, tmp_path):
+    source = tmp_path / "tone.wav"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=duration=1", str(source)], check=True
+    )
+    transcoder.max_cache_size = 10 * 1024 * 1024
+    profile = transcoder.get_profile("mp3")
+    cache_path = transcoder.cache_path(str(source), os.stat(source), profile, 64)
+
+    data = b"".join([chunk async for chunk in transcoder.stream(str(source), cache_path, profile, 64)])
+    assert data
+    with open(cache_path, "rb") as f:
+        assert f.read() == data
+    assert transcoder.stats()["completed"] == 1
+
+
+def test_default_cache_dir_follows_storage_cache_dir(monkeypatch):
+    from core.config_manager import get_config_manager
+    storage = {"cache_dir": "/audio_cache", "transcode_cache_dir": ""}
+    monkeypatch.setattr(get_config_manager(), "get", lambda key, default=None: storage if key == "storage" else default)
+    assert TranscodeService().cache_dir == os.path.join("/audio_cache", "transcode")
+
+    storage["transcode_cache_dir"] = "/data/transcode"
+    assert TranscodeService().cache_dir == "/data/transcode"
+
+
+@pytest.mark.asyncio
+async def test_stream_drains_noisy_stderr(transcoder, tmp_path, monkeypatch):
+    import asyncio
+    import sys
+    # 模拟 ffmpeg 先写出大量警告 (超过管道缓冲区) 再输出音频
+    script = "import sys; sys.stderr.write('w' * 500000); sys.stderr.flush(); sys.stdout.write('audio')"
+    monkeypatch.setattr(TranscodeService, "is_available", staticmethod(lambda: True))
+    monkeypatch.setattr(transcoder, "_command", lambda *args: [sys.executable, "-c", script])
+    transcoder.max_cache_size = 1024
+    profile = transcoder.get_profile("mp3")
+    cache_path = os.path.join(transcoder.cache_dir, "noisy.mp3")
+
+    async def consume():
+        return b"".join([chunk async for chunk in transcoder.stream("in.flac", cache_path, profile, 64)])
+
+    assert await asyncio.wait_for(consume(), timeout=10) == b"audio"
+    with open(cache_path, "rb") as f:
+        assert f.read() == b"audio"
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.models.artist import Artist
+from app.services.write_queue import WriteQueue
+
+
+@pytest.mark.asyncio
+async def test_write_queue_coalesces_and_isolates_failures(test_engine):
+    session_factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    queue = WriteQueue(session_factory, batch_size=10, latency_ms=20)
+
+    def add(name):
+        async def mutation(db):
+            db.add(Artist(name=name))
+            await db.flush()
+            return name
+        return mutation
+
+    async def broken(db):
+        db.add(Artist(name="队列-回滚"))
+        await db.flush()
+        raise ValueError("boom")
+
+    futures = [queue.submit_nowait(add(f"队列-{i}")) for i in range(3)]
+    futures.append(queue.submit_nowait(broken))
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    await queue.stop()
+
+    assert results[:3] == ["队列-0", "队列-1", "队列-2"]
+    assert isinstance(results[3], ValueError)
+
+    # 同一批次提交，失败的修改只回滚自己
+    stats = queue.stats()
+    assert stats["batches"] == 1
+    assert (stats["applied"], stats["failed"]) == (3, 1)
+
+    async with session_factory() as db:
+        names = (await db.execute(
+            select(Artist.name).where(Artist.name.like("队列-%"))
+        )).scalars().all()
+    assert sorted(names) == ["队列-0", "队列-1", "队列-2"]
+
+
+@pytest.mark.asyncio
+async def test_favorite_toggle_and_taken_changes_go_through_queue(db_session, write_queue):
+    from app.models.song import Song
+    from app.services.favorite_service import FavoriteService
+    from app.services.write_queue import take_changes, update_mutation
+
+    artist = Artist(name="队列-收藏歌手")
+    db_session.add(artist)
+    await db_session.flush()
+    song = Song(artist_id=artist.id, title="收藏", unique_key="queue-fav", status="PENDING")
+    db_session.add(song)
+    await db_session.commit()
+
+    result = await FavoriteService().toggle(db_session, song.id)
+    assert result["is_favorite"] is True
+    assert write_queue.stats()["applied"] == 1
+
+    # 读会话中的修改取出后不会被自动刷新，由队列按主键写入
+    song.album = "队列专辑"
+    changes = take_changes(song, ("title", "album"))
+    assert changes == {"album": "队列专辑"} and not db_session.is_modified(song)
+    await write_queue.submit(update_mutation(Song, {song.id: changes}))
+
+    row = (await db_session.execute(
+        select(Song.is_favorite, Song.album).where(Song.id == song.id)
+    )).one()
+    assert tuple(row) == (True, "队列专辑")
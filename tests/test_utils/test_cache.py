@@ -0,0 +1,103 @@
+import asyncio
+import time
+import pytest
+from app.utils import cache as cache_module
+from app.utils.cache import MemoryCache, DiskCache, TieredCache, NotFound, persistent_cache, _MISS
+
+
+def test_memory_cache_lru_eviction():
+    mem = MemoryCache(max_entries=2, max_bytes=1000)
+    expires = time.time() + 60
+    mem.set("a", 1, expires, 10)
+    mem.set("b", 2, expires, 10)
+    # Touch "a" so "b" becomes least recently used
+    assert mem.get("a") == 1
+    mem.set("c", 3, expires, 10)
+    assert mem.get("b") is _MISS
+    assert mem.get("a") == 1
+    assert mem.get("c") == 3
+
+
+def test_memory_cache_byte_budget_and_expiry():
+    mem = MemoryCache(max_entries=10, max_bytes=25)
+    mem.set("a", "x", time.time() + 60, 10)
+    mem.set("b", "y", time.time() + 60, 10)
+    mem.set("c", "z", time.time() + 60, 10)
+    assert mem.get("a") is _MISS
+    assert mem.stats()["bytes"] <= 25
+
+    mem.set("old", "v", time.time() - 1, 1)
+    assert mem.get("old") is _MISS
+
+
+def test_tiered_cache_negative_entries(tmp_path):
+    tiered = TieredCache(MemoryCache(), DiskCache(cache_dir=str(tmp_path)))
+    tiered.store("k", None, ttl=3600, negative_ttl=60, negative=True)
+    assert tiered.lookup("k", 3600, 60) is None
+
+    # Fresh memory tier: the negative entry is served from disk
+    cold = TieredCache(MemoryCache(), DiskCache(cache_dir=str(tmp_path)))
+    assert cold.lookup("k", 3600, 60) is None
+    # With negative caching disabled the entry is treated as expired
+    assert TieredCache(MemoryCache(), DiskCache(cache_dir=str(tmp_path))).lookup("k", 3600, 0) is _MISS
+
+
+@pytest.mark.asyncio
+async def test_persistent_cache_coalesces_concurrent_misses(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "api_cache", TieredCache(MemoryCache(), DiskCache(cache_dir=str(tmp_path))))
+    calls = []
+
+    @persistent_cache(namespace="test")
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return NotFound()
+
+    results = await asyncio.gather(*[fetch("song") for _ in range(5)])
+    assert results == [None] * 5
+    assert calls == ["song"]
+
+    # The explicit "not found" result is negatively cached
+    assert await fetch("song") is None
+    assert calls == ["song"]
+
+
+@pytest.mark.asyncio
+async def test_persistent_cache_skips_plain_empty_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "api_cache", TieredCache(MemoryCache(), DiskCache(cache_dir=str(tmp_path))))
+    calls = []
+
+    @persistent_cache(namespace="test")
+    async def fetch(key):
+        # 模拟捕获网络异常后返回 None
+        calls.append(key)
+        return None
+
+    assert await fetch("song") is None
+    assert await fetch("song") is None
+    assert calls == ["song", "song"]
+
+
+@pytest.mark.asyncio
+async def test_persistent_cache_waiters_survive_leader_cancellation(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "api_cache", TieredCache(MemoryCache(), DiskCache(str(tmp_path))))
+    calls = []
+    started = asyncio.Event()
+
+    @persistent_cache(namespace="test")
+    async def fetch(title):
+        calls.append(title)
+        started.set()
+        await asyncio.sleep(0.05)
+        return {"title": title}
+
+    leader = asyncio.create_task(fetch("song"))
+    await started.wait()
+    waiters = [asyncio.create_task(fetch("song")) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    # 其中一个等待者接替回源，其余共享结果
+    assert await asyncio.gather(*waiters) == [{"title": "song"}] * 3
+    assert leader.cancelled()
+    assert len(calls) == 2
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from core.database import SerializedWriter, create_db_engine
+
+
+@pytest.mark.asyncio
+async def test_engine_applies_pragmas_and_read_only_pool(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'tuning.db'}"
+    writer = create_db_engine(url)
+    reader = create_db_engine(url, read_only=True, pool_size=2)
+    try:
+        async with writer.begin() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+            await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            await conn.execute(text("INSERT INTO t (id) VALUES (1)"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT COUNT(*) FROM t"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t (id) VALUES (2)"))
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_serialized_writer_queues_writers(test_engine):
+    writer = SerializedWriter(sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    active = []
+    overlap = []
+
+    async def write():
+        async with writer.session():
+            overlap.append(len(active))
+            active.append(1)
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    await asyncio.gather(*(write() for _ in range(3)))
+
+    assert overlap == [0, 0, 0]
+    stats = writer.stats()
+    assert stats["acquired"] == 3
+    assert stats["contended"] == 2
+    assert stats["max_wait_ms"] > 0
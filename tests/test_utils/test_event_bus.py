@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from core.event_bus import EventBus, EventType
+
+
+@pytest.fixture
+def bus():
+    bus = EventBus()
+    yield bus
+    bus._subscribers.pop(EventType.SCAN_COMPLETE, None)
+    bus._metrics.pop(EventType.SCAN_COMPLETE, None)
+
+
+@pytest.mark.asyncio
+async def test_publish_does_not_wait_for_slow_subscriber(bus):
+    release = asyncio.Event()
+    received = []
+
+    async def slow(data):
+        await release.wait()
+        received.append(data)
+
+    bus.subscribe(EventType.SCAN_COMPLETE, slow, concurrency=1)
+    bus.subscribe(EventType.SCAN_COMPLETE, received.append)
+
+    await asyncio.wait_for(bus.publish(EventType.SCAN_COMPLETE, 1), 0.5)
+    await asyncio.sleep(0.01)
+    assert received == [1]
+    assert bus.stats()["events"]["scan_complete"]["queue_depth"] == 0
+
+    release.set()
+    await bus.drain(EventType.SCAN_COMPLETE)
+    assert received == [1, 1]
+    assert bus.stats()["events"]["scan_complete"]["delivered"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_dead_letter_and_backpressure(bus, monkeypatch):
+    attempts = []
+
+    async def flaky(data):
+        attempts.append(data)
+        if data == "bad" or len(attempts) == 1:
+            raise RuntimeError("boom")
+
+    bus.subscribe(EventType.SCAN_COMPLETE, flaky, max_retries=2, retry_delay=0)
+    await bus.publish(EventType.SCAN_COMPLETE, "ok")
+    await bus.publish(EventType.SCAN_COMPLETE, "bad")
+    await bus.drain(EventType.SCAN_COMPLETE)
+
+    assert attempts == ["ok", "ok", "bad", "bad", "bad"]
+    metrics = bus.stats()["events"]["scan_complete"]
+    assert (metrics["delivered"], metrics["failed"], metrics["retried"]) == (1, 1, 3)
+    assert bus.dead_letters[-1]["attempts"] == 3
+
+    # 队列满且超时: 发布者只等待 publish_timeout，事件进入死信
+    blocker = asyncio.Event()
+
+    async def stuck(data):
+        await blocker.wait()
+
+    bus._subscribers.pop(EventType.SCAN_COMPLETE)
+    bus.subscribe(EventType.SCAN_COMPLETE, stuck, queue_size=1)
+    monkeypatch.setattr("core.event_bus.DEFAULT_PUBLISH_TIMEOUT", 0.01)
+    for i in range(3):
+        await bus.publish(EventType.SCAN_COMPLETE, i)
+    assert bus.dead_letters[-1]["error"] == "queue full"
+    blocker.set()
+    await bus.drain(EventType.SCAN_COMPLETE)
@@ -0,0 +1,76 @@
+import os
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app.services.media_service import AudioPathCache
+from app.utils.file_response import conditional_file_response, parse_range
+
+CONTENT = bytes(range(256)) * 40  # 10240 字节
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/audio")
+    async def audio(request: Request):
+        return conditional_file_response(request, str(path), os.stat(path), media_type="audio/mpeg")
+
+    return TestClient(app)
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=500-5000", 1000) == (500, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+
+
+def test_range_and_conditional_requests(client):
+    full = client.get("/audio")
+    assert full.status_code == 200 and full.content == CONTENT
+    etag, last_modified = full.headers["etag"], full.headers["last-modified"]
+    assert full.headers["accept-ranges"] == "bytes"
+
+    part = client.get("/audio", headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.content == CONTENT[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    assert client.get("/audio", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/audio", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    # If-Range 匹配时按片段返回，不匹配时返回完整文件
+    assert client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    stale = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200 and stale.content == CONTENT
+
+    bad = client.get("/audio", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert bad.status_code == 416
+    assert bad.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_audio_path_cache_revalidates(tmp_path):
+    path = tmp_path / "a.flac"
+    path.write_bytes(b"x")
+    cache = AudioPathCache(max_entries=1)
+    cache.set("a.flac", str(path), os.stat(path))
+    assert cache.get("a.flac")[0] == str(path)
+
+    path.write_bytes(b"longer")
+    assert cache.get("a.flac")[1].st_size == 6
+
+    os.remove(path)
+    assert cache.get("a.flac") is None
+    assert cache.stats()["entries"] == 0
+
+    cache.set("a.flac", str(path), os.stat(tmp_path))
+    cache.set("b.flac", str(tmp_path), os.stat(tmp_path))
+    assert cache.stats()["entries"] == 1
+    cache.invalidate(str(tmp_path))
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,92 @@
+import pytest
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.models.artist import Artist
+from app.models.song import Song
+from app.pagination import InvalidCursorError
+from app.repositories.song import SongRepository
+from app.utils.counter_cache import CounterCache, counter_cache
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_match_offset_order(db_session):
+    artist = Artist(name="游标歌手")
+    db_session.add(artist)
+    await db_session.flush()
+    # 含并列与空值的发布时间
+    dates = [datetime(2024, 1, 1), datetime(2024, 1, 1), None, datetime(2023, 5, 1), None, datetime(2025, 2, 1), None]
+    db_session.add_all([
+        Song(artist_id=artist.id, title=f"游标{i}", unique_key=f"cursor-{i}", publish_time=d)
+        for i, d in enumerate(dates)
+    ])
+    await db_session.flush()
+
+    repo = SongRepository(db_session)
+    expected, total, _ = await repo.get_paginated(limit=100, artist_name="游标歌手")
+    assert total == len(dates)
+
+    seen, cursor = [], None
+    while True:
+        songs, _, cursor = await repo.get_paginated(limit=3, artist_name="游标歌手", cursor=cursor)
+        seen += songs
+        if not cursor:
+            break
+    assert [s.id for s in seen] == [s.id for s in expected]
+    # 空值排在最后
+    assert [s.publish_time for s in seen][-3:] == [None, None, None]
+
+    with pytest.raises(InvalidCursorError):
+        await repo.get_paginated(limit=3, cursor="not-a-cursor")
+    first_cursor = (await repo.get_paginated(limit=3, artist_name="游标歌手"))[2]
+    with pytest.raises(InvalidCursorError):
+        await repo.get_paginated(limit=3, sort_by="title", cursor=first_cursor)
+
+
+@pytest.mark.asyncio
+async def test_counter_cache_invalidated_on_commit(test_engine):
+    session_factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    key = ("test_counter",)
+    assert await counter_cache.get_or_compute(key, ("songs",), compute) == 1
+    assert await counter_cache.get_or_compute(key, ("songs",), compute) == 1
+
+    async with session_factory() as db:
+        artist = Artist(name="计数歌手")
+        db.add(artist)
+        await db.commit()
+    # 只写了 artists 表，songs 计数仍然命中
+    assert await counter_cache.get_or_compute(key, ("songs",), compute) == 1
+
+    async with session_factory() as db:
+        db.add(Song(artist_id=artist.id, title="计数", unique_key="counter-1"))
+        await db.commit()
+    assert await counter_cache.get_or_compute(key, ("songs",), compute) == 2
+
+
+@pytest.mark.asyncio
+async def test_counter_cache_is_bounded_and_drops_stale_entries():
+    cache = CounterCache(ttl=60, max_entries=2)
+
+    async def compute():
+        return 7
+
+    # 不同搜索词各占一条，超过上限时淘汰最久未使用的
+    for term in ("a", "b", "c"):
+        await cache.get_or_compute(("search", term), ("songs",), compute)
+    assert list(cache._entries) == [("search", "b"), ("search", "c")]
+    assert cache.stats()["evictions"] == 1
+
+    # 失效的条目在访问时删除 (统计期间又有写入时不写回)
+    async def racing_compute():
+        cache.invalidate("songs")
+        return 8
+
+    cache.invalidate("songs")
+    assert await cache.get_or_compute(("search", "b"), ("songs",), racing_compute) == 8
+    assert list(cache._entries) == [("search", "c")]
@@ -0,0 +1,95 @@
+"""
+查询计划回归测试
+
+执行各仓储 / 服务的热点查询，捕获实际发出的 SQL，再逐条运行 EXPLAIN QUERY PLAN，
+出现全表扫描 (SCAN <表> 且未使用索引) 即失败，防止索引被删除或查询写法退化。
+"""
+import re
+import pytest
+from sqlalchemy import event
+from app.models.base import Base
+from app.models.song import Song
+from app.models.media_record import MediaRecord
+from app.repositories.song import SongRepository
+from app.repositories.media_record import MediaRecordRepository
+from app.services.history_service import HistoryService
+from app.services.scan_service import ScanService
+from app.services.song_management_service import SongManagementService
+
+# 未使用索引的扫描只输出 "SCAN <表或别名>"；子查询物化结果 (anon_N) 不算
+FULL_SCAN = re.compile(r"SCAN (\w+?)(_\d+)?")
+
+
+def _is_full_scan(detail: str) -> bool:
+    m = FULL_SCAN.fullmatch(detail)
+    return bool(m) and m.group(1) in Base.metadata.tables
+
+
+async def _capture(test_engine, db_session, run):
+    """执行 run(db_session)，返回期间发出的 SELECT 语句及参数"""
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        await run(db_session)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", on_execute)
+    return captured
+
+
+async def _full_scans(db_session, captured):
+    conn = await db_session.connection()
+    scans = []
+    for statement, parameters in captured:
+        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+        scans += [(row[-1], statement) for row in rows if _is_full_scan(row[-1])]
+    return scans
+
+
+async def _song_repository_queries(db):
+    repo = SongRepository(db)
+    await repo.get_by_unique_key("netease", "123")
+    await repo.get_by_path("/music/a.flac")
+    await repo.get_by_title_artist("晴天", 1)
+    await repo.get_favorites()
+    await repo.get_by_artist(1)
+    await repo.get_paginated()
+    await repo.get_paginated(is_favorite=True)
+    await repo.get_duplicates_of([Song(dedup_key="晴天_周杰伦")])
+
+
+async def _media_record_queries(db):
+    repo = MediaRecordRepository(db)
+    await repo.get_by_unique_key("netease_1")
+    await repo.get_songs_paginated()
+    await repo.get_songs_paginated(order_by_publish_time=False)
+
+
+async def _service_queries(db):
+    from sqlalchemy import select
+    from app.models.song import SongSource
+
+    db.add(MediaRecord(unique_key="plan:1", source="netease", media_type="song", media_id="1", title="t"))
+    await db.flush()
+    await HistoryService().get_history(db)
+    await SongManagementService().get_local_songs_paginated(db, 0, 20, "created_at", "desc")
+    await db.execute(select(Song).where(Song.status == "PENDING").limit(50))
+
+    song = Song(artist_id=1, title="计划", unique_key="plan-song")
+    db.add(song)
+    await db.flush()
+    await ScanService()._create_song_source(db, song, "a.flac", "/music/a.flac", {})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("run", [_song_repository_queries, _media_record_queries, _service_queries])
+async def test_hot_queries_use_indexes(test_engine, db_session, run):
+    captured = await _capture(test_engine, db_session, run)
+    assert captured
+
+    scans = await _full_scans(db_session, captured)
+    assert scans == [], "\n".join(f"{detail}\n  {sql}" for detail, sql in scans)
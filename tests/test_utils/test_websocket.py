@@ -0,0 +1,120 @@
+import asyncio
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core.websocket import ConnectionManager, manager as global_manager
+
+
+class FakeWebSocket:
+    def __init__(self, block: bool = False, fail: bool = False):
+        self.sent = []
+        self.closed = False
+        self.block = block
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        if self.block:
+            await self.release.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+
+
+def progress(task_id, value):
+    return {"type": "task_progress", "data": {"taskId": task_id, "progress": value}}
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_others():
+    manager = ConnectionManager()
+    fast, slow = FakeWebSocket(), FakeWebSocket(block=True)
+    await manager.connect(fast)
+    await manager.connect(slow)
+
+    await manager.broadcast({"type": "notification", "message": "hi"})
+    for i in range(50):
+        await manager.broadcast(progress("t1", i))
+    await asyncio.sleep(0.01)
+
+    assert fast.sent[0]["type"] == "notification"
+    assert fast.sent[-1]["data"]["progress"] == 49
+
+    # 慢客户端卡在第一条上，排队中的进度被合并为最新一条
+    slow.release.set()
+    await asyncio.sleep(0.01)
+    assert [m["data"]["progress"] for m in slow.sent[1:]] == [49]
+    assert manager.stats()["coalesced"] >= 48
+    await manager.disconnect_all()
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_drops_oldest_and_evicts_dead_clients():
+    manager = ConnectionManager()
+    blocked, dead = FakeWebSocket(block=True), FakeWebSocket(fail=True)
+    await manager.connect(blocked)
+    await manager.connect(dead)
+    manager._clients[blocked].max_queue = 3
+
+    await manager.broadcast({"type": "log", "n": 0})
+    await asyncio.sleep(0.01)
+    for i in range(1, 10):
+        await manager.broadcast({"type": "log", "n": i})
+
+    assert manager.active_connections == [blocked]
+    assert dead.closed and manager.stats()["evicted"] == 1
+
+    blocked.release.set()
+    await asyncio.sleep(0.01)
+    assert [m["n"] for m in blocked.sent] == [0, 7, 8, 9]
+    assert manager.stats()["dropped"] == 6
+    await manager.disconnect_all()
+
+
+@pytest.mark.asyncio
+async def test_topic_subscriptions():
+    manager = ConnectionManager()
+    everything, artist_tab = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(everything)
+    await manager.connect(artist_tab, topics=["artist:5"])
+
+    await manager.broadcast({"type": "artist_progress", "artistId": "5", "progress": 10})
+    await manager.broadcast({"type": "artist_progress", "artistId": "6", "progress": 10})
+    await manager.broadcast({"type": "refresh_list", "artistId": "5"})
+    await manager.broadcast(progress("t1", 1))
+    await manager.broadcast({"type": "notification", "message": "hi"})
+    await asyncio.sleep(0.01)
+
+    assert len(everything.sent) == 5
+    assert [m["type"] for m in artist_tab.sent] == ["artist_progress", "refresh_list", "notification"]
+    assert manager.stats()["filtered"] == 2
+
+    manager.handle_client_message(artist_tab, json.dumps({"op": "subscribe", "topics": ["type:task_progress"]}))
+    manager.handle_client_message(artist_tab, "ping")
+    await manager.broadcast(progress("t2", 5))
+    await asyncio.sleep(0.01)
+    assert artist_tab.sent[-2]["type"] == "subscribed"
+    assert artist_tab.sent[-2]["topics"] == ["artist:5", "type:task_progress"]
+    assert artist_tab.sent[-1]["data"]["taskId"] == "t2"
+    await manager.disconnect_all()
+
+
+def test_ws_progress_route():
+    from app.routers import websocket as websocket_router
+    app = FastAPI()
+    app.include_router(websocket_router.router)
+
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/progress?topics=task:abc") as ws:
+            ws.send_text(json.dumps({"op": "encoding", "encoding": "json"}))
+            assert ws.receive_json()["topics"] == ["task:abc"]
+            client.portal.call(global_manager.broadcast, progress("other", 1))
+            client.portal.call(global_manager.broadcast, progress("abc", 2))
+            assert ws.receive_json()["data"]["taskId"] == "abc"